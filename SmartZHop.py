@@ -25,15 +25,20 @@ SMART Z-HOP COMPLETE FEATURES:
 Version: 2.0 Complete Integration Edition
 """
 
+import io
 import re
 import math
 import locale
+import threading
 from datetime import datetime
+from dataclasses import dataclass, fields
 
 # 조건부 Import: Cura 환경에서는 정상 Import, 독립 실행 시에는 Mock 클래스 사용
 try:
     from ..Script import Script
+    RUNNING_IN_CURA = True
 except (ImportError, ValueError):
+    RUNNING_IN_CURA = False
     # 독립 실행 환경을 위한 Mock Script 클래스
     class Script:
         def __init__(self):
@@ -60,7 +65,14 @@ except (ImportError, ValueError):
                 'slingshot_ascent_angle': 45.0,
                 'slingshot_descent_angle': 45.0,
                 'slingshot_angle_priority': False,
+                'slingshot_feature_policy': '',
+                'slingshot_height_map': False,
+                'slingshot_height_map_resolution': 1.0,
+                'hop_budget_mode': 'none',
+                'hop_budget_scope': 'job',
+                'hop_budget_value': 60.0,
                 'slingshot_z_feedrate': 15.0,  # Z축 속도
+                'adjust_print_time': True,
             }
             return mock_settings.get(key, None)
 
@@ -72,6 +84,7 @@ TRANSLATIONS = {
         'Enable Smart Z-Hop functionality': 'Smart Z-Hop 기능을 활성화/비활성화합니다. 체크하면 설정된 조건에 따라 Z-홉이 실행됩니다.',
         'Z-Hop Mode': 'Z-홉 모드',        'Select Z-Hop mode': 'Z-홉 알고리즘을 선택합니다: 전통적 (수직) 또는 스마트 (곡선)',        'Traditional': '전통적',
         'Slingshot': 'Smart Mode',
+        'Hybrid': '하이브리드',
         'Layer Change': '레이어 변경 시',
         'Z-Hop before layer change': '새 레이어로 이동하기 전에 Z-홉을 실행합니다. 레이어 경계에서 노즐과 프린트의 충돌을 방지합니다.',
         'Z-Hop Height': 'Z-홉 높이',
@@ -104,7 +117,9 @@ TRANSLATIONS = {
         'Ascent angle in degrees': '각도 기반 궤적에서 상승 각도를 도 단위로 설정합니다.',        'Descent Angle (Smart Mode)': '하강 각도',
         'Descent angle in degrees': '각도 기반 궤적에서 하강 각도를 도 단위로 설정합니다.',
         'Angle Priority (Smart Mode)': '각도 우선 모드',
-        'Prioritize angle over minimum height constraints': '최소 높이 제약보다 각도를 우선 적용합니다. 활성화 시 설정 각도를 보장하기 위해 필요한 높이로 자동 계산됩니다.'
+        'Prioritize angle over minimum height constraints': '최소 높이 제약보다 각도를 우선 적용합니다. 활성화 시 설정 각도를 보장하기 위해 필요한 높이로 자동 계산됩니다.',
+        'Update Print Time': '인쇄 시간 보정',
+        'Add the estimated Z-hop time to the print time markers': 'Z-홉으로 추가되는 예상 시간을 ;TIME:, ;TIME_ELAPSED:, M73 진행률 표시에 반영합니다.'
     },
     'en_US': {
         'Smart Z-Hop': 'Smart Z-Hop',
@@ -113,6 +128,7 @@ TRANSLATIONS = {
         'Z-Hop Mode': 'Z-Hop Mode',
         'Select Z-Hop mode': 'Select Z-Hop algorithm: Traditional (vertical) or Slingshot (curved)',        'Traditional': 'Traditional',
         'Slingshot': 'Smart Mode',
+        'Hybrid': 'Hybrid',
         'Layer Change': 'Layer Change',
         'Z-Hop before layer change': 'Execute Z-hop before moving to a new layer. Prevents nozzle collision with printed parts at layer boundaries.',
         'Z-Hop Height': 'Z-Hop Height',
@@ -145,7 +161,9 @@ TRANSLATIONS = {
         'Ascent angle in degrees': 'Ascent angle in degrees for angle-based trajectory calculation.',        'Descent Angle (Smart Mode)': 'Descent Angle',
         'Descent angle in degrees': 'Descent angle in degrees for angle-based trajectory calculation.',
         'Angle Priority (Smart Mode)': 'Angle Priority Mode',
-        'Prioritize angle over minimum height constraints': 'Prioritize angle over minimum height constraints. When enabled, calculates required height to guarantee set angles.'
+        'Prioritize angle over minimum height constraints': 'Prioritize angle over minimum height constraints. When enabled, calculates required height to guarantee set angles.',
+        'Update Print Time': 'Update Print Time',
+        'Add the estimated Z-hop time to the print time markers': 'Add the estimated time of inserted Z-hops to the ;TIME:, ;TIME_ELAPSED: and M73 progress markers.'
     }
 }
 
@@ -165,233 +183,671 @@ def i18n_catalog_i18nc(context, text, category=""):
         return TRANSLATIONS[lang][text]
     return text
 
-class SmartZHop(Script):
-    def __init__(self):
-        super().__init__()
-        self.original_z_max_feedrate = None  # 원본 Z축 최대 속도 저장
+# SETTING_3에서 찾지 못했을 때 사용하는 기계 한계값 (속도 mm/s, 가속도 mm/s², 접합 편차 mm)
+DEFAULT_MACHINE_LIMITS = {
+    'max_feedrate_x': 500.0,
+    'max_feedrate_y': 500.0,
+    'max_feedrate_z': 15.0,
+    'max_acceleration_x': 3000.0,
+    'max_acceleration_y': 3000.0,
+    'max_acceleration_z': 100.0,
+    'acceleration': 3000.0,
+    'junction_deviation': 0.013,  # Marlin 기본값: 구간 사이 코너 속도 계산용
+}
 
-    def getSettingDataString(self):
-        """완전한 설정 구조 반환 (V1 + V2 + Current 통합)"""
-        
-        return """{
-            "name": "%s",
-            "key": "SmartZHop",
-            "metadata": {},
-            "version": 2,
-            "settings": {
-                "enable": {
-                    "label": "%s",
-                    "description": "%s",
-                    "type": "bool",
-                    "default_value": true
-                },
-                "zhop_mode": {
-                    "label": "%s",
-                    "description": "%s",
-                    "type": "enum",
-                    "options": {
-                        "traditional": "%s",
-                        "slingshot": "%s"
-                    },
-                    "default_value": "traditional"
-                },
-                "layer_change_zhop": {
-                    "label": "%s",
-                    "description": "%s",
-                    "type": "bool",
-                    "default_value": true
-                },
-                "zhop_height_type": {
-                    "label": "%s",
-                    "description": "%s",
-                    "type": "enum",
-                    "options": {
-                        "layer_height": "%s",
-                        "custom": "%s"
-                    },
-                    "default_value": "custom"
-                },
-                "zhop_height": {
-                    "label": "  > %s",
-                    "description": "%s",
-                    "unit": "mm",
-                    "type": "float",
-                    "default_value": 0.2,
-                    "minimum_value": 0.0,
-                    "enabled": "zhop_height_type == 'custom'"
-                },
-                "travel_zhop": {
-                    "label": "%s",
-                    "description": "%s",
-                    "type": "bool",
-                    "default_value": true
-                },
-                "travel_distance": {
-                    "label": "  > %s",
-                    "description": "%s",
-                    "unit": "mm",
-                    "type": "float",
-                    "default_value": 1.0,
-                    "minimum_value": 0.0,
-                    "enabled": "travel_zhop"
-                },
-                "custom_layers": {
-                    "label": "  > %s",
-                    "description": "%s",
-                    "type": "str",
-                    "default_value": "",
-                    "enabled": "travel_zhop"
-                },
-                "top_bottom_only": {
-                    "label": "  > %s",
-                    "description": "%s",
-                    "type": "bool",
-                    "default_value": false,
-                    "enabled": "travel_zhop"
-                },
-                "zhop_speed": {
-                    "label": "%s",
-                    "description": "%s",
-                    "unit": "mm/s",
-                    "type": "float",
-                    "default_value": 0,
-                    "minimum_value": 0
-                },
-                "slingshot_min_zhop": {
-                    "label": "  > %s",
-                    "description": "%s",
-                    "unit": "mm",
-                    "type": "float",
-                    "default_value": 0.1,
-                    "minimum_value": 0.0,
-                    "enabled": "zhop_mode == 'slingshot'"
-                },
-                "slingshot_max_distance": {
-                    "label": "  > %s",
-                    "description": "%s",
-                    "unit": "mm",
-                    "type": "float",
-                    "default_value": 90.0,
-                    "minimum_value": 1.0,
-                    "enabled": "zhop_mode == 'slingshot'"
+# 분석 전용 모드의 travel 길이 히스토그램 구간 (라벨, 상한 mm)
+HOP_LENGTH_BUCKETS = (
+    ('<1mm', 1.0),
+    ('1-5mm', 5.0),
+    ('5-20mm', 20.0),
+    ('20-50mm', 50.0),
+    ('50-100mm', 100.0),
+    ('>=100mm', float('inf')),
+)
+
+# 인쇄 시간 표시 라인 (Cura 헤더/레이어 끝, M73 진행률)
+TIME_HEADER_PATTERN = re.compile(r'^;TIME:(\d+(?:\.\d+)?)', re.MULTILINE)
+TIME_ELAPSED_PATTERN = re.compile(r'^;TIME_ELAPSED:(\d+(?:\.\d+)?)', re.MULTILINE)
+M73_PATTERN = re.compile(r'^M73 (.*)$', re.MULTILINE)
+SETTING_3_LINE_PATTERN = re.compile(r'^;SETTING_3( [^\n]*)', re.MULTILINE)
+
+# Z 프로파일 분석: G 라인 파라미터/주석, Z-홉 높이 히스토그램 구간 (라벨, 상한 mm)
+GCODE_PARAM_PATTERN = re.compile(rb'([XYZE])([-+]?\d*\.?\d+)')
+GCODE_COMMENT_PATTERN = re.compile(rb';')
+Z_PROFILE_TOLERANCE = 0.001
+Z_PROFILE_HOP_BUCKETS = (
+    ('<0.1mm', 0.1),
+    ('0.1-0.2mm', 0.2),
+    ('0.2-0.4mm', 0.4),
+    ('0.4-0.8mm', 0.8),
+    ('0.8-1.6mm', 1.6),
+    ('>=1.6mm', float('inf')),
+)
+
+# 출력 검증: Z 변경/레이어 이벤트, XY 압출 라인, Smart Z-Hop M203 라인
+VALIDATOR_Z_EVENT_PATTERN = re.compile(rb'\n(?:G[0-3][^;\nZ]*Z([-+]?\d*\.?\d+)[^;\n]*|;LAYER:(-?\d+))')
+VALIDATOR_EXTRUSION_PATTERN = re.compile(rb'\nG[1-3] [^;\n]*?[XY][^;\n]*?E[-+]?[\d.]')
+VALIDATOR_M203_PATTERN = re.compile(rb'\nM203[^\n]*')
+
+# 스킵 스캔 엔진: travel 후보 라인 (E 값이 없는 G0/G1), 전통적 모드 이벤트 라인, 썸네일 base64 주석 블록
+SKIP_SCAN_TRAVEL_PATTERN = re.compile(r'^G[01](?: [^E\n]*(?:E(?![+-]?\.?\d)[^E\n]*)*|[^ \n][^\n]*)?$',
+                                      re.MULTILINE)
+TRADITIONAL_EVENT_PATTERN = re.compile(r'^(?:G0|[^\n]*;(?:LAYER:|MESH:NONMESH))[^\n]*', re.MULTILINE)
+SKIP_SCAN_THUMBNAIL_PATTERN = re.compile(r'^; thumbnail(?:_\w+)? begin.*?^; thumbnail(?:_\w+)? end[^\n]*',
+                                         re.MULTILINE | re.DOTALL)
+
+# getValue 축 값 (G 명령 뒤 마지막 key 숫자), 자주 쓰는 축은 미리 컴파일
+GCODE_VALUE_PATTERNS = {key: re.compile(rf'(?:G. .*){key}([+-]?\d*\.?\d+)') for key in 'XYZEF'}
+# "G0 ..." 형태 라인에서 getValue 값이 있는 축 (값 없이 존재 여부만 필요할 때 한 번에 확인)
+GCODE_AXIS_PRESENCE_PATTERN = re.compile(r'([XYZE])[+-]?\.?\d')
+
+# 레이어 마커 번호 (;LAYER:12, 래프트는 음수)
+LAYER_MARKER_PATTERN = re.compile(r';LAYER:(-?\d+)')
+
+# Cura 피처 타입 주석 (;TYPE:WALL-OUTER, ;TYPE:FILL 등)
+FEATURE_TYPE_PATTERN = re.compile(r'^;TYPE:([^\n]*)', re.MULTILINE)
+# 높이 맵에 반영할 라인 (스킵 스캔에서 라인 단위 엔진과 같은 G 라인만 순서대로 전달)
+HEIGHT_MAP_LINE_PATTERN = re.compile(r'^G[^\n]*', re.MULTILINE)
+# Z-홉 예산 점수: 도착 피처 타입별 가산점 (표면 품질에 보이는 흔적이 남는 피처일수록 높음)
+FEATURE_HOP_VALUES = {'WALL-OUTER': 1.0, 'SKIN': 0.75, 'WALL-INNER': 0.25}
+
+# travel 시퀀스 중간에 함께 옮겨도 되는 비이동 명령 (진행률, 팬, 가속도/저크, 속도/유량 배율, E 모드)
+CARRIED_COMMANDS = frozenset({'M73', 'M82', 'M83', 'M106', 'M107', 'M117', 'M204', 'M205', 'M220', 'M221'})
+
+# 확장자별 표준 라이브러리 압축 코덱 (독립 실행 도구의 입출력)
+COMPRESSION_CODECS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'lzma',
+    '.lzma': 'lzma',
+}
+
+# Prusa 바이너리 G-code (bgcode) 컨테이너 형식
+BGCODE_MAGIC = b'GCDE'
+BGCODE_VERSION = 1
+BGCODE_CHECKSUM_CRC32 = 1
+BGCODE_GCODE_BLOCK_SIZE = 64 * 1024
+BGCODE_METADATA_ENCODING_INI = 0
+BGCODE_BLOCK_TYPES = {
+    'file_metadata': 0,
+    'gcode': 1,
+    'slicer_metadata': 2,
+    'printer_metadata': 3,
+    'print_metadata': 4,
+    'thumbnail': 5,
+}
+BGCODE_COMPRESSION = {
+    'none': 0,
+    'deflate': 1,
+    'heatshrink_11_4': 2,
+    'heatshrink_12_4': 3,
+}
+BGCODE_GCODE_ENCODING = {
+    'none': 0,
+    'meatpack': 1,
+    'meatpack_comments': 2,
+}
+
+# MeatPack 4비트 문자 표 (no-spaces 모드: 11번 코드는 공백 대신 'E')
+MEATPACK_CHARACTERS = '0123456789.E\nGX'
+MEATPACK_CODES = {char: code for code, char in enumerate(MEATPACK_CHARACTERS)}
+MEATPACK_SIGNAL = b'\xff\xff'
+MEATPACK_ENABLE_PACKING = 251
+MEATPACK_DISABLE_PACKING = 250
+MEATPACK_RESET_ALL = 249
+MEATPACK_ENABLE_NO_SPACES = 247
+MEATPACK_DISABLE_NO_SPACES = 246
+
+def get_setting_data_string():
+    """완전한 설정 구조 반환 (V1 + V2 + Current 통합, Cura 설정 정의 JSON)"""
+    
+    return """{
+        "name": "%s",
+        "key": "SmartZHop",
+        "metadata": {},
+        "version": 2,
+        "settings": {
+            "enable": {
+                "label": "%s",
+                "description": "%s",
+                "type": "bool",
+                "default_value": true
+            },
+            "zhop_mode": {
+                "label": "%s",
+                "description": "%s",
+                "type": "enum",
+                "options": {
+                    "traditional": "%s",
+                    "slingshot": "%s",
+                    "hybrid": "%s"
                 },
-                "slingshot_trajectory_mode": {
-                    "label": "  > %s",
-                    "description": "%s",
-                    "type": "enum",
-                    "options": {
-                        "percentage": "%s",
-                        "angle": "%s"
-                    },
-                    "default_value": "percentage",
-                    "enabled": "zhop_mode == 'slingshot'"
+                "default_value": "traditional"
+            },
+            "layer_change_zhop": {
+                "label": "%s",
+                "description": "%s",
+                "type": "bool",
+                "default_value": true
+            },
+            "zhop_height_type": {
+                "label": "%s",
+                "description": "%s",
+                "type": "enum",
+                "options": {
+                    "layer_height": "%s",
+                    "custom": "%s"
                 },
-                "slingshot_ascent_ratio": {
-                    "label": "    > %s",
-                    "description": "%s",
-                    "unit": "%%",
-                    "type": "int",
-                    "default_value": 30,
-                    "minimum_value": 0,
-                    "maximum_value": 100,
-                    "enabled": "zhop_mode == 'slingshot' and slingshot_trajectory_mode == 'percentage'"
+                "default_value": "custom"
+            },
+            "zhop_height": {
+                "label": "  > %s",
+                "description": "%s",
+                "unit": "mm",
+                "type": "float",
+                "default_value": 0.2,
+                "minimum_value": 0.0,
+                "enabled": "zhop_height_type == 'custom'"
+            },
+            "travel_zhop": {
+                "label": "%s",
+                "description": "%s",
+                "type": "bool",
+                "default_value": true
+            },
+            "travel_distance": {
+                "label": "  > %s",
+                "description": "%s",
+                "unit": "mm",
+                "type": "float",
+                "default_value": 1.0,
+                "minimum_value": 0.0,
+                "enabled": "travel_zhop"
+            },
+            "custom_layers": {
+                "label": "  > %s",
+                "description": "%s",
+                "type": "str",
+                "default_value": "",
+                "enabled": "travel_zhop"
+            },
+            "top_bottom_only": {
+                "label": "  > %s",
+                "description": "%s",
+                "type": "bool",
+                "default_value": false,
+                "enabled": "travel_zhop"
+            },
+            "zhop_speed": {
+                "label": "%s",
+                "description": "%s",
+                "unit": "mm/s",
+                "type": "float",
+                "default_value": 0,
+                "minimum_value": 0
+            },
+            "slingshot_min_zhop": {
+                "label": "  > %s",
+                "description": "%s",
+                "unit": "mm",
+                "type": "float",
+                "default_value": 0.1,
+                "minimum_value": 0.0,
+                "enabled": "zhop_mode != 'traditional'"
+            },
+            "slingshot_max_distance": {
+                "label": "  > %s",
+                "description": "%s",
+                "unit": "mm",
+                "type": "float",
+                "default_value": 90.0,
+                "minimum_value": 1.0,
+                "enabled": "zhop_mode != 'traditional'"
+            },
+            "slingshot_trajectory_mode": {
+                "label": "  > %s",
+                "description": "%s",
+                "type": "enum",
+                "options": {
+                    "percentage": "%s",
+                    "angle": "%s"
                 },
-                "slingshot_descent_ratio": {
-                    "label": "    > %s",
-                    "description": "%s",
-                    "unit": "%%",
-                    "type": "int",
-                    "default_value": 30,
-                    "minimum_value": 0,
-                    "maximum_value": 100,
-                    "enabled": "zhop_mode == 'slingshot' and slingshot_trajectory_mode == 'percentage'"
+                "default_value": "percentage",
+                "enabled": "zhop_mode != 'traditional'"
+            },
+            "slingshot_ascent_ratio": {
+                "label": "    > %s",
+                "description": "%s",
+                "unit": "%%",
+                "type": "int",
+                "default_value": 30,
+                "minimum_value": 0,
+                "maximum_value": 100,
+                "enabled": "zhop_mode != 'traditional' and slingshot_trajectory_mode == 'percentage'"
+            },
+            "slingshot_descent_ratio": {
+                "label": "    > %s",
+                "description": "%s",
+                "unit": "%%",
+                "type": "int",
+                "default_value": 30,
+                "minimum_value": 0,
+                "maximum_value": 100,
+                "enabled": "zhop_mode != 'traditional' and slingshot_trajectory_mode == 'percentage'"
+            },
+            "slingshot_ascent_angle": {
+                "label": "    > %s",
+                "description": "%s",
+                "unit": "°",
+                "type": "float",
+                "default_value": 30.0,
+                "minimum_value": 1.0,
+                "maximum_value": 90.0,
+                "enabled": "zhop_mode != 'traditional' and slingshot_trajectory_mode == 'angle'"
+            },                "slingshot_descent_angle": {
+                "label": "    > %s",
+                "description": "%s",
+                "unit": "°",
+                "type": "float",
+                "default_value": 30.0,
+                "minimum_value": 1.0,
+                "maximum_value": 90.0,
+                "enabled": "zhop_mode != 'traditional' and slingshot_trajectory_mode == 'angle'"
+            },
+            "slingshot_angle_priority": {
+                "label": "    > %s",
+                "description": "%s",
+                "type": "bool",
+                "default_value": false,
+                "enabled": "zhop_mode != 'traditional' and slingshot_trajectory_mode == 'angle'"
+            },
+            "slingshot_feature_policy": {
+                "label": "  > %s",
+                "description": "%s",
+                "type": "str",
+                "default_value": "",
+                "enabled": "zhop_mode != 'traditional' and travel_zhop"
+            },
+            "slingshot_height_map": {
+                "label": "  > %s",
+                "description": "%s",
+                "type": "bool",
+                "default_value": false,
+                "enabled": "zhop_mode != 'traditional'"
+            },
+            "slingshot_height_map_resolution": {
+                "label": "    > %s",
+                "description": "%s",
+                "unit": "mm",
+                "type": "float",
+                "default_value": 1.0,
+                "minimum_value": 0.2,
+                "maximum_value": 10.0,
+                "enabled": "zhop_mode != 'traditional' and slingshot_height_map"
+            },
+            "hop_budget_mode": {
+                "label": "%s",
+                "description": "%s",
+                "type": "enum",
+                "options": {
+                    "none": "%s",
+                    "time": "%s",
+                    "count": "%s"
                 },
-                "slingshot_ascent_angle": {
-                    "label": "    > %s",
-                    "description": "%s",
-                    "unit": "°",
-                    "type": "float",
-                    "default_value": 30.0,
-                    "minimum_value": 1.0,
-                    "maximum_value": 90.0,
-                    "enabled": "zhop_mode == 'slingshot' and slingshot_trajectory_mode == 'angle'"
-                },                "slingshot_descent_angle": {
-                    "label": "    > %s",
-                    "description": "%s",
-                    "unit": "°",
-                    "type": "float",
-                    "default_value": 30.0,
-                    "minimum_value": 1.0,
-                    "maximum_value": 90.0,
-                    "enabled": "zhop_mode == 'slingshot' and slingshot_trajectory_mode == 'angle'"
+                "default_value": "none",
+                "enabled": "zhop_mode != 'traditional'"
+            },
+            "hop_budget_scope": {
+                "label": "  > %s",
+                "description": "%s",
+                "type": "enum",
+                "options": {
+                    "job": "%s",
+                    "layer": "%s"
                 },
-                "slingshot_angle_priority": {
-                    "label": "    > %s",
-                    "description": "%s",
-                    "type": "bool",
-                    "default_value": false,
-                    "enabled": "zhop_mode == 'slingshot' and slingshot_trajectory_mode == 'angle'"
-                }
+                "default_value": "job",
+                "enabled": "zhop_mode != 'traditional' and hop_budget_mode != 'none'"
+            },
+            "hop_budget_value": {
+                "label": "  > %s",
+                "description": "%s",
+                "type": "float",
+                "default_value": 60.0,
+                "minimum_value": 0.0,
+                "enabled": "zhop_mode != 'traditional' and hop_budget_mode != 'none'"
+            },
+            "adjust_print_time": {
+                "label": "%s",
+                "description": "%s",
+                "type": "bool",
+                "default_value": true
             }
-        }""" % (
-            i18n_catalog_i18nc("", "Smart Z-Hop"),
-            i18n_catalog_i18nc("", "Enable"),
-            i18n_catalog_i18nc("", "Enable Smart Z-Hop functionality"),
-            i18n_catalog_i18nc("", "Z-Hop Mode"),
-            i18n_catalog_i18nc("", "Select Z-Hop mode"),
-            i18n_catalog_i18nc("", "Traditional"),
-            i18n_catalog_i18nc("", "Slingshot"),
-            i18n_catalog_i18nc("", "Layer Change"),
-            i18n_catalog_i18nc("", "Z-Hop before layer change"),
-            i18n_catalog_i18nc("", "Z-Hop Height"),
-            i18n_catalog_i18nc("", "Select Z-Hop height"),
-            i18n_catalog_i18nc("", "Layer Height"),
-            i18n_catalog_i18nc("", "Custom Height"),
-            i18n_catalog_i18nc("", "Custom Height"),
-            i18n_catalog_i18nc("", "Custom Z-hop height value"),
-            i18n_catalog_i18nc("", "Travel"),
-            i18n_catalog_i18nc("", "Z-Hop before travel moves"),
-            i18n_catalog_i18nc("", "Travel Distance"),
-            i18n_catalog_i18nc("", "Apply Z-Hop only for moves longer than this distance"),
-            i18n_catalog_i18nc("", "Custom Layers"),
-            i18n_catalog_i18nc("", "Apply Travel Z-Hop only on specified layers"),
-            i18n_catalog_i18nc("", "Top/Bottom Only"),
-            i18n_catalog_i18nc("", "Apply Travel Z-Hop only on top/bottom layers"),
-            i18n_catalog_i18nc("", "Z-Hop Speed"),
-            i18n_catalog_i18nc("", "Z-axis speed limit for Z-hop movements (0 = unlimited)"),            i18n_catalog_i18nc("", "Min Z-Hop (Smart Mode)"),
-            i18n_catalog_i18nc("", "Minimum Z-hop height for slingshot mode"),
-            i18n_catalog_i18nc("", "Max Distance (Smart Mode)"),
-            i18n_catalog_i18nc("", "Maximum travel distance for height calculation"),
-            i18n_catalog_i18nc("", "Trajectory Mode (Smart Mode)"),
-            i18n_catalog_i18nc("", "Select trajectory calculation method"),
-            i18n_catalog_i18nc("", "Percentage"),
-            i18n_catalog_i18nc("", "Angle"),
-            i18n_catalog_i18nc("", "Ascent Ratio (Slingshot)"),
-            i18n_catalog_i18nc("", "Percentage of travel distance for ascent phase"),
-            i18n_catalog_i18nc("", "Descent Ratio (Slingshot)"),
-            i18n_catalog_i18nc("", "Percentage of travel distance for descent phase"),            i18n_catalog_i18nc("", "Ascent Angle (Smart Mode)"),
-            i18n_catalog_i18nc("", "Ascent angle in degrees"),            i18n_catalog_i18nc("", "Descent Angle (Smart Mode)"),            i18n_catalog_i18nc("", "Descent angle in degrees"),            i18n_catalog_i18nc("", "Angle Priority (Smart Mode)"),
-            i18n_catalog_i18nc("", "Prioritize angle over minimum height constraints")
-        )
+        }
+    }""" % (
+        i18n_catalog_i18nc("", "Smart Z-Hop"),
+        i18n_catalog_i18nc("", "Enable"),
+        i18n_catalog_i18nc("", "Enable Smart Z-Hop functionality"),
+        i18n_catalog_i18nc("", "Z-Hop Mode"),
+        i18n_catalog_i18nc("", "Select Z-Hop mode"),
+        i18n_catalog_i18nc("", "Traditional"),
+        i18n_catalog_i18nc("", "Slingshot"),
+        i18n_catalog_i18nc("", "Hybrid"),
+        i18n_catalog_i18nc("", "Layer Change"),
+        i18n_catalog_i18nc("", "Z-Hop before layer change"),
+        i18n_catalog_i18nc("", "Z-Hop Height"),
+        i18n_catalog_i18nc("", "Select Z-Hop height"),
+        i18n_catalog_i18nc("", "Layer Height"),
+        i18n_catalog_i18nc("", "Custom Height"),
+        i18n_catalog_i18nc("", "Custom Height"),
+        i18n_catalog_i18nc("", "Custom Z-hop height value"),
+        i18n_catalog_i18nc("", "Travel"),
+        i18n_catalog_i18nc("", "Z-Hop before travel moves"),
+        i18n_catalog_i18nc("", "Travel Distance"),
+        i18n_catalog_i18nc("", "Apply Z-Hop only for moves longer than this distance"),
+        i18n_catalog_i18nc("", "Custom Layers"),
+        i18n_catalog_i18nc("", "Apply Travel Z-Hop only on specified layers"),
+        i18n_catalog_i18nc("", "Top/Bottom Only"),
+        i18n_catalog_i18nc("", "Apply Travel Z-Hop only on top/bottom layers"),
+        i18n_catalog_i18nc("", "Z-Hop Speed"),
+        i18n_catalog_i18nc("", "Z-axis speed limit for Z-hop movements (0 = unlimited)"),            i18n_catalog_i18nc("", "Min Z-Hop (Smart Mode)"),
+        i18n_catalog_i18nc("", "Minimum Z-hop height for slingshot mode"),
+        i18n_catalog_i18nc("", "Max Distance (Smart Mode)"),
+        i18n_catalog_i18nc("", "Maximum travel distance for height calculation"),
+        i18n_catalog_i18nc("", "Trajectory Mode (Smart Mode)"),
+        i18n_catalog_i18nc("", "Select trajectory calculation method"),
+        i18n_catalog_i18nc("", "Percentage"),
+        i18n_catalog_i18nc("", "Angle"),
+        i18n_catalog_i18nc("", "Ascent Ratio (Slingshot)"),
+        i18n_catalog_i18nc("", "Percentage of travel distance for ascent phase"),
+        i18n_catalog_i18nc("", "Descent Ratio (Slingshot)"),
+        i18n_catalog_i18nc("", "Percentage of travel distance for descent phase"),            i18n_catalog_i18nc("", "Ascent Angle (Smart Mode)"),
+        i18n_catalog_i18nc("", "Ascent angle in degrees"),            i18n_catalog_i18nc("", "Descent Angle (Smart Mode)"),            i18n_catalog_i18nc("", "Descent angle in degrees"),            i18n_catalog_i18nc("", "Angle Priority (Smart Mode)"),
+        i18n_catalog_i18nc("", "Prioritize angle over minimum height constraints"),
+        i18n_catalog_i18nc("", "Feature Hop Policy (Smart Mode)"),
+        i18n_catalog_i18nc("", "Per feature type rules FROM>TO=ACTION separated by commas, first match wins (e.g. FILL>FILL=skip, *>SKIN=0.6). FROM/TO: Cura ;TYPE: name or *, ACTION: skip, hop, auto or hop height in mm"),
+        i18n_catalog_i18nc("", "Height Map Hop Height (Smart Mode)"),
+        i18n_catalog_i18nc("", "Lower each hop to the clearance actually needed over the printed area (current and previous layer) along its path. Z-Hop Height is kept above the tallest crossed surface; travels over empty areas use the minimum height"),
+        i18n_catalog_i18nc("", "Height Map Resolution"),
+        i18n_catalog_i18nc("", "Grid cell size of the height map. Smaller cells follow the printed area more closely but take longer to process"),
+        i18n_catalog_i18nc("", "Hop Budget (Smart Mode)"),
+        i18n_catalog_i18nc("", "Limit hops to a time or count budget. All travels are scored first (length, after retraction, crossing the printed area, destination feature type) and only the most valuable hops that fit the budget are kept. Layer change and feature policy hops are always kept. Not available when streaming"),
+        i18n_catalog_i18nc("", "None"),
+        i18n_catalog_i18nc("", "Added Time (s)"),
+        i18n_catalog_i18nc("", "Hop Count"),
+        i18n_catalog_i18nc("", "Budget Scope"),
+        i18n_catalog_i18nc("", "Apply the budget to the whole print or to each layer"),
+        i18n_catalog_i18nc("", "Whole Print"),
+        i18n_catalog_i18nc("", "Per Layer"),
+        i18n_catalog_i18nc("", "Budget"),
+        i18n_catalog_i18nc("", "Maximum added hop time in seconds or maximum number of hops, per scope"),
+        i18n_catalog_i18nc("", "Update Print Time"),
+        i18n_catalog_i18nc("", "Add the estimated Z-hop time to the print time markers")
+    )
+
+# 설정 정의 캐시 (get_setting_definitions가 처음 호출될 때 채움)
+_SETTING_DEFINITIONS = None
+
+def get_setting_definitions():
+    """설정 키 → Cura 설정 정의(type, default_value, options, minimum_value 등) 매핑"""
+    import json
+    global _SETTING_DEFINITIONS
+    if _SETTING_DEFINITIONS is None:
+        _SETTING_DEFINITIONS = json.loads(get_setting_data_string())['settings']
+    return _SETTING_DEFINITIONS
+
+def coerce_setting_value(key, value):
+    """설정값 하나를 정의에 맞게 변환/검증 (알 수 없는 키, 타입, 선택지, 범위 오류는 ValueError)"""
+    definitions = get_setting_definitions()
+    if key not in definitions:
+        raise ValueError(f"알 수 없는 설정 키: {key}")
+    definition = definitions[key]
+    setting_type = definition['type']
+    
+    if isinstance(value, str) and setting_type not in ('str', 'enum'):
+        try:
+            value = parse_setting_value(value, setting_type)
+        except ValueError:
+            raise ValueError(f"{key}: {setting_type} 값이 아닙니다: {value!r}")
+    
+    if setting_type == 'bool':
+        if not isinstance(value, (bool, int)):
+            raise ValueError(f"{key}: bool 값이 아닙니다: {value!r}")
+        return bool(value)
+    if setting_type in ('int', 'float'):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{key}: {setting_type} 값이 아닙니다: {value!r}")
+        value = int(value) if setting_type == 'int' else float(value)
+        if 'minimum_value' in definition and value < definition['minimum_value']:
+            raise ValueError(f"{key}: 최소값 {definition['minimum_value']}보다 작습니다: {value}")
+        if 'maximum_value' in definition and value > definition['maximum_value']:
+            raise ValueError(f"{key}: 최대값 {definition['maximum_value']}보다 큽니다: {value}")
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f"{key}: 문자열 값이 아닙니다: {value!r}")
+    if setting_type == 'enum' and value not in definition['options']:
+        raise ValueError(f"{key}: 허용되지 않는 값입니다: {value!r} (선택지: {', '.join(definition['options'])})")
+    return value
+
+@dataclass(frozen=True)
+class ZHopSettings:
+    """검증된 불변 Z-홉 설정 (기본값은 Cura 설정 정의의 default_value)
+
+    한 번 만들어지면 바뀌지 않으므로 워커 프로세스로 전달하거나 캐시 키로 사용 가능.
+    생성 시 모든 값을 설정 정의에 맞게 변환/검증 (dataclasses.replace로 만든 사본도 동일).
+    """
+    enable: bool = True
+    zhop_mode: str = 'traditional'
+    layer_change_zhop: bool = True
+    zhop_height_type: str = 'custom'
+    zhop_height: float = 0.2
+    travel_zhop: bool = True
+    travel_distance: float = 1.0
+    custom_layers: str = ''
+    top_bottom_only: bool = False
+    zhop_speed: float = 0.0
+    slingshot_min_zhop: float = 0.1
+    slingshot_max_distance: float = 90.0
+    slingshot_trajectory_mode: str = 'percentage'
+    slingshot_ascent_ratio: int = 30
+    slingshot_descent_ratio: int = 30
+    slingshot_ascent_angle: float = 30.0
+    slingshot_descent_angle: float = 30.0
+    slingshot_angle_priority: bool = False
+    slingshot_feature_policy: str = ''
+    slingshot_height_map: bool = False
+    slingshot_height_map_resolution: float = 1.0
+    hop_budget_mode: str = 'none'
+    hop_budget_scope: str = 'job'
+    hop_budget_value: float = 60.0
+    adjust_print_time: bool = True
+
+    def __post_init__(self):
+        for field in fields(self):
+            object.__setattr__(self, field.name, coerce_setting_value(field.name, getattr(self, field.name)))
+
+    @classmethod
+    def from_dict(cls, values):
+        """설정 딕셔너리(JSON/YAML, 문자열 값 허용) → 설정 객체 (없는 키는 기본값)"""
+        known = {field.name for field in fields(cls)}
+        for key in values:
+            if key not in known:
+                raise ValueError(f"알 수 없는 설정 키: {key}")
+        return cls(**values)
+
+    @classmethod
+    def from_script(cls, script):
+        """getSettingValueByKey를 가진 객체(Cura Script)에서 설정 객체 생성 (값이 없으면 기본값)"""
+        values = {}
+        for field in fields(cls):
+            value = script.getSettingValueByKey(field.name)
+            if value is not None:
+                values[field.name] = value
+        return cls(**values)
+
+    def to_dict(self):
+        """설정 키 → 값 딕셔너리"""
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+class HeightMap:
+    """압출 이동으로 만든 레이어별 점유 격자 (현재 레이어 + 이전 레이어)
+
+    격자 칸마다 그 칸을 지난 압출의 최고 Z를 기록하고, travel 경로가 지나는 칸의
+    최고 Z로 실제로 필요한 Z-홉 높이를 계산 (노즐 폭/격자 오차는 주변 한 칸까지 포함해 보정)
+    """
+    def __init__(self, cell_size=1.0):
+        self.cell_size = cell_size
+        self.current = {}  # (칸 X, 칸 Y) → 최고 Z
+        self.previous = {}
+        self.x, self.y, self.z = 0.0, 0.0, 0.0
+
+    def new_layer(self):
+        """레이어 시작: 현재 레이어 격자를 이전 레이어로 넘김 (그 전 레이어는 버림)"""
+        self.previous = self.current
+        self.current = {}
+
+    def cells_along(self, x0, y0, x1, y1):
+        """선분을 칸 크기 절반 간격으로 샘플링한 칸 좌표"""
+        steps = max(1, int(math.hypot(x1 - x0, y1 - y0) * 2 / self.cell_size))
+        for step in range(steps + 1):
+            ratio = step / steps
+            yield (math.floor((x0 + (x1 - x0) * ratio) / self.cell_size),
+                   math.floor((y0 + (y1 - y0) * ratio) / self.cell_size))
+
+    def move(self, x, y, z, extruding):
+        """G 라인 하나 반영: 위치 갱신, XY 압출 이동이면 지난 칸에 높이 기록"""
+        new_x = self.x if x is None else x
+        new_y = self.y if y is None else y
+        new_z = self.z if z is None else z
+        if extruding and (x is not None or y is not None):
+            for cell in self.cells_along(self.x, self.y, new_x, new_y):
+                if self.current.get(cell, -math.inf) < new_z:
+                    self.current[cell] = new_z
+        self.x, self.y, self.z = new_x, new_y, new_z
+
+    def path_top(self, start_x, start_y, travel_moves):
+        """travel 경로 주변 칸의 최고 Z (인쇄된 영역을 지나지 않으면 None)
+
+        출발/도착 지점 주변 칸은 제외 (방금 압출을 끝낸 선, 다음 압출이 시작되는 곳)
+        """
+        top = None
+        checked = set()
+        for x, y in ((start_x, start_y), (travel_moves[-1]['target_x'], travel_moves[-1]['target_y'])):
+            cell_x, cell_y = math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+            checked.update((cell_x + dx, cell_y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+        x, y = start_x, start_y
+        for move in travel_moves:
+            for cell_x, cell_y in self.cells_along(x, y, move['target_x'], move['target_y']):
+                for cell in ((cell_x + dx, cell_y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+                    if cell in checked:
+                        continue
+                    checked.add(cell)
+                    for grid in (self.current, self.previous):
+                        if cell in grid and (top is None or grid[cell] > top):
+                            top = grid[cell]
+            x, y = move['target_x'], move['target_y']
+        return top
+
+class ZHopEngine:
+    """Cura에 의존하지 않는 Z-홉 처리 엔진
+
+    설정은 불변 ZHopSettings 하나로만 받으므로 pickle로 워커 프로세스에 보낼 수 있고,
+    같은 설정의 엔진은 같은 값/해시를 가짐 (설정별 결과 캐시 키로 사용 가능).
+    """
+    def __init__(self, settings=None):
+        self.settings = settings if settings is not None else ZHopSettings()
+        self.original_z_max_feedrate = None  # 원본 Z축 최대 속도 저장
+        self.machine_limits = None  # 시간 추정용 기계 한계값
+        self.current_layer_index = 0  # 현재 처리 중인 레이어 (시간 통계용)
+        self.dry_run = False  # 분석 전용 모드 (G-code 생성 생략)
+        self.skip_scan = True  # travel 구간만 파싱하는 스킵 스캔 엔진 사용 (False: 라인 단위 엔진)
+        self.hop_budget_candidates = None  # Z-홉 예산 1단계에서 모으는 후보 목록
+        self.hop_budget_selection = None  # Z-홉 예산으로 선택된 travel 시퀀스 번호 집합 (None: 제한 없음)
+        # 처리가 끝난 레이어로 입력 data[i]를 바로 덮어쓰기 (최대 메모리 절감, 사용자가 켜야 함)
+        # 주의: 처리 중 오류가 나면 data는 앞쪽 레이어만 처리된 상태로 남으므로
+        # 실패 시 입력을 다시 쓰지 않는 호출자(예: process_file)만 사용
+        self.in_place = False
+        self.reset_print_time_stats()
+        self.reset_dry_run_stats()
+
+    def __eq__(self, other):
+        if not isinstance(other, ZHopEngine):
+            return NotImplemented
+        return type(self) is type(other) and self.settings == other.settings
+
+    def __hash__(self):
+        return hash((type(self).__name__, self.settings))
 
     def execute(self, data):
-        if not self.getSettingValueByKey("enable"):
+        if not self.settings.enable:
             return data
+        if self.settings.zhop_mode not in ("slingshot", "traditional", "hybrid"):
+            return data # off or unknown mode
+
+        if self.in_place:
+            # 입력 레이어를 처리 결과로 바로 교체하여 원본/결과 목록을 동시에 유지하지 않음
+            # (실행 설정 해석/검증은 첫 레이어가 나오기 전에 끝나므로 설정 오류로는 data가 바뀌지 않음)
+            for layer_index, layer in enumerate(self.iter_execute(data)):
+                data[layer_index] = layer
+            processed_data = data
+        else:
+            processed_data = list(self.iter_execute(data))
+
+        if self.dry_run:
+            return processed_data
+        if self.print_time_stats['hops'] > 0:
+            self.report_print_time_stats()
+            if self.settings.adjust_print_time:
+                processed_data = self.apply_print_time_delta(processed_data)  # execute가 소유한 목록
+        return processed_data
+
+    def iter_execute(self, data):
+        """레이어 단위로 처리 결과를 내보내는 제너레이터 (스트리밍 출력용, 시간 표시 보정 없음)"""
+        if not self.settings.enable:
+            yield from data
+            return
 
         # 첫 실행 시 원본 Z축 속도 파싱
         if self.original_z_max_feedrate is None:
             self.parse_original_z_feedrate(data)
+        if self.machine_limits is None:
+            self.parse_machine_limits(data)
+        self.reset_print_time_stats()
+        self.reset_dry_run_stats()
 
-        zhop_mode = self.getSettingValueByKey("zhop_mode")
+        run = self.resolve_run_settings(data[0] if len(data) > 0 else "")
+        # 대상 레이어는 레이어 문자열 첫 줄의 ;LAYER: 번호로 미리 결정
+        travel_layers = self.resolve_travel_layers(run['custom_layer_list'], run['top_bottom_only'],
+                                                   (self.layer_number(layer) for layer in data))
 
-        layer_change_zhop = self.getSettingValueByKey("layer_change_zhop")
-        zhop_height_type = self.getSettingValueByKey("zhop_height_type") # Needed for current_layer_height
-        zhop_height_setting = self.getSettingValueByKey("zhop_height") # Actual custom zhop height
-        travel_zhop = self.getSettingValueByKey("travel_zhop")
-        travel_distance_setting = self.getSettingValueByKey("travel_distance")
-        custom_layers = self.getSettingValueByKey("custom_layers")
-        top_bottom_only = self.getSettingValueByKey("top_bottom_only")
-        zhop_speed = self.getSettingValueByKey("zhop_speed")        # Determine current_layer_height for zhop_height_type == "layer_height"
+        self.hop_budget_selection = None
+        if run['zhop_mode'] in ("slingshot", "hybrid"):
+            slingshot_engine = self.iter_slingshot_skip_scan if self.skip_scan else self.iter_slingshot_mode
+            engine_args = (data, run['zhop_height'], run['zhop_speed'], run['layer_change_zhop'],
+                           run['travel_zhop'], run['travel_distance'], travel_layers, run['slingshot_settings'])
+            if run['slingshot_settings']['hop_budget']:
+                self.plan_hop_budget(slingshot_engine, engine_args, run['slingshot_settings']['hop_budget'])
+            yield from slingshot_engine(*engine_args)
+            if run['zhop_mode'] == "hybrid":
+                self.report_hybrid_choices()
+        elif run['zhop_mode'] == "traditional":
+            traditional_engine = self.iter_traditional_skip_scan if self.skip_scan else self.iter_traditional_mode
+            yield from traditional_engine(data, run['zhop_height'], run['zhop_speed'], run['layer_change_zhop'],
+                                          run['travel_zhop'], run['travel_distance'], travel_layers)
+        else: # off or unknown mode
+            yield from data
+
+    def resolve_run_settings(self, first_layer_gcode):
+        """실행 설정 해석: 모드, 유효 Z-홉 높이, 지정 레이어 목록, 스마트 모드 설정"""
+        zhop_mode = self.settings.zhop_mode
+
+        layer_change_zhop = self.settings.layer_change_zhop
+        zhop_height_type = self.settings.zhop_height_type # Needed for current_layer_height
+        zhop_height_setting = self.settings.zhop_height # Actual custom zhop height
+        travel_zhop = self.settings.travel_zhop
+        travel_distance_setting = self.settings.travel_distance
+        custom_layers = self.settings.custom_layers
+        top_bottom_only = self.settings.top_bottom_only
+        zhop_speed = self.settings.zhop_speed        # Determine current_layer_height for zhop_height_type == "layer_height"
         # This might need to be determined per layer if it can change,
         # or use a typical/first layer height if used as a general value.
         # For now, using zhop_height_setting as a fallback or if type is custom.
@@ -399,7 +855,6 @@ class SmartZHop(Script):
 
         if zhop_height_type == "layer_height":
             # Try to get it from gcode, very simplified, might need a more robust way
-            first_layer_gcode = data[0] if len(data) > 0 else ""
             lh = self.get_layer_height_from_gcode([first_layer_gcode]) # Pass as list
             if lh > 0:
                 effective_zhop_height = lh
@@ -409,61 +864,488 @@ class SmartZHop(Script):
         custom_layer_list = []
         if custom_layers:
             try:
-                custom_layer_list = [int(x.strip()) for x in custom_layers.split(',') if x.strip()]
+                custom_layer_list = [int(x) for x in re.split(r'[,\s]+', custom_layers) if x]
             except ValueError:
                 # Log error or handle incorrect custom_layers format
                 pass # Keep custom_layer_list empty
 
-        if zhop_mode == "slingshot":
+        slingshot_settings = None
+        if zhop_mode in ("slingshot", "hybrid"):
+            # 하이브리드: 스마트 모드 엔진으로 처리하되 시퀀스마다 전통적 수직 Z-홉과 시간 비교
             slingshot_settings = {
-                'min_zhop': self.getSettingValueByKey("slingshot_min_zhop"),
-                'max_distance': self.getSettingValueByKey("slingshot_max_distance"), # Renamed from slingshot_max_zhop_distance
-                'trajectory_mode': self.getSettingValueByKey("slingshot_trajectory_mode"),
-                'ascent_ratio': self.getSettingValueByKey("slingshot_ascent_ratio"),
-                'descent_ratio': self.getSettingValueByKey("slingshot_descent_ratio"),
-                'ascent_angle': self.getSettingValueByKey("slingshot_ascent_angle"),
-                'descent_angle': self.getSettingValueByKey("slingshot_descent_angle"),
-                'angle_priority': self.getSettingValueByKey("slingshot_angle_priority"),
+                'hybrid': zhop_mode == "hybrid",
+                'min_zhop': self.settings.slingshot_min_zhop,
+                'max_distance': self.settings.slingshot_max_distance, # Renamed from slingshot_max_zhop_distance
+                'trajectory_mode': self.settings.slingshot_trajectory_mode,
+                'ascent_ratio': self.settings.slingshot_ascent_ratio,
+                'descent_ratio': self.settings.slingshot_descent_ratio,
+                'ascent_angle': self.settings.slingshot_ascent_angle,
+                'descent_angle': self.settings.slingshot_descent_angle,
+                'angle_priority': self.settings.slingshot_angle_priority,
+                'feature_policy': self.parse_feature_policy(self.settings.slingshot_feature_policy),
+                'height_map': self.settings.slingshot_height_map,
+                'height_map_resolution': self.settings.slingshot_height_map_resolution,
+                'hop_budget': None,
             }
-            return self.execute_slingshot_mode(data, effective_zhop_height, zhop_speed, layer_change_zhop,
-                                                travel_zhop, travel_distance_setting, custom_layer_list, 
-                                                top_bottom_only, slingshot_settings)
-        elif zhop_mode == "traditional":
-            return self.execute_traditional_mode(data, effective_zhop_height, zhop_speed, layer_change_zhop,
-                                               travel_zhop, travel_distance_setting, custom_layer_list, top_bottom_only)
-        else: # off or unknown mode
-            return data
+            if self.settings.hop_budget_mode != 'none':
+                slingshot_settings['hop_budget'] = {'mode': self.settings.hop_budget_mode,
+                                                    'scope': self.settings.hop_budget_scope,
+                                                    'value': self.settings.hop_budget_value}
 
-    def parse_original_z_feedrate(self, data):
-        """G-code에서 원본 Z축 최대 속도 파싱 (단순 병합 처리)"""
+        return {
+            'zhop_mode': zhop_mode,
+            'zhop_height': effective_zhop_height,
+            'zhop_speed': zhop_speed,
+            'layer_change_zhop': layer_change_zhop,
+            'travel_zhop': travel_zhop,
+            'travel_distance': travel_distance_setting,
+            'custom_layer_list': custom_layer_list,
+            'top_bottom_only': top_bottom_only,
+            'slingshot_settings': slingshot_settings,
+        }
+
+    def parse_feature_policy(self, text):
+        """피처 타입 정책 문자열 → ((출발 타입, 도착 타입, 동작), ...) 규칙 튜플 (잘못된 규칙은 경고 후 무시)
+
+        규칙 'FROM>TO=ACTION' (쉼표/세미콜론/줄바꿈 구분, 먼저 일치한 규칙 적용)
+        - FROM/TO: Cura ;TYPE: 이름 (대소문자 무시) 또는 * (모든 타입, 타입 없음 포함)
+        - ACTION: skip(Z-홉 안 함), hop(항상 Z-홉), auto(거리/리트랙션 판단), 숫자(이 높이로 항상 Z-홉, mm)
+        """
+        rules = []
+        for rule in re.split(r'[,;\n]+', text):
+            if not rule.strip():
+                continue
+            match = re.fullmatch(r'\s*([^>=\s]+)\s*>\s*([^>=\s]+)\s*=\s*(\S+)\s*', rule)
+            action = match.group(3).lower() if match else None
+            if action is not None and action not in ('skip', 'hop', 'auto'):
+                try:
+                    action = float(action)
+                except ValueError:
+                    action = None
+                if action is not None and action <= 0:
+                    action = None
+            if action is None:
+                print(f"⚠️ 피처 타입 정책 규칙 무시: {rule.strip()!r}")
+                continue
+            rules.append((match.group(1).upper(), match.group(2).upper(), action))
+        return tuple(rules)
+
+    def resolve_feature_action(self, policy, source_type, destination_type):
+        """출발/도착 피처 타입에 먼저 일치하는 정책 규칙의 동작 (없으면 'auto')"""
+        source_type = source_type.upper() if source_type else None
+        destination_type = destination_type.upper() if destination_type else None
+        for rule_source, rule_destination, action in policy:
+            if rule_source in ('*', source_type) and rule_destination in ('*', destination_type):
+                return action
+        return 'auto'
+
+    def find_feature_markers(self, text):
+        """레이어 안 ;TYPE: 마커 → (위치 목록, 타입 목록)"""
+        positions, types = [], []
+        for match in FEATURE_TYPE_PATTERN.finditer(text):
+            positions.append(match.start())
+            types.append(match.group(1).strip())
+        return positions, types
+
+    def feature_type_at(self, markers, position, start_type):
+        """position 앞 마지막 ;TYPE: 값 (레이어 안에 없으면 레이어 시작 시점 타입)"""
+        import bisect
+        index = bisect.bisect_left(markers[0], position)
+        return markers[1][index - 1] if index > 0 else start_type
+
+    def find_feature_types(self, text, sequence_start, sequence_end, markers, start_type):
+        """travel 시퀀스가 떠나는/들어가는 영역의 피처 타입 → (출발, 도착)
+
+        출발: 시퀀스 앞 마지막 이동 라인 시점 (없으면 레이어 시작), 도착: 시퀀스 뒤 첫 이동 라인 시점 (없으면 레이어 끝)
+        → travel 앞뒤 어느 쪽에 ;TYPE: 주석이 있어도 같은 결과
+        """
+        before = self.find_previous_motion_line(text, sequence_start)
+        after = self.find_next_motion_line(text, sequence_end)
+        return (self.feature_type_at(markers, before[0] if before else 0, start_type),
+                self.feature_type_at(markers, after[0] if after else len(text), start_type))
+
+    def parse_layer_marker(self, line):
+        """;LAYER: 마커가 있는 라인의 레이어 번호 (없으면 None)"""
+        match = LAYER_MARKER_PATTERN.search(line)
+        return int(match.group(1)) if match else None
+
+    def layer_number(self, layer_gcode):
+        """레이어 문자열이 ;LAYER: 마커로 시작하면 그 번호 (첫 줄만 확인, 아니면 None)"""
+        match = LAYER_MARKER_PATTERN.match(layer_gcode)
+        return int(match.group(1)) if match else None
+
+    def resolve_travel_layers(self, custom_layer_list, top_bottom_only, layer_numbers):
+        """travel Z-홉 대상 ;LAYER: 번호 집합 (None이면 모든 레이어)
+
+        - custom_layer_list: 1부터 세는 레이어 번호 (1 = ;LAYER:0), top_bottom_only보다 우선
+        - top_bottom_only: layer_numbers(레이어 마커 번호들)의 처음/마지막 레이어
+        """
+        if custom_layer_list:
+            return frozenset(number - 1 for number in custom_layer_list)
+        if top_bottom_only:
+            numbers = [number for number in layer_numbers if number is not None]
+            return frozenset((min(numbers), max(numbers))) if numbers else frozenset()
+        return None
+
+    def resolve_stream_travel_layers(self, run, first_layer_number, layer_count):
+        """스트림 처리의 대상 레이어 집합 (첫 ;LAYER: 번호와 ;LAYER_COUNT: 헤더 기준)"""
+        if run['top_bottom_only'] and not run['custom_layer_list'] and layer_count is None:
+            raise ValueError("top_bottom_only 스트리밍 처리에는 ;LAYER_COUNT: 헤더가 필요합니다")
+        layer_numbers = ()
+        if layer_count is not None and first_layer_number is not None:
+            layer_numbers = (first_layer_number, first_layer_number + layer_count - 1)
+        return self.resolve_travel_layers(run['custom_layer_list'], run['top_bottom_only'], layer_numbers)
+
+    def iter_process_lines(self, lines):
+        """G-code 라인 스트림 → 출력 라인 제너레이터 (작업 전체를 메모리에 올리지 않음)
+
+        📡 파이프라인 연결용: 현재 travel 시퀀스(전통적 모드는 레이어 끝 공백 라인)만 버퍼링.
+        - 입력 라인 끝의 줄바꿈은 제거, 출력 라인은 줄바꿈 없이 반환
+        - 출력은 '\n'.join 기준으로 iter_execute(split_gcode_layers(text))와 동일
+        - SETTING_3(보통 파일 끝)는 미리 읽을 수 없으므로 machine_limits를 미리 지정하지 않으면
+          기본값 사용, 시간 표시 보정 없음
+        - 앞부분에 SETTING_3가 없고 original_z_max_feedrate도 지정하지 않으면 원본 Z 속도를
+          추측하지 않음 → Z-홉 속도 제어(M203 설정/복원) 없이 처리
+        """
+        import itertools
+
+        lines = (line[:-1] if line.endswith('\n') else line for line in lines)
+        if not self.settings.enable or \
+                self.settings.zhop_mode not in ("slingshot", "traditional", "hybrid"):
+            yield from lines
+            return
+
+        # 레이어 높이 판단용으로 첫 레이어의 앞부분(최대 20라인)만 미리 읽기
+        head = []
+        for line in lines:
+            if head and line.startswith(';LAYER:'):
+                lines = itertools.chain([line], lines)
+                break
+            head.append(line)
+            if len(head) >= 20:
+                break
+        first_layer_head = '\n'.join(head)
+
+        if self.original_z_max_feedrate is None and self.read_setting_3_text([first_layer_head]) is not None:
+            self.parse_original_z_feedrate([first_layer_head])
+        if self.machine_limits is None:
+            self.parse_machine_limits([first_layer_head])
+        self.reset_print_time_stats()
+        self.reset_dry_run_stats()
+
+        run = self.resolve_run_settings(first_layer_head)
+        if run['zhop_speed'] > 0 and self.original_z_max_feedrate is None:
+            # 추측한 값으로 복원하면 프린터의 실제 Z 속도 제한을 바꿔 버리므로 설정/복원 모두 생략
+            print("⚠️ 원본 Z축 최대 속도를 알 수 없어 Z-홉 속도 제어(M203)를 생략합니다 "
+                  "(original_z_max_feedrate를 지정하면 적용)")
+        lines = itertools.chain(head, lines)
+        self.hop_budget_selection = None
+        if run['slingshot_settings'] and run['slingshot_settings']['hop_budget']:
+            # 예산 선택은 전체 후보를 먼저 모아야 하므로 한 번 읽고 내보내는 스트림에서는 사용 불가
+            print("⚠️ Z-홉 예산은 스트리밍 처리에서 지원되지 않습니다 - 예산 없이 처리합니다")
+            run['slingshot_settings'] = dict(run['slingshot_settings'], hop_budget=None)
+        if run['zhop_mode'] in ("slingshot", "hybrid"):
+            yield from self.iter_slingshot_stream(lines, run)
+            if run['zhop_mode'] == "hybrid":
+                self.report_hybrid_choices()
+        else:
+            yield from self.iter_traditional_stream(lines, run)
+
+    def iter_slingshot_stream(self, lines, run):
+        """스마트 모드 라인 스트림 처리 (연속 travel 시퀀스와 슬라이서 Z-홉 상승~하강 구간만 버퍼링)
+
+        시퀀스 뒤 비이동 라인은 다음 이동 라인이 travel인지 확인할 때까지 보류 (이어지면 시퀀스에 포함)
+        피처 타입 정책 사용 시 도착 타입을 알 수 있는 다음 이동 라인까지 시퀀스 처리를 보류
+        """
+        actual_current_x, actual_current_y, actual_current_z = 0.0, 0.0, 0.0
+        current_feedrate = None
+        layer_index = 0
+        e_value_history = []
+        travel_moves = []
+        sequence_start = None
+        layer_count = None
+        travel_layers = None  # 첫 ;LAYER: 마커에서 결정
+        first_marker_seen = False
+        layer_targeted = not run['custom_layer_list'] and not run['top_bottom_only']
+        layer_change_window = False  # 레이어 변경 Z-홉을 합칠 첫 travel 대기 중
+        layer_start_z = 0.0
+        layer_change = None
+        held_lines = []  # 첫 Z 단독 이동 이후 대기 라인 (라인, 흡수 여부)
+        lift_hold = None  # 슬라이서 Z-홉 상승 후보 {'line', 'z': 상승 전 Z, 'lines': 이후 비이동 라인}
+        sequence_lift = None  # 현재 travel 시퀀스 앞의 상승 후보
+        awaiting_drop = None  # 하강 라인을 기다리는 시퀀스
+        carried_lines = []  # 마지막 travel 이후 비이동 라인 (다음 travel로 이어지면 시퀀스에 포함)
+        sequence_state = None  # 마지막 travel 시점의 (E 값 기록, feedrate)
+        policy = run['slingshot_settings'].get('feature_policy')
+        feature_type = None  # 현재 ;TYPE:
+        motion_feature_type = None  # 레이어 안 마지막 이동 라인 시점 타입 (없으면 레이어 시작 시점)
+        sequence_feature_type = None  # 현재 시퀀스 출발 타입
+        height_map = self.new_height_map(run['slingshot_settings'])
+        self.current_layer_index = 0
+
+        def detect_retraction(history):
+            """직전 E 값 2개로 리트랙션 판단"""
+            retraction = len(history) >= 2 and history[-1] < history[-2]
+            if retraction:
+                print(f"🔍 리트랙션 감지: E {history[-2]:.3f} → {history[-1]:.3f} (감소: {history[-2] - history[-1]:.3f})")
+            return retraction
+
+        def sequence_output(moves, start, retraction, feedrate, native_hop=None, feature_types=None):
+            """travel 시퀀스 처리 → (Z-홉 적용 여부, 결과 라인)"""
+            sequence_lines = []
+            hopped = self.process_travel_sequence(
+                *start, moves, sequence_lines,
+                run['travel_distance'], run['zhop_height'], run['zhop_speed'],
+                run['slingshot_settings'], feedrate, retraction, layer_change, native_hop, feature_types,
+                height_map
+            )
+            return hopped, [output_line for block in sequence_lines for output_line in block.split('\n')]
+
+        def lift_lines(lift):
+            """대체되지 않은 상승 후보 라인 (상승 라인 + 이후 비이동 라인)"""
+            return [] if lift is None else [lift['line']] + lift['lines']
+
+        def release_held_lines(absorbed_too):
+            """대기 라인 내보내기 (travel에 합쳐지면 흡수된 Z 단독 이동은 제외)"""
+            released = [held_line for held_line, absorbed in held_lines if absorbed_too or not absorbed]
+            held_lines.clear()
+            return released
+
+        for line_number, line in enumerate(lines):
+            if line.startswith(';LAYER_COUNT:'):
+                layer_count = int(line[13:].strip())
+            elif line.startswith(';LAYER:'):
+                layer = self.parse_layer_marker(line)
+                if not first_marker_seen:
+                    travel_layers = self.resolve_stream_travel_layers(run, layer, layer_count)
+                    first_marker_seen = True
+                layer_targeted = travel_layers is None or layer in travel_layers
+            current_e = self.getValue(line, 'E')
+            parsed_x = self.getValue(line, 'X')
+            parsed_y = self.getValue(line, 'Y')
+            parsed_z = self.getValue(line, 'Z')
+            parsed_f = self.getValue(line, 'F')
+            kind = self.layer_change_line_kind(line, (parsed_x, parsed_y, parsed_z, current_e))
+            is_travel = kind == 'travel' and \
+                (bool(travel_moves) or layer_change_window or (run['travel_zhop'] and layer_targeted))
+            new_layer = line_number > 0 and line.startswith(';LAYER:')
+            drop_removed = False
+            carried = bool(travel_moves) and not is_travel and not new_layer and self.is_carried_line(line)
+            if travel_moves and not carried and (new_layer or not is_travel):
+                history, feedrate = sequence_state
+                retraction = detect_retraction(history)
+                apply_policy = bool(policy) and layer_change is None
+                if (sequence_lift is not None or apply_policy) and not new_layer:
+                    # 다음 이동 라인이 하강인지 / 도착 타입을 확인할 때까지 보류
+                    awaiting_drop = {'moves': travel_moves, 'start': sequence_start, 'retraction': retraction,
+                                     'feedrate': feedrate, 'lift': sequence_lift, 'lines': carried_lines,
+                                     'policy': apply_policy, 'source_type': sequence_feature_type}
+                else:
+                    feature_types = (sequence_feature_type, feature_type) if apply_policy else None
+                    yield from lift_lines(sequence_lift)
+                    yield from sequence_output(travel_moves, sequence_start, retraction, feedrate,
+                                               feature_types=feature_types)[1]
+                    yield from carried_lines
+                travel_moves = []
+                carried_lines = []
+                layer_change = None
+                sequence_lift = None
+            if awaiting_drop is not None and (new_layer or kind is not None):
+                lift = awaiting_drop['lift']
+                native_hop = None
+                if lift is not None and kind == 'z_only' and not new_layer:
+                    native_hop = self.make_native_hop(lift['line'], line, lift['z'], awaiting_drop['moves'])
+                feature_types = None
+                if awaiting_drop['policy']:
+                    feature_types = (awaiting_drop['source_type'], feature_type)
+                hopped, output = sequence_output(awaiting_drop['moves'], awaiting_drop['start'],
+                                                 awaiting_drop['retraction'], awaiting_drop['feedrate'],
+                                                 native_hop, feature_types)
+                drop_removed = native_hop is not None and hopped
+                if lift is not None:
+                    if not drop_removed:
+                        yield lift['line']
+                    yield from lift['lines']
+                yield from output
+                yield from awaiting_drop['lines']
+                awaiting_drop = None
+            if lift_hold is not None and (new_layer or kind is not None):
+                if is_travel:
+                    sequence_lift = lift_hold
+                else:
+                    yield from lift_lines(lift_hold)
+                lift_hold = None
+            if line.startswith(';LAYER:'):
+                yield from release_held_lines(True)
+                layer_change_window = run['layer_change_zhop'] and self.parse_layer_marker(line) is not None
+                layer_start_z = actual_current_z
+                motion_feature_type = feature_type
+            if new_layer:
+                # 레이어 단위 리트랙션 감지 초기화 (split_gcode_layers 경계와 동일)
+                layer_index += 1
+                self.current_layer_index = layer_index
+                e_value_history = []
+                if height_map is not None:
+                    height_map.new_layer()
+
+            if current_e is not None:
+                e_value_history = (e_value_history + [current_e])[-2:]
+            if parsed_f is not None:
+                current_feedrate = parsed_f
+
+            if is_travel and not travel_moves:
+                sequence_start = (actual_current_x, actual_current_y, actual_current_z)
+                sequence_feature_type = motion_feature_type
+                if layer_change_window:
+                    layer_change = {'z': layer_start_z,
+                                    'lines': [held_line for held_line, absorbed in held_lines if absorbed]}
+                    layer_change_window = False
+                    yield from release_held_lines(False)
+            if line.startswith(';TYPE:'):
+                feature_type = line[6:].strip()
+            elif kind is not None:
+                motion_feature_type = feature_type
+            if height_map is not None:
+                self.trace_height_map(height_map, line)
+            z_before_line = actual_current_z
+            if parsed_x is not None: actual_current_x = parsed_x
+            if parsed_y is not None: actual_current_y = parsed_y
+            if parsed_z is not None: actual_current_z = parsed_z
+            if is_travel:
+                travel_moves.append({
+                    'line': line,
+                    'target_x': actual_current_x,
+                    'target_y': actual_current_y,
+                    'target_z': actual_current_z,
+                    'feedrate': parsed_f,
+                    'carried': carried_lines,
+                })
+                carried_lines = []
+                sequence_state = (list(e_value_history), current_feedrate)
+            elif carried:
+                carried_lines.append(line)
+            elif drop_removed:
+                continue  # 궤적으로 대체된 슬라이서 Z-홉 하강 라인
+            elif awaiting_drop is not None:
+                awaiting_drop['lines'].append(line)
+            elif lift_hold is not None:
+                lift_hold['lines'].append(line)
+            elif kind == 'z_only' and not layer_change_window and run['travel_zhop'] and layer_targeted:
+                lift_hold = {'line': line, 'z': z_before_line, 'lines': []}
+            else:
+                kind = kind if layer_change_window else None
+                if kind == 'z_only':
+                    held_lines.append((line, True))
+                elif kind == 'break':
+                    layer_change_window = False
+                    yield from release_held_lines(True)
+                    yield line
+                elif held_lines:
+                    held_lines.append((line, False))
+                else:
+                    yield line
+
+        if travel_moves:
+            history, feedrate = sequence_state
+            feature_types = None
+            if policy and layer_change is None:
+                feature_types = (sequence_feature_type, feature_type)
+            yield from lift_lines(sequence_lift)
+            yield from sequence_output(travel_moves, sequence_start, detect_retraction(history), feedrate,
+                                       feature_types=feature_types)[1]
+            yield from carried_lines
+        if awaiting_drop is not None:
+            feature_types = None
+            if awaiting_drop['policy']:
+                feature_types = (awaiting_drop['source_type'], feature_type)
+            output = sequence_output(awaiting_drop['moves'], awaiting_drop['start'],
+                                     awaiting_drop['retraction'], awaiting_drop['feedrate'],
+                                     feature_types=feature_types)[1]
+            yield from lift_lines(awaiting_drop['lift'])
+            yield from output
+            yield from awaiting_drop['lines']
+        yield from lift_lines(lift_hold)
+        yield from release_held_lines(True)
+
+    def iter_traditional_stream(self, lines, run):
+        """전통적 모드 라인 스트림 처리 (레이어 끝 rstrip을 위해 끝쪽 공백 라인만 버퍼링)"""
+        layer_index = 0
+        layer_count = None  # ;LAYER_COUNT: 헤더로 결정 (상하단 레이어 판단용)
+        travel_layers = None
+        first_marker_seen = False
+        state = self.new_traditional_state()
+        held_blocks = []  # 아직 내보내지 않은 레이어 끝부분 (마지막 내용 라인 + 이후 공백 라인)
+        self.current_layer_index = 0
+
+        def finish_layer():
+            """레이어 끝부분에 iter_traditional_mode의 rstrip() 적용"""
+            return '\n'.join(held_blocks).rstrip().split('\n')
+
+        for line_number, line in enumerate(lines):
+            if line_number > 0 and line.startswith(';LAYER:'):
+                if held_blocks:
+                    yield from finish_layer()
+                held_blocks = []
+                layer_index += 1
+                self.current_layer_index = layer_index
+                state = self.new_traditional_state()
+            if line.startswith(';LAYER_COUNT:'):
+                layer_count = int(line[13:].strip())
+            if not first_marker_seen and ";LAYER:" in line:
+                travel_layers = self.resolve_stream_travel_layers(run, self.parse_layer_marker(line), layer_count)
+                first_marker_seen = True
+
+            line_output = self.process_traditional_line(
+                state, line, run['zhop_height'], run['zhop_speed'],
+                run['layer_change_zhop'], run['travel_zhop'], run['travel_distance'], travel_layers)
+            if line_output is None:
+                continue  # 분석 전용 모드: iter_traditional_mode처럼 통계만 모으고 출력 없음
+            block = line_output[:-1]
+            if block.strip():
+                for held_block in held_blocks:
+                    yield from held_block.split('\n')
+                held_blocks = [block]
+            else:
+                held_blocks.append(block)
+
+        if held_blocks:
+            yield from finish_layer()
+
+    def read_setting_3_text(self, data):
+        """G-code의 SETTING_3 라인들을 병합하여 설정 텍스트 반환 (없으면 None)"""
         # 1단계: 모든 SETTING_3 라인을 찾아서 순수 텍스트만 추출
         setting_parts = []
         
         for layer in data:
-            lines = layer.split('\n')
-            for line in lines:
-                if line.startswith(';SETTING_3 '):
-                    # ';SETTING_3 ' 제거하고 나머지 텍스트만 추출 (strip 없이)
-                    setting_content = line[10:]  # ';SETTING_3 ' 제거 (10글자)
-                    setting_parts.append(setting_content)
+            if ';SETTING_3 ' not in layer:
+                continue
+            # 레이어 전체를 라인 목록으로 나누지 않고 SETTING_3 라인만 탐색
+            for match in SETTING_3_LINE_PATTERN.finditer(layer):
+                # ';SETTING_3' 제거하고 나머지 텍스트만 추출 (strip 없이)
+                setting_parts.append(match.group(1))
         
-        # 2단계: 단순 병합 (글자수 제한으로 잘린 텍스트 복원)
         if not setting_parts:
+            return None
+        
+        # 2단계: 단순 병합 (글자수 제한으로 잘린 텍스트 복원)
+        combined_settings = ''.join(setting_parts)
+        
+        # 3단계: \\n을 실제 줄바꿈으로 변환
+        return combined_settings.replace('\\n', '\n')
+
+    def parse_original_z_feedrate(self, data):
+        """G-code에서 원본 Z축 최대 속도 파싱 (단순 병합 처리)"""
+        normalized_settings = self.read_setting_3_text(data)
+        
+        if normalized_settings is None:
             self.original_z_max_feedrate = 15*60
             print(f"⚠️ SETTING_3 라인을 찾을 수 없어서 기본값 사용: {self.original_z_max_feedrate/60:.0f} mm/s")
             return self.original_z_max_feedrate
         
-        # 단순 병합 (공백이나 추가 처리 없이)
-        combined_settings = ''.join(setting_parts)
-        
         print(f"🔍 병합된 SETTING_3 내용:")
-        print(f"   병합 결과: {combined_settings[:100]}...")
-        
-        # 3단계: \\n을 실제 줄바꿈으로 변환하여 파싱
-        normalized_settings = combined_settings.replace('\\n', '\n')
+        print(f"   병합 결과: {normalized_settings[:100]}...")
         
         # 4단계: machine_max_feedrate_z 값 찾기
-        import re
         match = re.search(r'machine_max_feedrate_z\s*=\s*([\d\.]+)', normalized_settings)
         
         if match:
@@ -479,6 +1361,20 @@ class SmartZHop(Script):
             print(f"📋 파싱 대상 텍스트: {normalized_settings}")
             return self.original_z_max_feedrate
 
+    def parse_machine_limits(self, data):
+        """SETTING_3에서 시간 추정용 기계 한계값 파싱 (mm/s, mm/s²)"""
+        limits = dict(DEFAULT_MACHINE_LIMITS)
+        normalized_settings = self.read_setting_3_text(data)
+        
+        if normalized_settings is not None:
+            for key in limits:
+                match = re.search(rf'machine_{key}\s*=\s*([\d\.]+)', normalized_settings)
+                if match and float(match.group(1)) > 0:
+                    limits[key] = float(match.group(1))
+        
+        self.machine_limits = limits
+        return limits
+
     def get_layer_height_from_gcode(self, data_list): # Expects a list of layer gcode strings
         # Simplified: Tries to find G1 Z value in the first few lines of the first layer's G-code
         # This is a very basic approach and might not be robust.
@@ -486,7 +1382,7 @@ class SmartZHop(Script):
             return 0.0
         
         layer_gcode = data_list[0] # Check first layer
-        lines = layer_gcode.split('\n')
+        lines = layer_gcode.split('\n', 20)
         for line in lines[:20]: # Check first 20 lines
             if line.startswith("G1") and "Z" in line:
                 match = re.search(r"Z([\d\.]+)", line)
@@ -494,6 +1390,65 @@ class SmartZHop(Script):
                     return float(match.group(1))
         return 0.0 # Fallback
 
+    def analyze(self, data):
+        """분석 전용 실행: 파서와 Z-홉 판단만 수행하고 통계 리포트 반환 (G-code 생성 생략)"""
+        self.dry_run = True
+        try:
+            self.execute(data)
+        finally:
+            self.dry_run = False
+        
+        report = dict(self.dry_run_stats)
+        report['length_histogram'] = dict(self.dry_run_stats['length_histogram'])
+        report['hybrid_choices'] = dict(self.dry_run_stats['hybrid_choices'])
+        report['mode'] = self.settings.zhop_mode
+        report['layers'] = len(data)
+        if report['hops'] > 0:
+            report['hop_length_avg'] = report['hop_length_total'] / report['hops']
+        else:
+            report['hop_length_avg'] = 0.0
+            report['hop_length_min'] = 0.0
+        return report
+
+    def reset_dry_run_stats(self):
+        """분석 전용 모드 통계 초기화"""
+        self.dry_run_stats = {
+            'travel_sequences': 0,  # Z-홉 판단 대상 travel 시퀀스 수
+            'hops': 0,  # Z-홉이 적용될 시퀀스 수
+            'retraction_hops': 0,  # 리트랙션 조건으로 Z-홉이 적용된 시퀀스 수
+            'layer_change_hops': 0,  # 레이어 변경 Z-홉 수
+            'native_hops_replaced': 0,  # 궤적으로 대체한 슬라이서 Z-홉 수
+            'native_hop_z_saved': 0.0,  # 대체로 없앤 슬라이서 Z-홉 상승+하강 거리 (mm)
+            'policy_skipped_hops': 0,  # 피처 타입 정책으로 생략한 Z-홉 수
+            'policy_forced_hops': 0,  # 피처 타입 정책으로 추가한 Z-홉 수
+            'height_map_lowered_hops': 0,  # 높이 맵으로 높이를 낮춘 Z-홉 수
+            'height_map_height_saved': 0.0,  # 높이 맵으로 줄인 최대 Z-홉 높이 합계 (mm)
+            'hybrid_choices': {'slingshot': 0, 'traditional': 0, 'none': 0},  # 하이브리드 모드 방식별 선택 수
+            'budget_skipped_hops': 0,  # Z-홉 예산에 들지 못해 생략한 Z-홉 수
+            'hop_length_total': 0.0,  # Z-홉 시퀀스 XY 길이 합계 (mm)
+            'hop_length_min': None,
+            'hop_length_max': 0.0,
+            'added_z_travel': 0.0,  # 추가되는 Z 이동 거리 합계 (상승+하강, mm)
+            'length_histogram': {label: 0 for label, _ in HOP_LENGTH_BUCKETS},
+        }
+
+    def record_dry_run_hop(self, travel_length, hop_height, after_retraction=False):
+        """분석 전용 모드에서 Z-홉 하나를 통계에 기록"""
+        stats = self.dry_run_stats
+        stats['hops'] += 1
+        if after_retraction:
+            stats['retraction_hops'] += 1
+        stats['hop_length_total'] += travel_length
+        stats['hop_length_max'] = max(stats['hop_length_max'], travel_length)
+        if stats['hop_length_min'] is None or travel_length < stats['hop_length_min']:
+            stats['hop_length_min'] = travel_length
+        stats['added_z_travel'] += 2 * hop_height
+        
+        for label, upper in HOP_LENGTH_BUCKETS:
+            if travel_length < upper:
+                stats['length_histogram'][label] += 1
+                break
+
     def execute_standalone(self, gcode_lines):
         # This method is for testing with a list of G-code strings.
         # It simulates how the main 'execute' method would run.
@@ -503,7 +1458,7 @@ class SmartZHop(Script):
         # We will follow that, assuming gcode_lines is a list of individual gcode commands.
         combined_gcode = '\n'.join(gcode_lines)
         cura_format_data = [combined_gcode] # Process as a single layer        # Call the main execute method with this formatted data
-        # All settings will be pulled from self.getSettingValueByKey (Mock or Cura)
+        # All settings will be pulled from self.settings (ZHopSettings)
         return self.execute(cura_format_data)
 
     def get_zhop_speed_gcode(self, speed):
@@ -522,158 +1477,809 @@ class SmartZHop(Script):
         
         return f"M203 Z{self.original_z_max_feedrate:.0f} ; Restore original Z-axis speed ({self.original_z_max_feedrate/60:.1f} mm/s)"
 
+    def reset_print_time_stats(self):
+        """Z-홉 추가 시간 통계 초기화"""
+        self.print_time_stats = {
+            'hops': 0,  # 시간이 계산된 Z-홉 수
+            'total_delta': 0.0,  # 전체 추가 시간 (초)
+            'max_hop_delta': 0.0,  # 가장 오래 걸린 단일 Z-홉의 추가 시간
+            'added_z_travel': 0.0,  # Z-홉으로 추가된 Z 이동 거리 (mm)
+            'per_layer': {},  # 레이어 인덱스 → 추가 시간 (초)
+        }
+
+    def estimate_move_time(self, dx, dy, dz, feedrate, limits):
+        """단일 직선 이동의 실행 시간 추정 (정지→정지 사다리꼴 가속 프로파일)"""
+        length = math.sqrt(dx * dx + dy * dy + dz * dz)
+        if length <= 0:
+            return 0.0
+        speed, accel = self.move_speed_limits(dx, dy, dz, length, feedrate, limits)
+        return self.trapezoid_time(length, speed, accel, 0.0, 0.0)
+
+    def move_speed_limits(self, dx, dy, dz, length, feedrate, limits):
+        """직선 이동의 경로 최고 속도와 가속도 (요청 F와 축별 한계 적용) → (mm/s, mm/s²)"""
+        # 요청 속도 (G-code F는 mm/min), 없으면 XY 최대 속도
+        speed = feedrate / 60.0 if feedrate else limits['max_feedrate_x']
+        accel = limits['acceleration']
+        
+        # 축별 한계: 축 성분 비율만큼 경로 속도/가속도를 제한
+        for delta, axis in ((dx, 'x'), (dy, 'y'), (dz, 'z')):
+            if delta:
+                ratio = abs(delta) / length
+                speed = min(speed, limits['max_feedrate_' + axis] / ratio)
+                accel = min(accel, limits['max_acceleration_' + axis] / ratio)
+        return speed, accel
+
+    def trapezoid_time(self, length, speed, accel, entry_speed, exit_speed):
+        """진입/탈출 속도가 있는 사다리꼴 가속 프로파일 시간 (최고 속도에 못 미치면 삼각형)"""
+        peak_squared = accel * length + (entry_speed * entry_speed + exit_speed * exit_speed) / 2.0
+        if peak_squared <= speed * speed:
+            return (2.0 * math.sqrt(peak_squared) - entry_speed - exit_speed) / accel
+        ramp_length = (2.0 * speed * speed - entry_speed * entry_speed - exit_speed * exit_speed) / (2.0 * accel)
+        return (2.0 * speed - entry_speed - exit_speed) / accel + (length - ramp_length) / speed
+
+    def estimate_moves_time(self, start_x, start_y, start_z, moves, feedrate, limits):
+        """(X, Y, Z, F) 이동 목록의 실행 시간과 Z 이동 거리 추정 (F가 None이면 직전 feedrate 유지)
+
+        경로 처음과 끝은 정지하고, 구간 사이는 접합 편차(junction deviation) 코너 속도로
+        이어서 이동 (일직선에 가까운 구간끼리는 두 구간 최고 속도 중 낮은 쪽을 유지)
+        """
+        segments = []  # (길이, 최고 속도, 가속도, 단위 벡터)
+        x, y, z = start_x, start_y, start_z
+        z_travel = 0.0
+        for new_x, new_y, new_z, new_f in moves:
+            if new_f is not None:
+                feedrate = new_f
+            dx, dy, dz = new_x - x, new_y - y, new_z - z
+            length = math.sqrt(dx * dx + dy * dy + dz * dz)
+            if length > 0:
+                speed, accel = self.move_speed_limits(dx, dy, dz, length, feedrate, limits)
+                segments.append((length, speed, accel, (dx / length, dy / length, dz / length)))
+            z_travel += abs(dz)
+            x, y, z = new_x, new_y, new_z
+        
+        # 구간 경계 속도 상한: 방향 전환 각도에 따른 코너 속도 (경로 양 끝은 0)
+        junction_deviation = limits.get('junction_deviation', DEFAULT_MACHINE_LIMITS['junction_deviation'])
+        boundary_speeds = [0.0]
+        for (_, previous_speed, _, previous_unit), (_, speed, accel, unit) in zip(segments, segments[1:]):
+            junction_speed = min(previous_speed, speed)
+            cos_theta = -(previous_unit[0] * unit[0] + previous_unit[1] * unit[1] + previous_unit[2] * unit[2])
+            sin_half_theta = math.sqrt(max(0.0, 0.5 * (1.0 - cos_theta)))
+            if sin_half_theta < 1.0 - 1e-9:
+                junction_speed = min(junction_speed, math.sqrt(
+                    accel * junction_deviation * sin_half_theta / (1.0 - sin_half_theta)))
+            boundary_speeds.append(junction_speed)
+        boundary_speeds.append(0.0)
+        
+        # 역방향/정방향 패스: 각 구간 길이 안에서 가감속으로 도달 가능한 경계 속도로 제한
+        for index in range(len(segments) - 1, 0, -1):
+            length, _, accel, _ = segments[index]
+            boundary_speeds[index] = min(boundary_speeds[index], math.sqrt(
+                boundary_speeds[index + 1] ** 2 + 2.0 * accel * length))
+        for index in range(1, len(segments)):
+            length, _, accel, _ = segments[index - 1]
+            boundary_speeds[index] = min(boundary_speeds[index], math.sqrt(
+                boundary_speeds[index - 1] ** 2 + 2.0 * accel * length))
+        
+        total_time = sum(self.trapezoid_time(length, speed, accel, boundary_speeds[index], boundary_speeds[index + 1])
+                         for index, (length, speed, accel, _) in enumerate(segments))
+        return total_time, z_travel
+
+    def estimate_path_time(self, start_x, start_y, start_z, lines, feedrate, limits):
+        """G0/G1 라인 목록의 실행 시간과 Z 이동 거리 추정 (시작 위치와 모달 feedrate 기준)"""
+        x, y, z = start_x, start_y, start_z
+        moves = []
+        
+        for line in lines:
+            if self.getValue(line, 'G') is None:
+                continue  # M203 등 이동이 아닌 명령
+            
+            new_x = self.getValue(line, 'X')
+            new_y = self.getValue(line, 'Y')
+            new_z = self.getValue(line, 'Z')
+            x = x if new_x is None else new_x
+            y = y if new_y is None else new_y
+            z = z if new_z is None else new_z
+            moves.append((x, y, z, self.getValue(line, 'F')))
+        
+        return self.estimate_moves_time(start_x, start_y, start_z, moves, feedrate, limits)
+
+    def hop_time_limits(self, zhop_speed):
+        """Z-홉 궤적 시간 추정용 기계 한계값 (Z-홉 M203을 출력하는 경우 그 Z 속도 제한 적용)"""
+        limits = self.machine_limits or DEFAULT_MACHINE_LIMITS
+        if zhop_speed > 0 and self.original_z_max_feedrate is not None:
+            return dict(limits, max_feedrate_z=zhop_speed)
+        return limits
+
+    def record_hop_time(self, start_x, start_y, start_z, original_lines, hop_moves, feedrate, zhop_speed=0):
+        """원본 이동 대비 Z-홉 궤적의 추가 시간을 계산하여 통계에 기록
+
+        hop_moves: 궤적 생성 시 만든 (X, Y, Z, F) 좌표 목록 (생성한 G-code를 다시 파싱하지 않음)
+        Z-홉은 같은 XY 경로에 Z 이동을 더하므로 추가 시간은 0 이상으로 기록
+        (궤적 F가 원본보다 빨라도 전체 추정 시간이 줄지 않음)
+        """
+        limits = self.machine_limits or DEFAULT_MACHINE_LIMITS
+        
+        original_time, original_z = self.estimate_path_time(start_x, start_y, start_z, original_lines, feedrate, limits)
+        hop_time, hop_z = self.estimate_moves_time(start_x, start_y, start_z, hop_moves, feedrate,
+                                                   self.hop_time_limits(zhop_speed))
+        delta = max(hop_time - original_time, 0.0)
+        
+        stats = self.print_time_stats
+        stats['hops'] += 1
+        stats['total_delta'] += delta
+        stats['added_z_travel'] += hop_z - original_z
+        stats['max_hop_delta'] = max(stats['max_hop_delta'], delta)
+        per_layer = stats['per_layer']
+        per_layer[self.current_layer_index] = per_layer.get(self.current_layer_index, 0.0) + delta
+        return delta
+
+    def report_hybrid_choices(self):
+        """하이브리드 모드 방식별 선택 수 요약 출력"""
+        choices = self.dry_run_stats['hybrid_choices']
+        print(f"🔀 하이브리드 선택: 슬링샷 {choices['slingshot']}개, 전통적 {choices['traditional']}개, "
+              f"Z-홉 없음 {choices['none']}개")
+
+    def report_print_time_stats(self):
+        """Z-홉 추가 시간 요약 출력"""
+        stats = self.print_time_stats
+        print(f"⏱️ Z-홉 추가 시간: {stats['total_delta']:+.1f}초 "
+              f"(Z-홉 {stats['hops']}개, 최대 {stats['max_hop_delta']:.2f}초/홉, "
+              f"레이어 {len(stats['per_layer'])}개)")
+
+    def apply_print_time_delta(self, data):
+        """;TIME:, ;TIME_ELAPSED:, M73 진행률 표시에 Z-홉 추가 시간 반영 (data 목록을 직접 갱신)"""
+        per_layer = self.print_time_stats['per_layer']
+        total_delta = self.print_time_stats['total_delta']
+        
+        # 원본 전체 인쇄 시간 (M73 P 재계산용)
+        original_total = None
+        for layer in data:
+            match = TIME_HEADER_PATTERN.search(layer)
+            if match:
+                original_total = float(match.group(1))
+                break
+        new_total = (original_total or 0.0) + total_delta
+        
+        def shift_m73(match, elapsed_delta):
+            words = match.group(1).split()
+            for i, word in enumerate(words):
+                if word.startswith('P') and original_total:
+                    elapsed = float(word[1:]) / 100.0 * original_total + elapsed_delta
+                    words[i] = f"P{min(100, max(0, round(elapsed / new_total * 100)))}"
+                elif word.startswith('R'):
+                    remaining = float(word[1:]) + (total_delta - elapsed_delta) / 60.0
+                    words[i] = f"R{max(0, round(remaining))}"
+            return "M73 " + " ".join(words)
+        
+        # 레이어 목록을 그대로 갱신 (바뀐 레이어만 새 문자열, 이전 문자열은 즉시 해제)
+        processed_data = data
+        cumulative_delta = 0.0
+        
+        for layer_index, layer in enumerate(data):
+            layer_start_delta = cumulative_delta
+            cumulative_delta += per_layer.get(layer_index, 0.0)
+            
+            if ';TIME' in layer:
+                layer = TIME_HEADER_PATTERN.sub(
+                    lambda m: f";TIME:{max(0, round(float(m.group(1)) + total_delta))}", layer)
+                layer = self.shift_elapsed_time(layer, cumulative_delta)
+            if 'M73 ' in layer:
+                layer = M73_PATTERN.sub(lambda m: shift_m73(m, layer_start_delta), layer)
+            processed_data[layer_index] = layer
+        
+        return processed_data
+
+    def shift_elapsed_time(self, layer, cumulative_delta):
+        """;TIME_ELAPSED: 표시에 그 레이어까지의 누적 추가 시간 반영 (누적 추가 시간이 없으면 원본 그대로)"""
+        if not cumulative_delta or ';TIME_ELAPSED:' not in layer:
+            return layer
+        return TIME_ELAPSED_PATTERN.sub(
+            lambda m: f";TIME_ELAPSED:{float(m.group(1)) + cumulative_delta:.6f}", layer)
+
+    def needs_print_time_totals(self, data):
+        """첫 레이어(헤더) 이후에 전체 추가 시간이 있어야 보정할 수 있는 표시(;TIME:, M73)가 있는지 확인
+
+        없으면 iter_execute_elapsed로 레이어가 나오는 대로 저장하고 헤더만 finish_print_time으로 나중에 보정 가능
+        """
+        import itertools
+
+        if not self.settings.adjust_print_time:
+            return False
+        return any('M73 ' in layer or (';TIME:' in layer and TIME_HEADER_PATTERN.search(layer))
+                   for layer in itertools.islice(data, 1, None))
+
+    def iter_execute_elapsed(self, data):
+        """iter_execute 결과에 레이어가 나오는 대로 ;TIME_ELAPSED: 추가 시간을 반영 (스트리밍 저장용)
+
+        첫 레이어(헤더)는 보정하지 않고 그대로 내보냄 → 모든 레이어를 받은 뒤 finish_print_time으로 보정
+        (needs_print_time_totals가 False인 작업에서 execute와 같은 결과)
+        """
+        cumulative_delta = 0.0
+        for layer_index, layer in enumerate(self.iter_execute(data)):
+            cumulative_delta += self.print_time_stats['per_layer'].get(layer_index, 0.0)
+            if layer_index > 0 and self.settings.adjust_print_time:
+                layer = self.shift_elapsed_time(layer, cumulative_delta)
+            yield layer
+
+    def finish_print_time(self, header):
+        """iter_execute_elapsed 마무리: 추가 시간 요약 출력 및 헤더 레이어의 ;TIME:/M73 보정"""
+        if self.print_time_stats['hops'] > 0:
+            self.report_print_time_stats()
+            if self.settings.adjust_print_time:
+                return self.apply_print_time_delta([header])[0]
+        return header
+
     def execute_traditional_mode(self, data, zhop_height, zhop_speed, layer_change_zhop, 
-                               travel_zhop, travel_distance, custom_layer_list, top_bottom_only):
+                               travel_zhop, travel_distance, travel_layers):
         """전통적 모드 실행 (원본 Z_HopMove 로직 정확히 구현)"""
-        processed_data = []
-        total_layers = len(data)
-        
+        return list(self.iter_traditional_mode(data, zhop_height, zhop_speed, layer_change_zhop,
+                                               travel_zhop, travel_distance, travel_layers))
+
+    def iter_traditional_mode(self, data, zhop_height, zhop_speed, layer_change_zhop, 
+                              travel_zhop, travel_distance, travel_layers):
+        """전통적 모드 레이어 단위 제너레이터"""
         for layer_index, layer in enumerate(data):
-            lines = layer.split('\n')
-            output_gcode = ""
+            self.current_layer_index = layer_index
+            replacements = []  # (시작, 끝, 생성된 G-code) - 나머지는 원본 구간 그대로
+            line_start = 0
             
             # 원본 Z_HopMove의 정확한 플래그 시스템
-            current_z = 0
-            g1_saved = False
-            tr_layer = False  
-            lc_line = False
-            lc_z_hop_saved = False
-            tr_z_hop_saved = False
-            saved_x, saved_y = 0, 0
-            lc_gcode = ""
-            tr_gcode = ""
+            state = self.new_traditional_state()
+            
+            for line in layer.split('\n'):
+                line_output = self.process_traditional_line(
+                    state, line, zhop_height, zhop_speed, layer_change_zhop,
+                    travel_zhop, travel_distance, travel_layers)
+                if line_output is not None and line_output != line + "\n":
+                    replacements.append((line_start, line_start + len(line), line_output[:-1]))
+                line_start += len(line) + 1
             
-            for line in lines:
-                # 현재 위치 추적
-                if self.getValue(line, 'Z') is not None:
-                    current_z = self.getValue(line, 'Z')
-
-                # 레이어 시작 처리 (원본 방식)
-                if ";LAYER:" in line:
-                    tr_layer = True
+            if not self.dry_run:
+                yield self.splice_layer(layer, replacements, strip_end=True)
+
+    def splice_layer(self, text, replacements, strip_end=False):
+        """원본 레이어 구간 슬라이스와 생성된 블록을 이어 붙여 레이어 재구성
+
+        replacements: 위치 순서의 (시작, 끝, 대체 문자열) 목록. 변경이 없으면 원본 문자열을
+        그대로 반환하고, strip_end는 결과에 rstrip()을 적용한 것과 같음 (전체 복사 없이 끝부분만)
+        """
+        parts = []
+        position = 0
+        for start, end, block in replacements:
+            parts.append(text[position:start])
+            parts.append(block)
+            position = end
+
+        tail_end = len(text)
+        if strip_end:
+            while tail_end > position and text[tail_end - 1].isspace():
+                tail_end -= 1
+        if not replacements and tail_end == len(text):
+            return text
+        if tail_end > position:
+            parts.append(text[position:tail_end])
+        elif strip_end:
+            # 남은 원본 구간이 모두 공백이면 앞쪽 조각까지 정리
+            while parts and not parts[-1].strip():
+                parts.pop()
+            if parts:
+                parts[-1] = parts[-1].rstrip()
+        return ''.join(parts)
+
+    def new_traditional_state(self):
+        """전통적 모드 레이어별 플래그 초기값 (원본 Z_HopMove 방식)"""
+        return {
+            'current_z': 0,
+            'g1_saved': False,
+            'tr_layer': False,
+            'lc_line': False,
+            'lc_z_hop_saved': False,
+            'tr_z_hop_saved': False,
+            'saved_x': 0,
+            'saved_y': 0,
+            'lc_gcode': "",
+            'tr_gcode': "",
+        }
+
+    def process_traditional_line(self, state, line, zhop_height, zhop_speed,
+                                 layer_change_zhop, travel_zhop, travel_distance, travel_layers):
+        """전통적 모드 한 라인 처리: 출력할 G-code 반환 (줄바꿈 포함, 분석 전용 모드는 None)"""
+        # 현재 위치 추적
+        if self.getValue(line, 'Z') is not None:
+            state['current_z'] = self.getValue(line, 'Z')
+        current_z = state['current_z']
+
+        # 레이어 시작 처리 (원본 방식)
+        if ";LAYER:" in line:
+            # 레이어 제한 처리 (대상 ;LAYER: 번호 집합은 실행 전에 결정)
+            state['tr_layer'] = travel_layers is None or self.parse_layer_marker(line) in travel_layers
+
+        # 레이어 변경 Z-hop 준비 (원본 방식)                if layer_change_zhop and lc_line:
+            # 속도 제어 적용 (조건부: 속도 설정이 있고 원본 속도가 파싱된 경우만)
+            speed_prefix = ""
+            speed_suffix = ""
+            if zhop_speed > 0 and self.original_z_max_feedrate is not None:
+                speed_gcode = self.get_zhop_speed_gcode(zhop_speed)
+                if speed_gcode:
+                    speed_prefix = speed_gcode + "\n"
+                
+                restore_gcode = self.restore_original_speed_gcode()
+                if restore_gcode:
+                    speed_suffix = "\n" + restore_gcode
+            
+            # Z-홉 G-code 준비
+            state['lc_gcode'] = f"{speed_prefix}G0 Z{current_z + zhop_height:.2f};Smart Z-Hop Layer Change\n{line}{speed_suffix}\n"
+            state['lc_moves'] = [(state['saved_x'], state['saved_y'], current_z + zhop_height, None)]
+            state['lc_z_hop_saved'] = True
+
+        # Travel Z-hop 처리 (원본 방식)
+        if travel_zhop and state['tr_layer']:
+            # G1 압출 명령 감지 및 저장
+            if (self.getValue(line, 'G') == 1 and 
+                self.getValue(line, "X") is not None and 
+                self.getValue(line, "Y") is not None and 
+                self.getValue(line, "E") is not None):
+                
+                state['saved_x'] = self.getValue(line, "X")
+                state['saved_y'] = self.getValue(line, "Y")
+                state['g1_saved'] = True
+
+            # G0 이동 명령 처리
+            if (self.getValue(line, 'G') == 0 and state['g1_saved']):
+                state['g1_saved'] = False  # 원본처럼 즉시 False로 설정
+                if (self.getValue(line, "X") is not None and 
+                    self.getValue(line, "Y") is not None and 
+                    self.getValue(line, "Z") is None):
                     
-                    # 레이어 제한 처리
-                    if custom_layer_list:
-                        current_layer = layer_index + 1
-                        tr_layer = current_layer in custom_layer_list
-                    elif top_bottom_only:
-                        tr_layer = (layer_index == 0 or layer_index == total_layers - 1)
-
-                # 레이어 변경 Z-hop 준비 (원본 방식)                if layer_change_zhop and lc_line:
-                    # 속도 제어 적용 (조건부: 속도 설정이 있고 원본 속도가 파싱된 경우만)
-                    speed_prefix = ""
-                    speed_suffix = ""
-                    if zhop_speed > 0 and self.original_z_max_feedrate is not None:
-                        speed_gcode = self.get_zhop_speed_gcode(zhop_speed)
-                        if speed_gcode:
-                            speed_prefix = speed_gcode + "\n"
-                        
-                        restore_gcode = self.restore_original_speed_gcode()
-                        if restore_gcode:
-                            speed_suffix = "\n" + restore_gcode
+                    target_x = self.getValue(line, "X")
+                    target_y = self.getValue(line, "Y")
+                    distance = self.calculate_distance(state['saved_x'], state['saved_y'], target_x, target_y)
+                    self.dry_run_stats['travel_sequences'] += 1
                     
-                    # Z-홉 G-code 준비
-                    lc_gcode = f"{speed_prefix}G0 Z{current_z + zhop_height:.2f};Smart Z-Hop Layer Change\n{line}{speed_suffix}\n"
-                    lc_z_hop_saved = True
-
-                # Travel Z-hop 처리 (원본 방식)
-                if travel_zhop and tr_layer:
-                    # G1 압출 명령 감지 및 저장
-                    if (self.getValue(line, 'G') == 1 and 
-                        self.getValue(line, "X") is not None and 
-                        self.getValue(line, "Y") is not None and 
-                        self.getValue(line, "E") is not None):
-                        
-                        saved_x = self.getValue(line, "X")
-                        saved_y = self.getValue(line, "Y")
-                        g1_saved = True
-
-                    # G0 이동 명령 처리
-                    if (self.getValue(line, 'G') == 0 and g1_saved):
-                        g1_saved = False  # 원본처럼 즉시 False로 설정
-                        if (self.getValue(line, "X") is not None and 
-                            self.getValue(line, "Y") is not None and 
-                            self.getValue(line, "Z") is None):
-                            
-                            target_x = self.getValue(line, "X")
-                            target_y = self.getValue(line, "Y")
-                            distance = self.calculate_distance(saved_x, saved_y, target_x, target_y)
+                    if distance >= travel_distance and self.dry_run:
+                        self.record_dry_run_hop(distance, zhop_height)
+                    elif distance >= travel_distance:
+                        # 속도 제어 적용 (조건부: 속도 설정이 있고 원본 속도가 파싱된 경우만)
+                        speed_prefix = ""
+                        speed_suffix = ""
+                        if zhop_speed > 0 and self.original_z_max_feedrate is not None:
+                            speed_gcode = self.get_zhop_speed_gcode(zhop_speed)
+                            if speed_gcode:
+                                speed_prefix = speed_gcode + "\n"
                             
-                            if distance >= travel_distance:
-                                # 속도 제어 적용 (조건부: 속도 설정이 있고 원본 속도가 파싱된 경우만)
-                                speed_prefix = ""
-                                speed_suffix = ""
-                                if zhop_speed > 0 and self.original_z_max_feedrate is not None:
-                                    speed_gcode = self.get_zhop_speed_gcode(zhop_speed)
-                                    if speed_gcode:
-                                        speed_prefix = speed_gcode + "\n"
-                                    
-                                    restore_gcode = self.restore_original_speed_gcode()
-                                    if restore_gcode:
-                                        speed_suffix = "\n" + restore_gcode
-                                
-
-                                # Z-hop G-code 준비
-                                tr_gcode = f"{speed_prefix}G0 Z{current_z + zhop_height:.2f};Smart Z-Hop Travel Up, D:{distance:.2f}\n"
-                                tr_gcode += line + "\n"
-                                tr_gcode += f"G0 Z{current_z:.2f};Smart Z-Hop Travel Down{speed_suffix}\n"
-                                tr_z_hop_saved = True
-
-                # 원본 방식: 저장된 G코드가 있으면 출력, 없으면 기본 라인 출력
-                if layer_change_zhop and lc_z_hop_saved:
-                    output_gcode += lc_gcode
-                    lc_z_hop_saved = False
-                    lc_line = False
-                    g1_saved = False
-                elif travel_zhop and tr_z_hop_saved:
-                    output_gcode += tr_gcode
-                    tr_z_hop_saved = False
+                            restore_gcode = self.restore_original_speed_gcode()
+                            if restore_gcode:
+                                speed_suffix = "\n" + restore_gcode
+                        
+
+                        # Z-hop G-code 준비
+                        tr_gcode = f"{speed_prefix}G0 Z{current_z + zhop_height:.2f};Smart Z-Hop Travel Up, D:{distance:.2f}\n"
+                        tr_gcode += line + "\n"
+                        tr_gcode += f"G0 Z{current_z:.2f};Smart Z-Hop Travel Down{speed_suffix}\n"
+                        state['tr_gcode'] = tr_gcode
+                        state['tr_moves'] = [(state['saved_x'], state['saved_y'], current_z + zhop_height, None),
+                                             (target_x, target_y, current_z + zhop_height, self.getValue(line, 'F')),
+                                             (target_x, target_y, current_z, None)]
+                        state['tr_z_hop_saved'] = True
+
+        line_output = None
+        # 분석 전용 모드: 출력 조립 생략
+        if self.dry_run:
+            if layer_change_zhop and state['lc_z_hop_saved']:
+                self.dry_run_stats['layer_change_hops'] += 1
+                self.dry_run_stats['added_z_travel'] += zhop_height
+                state['lc_z_hop_saved'] = False
+                state['lc_line'] = False
+                state['g1_saved'] = False
+        # 원본 방식: 저장된 G코드가 있으면 출력, 없으면 기본 라인 출력
+        elif layer_change_zhop and state['lc_z_hop_saved']:
+            line_output = state['lc_gcode']
+            self.record_hop_time(state['saved_x'], state['saved_y'], current_z, [line],
+                                 state['lc_moves'], None, zhop_speed)
+            state['lc_z_hop_saved'] = False
+            state['lc_line'] = False
+            state['g1_saved'] = False
+        elif travel_zhop and state['tr_z_hop_saved']:
+            line_output = state['tr_gcode']
+            self.record_hop_time(state['saved_x'], state['saved_y'], current_z, [line],
+                                 state['tr_moves'], None, zhop_speed)
+            state['tr_z_hop_saved'] = False
+        else:
+            line_output = line + "\n"
+
+        # MESH:NONMESH 처리 (원본 방식 - 마지막에!)
+        if ";MESH:NONMESH" in line:
+            state['lc_line'] = True
+            state['tr_layer'] = False  # 원본은 여기서 False로 설정!
+        return line_output
+
+    def iter_traditional_skip_scan(self, data, zhop_height, zhop_speed, layer_change_zhop,
+                                   travel_zhop, travel_distance, travel_layers):
+        """전통적 모드 스킵 스캔 제너레이터 (iter_traditional_mode와 동일한 출력)
+
+        🚀 G0, ;LAYER:, ;MESH:NONMESH 라인만 process_traditional_line으로 처리하고
+        그 사이 구간은 마지막 Z 값과 마지막 G1 압출 좌표만 rfind로 조회.
+        travel Z-홉 대상이 아닌 레이어는 라인 분할/스캔 없이 ;LAYER: 라인(레이어 변경 Z-홉)만 처리
+        """
+        for layer_index, layer in enumerate(data):
+            self.current_layer_index = layer_index
+            marker = self.find_untargeted_layer_marker(layer, travel_zhop, travel_layers)
+            if marker is not None:
+                replacements = []
+                if marker >= 0 and layer_change_zhop:
+                    line_start = layer.rfind('\n', 0, marker) + 1
+                    line_end = layer.find('\n', marker)
+                    if line_end < 0:
+                        line_end = len(layer)
+                    line = layer[line_start:line_end]
+                    state = self.new_traditional_state()
+                    if line_start > 0:
+                        values = self.find_last_values(layer, 'Z', 0, line_start, self.find_thumbnail_spans(layer))
+                        if values:
+                            state['current_z'] = values[0]
+                    line_output = self.process_traditional_line(
+                        state, line, zhop_height, zhop_speed, layer_change_zhop,
+                        travel_zhop, travel_distance, travel_layers)
+                    if line_output is not None and line_output != line + "\n":
+                        replacements.append((line_start, line_end, line_output[:-1]))
+                if not self.dry_run:
+                    yield self.splice_layer(layer, replacements, strip_end=True)
+                continue
+            state = self.new_traditional_state()
+            skip_spans = self.find_thumbnail_spans(layer)
+            replacements = []
+            position = 0
+
+            while position <= len(layer):
+                if travel_zhop and state['tr_z_hop_saved']:
+                    # 레이어 변경 Z-홉과 겹쳐 보류된 travel Z-홉은 바로 다음 라인에 출력
+                    line_start = position
+                    line_end = layer.find('\n', position)
+                    if line_end < 0:
+                        line_end = len(layer)
                 else:
-                    output_gcode += line + "\n"
+                    match = TRADITIONAL_EVENT_PATTERN.search(layer, position)
+                    gap_end = match.start() if match else len(layer)
+                    if gap_end > position:
+                        values = self.find_last_values(layer, 'Z', position, gap_end, skip_spans)
+                        if values:
+                            state['current_z'] = values[0]
+                        if travel_zhop and state['tr_layer']:
+                            extrusion = self.find_last_extrusion(layer, position, gap_end)
+                            if extrusion is not None:
+                                state['saved_x'], state['saved_y'] = extrusion
+                                state['g1_saved'] = True
+                    if match is None:
+                        break
+                    line_start, line_end = match.span()
 
-                # MESH:NONMESH 처리 (원본 방식 - 마지막에!)
-                if ";MESH:NONMESH" in line:
-                    lc_line = True
-                    tr_layer = False  # 원본은 여기서 False로 설정!
-            
-            processed_data.append(output_gcode.rstrip())
-        
-        return processed_data
+                line = layer[line_start:line_end]
+                line_output = self.process_traditional_line(
+                    state, line, zhop_height, zhop_speed, layer_change_zhop,
+                    travel_zhop, travel_distance, travel_layers)
+                if line_output is not None and line_output != line + "\n":
+                    replacements.append((line_start, line_end, line_output[:-1]))
+                position = line_end + 1
 
-    def execute_slingshot_mode(self, data, zhop_height, zhop_speed, layer_change_zhop,
-                             travel_zhop, travel_distance_threshold, custom_layer_list, top_bottom_only, 
-                             slingshot_settings):
-        """스마트 모드 실행 (smart_mode 완전 통합 버전 - V2 3-stage 시스템 포함)"""
-        processed_data = []
-        
-        # Note: slingshot_settings is expected to be a dictionary with keys like:
-        # 'min_zhop', 'max_distance', 'trajectory_mode', 
-        # 'ascent_ratio', 'descent_ratio', 'ascent_angle', 'descent_angle', 'z_feedrate'
+            if not self.dry_run:
+                yield self.splice_layer(layer, replacements, strip_end=True)
+
+    def find_untargeted_layer_marker(self, layer, travel_zhop, travel_layers):
+        """travel Z-홉 대상이 아닌 레이어의 ;LAYER: 마커 위치 (-1: 마커 없음, 라인 단위 처리가 필요하면 None)
+
+        전통적 모드의 Z-홉은 ;LAYER: 라인(레이어 변경)과 대상 레이어의 travel에서만 생기므로,
+        마커가 하나뿐이고 대상 번호가 아닌 레이어는 마커 라인 외에는 바뀌지 않음
+        """
+        marker = layer.find(';LAYER:')
+        if marker < 0:
+            return -1
+        if layer.find(';LAYER:', marker + 1) >= 0:
+            return None  # 마커가 여러 개인 레이어는 라인 단위로 판단
+        if travel_zhop:
+            if travel_layers is None:
+                return None
+            line_end = layer.find('\n', marker)
+            if self.parse_layer_marker(layer[marker:line_end if line_end >= 0 else len(layer)]) in travel_layers:
+                return None
+        return marker
 
+    def find_last_extrusion(self, text, start, end):
+        """text[start:end]의 마지막 G1 X/Y/E 압출 라인 좌표 (x, y) 반환 (없으면 None)"""
+        while True:
+            position = text.rfind('G1', start, end)
+            if position < 0:
+                return None
+            if position == 0 or text[position - 1] == '\n':
+                line_end = text.find('\n', position)
+                line = text[position:line_end if line_end >= 0 else len(text)]
+                x, y = self.getValue(line, 'X'), self.getValue(line, 'Y')
+                if x is not None and y is not None and self.getValue(line, 'E') is not None:
+                    return x, y
+            end = position + 1
+
+    def find_thumbnail_spans(self, text):
+        """썸네일 base64 주석 블록의 (시작, 끝) 위치 목록"""
+        if '; thumbnail' not in text:
+            return []
+        return [match.span() for match in SKIP_SCAN_THUMBNAIL_PATTERN.finditer(text)]
+
+    def iter_slingshot_skip_scan(self, data, zhop_height, zhop_speed, layer_change_zhop,
+                                 travel_zhop, travel_distance_threshold, travel_layers,
+                                 slingshot_settings):
+        """스마트 모드 스킵 스캔 제너레이터 (iter_slingshot_mode와 동일한 출력)
+
+        🚀 레이어 문자열에서 travel 후보 라인만 정규식으로 찾아 처리:
+        - 압출 라인 등 변경되지 않는 구간은 슬라이스로 그대로 복사
+        - 위치/F/E 상태는 travel 직전 구간을 뒤에서부터 rfind로 필요한 만큼만 조회
+        - 썸네일 base64 블록은 통째로 건너뜀
+        - travel_layers에 없는 레이어는 스캔 없이 원본 객체 그대로 반환하고, 다음 대상 레이어에서
+          필요한 위치/속도 값만 건너뛴 레이어 끝에서부터 거꾸로 조회
+        - 레이어 변경 Z-홉은 레이어 앞부분만 보고 첫 travel 시퀀스에 합침 (비대상 레이어도 그 부분만 처리)
+        """
         actual_current_x, actual_current_y, actual_current_z = 0.0, 0.0, 0.0
-        current_feedrate = None  # 현재 활성화된 feedrate 추적        # More robust initialization would involve parsing initial G-code state or carrying over from Cura.
-        # For script scope, we often reset or try to find first G1 with X,Y,Z in the layer.
+        current_feedrate = None
+        skipped_layers = []  # 위치 상태가 반영되지 않은 비대상 레이어
+        # 피처 타입은 정책 적용과 Z-홉 예산 점수에 사용
+        track_features = bool(slingshot_settings.get('feature_policy') or slingshot_settings.get('hop_budget'))
+        feature_type = None  # 지금까지의 마지막 ;TYPE:
+        height_map = self.new_height_map(slingshot_settings)
+        # 분석 전용 모드는 궤적을 만들지 않으므로 F 값은 하이브리드 시간 비교에만 필요
+        state_keys = 'XYZF' if not self.dry_run or slingshot_settings.get('hybrid') else 'XYZ'
 
         for layer_index, layer_gcode in enumerate(data):
-            lines = layer_gcode.split('\n')
-            processed_lines = []
-            
-            # Attempt to find initial position for the layer if not carried over
-            # This is a simplified approach for layer-by-layer processing.
-            # A full G-code parser would maintain state across the entire file.
-            # For now, we assume actual_current_x,y,z are updated by each G-code line.
-            # If the first line of a layer doesn't set them, they might be from previous layer's end.            # 리트랙션 감지를 위한 E 값 변화 추적 (직전 2개 E 값)
-            e_value_history = []  # [이전 E 값, 현재 E 값] 형태로 최대 2개 저장
-            is_first_travel_after_retraction = False
-            
-            # 연속 travel move 그룹화를 위한 변수들
-            in_travel_sequence = False
-            travel_sequence_start_x = None
-            travel_sequence_start_y = None
-            travel_sequence_start_z = None
-            travel_sequence_moves = []
+            self.current_layer_index = layer_index
+            if height_map is not None:
+                height_map.new_layer()
+            layer_start_feature_type = feature_type
+            if track_features:
+                feature_markers = self.find_feature_markers(layer_gcode)
+                feature_type = feature_markers[1][-1] if feature_markers[1] else feature_type
+            layer_number = self.layer_number(layer_gcode)
+            targeted = travel_zhop and (travel_layers is None or layer_number in travel_layers)
+            layer_change_start, absorbed_spans = None, []
+            if layer_change_zhop and layer_number is not None:
+                layer_change_start, absorbed_spans = self.find_layer_change_travel(layer_gcode)
+            if not targeted and layer_change_start is None:
+                skipped_layers.append(layer_gcode)
+                if height_map is not None:
+                    # 높이 맵은 비대상 레이어도 압출 위치를 모두 반영 (다음 레이어의 이전 레이어 격자)
+                    self.trace_height_map_text(height_map, layer_gcode, 0, len(layer_gcode))
+                if not self.dry_run:
+                    yield layer_gcode
+                continue
+            if skipped_layers:
+                values = self.find_last_layer_values(skipped_layers, 'XYZF')
+                actual_current_x = values.get('X', actual_current_x)
+                actual_current_y = values.get('Y', actual_current_y)
+                actual_current_z = values.get('Z', actual_current_z)
+                current_feedrate = values.get('F', current_feedrate)
+                skipped_layers = []
+            layer_start_z = actual_current_z  # 레이어 변경 Z-홉 출발 높이
 
-            for line_index, line in enumerate(lines):
+            skip_spans = self.find_thumbnail_spans(layer_gcode)
+
+            e_value_history = []  # 레이어 단위 리트랙션 감지 (직전 2개 E 값)
+            replacements = []  # (시작, 끝, 궤적 G-code)
+            scan_position = 0  # 위치 상태가 반영되지 않은 구간 시작
+            travel_moves = []
+            sequence_end = -1
+            traced_until = 0  # 높이 맵에 반영된 구간 끝
+
+            def flush_gap(gap_end):
+                """travel 사이 구간의 마지막 X/Y/Z/F/E 값으로 상태 갱신"""
+                nonlocal actual_current_x, actual_current_y, actual_current_z, current_feedrate
+                if gap_end <= scan_position:
+                    return
+                values = {key: self.find_last_values(layer_gcode, key, scan_position, gap_end, skip_spans)
+                          for key in state_keys}
+                if values['X']: actual_current_x = values['X'][0]
+                if values['Y']: actual_current_y = values['Y'][0]
+                if values['Z']: actual_current_z = values['Z'][0]
+                if values.get('F'): current_feedrate = values['F'][0]
+                recent_e = self.find_last_values(layer_gcode, 'E', scan_position, gap_end, skip_spans, count=2)
+                e_value_history[:] = (e_value_history + recent_e[::-1])[-2:]
+
+            def trace_height_map_until(end):
+                """높이 맵에 end 위치(라인 시작)까지의 압출 반영"""
+                nonlocal traced_until
+                self.trace_height_map_text(height_map, layer_gcode, traced_until, end)
+                traced_until = end
+
+            def flush_sequence():
+                """모인 travel 시퀀스를 처리하고 원본 구간 대신 결과 라인 삽입"""
+                start_x, start_y, start_z = travel_moves[0]['start_position']
+                retraction = len(e_value_history) >= 2 and e_value_history[-1] < e_value_history[-2]
+                if retraction:
+                    print(f"🔍 리트랙션 감지: E {e_value_history[-2]:.3f} → {e_value_history[-1]:.3f} (감소: {e_value_history[-2] - e_value_history[-1]:.3f})")
+                layer_change = native_hop = native_spans = None
+                if travel_moves[0]['start'] == layer_change_start:
+                    layer_change = {'z': layer_start_z,
+                                    'lines': [layer_gcode[start:end] for start, end in absorbed_spans]}
+                else:
+                    native_spans = self.find_native_hop_spans(layer_gcode, travel_moves[0]['start'], sequence_end)
+                if native_spans is not None:
+                    (lift_start, lift_end), (drop_start, drop_end) = native_spans
+                    gap_start, gap_z = travel_moves[0]['gap']
+                    pre_lift_z = (self.find_last_values(layer_gcode, 'Z', gap_start, lift_start, skip_spans)
+                                  or [gap_z])[0]
+                    native_hop = self.make_native_hop(layer_gcode[lift_start:lift_end],
+                                                      layer_gcode[drop_start:drop_end], pre_lift_z, travel_moves)
+                feature_types = None
+                if track_features and layer_change is None:
+                    feature_types = self.find_feature_types(layer_gcode, travel_moves[0]['start'], sequence_end,
+                                                            feature_markers, layer_start_feature_type)
+                if height_map is not None:
+                    trace_height_map_until(travel_moves[0]['start'])
+                sequence_lines = []
+                hopped = self.process_travel_sequence(
+                    start_x, start_y, start_z, travel_moves, sequence_lines,
+                    travel_distance_threshold, zhop_height, zhop_speed,
+                    slingshot_settings, current_feedrate, retraction, layer_change, native_hop, feature_types,
+                    height_map
+                )
+                if not self.dry_run:
+                    if layer_change is not None:
+                        # 합쳐진 Z 단독 이동 라인 제거
+                        replacements.extend((start, end + 1, '') for start, end in absorbed_spans)
+                    replaced = native_hop is not None and hopped
+                    if replaced:
+                        replacements.extend(self.native_hop_removals(layer_gcode, native_spans[:1]))
+                    replacements.append((travel_moves[0]['start'], sequence_end, '\n'.join(sequence_lines)))
+                    if replaced:
+                        replacements.extend(self.native_hop_removals(layer_gcode, native_spans[1:]))
+
+            for match in SKIP_SCAN_TRAVEL_PATTERN.finditer(layer_gcode):
+                line = match.group()
+                if self.layer_change_line_kind(line) != 'travel':  # is_travel_move와 같은 판단
+                    continue  # Z 단독 이동 등: 다음 구간 스캔에서 상태 반영
+
+                carried = []
+                if travel_moves and match.start() != sequence_end + 1:
+                    if self.find_chained_travel(layer_gcode, sequence_end + 1) == match.start():
+                        # 비이동 라인만 사이에 있으면 같은 시퀀스로 이어서 함께 옮김
+                        carried = layer_gcode[sequence_end + 1:match.start() - 1].split('\n')
+                        flush_gap(match.start())
+                    else:
+                        flush_sequence()
+                        travel_moves = []
+                if not travel_moves:
+                    gap = (scan_position, actual_current_z)  # 슬라이서 Z-홉 상승 전 높이 조회용
+                    flush_gap(match.start())
+                    start_position = (actual_current_x, actual_current_y, actual_current_z)
+
+                parsed_x = self.getValue(line, 'X')
+                parsed_y = self.getValue(line, 'Y')
+                parsed_z = self.getValue(line, 'Z')
+                parsed_f = self.getValue(line, 'F') if 'F' in state_keys else None
+                if parsed_f is not None:
+                    current_feedrate = parsed_f
+                if parsed_x is not None: actual_current_x = parsed_x
+                if parsed_y is not None: actual_current_y = parsed_y
+                if parsed_z is not None: actual_current_z = parsed_z
+                travel_moves.append({
+                    'line': line,
+                    'target_x': actual_current_x,
+                    'target_y': actual_current_y,
+                    'target_z': actual_current_z,
+                    'feedrate': parsed_f,
+                    'start': match.start(),
+                    'start_position': start_position,
+                    'gap': gap,
+                    'carried': carried,
+                })
+                sequence_end = scan_position = match.end()
+                if not targeted:
+                    # 비대상 레이어: 이어지는 travel이 없으면 레이어 변경 시퀀스만 처리하고 종료
+                    if self.find_chained_travel(layer_gcode, sequence_end + 1) is None:
+                        break
+
+            if travel_moves:
+                flush_sequence()
+            if height_map is not None:
+                trace_height_map_until(len(layer_gcode))
+            if targeted:
+                flush_gap(len(layer_gcode))  # 다음 레이어로 이어지는 위치/속도 상태
+            else:
+                skipped_layers.append(layer_gcode)
+
+            if not self.dry_run:
+                yield self.splice_layer(layer_gcode, replacements)
+
+    def find_last_layer_values(self, layers, keys):
+        """레이어 목록 끝에서부터 거꾸로 각 key의 마지막 값 조회 → {key: 값} (없는 key는 제외)"""
+        found = {}
+        for layer in reversed(layers):
+            missing = [key for key in keys if key not in found]
+            if not missing:
+                break
+            skip_spans = self.find_thumbnail_spans(layer)
+            for key in missing:
+                values = self.find_last_values(layer, key, 0, len(layer), skip_spans)
+                if values:
+                    found[key] = values[0]
+        return found
+
+    def find_last_values(self, text, key, start, end, skip_spans=(), count=1):
+        """text[start:end]에서 key 값이 있는 마지막 라인부터 거꾸로 최대 count개 값 반환 (getValue 규칙)"""
+        values = []
+        while len(values) < count:
+            position = text.rfind(key, start, end)
+            if position < 0:
+                break
+            line_start = text.rfind('\n', 0, position) + 1
+            skipped = next((span_start for span_start, span_end in skip_spans
+                            if span_start <= position < span_end), None)
+            if skipped is not None:
+                end = skipped  # 썸네일 블록 통째로 건너뜀
+                continue
+            line_end = text.find('\n', position)
+            value = self.getValue(text[line_start:line_end if line_end >= 0 else len(text)], key)
+            if value is not None:
+                values.append(value)
+            end = line_start
+        return values
+
+    def execute_slingshot_mode(self, data, zhop_height, zhop_speed, layer_change_zhop,
+                             travel_zhop, travel_distance_threshold, travel_layers, 
+                             slingshot_settings):
+        """스마트 모드 실행 (smart_mode 완전 통합 버전 - V2 3-stage 시스템 포함)"""
+        return list(self.iter_slingshot_mode(data, zhop_height, zhop_speed, layer_change_zhop,
+                                             travel_zhop, travel_distance_threshold, travel_layers, slingshot_settings))
+
+    def iter_slingshot_mode(self, data, zhop_height, zhop_speed, layer_change_zhop,
+                            travel_zhop, travel_distance_threshold, travel_layers, 
+                            slingshot_settings):
+        """스마트 모드 레이어 단위 제너레이터"""
+        
+        # Note: slingshot_settings is expected to be a dictionary with keys like:
+        # 'min_zhop', 'max_distance', 'trajectory_mode', 
+        # 'ascent_ratio', 'descent_ratio', 'ascent_angle', 'descent_angle', 'z_feedrate'
+
+        actual_current_x, actual_current_y, actual_current_z = 0.0, 0.0, 0.0
+        # 피처 타입은 정책 적용과 Z-홉 예산 점수에 사용
+        track_features = bool(slingshot_settings.get('feature_policy') or slingshot_settings.get('hop_budget'))
+        feature_type = None  # 지금까지의 마지막 ;TYPE:
+        height_map = self.new_height_map(slingshot_settings)
+        current_feedrate = None  # 현재 활성화된 feedrate 추적        # More robust initialization would involve parsing initial G-code state or carrying over from Cura.
+        # For script scope, we often reset or try to find first G1 with X,Y,Z in the layer.
+
+        for layer_index, layer_gcode in enumerate(data):
+            self.current_layer_index = layer_index
+            lines = layer_gcode.split('\n')
+            replacements = []  # (시작, 끝, 궤적 G-code) - 나머지 라인은 원본 구간 그대로
+            line_start = 0
+            if height_map is not None:
+                height_map.new_layer()
+            
+            # Attempt to find initial position for the layer if not carried over
+            # This is a simplified approach for layer-by-layer processing.
+            # A full G-code parser would maintain state across the entire file.
+            # For now, we assume actual_current_x,y,z are updated by each G-code line.
+            # If the first line of a layer doesn't set them, they might be from previous layer's end.            # 리트랙션 감지를 위한 E 값 변화 추적 (직전 2개 E 값)
+            e_value_history = []  # [이전 E 값, 현재 E 값] 형태로 최대 2개 저장
+            is_first_travel_after_retraction = False
+            # 대상 레이어가 아니면 위치만 추적 (travel Z-홉 없음)
+            layer_targeted = travel_layers is None or self.layer_number(layer_gcode) in travel_layers
+            # 레이어 변경 Z-홉: 첫 travel 전까지 Z 단독 이동을 모았다가 첫 travel 시퀀스에 합침
+            layer_change_window = layer_change_zhop and self.layer_number(layer_gcode) is not None
+            layer_change = None
+            layer_start_z = actual_current_z
+            absorbed_spans = []
+            z_before_line = {}  # Z 단독 이동 라인 시작 → 그 직전 Z (슬라이서 Z-홉 판단용)
+            layer_start_feature_type = feature_type
+            if track_features:
+                feature_markers = self.find_feature_markers(layer_gcode)
+                feature_type = feature_markers[1][-1] if feature_markers[1] else feature_type
+            
+            # 연속 travel move 그룹화를 위한 변수들
+            in_travel_sequence = False
+            travel_sequence_start_x = None
+            travel_sequence_start_y = None
+            travel_sequence_start_z = None
+            travel_sequence_moves = []
+            carried_lines = []  # 시퀀스 중간 비이동 라인
+
+            for line_index, line in enumerate(lines):
                 # Store position *before* this line is processed for Z-hop decision
                 start_x_for_move = actual_current_x
                 start_y_for_move = actual_current_y
@@ -710,11 +2316,25 @@ class SmartZHop(Script):
                 if parsed_f is not None:
                     current_feedrate = parsed_f
 
+                if parsed_z is not None and parsed_x is None and parsed_y is None:
+                    z_before_line[line_start] = actual_current_z
+                if layer_change_window and not is_travel:
+                    kind = self.layer_change_line_kind(line)
+                    if kind == 'z_only':
+                        absorbed_spans.append((line_start, line_start + len(line)))
+                    elif kind == 'break':
+                        layer_change_window = False
+
                 # 연속 travel move 감지 및 그룹화
-                if travel_zhop and is_travel and not line.startswith(';'):
+                if is_travel and not line.startswith(';') and \
+                        (in_travel_sequence or layer_change_window or (travel_zhop and layer_targeted)):
                     if not in_travel_sequence:
                         # 새로운 travel 시퀀스 시작
                         in_travel_sequence = True
+                        if layer_change_window:
+                            layer_change = {'z': layer_start_z,
+                                            'lines': [layer_gcode[start:end] for start, end in absorbed_spans]}
+                            layer_change_window = False
                         travel_sequence_start_x = start_x_for_move
                         travel_sequence_start_y = start_y_for_move
                         travel_sequence_start_z = start_z_for_move
@@ -729,92 +2349,126 @@ class SmartZHop(Script):
                         'target_x': target_x,
                         'target_y': target_y,
                         'target_z': target_z,
-                        'line_index': line_index
+                        'feedrate': parsed_f,
+                        'line_index': line_index,
+                        'start': line_start,
+                        'carried': carried_lines
                     })
+                    carried_lines = []
                     
                     actual_current_x = target_x
                     actual_current_y = target_y
                     actual_current_z = target_z
 
-                    # 다음 라인이 travel move인지 미리 확인
-                    next_is_travel = False
-                    if line_index + 1 < len(lines):
-                        next_line = lines[line_index + 1]
-                        next_is_travel = self.is_travel_move(next_line)
+                    # 비이동 라인만 지나 다음 travel move가 이어지는지 미리 확인
+                    next_is_travel = self.find_chained_travel(layer_gcode, line_start + len(line) + 1) is not None
                     
                     
 
                     # 다음 라인이 travel이 아니면 시퀀스 종료 및 처리
                     if not next_is_travel:
-                        self.process_travel_sequence(
+                        last_move = travel_sequence_moves[-1]
+                        sequence_end = last_move['start'] + len(last_move['line'])
+                        native_hop = native_spans = None
+                        if layer_change is None:
+                            native_spans = self.find_native_hop_spans(
+                                layer_gcode, travel_sequence_moves[0]['start'], sequence_end)
+                        if native_spans is not None:
+                            (lift_start, lift_end), (drop_start, drop_end) = native_spans
+                            native_hop = self.make_native_hop(
+                                layer_gcode[lift_start:lift_end], layer_gcode[drop_start:drop_end],
+                                z_before_line[lift_start], travel_sequence_moves)
+                        feature_types = None
+                        if track_features and layer_change is None:
+                            feature_types = self.find_feature_types(
+                                layer_gcode, travel_sequence_moves[0]['start'], sequence_end,
+                                feature_markers, layer_start_feature_type)
+                        sequence_lines = []
+                        hopped = self.process_travel_sequence(
                             travel_sequence_start_x, travel_sequence_start_y, travel_sequence_start_z,
-                            travel_sequence_moves, processed_lines, 
+                            travel_sequence_moves, sequence_lines, 
                             travel_distance_threshold, zhop_height, zhop_speed, 
                             slingshot_settings, current_feedrate,
-                            is_first_travel_after_retraction
+                            is_first_travel_after_retraction, layer_change, native_hop, feature_types,
+                            height_map
                         )
+                        if not self.dry_run:
+                            if layer_change is not None:
+                                # 합쳐진 Z 단독 이동 라인 제거
+                                replacements.extend((start, end + 1, '') for start, end in absorbed_spans)
+                            replaced = native_hop is not None and hopped
+                            if replaced:
+                                replacements.extend(self.native_hop_removals(layer_gcode, native_spans[:1]))
+                            replacements.append((travel_sequence_moves[0]['start'], sequence_end,
+                                                 '\n'.join(sequence_lines)))
+                            if replaced:
+                                replacements.extend(self.native_hop_removals(layer_gcode, native_spans[1:]))
                         
                           # 시퀀스 리셋
                         in_travel_sequence = False
                         is_first_travel_after_retraction = False
+                        layer_change = None
                     
-                elif ";LAYER:" in line and layer_change_zhop: # Handle layer change Z-hop (potentially traditional)
-                    # This is a placeholder for layer change Z-hop logic.
-                    # It might involve a traditional Z-hop or be handled by `execute_traditional_mode`.
-                    # For now, just add the line and update Z if present.
-                    # The original Z_HopMove script had specific logic here.
-                    # If this script is purely for slingshot on travel, this might be simpler.
-                    # For now, assume it's a simple pass-through and Z update.
-                    # A proper implementation would insert a traditional Z-hop here if configured.
-                      # Example: Simple traditional Z-hop for layer change (if not handled elsewhere)
-                    # if layer_index > 0: # Avoid Z-hop on the very first layer
-                    # processed_lines.append(f"G1 Z{actual_current_z + zhop_height} F{zhop_speed * 60 if zhop_speed > 0 else self.getSettingValueByKey('z_feedrate', 60.0) * 60}") # Z up
-                    processed_lines.append(line) # The LAYER line itself
-                    if parsed_x is not None: actual_current_x = parsed_x # Unlikely in ;LAYER:
-                    if parsed_y is not None: actual_current_y = parsed_y # Unlikely in ;LAYER:
-                    if parsed_z is not None: actual_current_z = parsed_z # Update Z if ;LAYER: also has Z
-                    # processed_lines.append(f"G1 Z{actual_current_z} F{zhop_speed * 60 if zhop_speed > 0 else self.getSettingValueByKey('z_feedrate', 60.0) * 60}") # Z down after new layer moves
-                    # The above Z up/down for layer change is a simplification and needs to fit the overall script design.
-                    # The original script had more complex logic for lc_line, etc.
-                    # For now, just updating Z if the ;LAYER: line or subsequent lines change it.
-                    # The main point is that this is distinct from slingshot travel Z-hop.
-                    # If parsed_z is None from the ;LAYER: line, actual_current_z remains.                    # Usually, the slicer adds G1 Z commands after ;LAYER:
-                    # 현재 layer_gcode를 이용한 검색은 범위 문제로 인해 주석 처리
-                    # new_layer_z_match = re.search(r";LAYER:\d+\s*\n(?:G[01]\s+Z([\d\.]+))?", layer_gcode[lines.index(line):], re.MULTILINE)
-                    # if new_layer_z_match and new_layer_z_match.group(1):
-                    #     actual_current_z = float(new_layer_z_match.group(1))
-
-                else: # Not a travel move for Z-hop, or not a layer change
+                elif in_travel_sequence:
+                    # 이어지는 travel 사이의 비이동 라인: 시퀀스와 함께 옮김
+                    carried_lines.append(line)
+                    if parsed_x is not None: actual_current_x = parsed_x
+                    if parsed_y is not None: actual_current_y = parsed_y
+                    if parsed_z is not None: actual_current_z = parsed_z
+
+                else: # Not a travel move for Z-hop (레이어 변경 Z-홉은 첫 travel 시퀀스에서 처리)
                     # travel 시퀀스가 진행 중이었다면 여기서 강제 종료
                     if in_travel_sequence:
+                        sequence_lines = []
                         self.process_travel_sequence(
                             travel_sequence_start_x, travel_sequence_start_y, travel_sequence_start_z,
-                            travel_sequence_moves, processed_lines, 
+                            travel_sequence_moves, sequence_lines, 
                             travel_distance_threshold, zhop_height, zhop_speed, 
                             slingshot_settings, current_feedrate,
-                            is_first_travel_after_retraction
+                            is_first_travel_after_retraction, height_map=height_map
                         )
+                        if not self.dry_run:
+                            last_move = travel_sequence_moves[-1]
+                            replacements.append((travel_sequence_moves[0]['start'],
+                                                 last_move['start'] + len(last_move['line']),
+                                                 '\n'.join(sequence_lines)))
                         # 시퀀스 리셋
                         in_travel_sequence = False
                         is_first_travel_after_retraction = False
-                    processed_lines.append(line)
                     if parsed_x is not None: actual_current_x = parsed_x
                     if parsed_y is not None: actual_current_y = parsed_y
                     if parsed_z is not None: actual_current_z = parsed_z
                 
+                if height_map is not None:
+                    self.trace_height_map(height_map, line)
+
                 # 다음 반복을 위해 이전 라인 업데이트
                 previous_line = line
-            processed_data.append('\n'.join(processed_lines))
-        
-        return processed_data
+                line_start += len(line) + 1
+            if not self.dry_run:
+                yield self.splice_layer(layer_gcode, replacements)
 
     def process_travel_sequence(self, start_x, start_y, start_z, travel_moves, 
                                processed_lines, travel_distance_threshold, zhop_height, 
                                zhop_speed, slingshot_settings, current_feedrate, 
-                               is_first_travel_after_retraction):
-        """연속 travel move 시퀀스를 부드러운 연속 궤적으로 처리"""
+                               is_first_travel_after_retraction, layer_change=None, native_hop=None,
+                               feature_types=None, height_map=None):
+        """연속 travel move 시퀀스를 부드러운 연속 궤적으로 처리 → Z-홉 적용 여부 반환
+
+        layer_change: 새 레이어 첫 travel이면 {'z': 이전 레이어 Z, 'lines': 흡수한 Z 단독 이동 라인}
+        → 거리와 관계없이 Z-홉하며, 이전 레이어 높이에서 출발해 새 레이어 높이 기준 궤적 하나로 이동
+        native_hop: 시퀀스를 감싼 슬라이서 Z-홉 (make_native_hop 결과)
+        → Z-홉하면 슬라이서 상승/하강 대신 하강 후 높이 기준 궤적 하나로 대체 (호출 측에서 두 라인 제거)
+        move['carried']: 직전 travel과 이 travel 사이의 비이동 라인 → 궤적의 해당 구간 시작 위치에 그대로 출력
+        feature_types: (출발, 도착) 피처 타입 → slingshot_settings['feature_policy'] 규칙으로 Z-홉 여부/높이 결정
+        (레이어 변경 시퀀스는 정책과 관계없이 Z-홉)
+        Z-홉 예산 사용 시 1단계(plan_hop_budget)에서는 Z-홉 후보의 점수/추가 시간을 모으고,
+        2단계에서는 선택되지 않은 시퀀스의 Z-홉을 생략 (시퀀스 번호 = travel_sequences 순서)
+        """
         if not travel_moves:
-            return
+            return False
+        if native_hop is not None:
+            start_z = native_hop['base_z']  # 슬라이서 상승 없이 원래 높이에서 이동
         
         # 전체 경로의 XY 거리 적분 계산
         path_segments = []
@@ -822,11 +2476,16 @@ class SmartZHop(Script):
         total_distance = 0.0
 
         prev_x, prev_y, prev_z = start_x, start_y, start_z
+        # 분석 전용 모드는 궤적을 만들지 않으므로 구간 목록 없이 거리만 (하이브리드 시간 비교 제외)
+        build_segments = not self.dry_run or slingshot_settings.get('hybrid')
 
         # 각 구간별 거리와 누적 거리 계산
         for move in travel_moves:
             segment_distance = self.calculate_distance(prev_x, prev_y, move['target_x'], move['target_y'])
             total_distance += segment_distance
+            if not build_segments:
+                prev_x, prev_y = move['target_x'], move['target_y']
+                continue
             cumulative_distances.append(total_distance)
             
             path_segments.append({
@@ -835,31 +2494,251 @@ class SmartZHop(Script):
                 'start_z': prev_z,
                 'end_x': move['target_x'],
                 'end_y': move['target_y'],
-                'end_z': move['target_z'],
+                'end_z': move['target_z'] if native_hop is None else start_z,
                 'distance': segment_distance,
                 'cumulative_distance': total_distance,
-                'original_line': move['line']
+                'original_line': move['line'],
+                'carried': move.get('carried', [])
             })
 
-            prev_x, prev_y, prev_z = move['target_x'], move['target_y'], move['target_z']
+            prev_x, prev_y, prev_z = move['target_x'], move['target_y'], path_segments[-1]['end_z']
 
         # Z-hop 적용 조건 확인
-        should_zhop = (is_first_travel_after_retraction or 
+        should_zhop = (layer_change is not None or is_first_travel_after_retraction or 
                       total_distance > travel_distance_threshold)
+        self.dry_run_stats['travel_sequences'] += 1
+        sequence_id = self.dry_run_stats['travel_sequences'] - 1
+        policy_hop = False
+        policy = slingshot_settings.get('feature_policy')
+        if policy and feature_types is not None and layer_change is None:
+            action = self.resolve_feature_action(policy, *feature_types)
+            if action == 'skip':
+                if should_zhop:
+                    self.dry_run_stats['policy_skipped_hops'] += 1
+                should_zhop = False
+            elif action != 'auto':
+                if not should_zhop:
+                    self.dry_run_stats['policy_forced_hops'] += 1
+                should_zhop = True
+                policy_hop = True
+                if action != 'hop':
+                    zhop_height = action  # 정책 지정 높이
+                    height_map = None
+        budget_candidate = None
+        if should_zhop and slingshot_settings.get('hop_budget'):
+            if self.hop_budget_selection is not None and sequence_id not in self.hop_budget_selection:
+                self.dry_run_stats['budget_skipped_hops'] += 1
+                should_zhop = False
+            elif self.hop_budget_candidates is not None:
+                # 레이어 변경/정책 Z-홉은 예산과 관계없이 유지 (예산을 먼저 차지)
+                budget_candidate = {
+                    'id': sequence_id, 'layer': self.current_layer_index,
+                    'value': self.score_hop(start_x, start_y, travel_moves, total_distance,
+                                            is_first_travel_after_retraction, feature_types, height_map,
+                                            slingshot_settings),
+                    'cost': 0.0, 'mandatory': layer_change is not None or policy_hop,
+                }
+        if should_zhop and height_map is not None and slingshot_settings.get('height_map'):
+            # 경로가 지나는 인쇄 영역의 최고 Z 위로 zhop_height만 확보 (빈 영역이면 최소 높이)
+            min_zhop = slingshot_settings.get('min_zhop', 0.1)
+            top = height_map.path_top(start_x, start_y, travel_moves)
+            required = min_zhop if top is None else zhop_height - (start_z - top)
+            if required < zhop_height - 0.001 and min_zhop < zhop_height:
+                lowered = max(min_zhop, required)
+                self.dry_run_stats['height_map_lowered_hops'] += 1
+                self.dry_run_stats['height_map_height_saved'] += zhop_height - lowered
+                zhop_height = lowered
+        if should_zhop and native_hop is not None:
+            self.dry_run_stats['native_hops_replaced'] += 1
+            self.dry_run_stats['native_hop_z_saved'] += (
+                2 * native_hop['lift_z'] - native_hop['z'] - native_hop['base_z'])
+        strategy = hybrid_lines = hybrid_moves = None
+        if slingshot_settings.get('hybrid'):
+            # 하이브리드: Z-홉이 필요 없으면 그대로, 필요하면 예상 시간이 짧은 방식 선택
+            # (레이어 변경/슬라이서 Z-홉을 합치거나 Z가 바뀌는 시퀀스는 슬링샷 궤적으로만 처리)
+            strategy = 'none'
+            if should_zhop:
+                strategy = 'slingshot'
+                if layer_change is None and native_hop is None and \
+                        all(abs(move['target_z'] - start_z) <= 0.001 for move in travel_moves):
+                    strategy, hybrid_lines, hybrid_moves = self.select_hybrid_strategy(
+                        start_x, start_y, start_z, travel_moves, path_segments, total_distance,
+                        zhop_height, zhop_speed, slingshot_settings, current_feedrate)
+            self.dry_run_stats['hybrid_choices'][strategy] += 1
         
-        if should_zhop:
-            # 연속 궤적 Z-hop 궤적 생성
-            trajectory_gcode_lines = self.calculate_continuous_curve_trajectory(
-                start_x, start_y, start_z, path_segments, total_distance,
-                zhop_height, zhop_speed, slingshot_settings, current_feedrate
-            )
+        if self.dry_run:
+            # 분석 전용 모드: 궤적 생성 없이 높이만 계산하여 기록
+            if should_zhop:
+                hop_height = self.calculate_dynamic_height(
+                    total_distance, zhop_height, slingshot_settings.get('min_zhop', 0.1),
+                    slingshot_settings.get('max_distance', 80.0), slingshot_settings)
+                self.record_dry_run_hop(total_distance, hop_height,
+                                        is_first_travel_after_retraction and
+                                        total_distance <= travel_distance_threshold)
+                if layer_change is not None:
+                    self.dry_run_stats['layer_change_hops'] += 1
+        elif should_zhop:
+            original_lines = [line for move in travel_moves for line in move.get('carried', []) + [move['line']]]
+            entry_z = None
+            if layer_change is not None:
+                # 레이어 Z 이동을 궤적에 합침: 새 레이어 높이 기준 궤적, 출발은 이전 레이어 높이
+                entry_z = layer_change['z']
+                original_lines = layer_change['lines'] + original_lines
+                start_z = travel_moves[-1]['target_z']
+            elif native_hop is not None:
+                # 슬라이서 상승/하강 라인을 궤적에 합침 (상승 전 높이에서 출발)
+                if abs(native_hop['z'] - start_z) > 0.001:
+                    entry_z = native_hop['z']
+                original_lines = native_hop['lines'] + original_lines + [native_hop['drop_line']]
+            if hybrid_lines is not None:
+                # 하이브리드 모드에서 이미 만든 궤적
+                trajectory_gcode_lines, trajectory_moves = hybrid_lines, hybrid_moves
+            else:
+                # 연속 궤적 Z-hop 궤적 생성
+                trajectory_moves = []
+                trajectory_gcode_lines = self.calculate_continuous_curve_trajectory(
+                    start_x, start_y, start_z, path_segments, total_distance,
+                    zhop_height, zhop_speed, slingshot_settings, current_feedrate, entry_z,
+                    trajectory_moves
+                )
             processed_lines.extend(trajectory_gcode_lines)
+            delta = self.record_hop_time(start_x, start_y, start_z if entry_z is None else entry_z,
+                                         original_lines, trajectory_moves, current_feedrate, zhop_speed)
+            if budget_candidate is not None:
+                budget_candidate['cost'] = delta
+                self.hop_budget_candidates.append(budget_candidate)
         else:
             # Z-hop 조건에 맞지 않으면 원본 라인들 그대로 추가
             for move in travel_moves:
+                processed_lines.extend(move.get('carried', []))
                 processed_lines.append(move['line'])
+        return should_zhop
                 
 
+    def traditional_hop_lines(self, travel_lines, base_z, zhop_height, distance, zhop_speed):
+        """전통적 방식 Z-홉 라인 (수직 상승 → 원본 travel → 수직 하강, 전통적 모드와 같은 형식)"""
+        lines = []
+        speed_control = zhop_speed > 0 and self.original_z_max_feedrate is not None
+        if speed_control and self.get_zhop_speed_gcode(zhop_speed):
+            lines.append(self.get_zhop_speed_gcode(zhop_speed))
+        lines.append(f"G0 Z{base_z + zhop_height:.2f};Smart Z-Hop Travel Up, D:{distance:.2f}")
+        lines.extend(travel_lines)
+        lines.append(f"G0 Z{base_z:.2f};Smart Z-Hop Travel Down")
+        if speed_control and self.restore_original_speed_gcode():
+            lines.append(self.restore_original_speed_gcode())
+        return lines
+
+    def select_hybrid_strategy(self, start_x, start_y, start_z, travel_moves, path_segments, total_distance,
+                               zhop_height, zhop_speed, slingshot_settings, current_feedrate):
+        """하이브리드 모드: 슬링샷 궤적과 전통적 수직 Z-홉 중 예상 실행 시간이 짧은 쪽 → (방식, 라인, 좌표)
+
+        두 방식 모두 슬링샷 궤적과 같은 최고 높이(거리 기반 동적 높이)를 확보하고,
+        시간은 SETTING_3의 기계 한계값과 Z-홉 속도 제한으로 추정 (같으면 슬링샷)
+        """
+        limits = self.hop_time_limits(zhop_speed)
+        travel_lines = [line for move in travel_moves for line in move.get('carried', []) + [move['line']]]
+        hop_height = self.calculate_dynamic_height(
+            total_distance, zhop_height, slingshot_settings.get('min_zhop', 0.1),
+            slingshot_settings.get('max_distance', 80.0), slingshot_settings)
+        slingshot_moves = []
+        traditional_moves = [(start_x, start_y, start_z + hop_height, None)]
+        traditional_moves.extend((move['target_x'], move['target_y'], start_z + hop_height, move.get('feedrate'))
+                                 for move in travel_moves)
+        traditional_moves.append((travel_moves[-1]['target_x'], travel_moves[-1]['target_y'], start_z, None))
+        candidates = {
+            'slingshot': (self.calculate_continuous_curve_trajectory(
+                start_x, start_y, start_z, path_segments, total_distance,
+                zhop_height, zhop_speed, slingshot_settings, current_feedrate, moves=slingshot_moves),
+                slingshot_moves),
+            'traditional': (self.traditional_hop_lines(travel_lines, start_z, hop_height, total_distance, zhop_speed),
+                            traditional_moves),
+        }
+        times = {name: self.estimate_moves_time(start_x, start_y, start_z, moves, current_feedrate, limits)[0]
+                 for name, (_, moves) in candidates.items()}
+        strategy = min(candidates, key=times.get)
+        return (strategy,) + candidates[strategy]
+
+    def score_hop(self, start_x, start_y, travel_moves, total_distance, after_retraction, feature_types,
+                  height_map, slingshot_settings):
+        """Z-홉 예산용 travel 가치 점수 (길이 0~1 + 리트랙션 직후 1 + 인쇄 영역 통과 2 + 도착 피처 가산점)"""
+        value = min(total_distance / max(slingshot_settings.get('max_distance', 80.0), 0.001), 1.0)
+        if after_retraction:
+            value += 1.0
+        if height_map is not None and height_map.path_top(start_x, start_y, travel_moves) is not None:
+            value += 2.0  # 노즐이 인쇄된 부분 위를 지나감 (충돌/스트링 위험)
+        if feature_types is not None and feature_types[1]:
+            value += FEATURE_HOP_VALUES.get(feature_types[1].strip().upper(), 0.0)
+        return value
+
+    def select_budget_hops(self, candidates, budget):
+        """Z-홉 후보 중 예산 안에서 가치가 높은 것 선택 → 선택된 시퀀스 번호 집합 (O(n log n))
+
+        budget: {'mode': 'time'(추가 시간 초) 또는 'count'(Z-홉 수), 'scope': 'job' 또는 'layer', 'value'}
+        필수 후보(레이어 변경/정책 Z-홉)가 예산을 먼저 차지하고, 나머지는 시간 예산이면 초당 가치,
+        개수 예산이면 가치가 높은 순으로 남은 예산에 들어가는 것만 선택 (추가 시간이 0 이하면 항상 선택)
+        """
+        by_time = budget['mode'] == 'time'
+        pools = {}
+        for candidate in candidates:
+            pools.setdefault(candidate['layer'] if budget['scope'] == 'layer' else None, []).append(candidate)
+
+        selected = set()
+        for pool in pools.values():
+            remaining = budget['value'] if by_time else int(budget['value'])
+            optional = []
+            for candidate in pool:
+                if candidate['mandatory']:
+                    selected.add(candidate['id'])
+                    remaining -= max(candidate['cost'], 0.0) if by_time else 1
+                else:
+                    optional.append(candidate)
+            if by_time:
+                optional.sort(key=lambda c: (c['cost'] > 0, -c['value'] / max(c['cost'], 1e-9), c['id']))
+            else:
+                optional.sort(key=lambda c: (-c['value'], c['id']))
+            for candidate in optional:
+                cost = max(candidate['cost'], 0.0) if by_time else 1
+                if cost <= remaining:
+                    selected.add(candidate['id'])
+                    remaining -= cost
+        return selected
+
+    def plan_hop_budget(self, slingshot_engine, engine_args, budget):
+        """Z-홉 예산 1단계: 엔진을 한 번 실행해 Z-홉 후보의 점수/추가 시간을 모으고 예산 안의 Z-홉 선택
+
+        1단계 출력과 로그는 버리고, 통계는 2단계 실행 전에 초기화
+        """
+        import contextlib
+        import io
+
+        dry_run = self.dry_run
+        self.dry_run = False  # 추가 시간은 궤적을 만들어야 계산 가능
+        self.hop_budget_candidates = []
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in slingshot_engine(*engine_args):
+                    pass
+            candidates = self.hop_budget_candidates
+        finally:
+            self.dry_run = dry_run
+            self.hop_budget_candidates = None
+
+        self.hop_budget_selection = self.select_budget_hops(candidates, budget)
+        kept = [candidate for candidate in candidates if candidate['id'] in self.hop_budget_selection]
+        unit = "초" if budget['mode'] == 'time' else "개"
+        scope = "레이어당" if budget['scope'] == 'layer' else "전체"
+        print(f"💰 Z-홉 예산 ({scope} {budget['value']:g}{unit}): 후보 {len(candidates)}개 중 {len(kept)}개 선택 "
+              f"(예상 추가 시간 {sum(c['cost'] for c in candidates):+.1f}초 → "
+              f"{sum(c['cost'] for c in kept):+.1f}초)")
+        self.reset_print_time_stats()
+        self.reset_dry_run_stats()
+
+    def new_height_map(self, slingshot_settings):
+        """높이 맵 Z-홉 높이 또는 Z-홉 예산 점수(인쇄 영역 통과 여부)에 쓸 높이 맵 (둘 다 꺼져 있으면 None)"""
+        if slingshot_settings.get('height_map') or slingshot_settings.get('hop_budget'):
+            return HeightMap(slingshot_settings['height_map_resolution'])
+        return None
+
     def calculate_dynamic_height(self, distance, max_zhop_height, min_zhop, max_distance, settings=None):
         """거리 기반 동적 높이 계산 (각도 우선 모드 지원)"""
         # 각도 우선 모드 체크
@@ -878,6 +2757,18 @@ class SmartZHop(Script):
             ratio = distance / max_distance
             return min_zhop + (max_zhop_height - min_zhop) * ratio
     
+    def trace_height_map(self, height_map, line):
+        """G 라인 하나를 높이 맵에 반영 (모든 엔진이 같은 라인을 같은 순서로 전달)"""
+        if not line.startswith('G'):
+            return
+        x, y, z, e = (self.getValue(line, key) for key in 'XYZE')
+        height_map.move(x, y, z, e is not None)
+
+    def trace_height_map_text(self, height_map, text, start, end):
+        """text[start:end]의 G 라인을 순서대로 높이 맵에 반영 (start/end는 라인 시작 위치)"""
+        for match in HEIGHT_MAP_LINE_PATTERN.finditer(text, start, end):
+            self.trace_height_map(height_map, match.group())
+
     def is_travel_move(self, line):
         """트래블 이동 여부 판단 (G0, G1 모두 지원)"""
         # G0 또는 G1으로 시작하는지 확인
@@ -890,6 +2781,130 @@ class SmartZHop(Script):
         
         return e_value is None and has_xy
 
+    def layer_change_line_kind(self, line, values=None):
+        """레이어 변경 Z-홉 대기 중 라인 분류 → 'travel', 'z_only'(흡수), 'break'(대기 종료), None(무관)
+
+        첫 travel 전에 압출/원호 등 위치가 바뀌는 이동이 있으면 합칠 travel이 없으므로 대기 종료
+        values: 이미 파싱한 (X, Y, Z, E) 값
+        """
+        if not line.startswith(('G0', 'G1', 'G2', 'G3')):
+            return None
+        if values is None and line[2:3] == ' ':
+            # 종류 판단에는 값이 아니라 존재 여부만 필요 (getValue와 같은 규칙을 정규식 한 번으로)
+            present = GCODE_AXIS_PRESENCE_PATTERN.findall(line, 3)
+            values = [0.0 if key in present else None for key in 'XYZE']
+        x, y, z, e = values or (self.getValue(line, key) for key in 'XYZE')
+        if line.startswith(('G0', 'G1')):
+            if e is None and (x is not None or y is not None):
+                return 'travel'
+            if z is not None and x is None and y is None and e is None:
+                return 'z_only'
+        if x is not None or y is not None or z is not None:
+            return 'break'
+        return None
+
+    def find_layer_change_travel(self, text):
+        """레이어 첫 travel 위치와 그 앞의 Z 단독 이동 구간 목록 → (위치, [(시작, 끝)]), 없으면 (None, [])"""
+        absorbed = []
+        position = 0
+        while position < len(text):
+            line_end = text.find('\n', position)
+            if line_end < 0:
+                line_end = len(text)
+            kind = self.layer_change_line_kind(text[position:line_end])
+            if kind == 'travel':
+                return position, absorbed
+            if kind == 'z_only':
+                absorbed.append((position, line_end))
+            elif kind == 'break':
+                break
+            position = line_end + 1
+        return None, []
+
+    def find_previous_motion_line(self, text, sequence_start):
+        """travel 시퀀스 바로 앞 이동 라인 → (시작, 끝, 종류) 또는 None (주석/리트랙션 등 비이동 라인은 건너뜀)
+
+        종류는 layer_change_line_kind 값
+        """
+        line_end = sequence_start - 1
+        while line_end > 0:
+            line_start = text.rfind('\n', 0, line_end) + 1
+            kind = self.layer_change_line_kind(text[line_start:line_end])
+            if kind is not None:
+                return line_start, line_end, kind
+            line_end = line_start - 1
+        return None
+
+    def find_next_motion_line(self, text, sequence_end):
+        """travel 시퀀스 바로 뒤 이동 라인 → (시작, 끝, 종류) 또는 None"""
+        position = sequence_end + 1
+        while position < len(text):
+            line_end = text.find('\n', position)
+            if line_end < 0:
+                line_end = len(text)
+            kind = self.layer_change_line_kind(text[position:line_end])
+            if kind is not None:
+                return position, line_end, kind
+            position = line_end + 1
+        return None
+
+    def find_native_hop_spans(self, text, sequence_start, sequence_end):
+        """travel 시퀀스 바로 앞/뒤 이동 라인이 Z 단독 이동이면 (상승 구간, 하강 구간), 아니면 None
+
+        사이의 주석/리트랙션 등 비이동 라인은 건너뜀 (Cura "Z Hop When Retracted" 형태)
+        """
+        before = self.find_previous_motion_line(text, sequence_start)
+        if before is None or before[2] != 'z_only':
+            return None
+        after = self.find_next_motion_line(text, sequence_end)
+        if after is None or after[2] != 'z_only':
+            return None
+        return before[:2], after[:2]
+
+    def make_native_hop(self, lift_line, drop_line, pre_lift_z, travel_moves):
+        """슬라이서 Z-홉 확인 (상승 → XY만 바꾸는 travel → 하강) → process_travel_sequence용 정보 또는 None"""
+        lift_z = self.getValue(lift_line, 'Z')
+        drop_z = self.getValue(drop_line, 'Z')
+        if lift_z <= pre_lift_z + 0.001 or drop_z >= lift_z - 0.001:
+            return None
+        if any(self.getValue(move['line'], 'Z') is not None for move in travel_moves):
+            return None
+        return {'z': pre_lift_z, 'base_z': drop_z, 'lift_z': lift_z,
+                'lines': [lift_line], 'drop_line': drop_line}
+
+    def native_hop_removals(self, text, spans):
+        """슬라이서 Z-홉 라인 제거용 대체 구간 (마지막 라인이면 앞 줄바꿈을 함께 제거)"""
+        return [(start, end + 1, '') if end < len(text) else (start - 1, end, '') for start, end in spans]
+
+    def is_carried_line(self, line):
+        """travel 시퀀스 중간에 있어도 시퀀스를 끊지 않는 비이동 라인인지
+
+        주석/빈 라인, F/E만 바꾸는 G0/G1(리트랙션), 좌표 없는 G92, CARRIED_COMMANDS의 M 명령
+        """
+        command = line.split(';', 1)[0].split()
+        if not command:
+            return True
+        if command[0] in ('G0', 'G1'):
+            return self.layer_change_line_kind(line) is None
+        if command[0] == 'G92':
+            return not any(param[0] in 'XYZ' for param in command[1:])
+        return command[0] in CARRIED_COMMANDS
+
+    def find_chained_travel(self, text, position):
+        """position부터 비이동 라인만 지나 travel 라인이 나오면 그 시작 위치, 아니면 None"""
+        while position < len(text):
+            line_end = text.find('\n', position)
+            if line_end < 0:
+                line_end = len(text)
+            line = text[position:line_end]
+            kind = self.layer_change_line_kind(line)
+            if kind == 'travel':
+                return position
+            if kind is not None or not self.is_carried_line(line):
+                return None
+            position = line_end + 1
+        return None
+
     def getValue(self, line, key):
         """G-code 라인에서 특정 축의 값 추출 (안전한 키 매칭, 공백 또는 맨 앞만 허용)"""
         if key == 'G':
@@ -900,8 +2915,8 @@ class SmartZHop(Script):
             return None
 
         # 정규표현식: 맨 앞 또는 공백 뒤에 key, 그 뒤에 숫자(부호/소수점 포함)
-        pattern = rf'(?:G. .*){key}([+-]?\d*\.?\d+)'
-        match = re.search(pattern, line)
+        pattern = GCODE_VALUE_PATTERNS.get(key)
+        match = pattern.search(line) if pattern else re.search(rf'(?:G. .*){key}([+-]?\d*\.?\d+)', line)
         if match:
             try:
                 return float(match.group(1))
@@ -941,8 +2956,11 @@ class SmartZHop(Script):
 
     def calculate_continuous_curve_trajectory(self, start_x, start_y, start_z, path_segments, 
                                             total_distance, zhop_height, zhop_speed, 
-                                            slingshot_settings, current_feedrate):
-        """XY 경로 적분 기반 연속 궤적 Z-hop 궤적 계산"""
+                                            slingshot_settings, current_feedrate, entry_z=None, moves=None):
+        """XY 경로 적분 기반 연속 궤적 Z-hop 궤적 계산 (entry_z: 궤적 기준 높이와 다른 실제 출발 높이)
+
+        moves: 목록을 주면 생성한 이동의 (X, Y, Z, F) 좌표를 추가 (시간 추정용)
+        """
         import math
         
         # 설정 추출
@@ -988,8 +3006,13 @@ class SmartZHop(Script):
         
         # 각 경로 구간별로 Z 높이 계산하여 G-code 생성 (긴 구간 자동 세분화 포함)
         cumulative_distance = 0.0
+        pending_entry_z = entry_z  # 첫 Z 포함 이동 전까지의 실제 높이
+        if moves is None:
+            moves = []
+        moved_z = start_z if entry_z is None else entry_z  # 마지막으로 출력한 이동의 Z
         
         for i, segment in enumerate(path_segments):
+            trajectory_gcode.extend(segment['carried'])  # 시퀀스 중간 비이동 라인은 원래 순서 위치에
             segment_start_distance = cumulative_distance
             segment_end_distance = cumulative_distance + segment['distance']
             
@@ -1014,6 +3037,8 @@ class SmartZHop(Script):
                 if point['segment_distance'] > 0.001:  # 0.001mm 이상인 경우만
                     # 이전 점과의 Z 변화 확인
                     prev_z = start_z + z_height_function(point.get('prev_distance', 0))
+                    if pending_entry_z is not None:
+                        prev_z = pending_entry_z
                     
                     if abs(point_z - prev_z) > 0.001:
                         # Z가 변하는 구간: XYZ 동시 이동
@@ -1021,6 +3046,8 @@ class SmartZHop(Script):
                             f"G1 X{point['x']:.3f} Y{point['y']:.3f} Z{point_z:.3f}{f_command} "
                             f";Smart Continuous Curve (Distance: {point_distance:.1f}mm, {point['boundary_type']})"
                         )
+                        pending_entry_z = None
+                        moved_z = point_z
                     else:
                         # Z가 변하지 않는 구간: XY만 이동
                         trajectory_gcode.append(
@@ -1035,6 +3062,7 @@ class SmartZHop(Script):
                     )
                 
                 # 생성된 점의 좌표를 기록
+                moves.append((point['x'], point['y'], moved_z, feedrate_for_moves))
                 last_generated_point = current_point_key
             
             # 누적 거리 업데이트
@@ -1044,12 +3072,16 @@ class SmartZHop(Script):
         final_segment = path_segments[-1]
         current_z = start_z + z_height_function(total_distance)
         
+        if pending_entry_z is not None:
+            current_z = pending_entry_z  # Z 포함 이동이 없었으면 아직 출발 높이
+        
         # 현재 Z가 원래 높이보다 높다면 안전하게 하강
         if abs(current_z - final_segment['end_z']) > 0.001:  # 0.001mm 이상 차이가 있을 때만
             trajectory_gcode.append(
                 f"G1 X{final_segment['end_x']:.3f} Y{final_segment['end_y']:.3f} Z{final_segment['end_z']:.3f}{f_command} "
                 f";Smart Z-Hop Complete (Safe Descent)"
             )
+            moves.append((final_segment['end_x'], final_segment['end_y'], final_segment['end_z'], feedrate_for_moves))
         
         # 속도 복원
         restore_gcode = self.restore_original_speed_gcode()
@@ -1137,132 +3169,1849 @@ class SmartZHop(Script):
         
         return z_height_at_distance
 
-    def subdivide_long_segment_for_zhop_boundaries(self, segment, start_distance, end_distance,
-                                                  z_height_function, total_distance, settings):
-        """긴 구간을 Z-hop 경계에서 세분화하여 각도 일관성 보장"""
-        import math
+    def subdivide_long_segment_for_zhop_boundaries(self, segment, start_distance, end_distance,
+                                                  z_height_function, total_distance, settings):
+        """긴 구간을 Z-hop 경계에서 세분화하여 각도 일관성 보장"""
+        import math
+        
+        # 구간 기본 정보
+        segment_length = segment['distance']
+        start_x, start_y = segment['start_x'], segment['start_y']
+        end_x, end_y = segment['end_x'], segment['end_y']
+        
+        # Z-hop 단계 경계 계산
+        trajectory_mode = settings.get('trajectory_mode', 'percentage')
+        
+        if trajectory_mode == 'angle':
+            # 각도 기반 경계 계산
+            ascent_angle = settings.get('ascent_angle', 45.0)
+            descent_angle = settings.get('descent_angle', 45.0)
+            max_height = z_height_function(total_distance / 2)  # 추정 최대 높이
+            
+            if ascent_angle >= 89.5:
+                ascent_boundary = 0.0
+            else:
+                ascent_boundary = max_height / math.tan(math.radians(ascent_angle))
+            
+            if descent_angle >= 89.5:
+                descent_start = total_distance
+            else:
+                descent_horizontal = max_height / math.tan(math.radians(descent_angle))
+                descent_start = total_distance - descent_horizontal
+        else:
+            # 퍼센티지 기반 경계 계산
+            ascent_ratio = settings.get('ascent_ratio', 30) / 100.0
+            descent_ratio = settings.get('descent_ratio', 30) / 100.0
+            
+            ascent_boundary = total_distance * ascent_ratio
+            descent_start = total_distance * (1.0 - descent_ratio)
+        
+        # 경계점들
+        boundaries = []
+          # 상승 끝 경계 (수평 시작)
+        if start_distance <= ascent_boundary <= end_distance:
+            boundaries.append({
+                'distance': ascent_boundary,
+                'type': 'ascent_end',
+                'description': 'Ascent->Travel'
+            })
+        
+        # 하강 시작 경계 (수평 끝)
+        if start_distance <= descent_start <= end_distance:
+            boundaries.append({
+                'distance': descent_start,
+                'type': 'descent_start', 
+                'description': 'Travel->Descent'
+            })
+        
+        # 경계점들을 거리순으로 정렬
+        boundaries.sort(key=lambda x: x['distance'])
+        
+        # 세분화된 점들 생성
+        subdivided_points = []
+        current_distance = start_distance
+        prev_distance = start_distance
+        
+        # 구간 시작점
+        if start_distance == 0 or len(boundaries) > 0:
+            subdivided_points.append({
+                'x': start_x,
+                'y': start_y,
+                'cumulative_distance': start_distance,
+                'segment_distance': 0.001,  # 최소값
+                'boundary_type': 'segment_start',
+                'prev_distance': start_distance
+            })
+        
+        # 각 경계점에서 중간점 생성
+        for boundary in boundaries:
+            boundary_distance = boundary['distance']
+            
+            # 구간 내 위치 비율 계산
+            if segment_length > 0:
+                ratio = (boundary_distance - start_distance) / segment_length
+            else:
+                ratio = 0.0
+            
+            # 선형 보간으로 XY 좌표 계산
+            boundary_x = start_x + (end_x - start_x) * ratio
+            boundary_y = start_y + (end_y - start_y) * ratio
+            
+            subdivided_points.append({
+                'x': boundary_x,
+                'y': boundary_y,
+                'cumulative_distance': boundary_distance,
+                'segment_distance': boundary_distance - prev_distance,
+                'boundary_type': boundary['description'],
+                'prev_distance': prev_distance
+            })
+            
+            prev_distance = boundary_distance
+        
+        # 구간 끝점
+        if end_distance - prev_distance > 0.001:  # 의미있는 거리가 남아있을 때만
+            subdivided_points.append({
+                'x': end_x,
+                'y': end_y,
+                'cumulative_distance': end_distance,
+                'segment_distance': end_distance - prev_distance,
+                'boundary_type': 'segment_end',
+                'prev_distance': prev_distance
+            })
+        
+        # 세분화 결과가 없으면 원본 구간 반환
+        if len(subdivided_points) == 0:
+            subdivided_points.append({
+                'x': end_x,
+                'y': end_y,
+                'cumulative_distance': end_distance,
+                'segment_distance': segment_length,
+                'boundary_type': 'original',
+                'prev_distance': start_distance
+            })
+        
+        return subdivided_points
+
+class SmartZHop(ZHopEngine, Script):
+    """Cura 후처리 스크립트 어댑터: 실행 시 Cura(또는 Mock) 설정으로 ZHopSettings를 만들어 엔진에 전달"""
+    def __init__(self, settings=None):
+        # 독립 실행 도구(sweep, batch 등)에서 전달한 설정값은 Cura/Mock 설정보다 우선
+        self.setting_overrides = dict(settings or {})
+        ZHopEngine.__init__(self)
+        Script.__init__(self)
+        # 제자리 처리는 켜지 않음: 처리 중 오류가 나면 Cura가 가진 G-code 목록이 일부만 처리된 채 남음
+        if not RUNNING_IN_CURA:
+            self.refresh_settings()
+
+    # 설정이 바뀔 수 있는 스크립트 객체는 엔진과 달리 객체 자체로 비교
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def getSettingValueByKey(self, key):
+        """설정값 조회 (생성자에 전달된 설정값 우선)"""
+        if key in self.setting_overrides:
+            return self.setting_overrides[key]
+        return super().getSettingValueByKey(key)
+
+    def get_setting_types(self):
+        """설정 키 → Cura 설정 타입 (bool, int, float, enum, str) 매핑"""
+        return {key: definition['type'] for key, definition in get_setting_definitions().items()}
+
+    def getSettingDataString(self):
+        """Cura 설정 정의 JSON 반환"""
+        return get_setting_data_string()
+
+    def refresh_settings(self):
+        """현재 Cura/Mock 설정값(+생성자 설정값)으로 불변 설정 객체를 다시 생성"""
+        self.settings = ZHopSettings.from_script(self)
+        return self.settings
+
+    def create_engine(self):
+        """현재 설정을 가진 독립 엔진 생성 (워커 프로세스 전달용)"""
+        return ZHopEngine(self.refresh_settings())
+
+    def execute(self, data):
+        self.refresh_settings()
+        return ZHopEngine.execute(self, data)
+
+    def iter_execute(self, data):
+        self.refresh_settings()
+        yield from ZHopEngine.iter_execute(self, data)
+
+    def iter_process_lines(self, lines):
+        self.refresh_settings()
+        yield from ZHopEngine.iter_process_lines(self, lines)
+
+# ========================================================================================
+# 독립 실행을 위한 테스트 함수들
+# ========================================================================================
+
+def split_gcode_layers(gcode_text):
+    """G-code 텍스트를 Cura 형식의 레이어 문자열 목록으로 분할 (;LAYER: 라인 기준)"""
+    return re.split(r'\n(?=;LAYER:)', gcode_text)
+
+def iter_process(lines, settings=None):
+    """G-code 라인 이터러블을 처리하여 출력 라인을 하나씩 내보내는 제너레이터 (파이프라인 연결용)
+
+    파일 리더와 프린터 전송기 사이에 두고 작업 전체를 메모리에 올리지 않고 사용:
+        for line in iter_process(open('model.gcode'), {'zhop_height': 0.4}):
+            sender.send(line)
+    """
+    return SmartZHop(settings).iter_process_lines(lines)
+
+def get_compression_codec(file_path):
+    """파일 확장자에 해당하는 압축 코덱 모듈 반환 (압축 파일이 아니면 None)"""
+    import os
+    import importlib
+    
+    codec_name = COMPRESSION_CODECS.get(os.path.splitext(file_path)[1].lower())
+    return importlib.import_module(codec_name) if codec_name else None
+
+def strip_compression_suffix(file_path):
+    """압축 확장자를 제거한 경로 반환 (model.gcode.gz → model.gcode)"""
+    import os
+    
+    base, ext = os.path.splitext(file_path)
+    return base if ext.lower() in COMPRESSION_CODECS else file_path
+
+def is_gcode_file_name(name):
+    """G-code 파일 이름인지 확인 (.gcode, 압축된 .gcode.gz/.bz2/.xz, 바이너리 .bgcode)"""
+    return strip_compression_suffix(name).lower().endswith(('.gcode', '.bgcode'))
+
+def is_bgcode_path(file_path):
+    """바이너리 G-code(bgcode) 파일 경로인지 확인"""
+    return file_path.lower().endswith('.bgcode')
+
+def open_gcode_file(file_path, mode='r'):
+    """G-code 파일 열기 (확장자로 압축 여부를 판단하여 투명하게 압축 해제/압축, bgcode는 읽기 전용)"""
+    import io
+    
+    if is_bgcode_path(file_path):
+        if mode != 'r':
+            raise ValueError("bgcode 파일은 write_gcode_atomic()으로 저장하세요")
+        with open(file_path, 'rb') as f:
+            return io.StringIO(decode_bgcode(f.read())[0])
+    codec = get_compression_codec(file_path)
+    if codec is None:
+        return open(file_path, mode, encoding='utf-8', errors='replace')
+    if mode == 'r':
+        # 압축 해제는 별도 스레드에서 미리 진행 (파싱/처리 루프와 동시에)
+        return io.TextIOWrapper(io.BufferedReader(ThreadedDecompressedReader(file_path, codec)),
+                                encoding='utf-8', errors='replace')
+    return codec.open(file_path, mode + 't', encoding='utf-8', errors='replace')
+
+def load_gcode_layers(file_path):
+    """G-code 파일을 읽어 Cura 형식의 레이어 목록으로 반환"""
+    with open_gcode_file(file_path) as f:
+        return split_gcode_layers(f.read())
+
+class MappedGcodeReader:
+    """G-code 파일을 mmap으로 열어 라인 단위로 순회 (전체 라인 목록을 만들지 않아 메모리 사용량 일정)"""
+    
+    def __init__(self, file_path):
+        import os
+        import mmap
+        
+        self.file_path = file_path
+        self.file = None
+        self.buffer = None
+        self.view = None
+        # 압축/bgcode 파일은 mmap 불가: 스트리밍 읽기로 대체
+        if get_compression_codec(file_path) is None and not is_bgcode_path(file_path):
+            self.file = open(file_path, 'rb')
+            if os.fstat(self.file.fileno()).st_size > 0:
+                self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.view = memoryview(self.buffer)
+    
+    def iter_lines(self, max_lines=None):
+        """(라인 번호, 라인 bytes 뷰) 순회 - 복사 없는 memoryview는 다음 라인으로 넘어가면 해제됨"""
+        if self.file is None:
+            with open_gcode_file(self.file_path) as f:
+                for line_number, line in enumerate(f, 1):
+                    if max_lines is not None and line_number > max_lines:
+                        return
+                    yield line_number, memoryview(line.rstrip('\r\n').encode('utf-8'))
+            return
+        if self.buffer is None:
+            return
+        
+        size = len(self.buffer)
+        start = 0
+        line_number = 0
+        while start < size and (max_lines is None or line_number < max_lines):
+            end = self.buffer.find(b'\n', start)
+            if end < 0:
+                end = size
+            line_number += 1
+            line_end = end - 1 if end > start and self.buffer[end - 1] == 13 else end  # CRLF
+            line = self.view[start:line_end]
+            try:
+                yield line_number, line
+            finally:
+                line.release()
+            start = end + 1
+    
+    def iter_motion_lines(self, max_lines=None):
+        """G 명령 라인만 디코딩하여 (라인 번호, 문자열) 순회 (주석/기타 라인은 디코딩하지 않음)"""
+        for line_number, line in self.iter_lines(max_lines):
+            if len(line) > 1 and line[0] == 71:  # 'G'
+                yield line_number, str(line, 'utf-8', 'replace')
+    
+    def close(self):
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class ThreadedCompressedWriter:
+    """압축을 별도 스레드에서 수행하는 텍스트 쓰기 객체 (처리 루프가 압축을 기다리지 않음)"""
+    
+    def __init__(self, fileobj, codec, buffer_size=1024 * 1024, max_pending=4):
+        import queue
+        import threading
+        
+        self.stream = codec.open(fileobj, 'wb')
+        self.buffer_size = buffer_size
+        self.pending = []
+        self.pending_size = 0
+        self.error = None
+        self.blocks = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self.compress_blocks, daemon=True)
+        self.thread.start()
+    
+    def compress_blocks(self):
+        """압축 스레드: 큐에서 받은 블록을 압축하여 기록 (zlib/bz2/lzma는 압축 중 GIL 해제)"""
+        while True:
+            block = self.blocks.get()
+            if block is None:
+                break
+            if self.error is None:
+                try:
+                    self.stream.write(block)
+                except Exception as e:
+                    self.error = e
+    
+    def write(self, text):
+        encoded = text.encode('utf-8')
+        self.pending.append(encoded)
+        self.pending_size += len(encoded)
+        if self.pending_size >= self.buffer_size:
+            self.flush_pending()
+    
+    def flush_pending(self):
+        if self.error is not None:
+            raise self.error
+        if self.pending:
+            self.blocks.put(b''.join(self.pending))
+            self.pending = []
+            self.pending_size = 0
+    
+    def close(self):
+        """남은 블록을 모두 압축하고 스트림 종료 (압축 스레드 오류는 여기서 전달)"""
+        try:
+            self.flush_pending()
+        finally:
+            self.blocks.put(None)
+            self.thread.join()
+        self.stream.close()
+        if self.error is not None:
+            raise self.error
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.blocks.put(None)
+            self.thread.join()
+            self.stream.close()
+
+class ThreadedDecompressedReader(io.RawIOBase):
+    """압축 해제를 별도 스레드에서 수행하는 바이트 읽기 스트림 (읽는 쪽이 압축 해제를 기다리지 않음)"""
+    
+    def __init__(self, file_path, codec, block_size=1024 * 1024, max_pending=4):
+        import queue
+        import threading
+        
+        super().__init__()
+        self.source = codec.open(file_path, 'rb')
+        self.block_size = block_size
+        self.blocks = queue.Queue(maxsize=max_pending)
+        self.block = b''
+        self.offset = 0
+        self.finished = False
+        self.stop_requested = False
+        self.thread = threading.Thread(target=self.decompress_blocks, daemon=True)
+        self.thread.start()
+    
+    def decompress_blocks(self):
+        """압축 해제 스레드: 블록 단위로 풀어서 큐에 전달 (b''는 끝, 예외는 읽는 쪽에서 다시 발생)"""
+        try:
+            while not self.stop_requested:
+                block = self.source.read(self.block_size)
+                self.blocks.put(block)
+                if not block:
+                    break
+        except Exception as e:
+            self.blocks.put(e)
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        while self.offset >= len(self.block):
+            if self.finished:
+                return 0
+            block = self.blocks.get()
+            if isinstance(block, Exception):
+                self.finished = True
+                raise block
+            if not block:
+                self.finished = True
+                return 0
+            self.block, self.offset = block, 0
+        count = min(len(buffer), len(self.block) - self.offset)
+        buffer[:count] = self.block[self.offset:self.offset + count]
+        self.offset += count
+        return count
+    
+    def close(self):
+        """스레드를 멈추고 원본 스트림 닫기 (끝까지 읽지 않고 닫아도 스레드가 큐에서 막히지 않음)"""
+        import queue
+        
+        if not self.closed:
+            self.stop_requested = True
+            while self.thread.is_alive():
+                try:
+                    self.blocks.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self.source.close()
+        super().close()
+
+def _meatpack_respace(line):
+    """no-spaces 모드로 압축된 G 라인의 파라미터 공백 복원 (대문자 앞에 공백)"""
+    return re.sub(r'(?<=.)(?=[A-Z])', ' ', line)
+
+def meatpack_encode(lines, keep_comments=True):
+    """G-code 라인들을 MeatPack으로 인코딩 (숫자/G/X 등 자주 쓰는 문자를 4비트로 압축, G 라인 공백 제거)
+
+    각 라인의 앞뒤 공백과 빈 줄은 버림. keep_comments=False(meatpack)면 주석 라인과 줄 끝 주석도 버리고,
+    keep_comments=True(meatpack_comments)면 주석이 있는 라인을 패킹 없이 원문 그대로 기록.
+    공백을 빼도 디코딩 시 그대로 복원되는 G 라인만 공백을 빼고, 나머지(G0X1, 소문자 파라미터 등)는 원문 기록
+    """
+    packed = bytearray()
+    
+    def append_command(command):
+        packed.extend(MEATPACK_SIGNAL)
+        packed.append(command)
+    
+    def append_raw(text):
+        nonlocal packing
+        if packing:
+            append_command(MEATPACK_DISABLE_PACKING)
+            packing = False
+        packed.extend((text + '\n').encode('utf-8'))
+    
+    def nibble(byte):
+        return MEATPACK_CODES.get(chr(byte), 0x0F)  # ASCII 외 바이트(UTF-8 다중 바이트 포함)는 그대로 뒤따름
+    
+    append_command(MEATPACK_ENABLE_PACKING)
+    append_command(MEATPACK_ENABLE_NO_SPACES)
+    packing = True
+    
+    for line in lines:
+        stripped = line.strip()
+        code = stripped.split(';', 1)[0].rstrip()
+        if code != stripped and keep_comments:
+            append_raw(stripped)  # 주석(줄 끝 주석 포함) 라인은 패킹을 끄고 원문 그대로 기록
+            continue
+        if not code:
+            continue
+        if re.match(r'G\d', code):
+            if _meatpack_respace(code.replace(' ', '')) != code:
+                append_raw(code)  # 공백 복원 규칙과 다른 G 라인은 원문 그대로
+                continue
+            code = code.replace(' ', '')  # no-spaces 모드: G 라인의 공백은 디코딩 시 복원
+        code = (code + '\n').encode('utf-8')  # 문자가 아닌 UTF-8 바이트 단위로 패킹
+        if not packing:
+            append_command(MEATPACK_ENABLE_PACKING)
+            packing = True
+        
+        for index in range(0, len(code), 2):
+            first = code[index]
+            second = code[index + 1] if index + 1 < len(code) else ord('\n')  # 홀수 길이는 빈 줄로 채움
+            packed.append((nibble(second) << 4) | nibble(first))
+            if nibble(first) == 0x0F:
+                packed.append(first)
+            if nibble(second) == 0x0F:
+                packed.append(second)
+    
+    return bytes(packed)
+
+def meatpack_decode(data):
+    """MeatPack 데이터를 G-code 텍스트로 복원 (빈 줄 제거, no-spaces로 패킹된 G 라인만 파라미터 공백 복원)"""
+    characters = bytearray()
+    respace = []  # 줄마다: no-spaces 패킹으로 디코딩되어 공백 복원이 필요한지
+    packing = False
+    no_spaces = False
+    index = 0
+    
+    while index < len(data):
+        byte = data[index]
+        if byte == 0xFF and index + 2 < len(data) and data[index + 1] == 0xFF:
+            command = data[index + 2]
+            index += 3
+            if command == MEATPACK_ENABLE_PACKING:
+                packing = True
+            elif command == MEATPACK_DISABLE_PACKING:
+                packing = False
+            elif command == MEATPACK_ENABLE_NO_SPACES:
+                no_spaces = True
+            elif command == MEATPACK_DISABLE_NO_SPACES:
+                no_spaces = False
+            elif command == MEATPACK_RESET_ALL:
+                packing = no_spaces = False
+            continue
+        
+        index += 1
+        if not packing:
+            characters.append(byte)
+            if byte == 0x0A:
+                respace.append(False)
+            continue
+        
+        for code in (byte & 0x0F, byte >> 4):
+            if code == 0x0F:
+                char = data[index]
+                index += 1
+            elif code == MEATPACK_CODES['E'] and not no_spaces:
+                char = ord(' ')
+            else:
+                char = ord(MEATPACK_CHARACTERS[code])
+            characters.append(char)
+            if char == 0x0A:
+                respace.append(no_spaces)
+    
+    lines = []
+    for line, spaced in zip(characters.decode('utf-8').split('\n'), respace + [False]):
+        if not line:
+            continue
+        if spaced and re.match(r'G\d', line):
+            line = _meatpack_respace(line)
+        lines.append(line)
+    return '\n'.join(lines) + '\n' if lines else ''
+
+def heatshrink_compress(data, window_sz2=12, lookahead_sz2=4):
+    """Heatshrink(LZSS) 압축: 리터럴은 1+8비트, 역참조는 1+window+lookahead 비트"""
+    window_size = 1 << window_sz2
+    max_length = 1 << lookahead_sz2
+    output = bytearray()
+    bit_buffer = 0
+    bit_count = 0
+    recent_positions = {}  # 2바이트 접두사 → 최근 위치 목록
+    position = 0
+    
+    while position < len(data):
+        best_length = 1
+        best_offset = 0
+        key = data[position:position + 2]
+        candidates = recent_positions.get(key, ())
+        limit = min(max_length, len(data) - position)
+        for candidate in reversed(candidates[-32:]):
+            offset = position - candidate
+            if offset > window_size:
+                break
+            length = 2
+            while length < limit and data[candidate + length] == data[position + length]:
+                length += 1
+            if length > best_length:
+                best_length = length
+                best_offset = offset
+                if length == limit:
+                    break
+        
+        # 2바이트 이상 일치하면 역참조가 리터럴 두 개(18비트)보다 짧음
+        if best_length >= 2:
+            value = ((best_offset - 1) << lookahead_sz2) | (best_length - 1)
+            bits = 1 + window_sz2 + lookahead_sz2
+        else:
+            value = 0x100 | data[position]
+            bits = 9
+        bit_buffer = (bit_buffer << bits) | value
+        bit_count += bits
+        while bit_count >= 8:
+            bit_count -= 8
+            output.append((bit_buffer >> bit_count) & 0xFF)
+        bit_buffer &= (1 << bit_count) - 1
+        
+        for step in range(best_length):
+            prefix = data[position + step:position + step + 2]
+            if len(prefix) == 2:
+                recent_positions.setdefault(prefix, []).append(position + step)
+        position += best_length
+    
+    if bit_count:
+        output.append((bit_buffer << (8 - bit_count)) & 0xFF)
+    return bytes(output)
+
+def heatshrink_decompress(data, window_sz2=12, lookahead_sz2=4):
+    """Heatshrink(LZSS) 압축 해제 (마지막 바이트의 0 패딩은 무시)"""
+    output = bytearray()
+    total_bits = len(data) * 8
+    bit_position = 0
+    
+    def read_bits(count):
+        nonlocal bit_position
+        value = 0
+        for _ in range(count):
+            byte = data[bit_position >> 3]
+            value = (value << 1) | ((byte >> (7 - (bit_position & 7))) & 1)
+            bit_position += 1
+        return value
+    
+    while bit_position < total_bits:
+        remaining = total_bits - bit_position
+        if read_bits(1):
+            if remaining < 9:
+                break
+            output.append(read_bits(8))
+        else:
+            if remaining < 1 + window_sz2 + lookahead_sz2:
+                break
+            offset = read_bits(window_sz2) + 1
+            length = read_bits(lookahead_sz2) + 1
+            for _ in range(length):
+                output.append(output[-offset])
+    return bytes(output)
+
+def compress_bgcode_payload(data, compression):
+    """bgcode 블록 데이터 압축"""
+    import zlib
+    
+    if compression == 'none':
+        return data
+    if compression == 'deflate':
+        return zlib.compress(data, 9)
+    if compression == 'heatshrink_11_4':
+        return heatshrink_compress(data, 11, 4)
+    if compression == 'heatshrink_12_4':
+        return heatshrink_compress(data, 12, 4)
+    raise ValueError(f"지원하지 않는 bgcode 압축 방식: {compression}")
+
+def decompress_bgcode_payload(data, compression_id):
+    """bgcode 블록 데이터 압축 해제"""
+    import zlib
+    
+    if compression_id == BGCODE_COMPRESSION['none']:
+        return data
+    if compression_id == BGCODE_COMPRESSION['deflate']:
+        return zlib.decompress(data)
+    if compression_id == BGCODE_COMPRESSION['heatshrink_11_4']:
+        return heatshrink_decompress(data, 11, 4)
+    if compression_id == BGCODE_COMPRESSION['heatshrink_12_4']:
+        return heatshrink_decompress(data, 12, 4)
+    raise ValueError(f"알 수 없는 bgcode 압축 방식: {compression_id}")
+
+def build_bgcode_block(block_type, data, encoding, compression):
+    """bgcode 블록 생성: 헤더(type, compression, 크기) + 파라미터(encoding) + 데이터 + CRC32"""
+    import zlib
+    import struct
+    
+    payload = compress_bgcode_payload(data, compression)
+    if len(payload) >= len(data):
+        compression, payload = 'none', data  # 압축 이득이 없으면 원본 저장
+    compression_id = BGCODE_COMPRESSION[compression]
+    
+    block = struct.pack('<HHI', BGCODE_BLOCK_TYPES[block_type], compression_id, len(data))
+    if compression_id != BGCODE_COMPRESSION['none']:
+        block += struct.pack('<I', len(payload))
+    block += struct.pack('<H', encoding) + payload
+    return block + struct.pack('<I', zlib.crc32(block))
+
+def format_bgcode_time(seconds):
+    """Prusa 메타데이터 시간 형식 (예: 1h 2m 3s)"""
+    seconds = int(round(seconds))
+    parts = []
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size or parts:
+            parts.append(f"{seconds // size}{unit}")
+            seconds %= size
+    parts.append(f"{seconds}s")
+    return ' '.join(parts)
+
+def extract_bgcode_metadata(gcode_text):
+    """Cura 헤더 주석에서 bgcode 메타데이터 블록 내용 추출"""
+    header = gcode_text[:4096]
+    printer = {}
+    print_info = {}
+    slicer = {}
+    
+    machine = re.search(r'^;TARGET_MACHINE\.NAME:(.+)$', header, re.MULTILINE)
+    printer['printer_model'] = machine.group(1).strip() if machine else 'unknown'
+    
+    time_match = TIME_HEADER_PATTERN.search(header)
+    if time_match:
+        print_info['estimated printing time (normal mode)'] = format_bgcode_time(float(time_match.group(1)))
+    filament = re.search(r'^;Filament used:\s*([\d.]+)m', header, re.MULTILINE)
+    if filament:
+        print_info['filament used [mm]'] = f"{float(filament.group(1)) * 1000:.2f}"
+    printer.update(print_info)
+    
+    generator = re.search(r'^;Generated with (.+)$', header, re.MULTILINE)
+    slicer['Producer'] = generator.group(1).strip() if generator else 'unknown'
+    layer_height = re.search(r'^;Layer height:\s*([\d.]+)', header, re.MULTILINE)
+    if layer_height:
+        slicer['layer_height'] = layer_height.group(1)
+    
+    return {'file': {'Producer': 'Smart Z-Hop'}, 'printer': printer, 'print': print_info, 'slicer': slicer}
+
+def encode_bgcode(gcode_text, compression='heatshrink_12_4', encoding='meatpack_comments',
+                  metadata_compression='deflate'):
+    """G-code 텍스트를 Prusa 바이너리 G-code(bgcode) 파일 바이트로 변환"""
+    import struct
+    
+    if encoding not in BGCODE_GCODE_ENCODING:
+        raise ValueError(f"지원하지 않는 bgcode 인코딩: {encoding}")
+    
+    def metadata_block(block_type, values):
+        ini = ''.join(f"{key}={value}\n" for key, value in values.items()).encode('utf-8')
+        return build_bgcode_block(block_type, ini, BGCODE_METADATA_ENCODING_INI, metadata_compression)
+    
+    metadata = extract_bgcode_metadata(gcode_text)
+    blocks = [struct.pack('<4sIH', BGCODE_MAGIC, BGCODE_VERSION, BGCODE_CHECKSUM_CRC32),
+              metadata_block('file_metadata', metadata['file']),
+              metadata_block('printer_metadata', metadata['printer']),
+              metadata_block('print_metadata', metadata['print']),
+              metadata_block('slicer_metadata', metadata['slicer'])]
+    
+    # G-code는 약 64KB 단위 블록으로 나누어 각각 독립적으로 인코딩/압축
+    lines = gcode_text.split('\n')
+    if lines and not lines[-1]:
+        lines.pop()  # 마지막 줄바꿈은 빈 줄로 취급하지 않음
+    block_lines = []
+    block_size = 0
+    for line in lines:
+        block_lines.append(line)
+        block_size += len(line) + 1
+        if block_size >= BGCODE_GCODE_BLOCK_SIZE:
+            blocks.append(build_gcode_data_block(block_lines, compression, encoding))
+            block_lines = []
+            block_size = 0
+    if block_lines:
+        blocks.append(build_gcode_data_block(block_lines, compression, encoding))
+    return b''.join(blocks)
+
+def build_gcode_data_block(lines, compression, encoding):
+    """G-code 라인 묶음을 인코딩하여 G-code 블록 생성"""
+    if encoding == 'none':
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+    else:
+        data = meatpack_encode(lines, keep_comments=(encoding == 'meatpack_comments'))
+    return build_bgcode_block('gcode', data, BGCODE_GCODE_ENCODING[encoding], compression)
+
+def decode_bgcode(data):
+    """bgcode 파일 바이트를 (G-code 텍스트, 메타데이터) 로 복원 (CRC32 검증 포함)"""
+    import zlib
+    import struct
+    
+    magic, version, checksum_type = struct.unpack_from('<4sIH', data, 0)
+    if magic != BGCODE_MAGIC:
+        raise ValueError("bgcode 파일이 아닙니다 (GCDE 시그니처 없음)")
+    if version != BGCODE_VERSION:
+        raise ValueError(f"지원하지 않는 bgcode 버전: {version}")
+    
+    block_names = {value: key for key, value in BGCODE_BLOCK_TYPES.items()}
+    metadata = {}
+    gcode_parts = []
+    position = struct.calcsize('<4sIH')
+    
+    while position < len(data):
+        block_start = position
+        block_type, compression_id, uncompressed_size = struct.unpack_from('<HHI', data, position)
+        position += 8
+        payload_size = uncompressed_size
+        if compression_id != BGCODE_COMPRESSION['none']:
+            payload_size, = struct.unpack_from('<I', data, position)
+            position += 4
+        parameter_size = 6 if block_type == BGCODE_BLOCK_TYPES['thumbnail'] else 2
+        encoding, = struct.unpack_from('<H', data, position)
+        position += parameter_size
+        payload = data[position:position + payload_size]
+        position += payload_size
+        
+        if checksum_type == BGCODE_CHECKSUM_CRC32:
+            checksum, = struct.unpack_from('<I', data, position)
+            if checksum != zlib.crc32(data[block_start:position]):
+                raise ValueError(f"bgcode 블록 CRC32 불일치 (오프셋 {block_start})")
+            position += 4
+        
+        block_data = decompress_bgcode_payload(payload, compression_id)
+        if len(block_data) != uncompressed_size:
+            raise ValueError(f"bgcode 블록 크기 불일치 (오프셋 {block_start})")
+        
+        name = block_names.get(block_type)
+        if name == 'gcode':
+            if encoding == BGCODE_GCODE_ENCODING['none']:
+                gcode_parts.append(block_data.decode('utf-8'))
+            else:
+                gcode_parts.append(meatpack_decode(block_data))
+        elif name and name.endswith('_metadata'):
+            metadata[name[:-len('_metadata')]] = dict(
+                line.split('=', 1) for line in block_data.decode('utf-8').splitlines() if '=' in line)
+    
+    return ''.join(gcode_parts), metadata
+
+def print_dry_run_report(report):
+    """분석 전용 모드 통계 리포트 출력"""
+    print(f"📊 Z-홉 분석 결과 ({report['mode']} 모드, {report['layers']}개 레이어)")
+    print("-" * 50)
+    print(f"   • Travel 시퀀스: {report['travel_sequences']}개")
+    print(f"   • Z-홉 적용: {report['hops']}개 (리트랙션 조건: {report['retraction_hops']}개)")
+    print(f"   • 레이어 변경 Z-홉: {report['layer_change_hops']}개")
+    print(f"   • 대체한 슬라이서 Z-홉: {report['native_hops_replaced']}개 "
+          f"(제거된 Z 이동 {report['native_hop_z_saved']:.2f}mm)")
+    print(f"   • 피처 타입 정책: 생략 {report['policy_skipped_hops']}개, 추가 {report['policy_forced_hops']}개")
+    print(f"   • 높이 맵: 낮춘 Z-홉 {report['height_map_lowered_hops']}개 "
+          f"(줄인 높이 합계 {report['height_map_height_saved']:.2f}mm)")
+    print(f"   • Z-홉 예산: 생략 {report['budget_skipped_hops']}개")
+    if report['mode'] == 'hybrid':
+        choices = report['hybrid_choices']
+        print(f"   • 하이브리드 선택: 슬링샷 {choices['slingshot']}개, 전통적 {choices['traditional']}개, "
+              f"Z-홉 없음 {choices['none']}개")
+    print(f"   • Z-홉 이동 길이: 평균 {report['hop_length_avg']:.2f}mm, "
+          f"최소 {report['hop_length_min']:.2f}mm, 최대 {report['hop_length_max']:.2f}mm")
+    print(f"   • 추가 Z 이동 거리: {report['added_z_travel']:.2f}mm")
+    print("   • 길이 분포:")
+    for label, count in report['length_histogram'].items():
+        print(f"       {label:>9}: {count}")
+
+def run_dry_run(file_path, as_json=False, settings=None):
+    """G-code 파일 분석 전용 실행 (CLI dry-run 명령, settings가 없으면 ZHopSettings 기본값)"""
+    import io
+    import json
+    import time
+    import contextlib
+    
+    settings = to_zhop_settings(settings)
+    layers = load_gcode_layers(file_path)
+    engine = ZHopEngine(settings)
+    
+    start_time = time.perf_counter()
+    # JSON 출력은 그대로 파싱할 수 있도록 엔진 진행 로그를 표준 출력에 섞지 않음
+    with contextlib.redirect_stdout(io.StringIO()) if as_json else contextlib.nullcontext():
+        report = engine.analyze(layers)
+    report['elapsed_seconds'] = time.perf_counter() - start_time
+    report['settings'] = settings.to_dict()
+    
+    if as_json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_dry_run_report(report)
+        print(f"⏱️ 분석 시간: {report['elapsed_seconds']:.2f}초")
+    return report
+
+def run_dry_run_command(argv):
+    """CLI dry-run 명령 처리 (설정 파일 + --set 덮어쓰기로 여러 값을 출력 없이 비교)"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='SmartZHop.py dry-run',
+                                     description='G-code 생성 없이 설정별 Z-홉 통계만 분석')
+    parser.add_argument('file', help='입력 G-code 파일')
+    parser.add_argument('--settings', '-s', help='JSON/YAML 설정 파일 (없는 키는 ZHopSettings 기본값)')
+    parser.add_argument('--set', action='append', default=[], metavar='키=값', dest='overrides',
+                        help='설정값 덮어쓰기 (예: --set travel_distance=2 --set zhop_height=0.4), 여러 번 지정 가능')
+    parser.add_argument('--json', action='store_true', help='보고서를 JSON으로 출력')
+    args = parser.parse_args(argv)
+    
+    try:
+        settings = load_settings_file(args.settings) if args.settings else None
+        settings = apply_setting_overrides(settings, args.overrides)
+    except ValueError as e:
+        parser.error(str(e))
+    return run_dry_run(args.file, as_json=args.json, settings=settings)
+
+def parse_setting_value(text, setting_type):
+    """문자열 설정값을 Cura 설정 타입에 맞게 변환"""
+    if setting_type == 'bool':
+        return text.strip().lower() in ('1', 'true', 'yes', 'on')
+    if setting_type == 'int':
+        return int(float(text))
+    if setting_type == 'float':
+        return float(text)
+    return text
+
+def parse_sweep_grid(grid_args, setting_types):
+    """'key=v1,v2,...' 목록을 설정 조합 목록으로 변환"""
+    import itertools
+    
+    keys = []
+    value_lists = []
+    for grid_arg in grid_args:
+        key, _, values = grid_arg.partition('=')
+        key = key.strip()
+        if key not in setting_types:
+            raise ValueError(f"알 수 없는 설정 키: {key}")
+        keys.append(key)
+        value_lists.append([parse_setting_value(value, setting_types[key])
+                            for value in values.split(',') if value.strip()])
+    
+    return keys, [dict(zip(keys, combination)) for combination in itertools.product(*value_lists)]
+
+def merge_sweep_points(keys, combinations, base_settings=None):
+    """grid 조합을 기본 설정(--settings) 위에 병합하여 검증된 설정 딕셔너리 목록으로 변환
+    
+    slingshot_* 키를 바꾸는 grid가 traditional 모드 조합에서는 적용되지 않으므로,
+    모든 조합이 traditional이면 ValueError, 일부만 traditional이면 경고 출력
+    """
+    base = to_zhop_settings(base_settings).to_dict()
+    points = [ZHopSettings.from_dict({**base, **combination}).to_dict() for combination in combinations]
+    
+    slingshot_keys = [key for key in keys if key.startswith('slingshot_')]
+    if slingshot_keys:
+        ignored = sum(1 for point in points if point['zhop_mode'] == 'traditional')
+        key_names = ', '.join(slingshot_keys)
+        if points and ignored == len(points):
+            raise ValueError(f"{key_names}는 Smart/Hybrid 모드 설정이지만 모든 조합이 traditional 모드입니다 "
+                             f"(--settings 파일 또는 --grid zhop_mode=slingshot으로 모드 지정)")
+        if ignored:
+            print(f"⚠️ traditional 모드 조합 {ignored}개에는 {key_names}가 적용되지 않습니다")
+    return points
+
+def parse_job_once(file_path):
+    """sweep용: 파일을 한 번만 읽고 레이어/기계 설정을 미리 파싱"""
+    import io
+    import contextlib
+    
+    layers = load_gcode_layers(file_path)
+    probe = ZHopEngine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        probe.parse_original_z_feedrate(layers)
+        probe.parse_machine_limits(layers)
+    
+    return {
+        'layers': layers,
+        'original_z_max_feedrate': probe.original_z_max_feedrate,
+        'machine_limits': probe.machine_limits,
+        'input_bytes': sum(len(layer.encode('utf-8')) for layer in layers) + len(layers) - 1,
+    }
+
+# sweep 워커 프로세스에 한 번만 전달되는 파싱된 작업
+_SWEEP_JOB = None
+
+def _init_sweep_worker(job):
+    """sweep 워커 초기화: 파싱된 작업 저장 및 진행 로그 억제"""
+    import os
+    import sys
+    global _SWEEP_JOB
+    _SWEEP_JOB = job
+    sys.stdout = open(os.devnull, 'w')
+
+def evaluate_sweep_point(settings):
+    """파싱된 작업에 설정 조합 하나를 적용하여 결과 지표 반환 (조합에 없는 키는 ZHopSettings 기본값)"""
+    import time
+    
+    job = _SWEEP_JOB
+    engine = ZHopEngine(ZHopSettings.from_dict(settings))
+    engine.original_z_max_feedrate = job['original_z_max_feedrate']
+    engine.machine_limits = job['machine_limits']
+    
+    start_time = time.perf_counter()
+    result = engine.execute(job['layers'])
+    elapsed = time.perf_counter() - start_time
+    
+    stats = engine.print_time_stats
+    return {
+        'settings': settings,
+        'hops': stats['hops'],
+        'added_z_travel': stats['added_z_travel'],
+        'added_time': stats['total_delta'],
+        'output_bytes': sum(len(layer.encode('utf-8')) for layer in result) + len(result) - 1,
+        'elapsed_seconds': elapsed,
+    }
+
+def run_parameter_sweep(file_path, grid_args, workers=None, base_settings=None):
+    """G-code를 한 번 파싱한 뒤 설정 조합들을 프로세스 풀에서 평가 (각 조합은 base_settings 위에 병합)"""
+    import io
+    import contextlib
+    from concurrent.futures import ProcessPoolExecutor
+    
+    setting_types = {key: definition['type'] for key, definition in get_setting_definitions().items()}
+    keys, combinations = parse_sweep_grid(grid_args, setting_types)
+    combinations = merge_sweep_points(keys, combinations, base_settings)
+    job = parse_job_once(file_path)
+    
+    if workers == 1 or len(combinations) <= 1:
+        # 단일 프로세스: 풀 생성 비용 없이 순차 평가
+        global _SWEEP_JOB
+        _SWEEP_JOB = job
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = [evaluate_sweep_point(settings) for settings in combinations]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                                 initargs=(job,)) as executor:
+            results = list(executor.map(evaluate_sweep_point, combinations))
+    
+    return keys, job, results
+
+def print_sweep_table(keys, job, results):
+    """sweep 결과 표 출력"""
+    headers = keys + ['hops', 'added_z_mm', 'added_time_s', 'output_kb', 'size_%']
+    rows = []
+    for result in results:
+        rows.append([str(result['settings'][key]) for key in keys] + [
+            str(result['hops']),
+            f"{result['added_z_travel']:.1f}",
+            f"{result['added_time']:+.1f}",
+            f"{result['output_bytes'] / 1024:.1f}",
+            f"{(result['output_bytes'] / job['input_bytes'] - 1) * 100:+.1f}",
+        ])
+    
+    widths = [max(len(row[i]) for row in rows + [headers]) for i in range(len(headers))]
+    print("  ".join(header.rjust(width) for header, width in zip(headers, widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+def write_sweep_csv(csv_path, keys, results):
+    """sweep 결과를 CSV로 저장"""
+    import csv
+    
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(keys + ['hops', 'added_z_travel_mm', 'added_time_s', 'output_bytes'])
+        for result in results:
+            writer.writerow([result['settings'][key] for key in keys] + [
+                result['hops'], round(result['added_z_travel'], 4),
+                round(result['added_time'], 3), result['output_bytes']])
+
+def run_sweep_command(argv):
+    """CLI sweep 명령 처리"""
+    import argparse
+    import time
+    
+    parser = argparse.ArgumentParser(prog='SmartZHop.py sweep',
+                                     description='한 번 파싱한 G-code에 설정 조합들을 병렬 적용하여 비교')
+    parser.add_argument('file', help='입력 G-code 파일')
+    parser.add_argument('--settings', '-s', help='기본 설정 JSON/YAML 파일 (각 grid 조합이 이 설정 위에 병합됨)')
+    parser.add_argument('--grid', action='append', required=True,
+                        help='설정 값 목록 (예: --grid slingshot_ascent_ratio=20,30,40), 여러 번 지정 가능')
+    parser.add_argument('--workers', type=int, default=None, help='워커 프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--csv', help='결과를 저장할 CSV 경로')
+    args = parser.parse_args(argv)
+    
+    start_time = time.perf_counter()
+    try:
+        base_settings = load_settings_file(args.settings) if args.settings else None
+        keys, job, results = run_parameter_sweep(args.file, args.grid, args.workers, base_settings)
+    except ValueError as e:
+        parser.error(str(e))
+    print_sweep_table(keys, job, results)
+    print(f"\n⏱️ {len(results)}개 조합 평가: {time.perf_counter() - start_time:.2f}초")
+    
+    if args.csv:
+        write_sweep_csv(args.csv, keys, results)
+        print(f"💾 CSV 저장됨: {args.csv}")
+    return results
+
+def to_zhop_settings(settings):
+    """독립 실행 도구의 설정 인자(None, 딕셔너리, ZHopSettings) → 검증된 ZHopSettings (없는 키는 기본값)"""
+    if settings is None:
+        return ZHopSettings()
+    if isinstance(settings, ZHopSettings):
+        return settings
+    return ZHopSettings.from_dict(settings)
+
+def load_settings_file(settings_path):
+    """JSON/YAML 설정 파일을 읽어 검증된 설정 객체(ZHopSettings)로 반환 (파일에 없는 키는 기본값)"""
+    import json
+    
+    with open(settings_path, 'r', encoding='utf-8') as f:
+        if settings_path.lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML 설정 파일을 읽으려면 PyYAML이 필요합니다 (pip install pyyaml)")
+            raw_settings = yaml.safe_load(f) or {}
+        else:
+            raw_settings = json.load(f)
+    
+    if not isinstance(raw_settings, dict):
+        raise ValueError(f"설정 파일은 키-값 객체여야 합니다: {settings_path}")
+    
+    return ZHopSettings.from_dict(raw_settings)
+
+def apply_setting_overrides(settings, assignments):
+    """'키=값' 목록을 설정(None, 딕셔너리, ZHopSettings) 위에 덮어쓴 ZHopSettings 반환 (값은 정의 타입으로 검증)"""
+    overrides = {}
+    for assignment in assignments:
+        key, separator, value = assignment.partition('=')
+        if not separator:
+            raise ValueError(f"'키=값' 형식이 아닙니다: {assignment}")
+        overrides[key.strip()] = value.strip()
+    settings = to_zhop_settings(settings)
+    if not overrides:
+        return settings
+    return ZHopSettings.from_dict({**settings.to_dict(), **overrides})
+
+def replace_file_prefix(path, old_length, prefix, block_size=1024 * 1024):
+    """파일 앞 old_length 바이트를 prefix로 교체 (길이가 같으면 덮어쓰기만, 다르면 같은 파일 안에서 뒷부분을 밀거나 당김)"""
+    shift = len(prefix) - old_length
+    with open(path, 'r+b') as f:
+        if shift > 0:
+            # 뒤로 미는 경우: 끝에서부터 블록 단위로 옮겨야 아직 읽지 않은 부분을 덮어쓰지 않음
+            position = f.seek(0, 2)
+            while position > old_length:
+                start = max(old_length, position - block_size)
+                f.seek(start)
+                block = f.read(position - start)
+                f.seek(start + shift)
+                f.write(block)
+                position = start
+        elif shift < 0:
+            position = old_length
+            while True:
+                f.seek(position)
+                block = f.read(block_size)
+                if not block:
+                    break
+                f.seek(position + shift)
+                f.write(block)
+                position += len(block)
+            f.truncate(position + shift)
+        f.seek(0)
+        f.write(prefix)
+
+def write_gcode_atomic(output_path, layers, finish_header=None):
+    """레이어 이터러블을 임시 파일에 쓴 뒤 원자적으로 교체 (중간 상태 파일 노출 방지, 확장자에 따라 압축/bgcode)
+
+    레이어는 받는 대로 '\n'으로 이어 기록하므로(끝에 줄바꿈을 덧붙이지 않음) 입력 텍스트와 같은 형태가 되고,
+    iter_execute 결과를 넘기면 처리와 압축 스레드가 동시에 진행됨.
+    finish_header: 첫 레이어(헤더)를 모든 레이어를 받은 뒤 보정하는 함수 → 원래 헤더를 먼저 쓰고 본문을 이어 쓴 뒤
+    같은 임시 파일에서 헤더 자리만 보정한 헤더로 교체 (;TIME: 자릿수가 같으면 덮어쓰기만 함. 압축 파일은 헤더를
+    별도 압축 멤버로 두며, gzip/bz2/xz 모두 이어 붙인 멤버를 한 파일로 읽음)
+    """
+    import os
+    import tempfile
+    
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=output_dir, prefix='.smartzhop-', suffix='.tmp')
+    
+    try:
+        codec = get_compression_codec(output_path)
+        if is_bgcode_path(output_path):
+            layers = list(layers)
+            if finish_header is not None and layers:
+                layers[0] = finish_header(layers[0])
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encode_bgcode('\n'.join(layers)))
+        else:
+            layers = iter(layers)
+            header = next(layers, None) if finish_header is not None else None
+            
+            def encode_header(text):
+                header_bytes = text.encode('utf-8')
+                return header_bytes if codec is None else codec.compress(header_bytes)
+            
+            with os.fdopen(fd, 'wb') as raw:
+                header_slot = encode_header(header) if header is not None else b''
+                raw.write(header_slot)
+                raw.flush()  # 본문 쓰기 객체는 같은 파일 디스크립터에 이어 씀
+                separator = '\n' if header is not None else ''
+                if codec is None:
+                    with open(raw.fileno(), 'w', encoding='utf-8', newline='\n', closefd=False) as f:
+                        for layer in layers:
+                            f.write(separator)
+                            f.write(layer)
+                            separator = '\n'
+                else:
+                    with ThreadedCompressedWriter(raw, codec) as f:
+                        for layer in layers:
+                            f.write(separator)
+                            f.write(layer)
+                            separator = '\n'
+            if header is not None:
+                replace_file_prefix(temp_path, len(header_slot), encode_header(finish_header(header)))
+        # mkstemp는 0600으로 생성하므로 일반 파일과 같은 권한(umask 적용)으로 변경
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def process_file(input_path, output_path, settings=None):
+    """G-code 파일 하나를 독립 엔진으로 처리하여 원자적으로 저장하고 처리 통계 반환 (오류는 결과에 기록)
+
+    settings: ZHopSettings (딕셔너리/None이면 ZHopSettings 기본값 기준으로 변환)
+    """
+    import os
+    import time
+    
+    result = {'input': input_path, 'output': output_path, 'error': None}
+    start_time = time.perf_counter()
+    try:
+        layers = load_gcode_layers(input_path)
+        result['lines'] = sum(layer.count('\n') + 1 for layer in layers)
+        engine = ZHopEngine(to_zhop_settings(settings))
+        if engine.needs_print_time_totals(layers):
+            # 본문의 ;TIME:/M73 보정에 전체 추가 시간이 필요: 모두 처리한 뒤 저장
+            engine.in_place = True  # 입력 레이어는 다시 쓰지 않으므로 결과로 덮어쓰기
+            write_gcode_atomic(output_path, engine.execute(layers))
+        else:
+            # 처리되는 레이어를 바로 쓰기/압축 스레드로 넘기고, 헤더의 ;TIME:만 마지막에 보정
+            write_gcode_atomic(output_path, engine.iter_execute_elapsed(layers), engine.finish_print_time)
+        
+        result['bytes_in'] = os.path.getsize(input_path)
+        result['bytes_out'] = os.path.getsize(output_path)
+        result['hops'] = engine.print_time_stats['hops']
+        result['added_time'] = engine.print_time_stats['total_delta']
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start_time
+    return result
+
+def run_process_command(argv):
+    """CLI process 명령 처리 (단일 파일, 출력 형식은 확장자로 결정)"""
+    import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='SmartZHop.py process',
+                                     description='G-code 파일 하나를 후처리 (.gcode, .gcode.gz/.bz2/.xz, .bgcode)')
+    parser.add_argument('input', help='입력 G-code 파일')
+    parser.add_argument('output', help='출력 파일 (예: out.gcode, out.gcode.gz, out.bgcode)')
+    parser.add_argument('--settings', '-s', help='JSON/YAML 설정 파일')
+    parser.add_argument('--validate', action='store_true', help='저장 후 원본과 비교하여 결과 검증 (실패 시 종료 코드 1)')
+    args = parser.parse_args(argv)
+    
+    settings = load_settings_file(args.settings) if args.settings else None
+    result = process_file(args.input, args.output, settings)
+    print(format_throughput(result))
+    if result['error']:
+        sys.exit(1)
+    print(f"💾 저장됨: {args.output} ({result['bytes_out']:,} bytes)")
+    if args.validate:
+        report = validate_gcode_file(args.output, args.input)
+        for error in report['errors'][:10]:
+            print(f"   ❌ Line {error['line']}: [{error['type']}] {error['message']}")
+        if not report['valid']:
+            sys.exit(1)
+        print(f"✅ 검증 통과 (Z-홉 끝점 {report['hops_checked']}개)")
+    return result
+
+def benchmark_compressed_io(file_path, suffixes=('', '.gz', '.bz2', '.xz'), settings=None, repeat=1):
+    """압축 방식별 전체 처리(읽기 → 처리 → 쓰기) 처리량 측정"""
+    import io
+    import os
+    import tempfile
+    import contextlib
+    
+    with open_gcode_file(file_path) as f:
+        text = f.read()
+    raw_bytes = len(text.encode('utf-8'))
+    line_count = text.count('\n') + 1
+    
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for suffix in suffixes:
+            input_path = os.path.join(work_dir, 'bench.gcode' + suffix)
+            output_path = os.path.join(work_dir, 'bench_out.gcode' + suffix)
+            with open_gcode_file(input_path, 'w') as f:
+                f.write(text)
+            
+            timings = []
+            for _ in range(repeat):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = process_file(input_path, output_path, settings)
+                if result['error']:
+                    raise RuntimeError(result['error'])
+                timings.append(result['seconds'])
+            seconds = max(min(timings), 1e-9)
+            
+            results.append({
+                'codec': COMPRESSION_CODECS.get(suffix, 'none'),
+                'suffix': suffix,
+                'input_bytes': os.path.getsize(input_path),
+                'output_bytes': os.path.getsize(output_path),
+                'ratio': raw_bytes / max(os.path.getsize(input_path), 1),
+                'seconds': seconds,
+                'mb_per_second': raw_bytes / 1e6 / seconds,
+                'lines_per_second': line_count / seconds,
+            })
+    return results
+
+def run_bench_io_command(argv):
+    """CLI bench-io 명령 처리"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='SmartZHop.py bench-io',
+                                     description='압축/비압축 입출력의 전체 처리량 비교')
+    parser.add_argument('file', help='G-code 파일 (.gcode 또는 .gcode.gz/.bz2/.xz)')
+    parser.add_argument('--codecs', default='none,gz,bz2,xz', help='비교할 코덱 (기본: none,gz,bz2,xz)')
+    parser.add_argument('--settings', '-s', help='JSON/YAML 설정 파일')
+    parser.add_argument('--repeat', type=int, default=3, help='반복 측정 횟수 (최솟값 사용, 기본: 3)')
+    args = parser.parse_args(argv)
+    
+    suffixes = ['' if codec == 'none' else '.' + codec.lstrip('.') for codec in args.codecs.split(',')]
+    for suffix in suffixes:
+        if suffix and suffix not in COMPRESSION_CODECS:
+            parser.error(f"지원하지 않는 코덱: {suffix}")
+    
+    settings = load_settings_file(args.settings) if args.settings else None
+    results = benchmark_compressed_io(args.file, suffixes, settings, args.repeat)
+    
+    print(f"\n⏱️ 입출력 처리량 비교: {args.file}")
+    print("-" * 72)
+    print(f"{'코덱':<8} {'입력 크기':>12} {'압축률':>8} {'시간':>9} {'MB/s':>8} {'줄/s':>12}")
+    for result in results:
+        print(f"{result['codec']:<8} {result['input_bytes']:>12,} {result['ratio']:>7.1f}x "
+              f"{result['seconds']:>8.3f}s {result['mb_per_second']:>8.2f} {result['lines_per_second']:>12,.0f}")
+    return results
+
+# batch/watch 워커 프로세스에 미리 로드되는 설정 (ZHopSettings)
+_WORKER_SETTINGS = None
+
+def _init_processing_worker(settings):
+    """처리 워커 초기화: pickle로 전달된 불변 설정 저장 및 진행 로그 억제"""
+    import os
+    import sys
+    global _WORKER_SETTINGS
+    _WORKER_SETTINGS = settings
+    sys.stdout = open(os.devnull, 'w')
+
+def _process_file_in_worker(input_path, output_path):
+    """워커에 미리 로드된 설정으로 파일 처리"""
+    return process_file(input_path, output_path, _WORKER_SETTINGS)
+
+def collect_gcode_files(source):
+    """디렉터리 또는 glob 패턴에서 처리할 G-code 파일 목록 수집"""
+    import os
+    import glob
+    
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if is_gcode_file_name(name) and os.path.isfile(os.path.join(source, name)))
+    return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+
+def format_throughput(result):
+    """파일 처리 결과 한 줄 요약"""
+    import os
+    
+    name = os.path.basename(result['input'])
+    if result['error']:
+        return f"❌ {name}: {result['error']}"
+    seconds = max(result['seconds'], 1e-9)
+    return (f"✅ {name}: {result['bytes_in'] / 1e6:.2f}MB, {result['seconds']:.2f}초 "
+            f"({result['bytes_in'] / 1e6 / seconds:.2f} MB/s, {result['lines'] / seconds:,.0f} 줄/s), "
+            f"Z-홉 {result['hops']}개, {result['added_time']:+.1f}초")
+
+def batch_output_paths(source, files, output_dir):
+    """입력 파일별 출력 경로 (입력 기준 디렉터리에서의 상대 경로를 output_dir 아래에 유지)
+
+    glob으로 여러 폴더의 같은 이름 파일을 모아도 서로 덮어쓰지 않도록 파일 이름만 쓰지 않음.
+    출력 디렉터리가 입력 위치와 같거나 출력이 입력 파일을 덮어쓰게 되면 ValueError
+    """
+    import os
+    
+    if not files:
+        return {}
+    if os.path.isdir(source):
+        base = os.path.abspath(source)
+    else:
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+    if os.path.realpath(output_dir) == os.path.realpath(base):
+        raise ValueError(f"출력 디렉터리가 입력 위치와 같습니다: {output_dir}")
+    
+    outputs = {path: os.path.join(output_dir, os.path.relpath(os.path.abspath(path), base)) for path in files}
+    inputs = {os.path.normcase(os.path.realpath(path)) for path in files}
+    seen = {}
+    for path, output_path in outputs.items():
+        key = os.path.normcase(os.path.realpath(output_path))
+        if key in inputs:
+            raise ValueError(f"출력 파일이 입력 파일을 덮어씁니다: {output_path}")
+        if key in seen:
+            raise ValueError(f"출력 경로가 겹칩니다: {seen[key]}, {path} → {output_path}")
+        seen[key] = path
+    return outputs
+
+def run_batch(source, output_dir, settings=None, workers=None):
+    """여러 G-code 파일을 워커 프로세스 풀에서 동시 처리 (파일별 실패 격리)"""
+    import os
+    import time
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    settings = to_zhop_settings(settings)
+    files = collect_gcode_files(source)
+    output_paths = batch_output_paths(source, files, output_dir)  # 워커 시작 전에 경로 충돌 거부
+    results = []
+    start_time = time.perf_counter()
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_processing_worker,
+                             initargs=(settings,)) as executor:
+        futures = {executor.submit(_process_file_in_worker, path, output_paths[path]): path
+                   for path in files}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # 워커 프로세스 자체가 비정상 종료된 경우에도 나머지 파일은 계속 처리
+                result = {'input': futures[future], 'output': None, 'seconds': 0.0,
+                          'error': f"{type(e).__name__}: {e}"}
+            results.append(result)
+            print(format_throughput(result))
+    
+    wall_time = time.perf_counter() - start_time
+    succeeded = [result for result in results if not result['error']]
+    total_bytes = sum(result['bytes_in'] for result in succeeded)
+    summary = {
+        'files': len(files),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'bytes_in': total_bytes,
+        'wall_seconds': wall_time,
+        'throughput_mb_s': total_bytes / 1e6 / max(wall_time, 1e-9),
+    }
+    return results, summary
+
+def run_batch_command(argv):
+    """CLI batch 명령 처리"""
+    import os
+    import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='SmartZHop.py batch',
+                                     description='디렉터리/glob의 G-code 파일들을 병렬로 후처리')
+    parser.add_argument('source', help='입력 디렉터리 또는 glob 패턴 (예: "queue/*.gcode")')
+    parser.add_argument('--output', '-o', help='출력 디렉터리 (기본: 입력 위치의 processed/)')
+    parser.add_argument('--settings', '-s', help='JSON/YAML 설정 파일')
+    parser.add_argument('--workers', '-j', type=int, default=None, help='워커 프로세스 수 (기본: CPU 수)')
+    args = parser.parse_args(argv)
+    
+    settings = load_settings_file(args.settings) if args.settings else None
+    source_dir = args.source if os.path.isdir(args.source) else os.path.dirname(args.source) or '.'
+    output_dir = args.output or os.path.join(source_dir, 'processed')
+    
+    try:
+        results, summary = run_batch(args.source, output_dir, settings, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    print("-" * 60)
+    print(f"📦 {summary['files']}개 파일: 성공 {summary['succeeded']}개, 실패 {summary['failed']}개")
+    print(f"⏱️ 전체 {summary['wall_seconds']:.2f}초, {summary['bytes_in'] / 1e6:.2f}MB "
+          f"({summary['throughput_mb_s']:.2f} MB/s)")
+    print(f"💾 출력 디렉터리: {output_dir}")
+    if summary['failed']:
+        sys.exit(1)
+    return summary
+
+def _warm_up_worker():
+    """워커 예열: 첫 작업 전에 엔진 생성과 정규식 컴파일 비용을 미리 지불"""
+    engine = ZHopEngine(_WORKER_SETTINGS)
+    engine.is_travel_move("G0 F9000 X1 Y1")
+    return True
+
+class HotFolderWatcher:
+    """입력 폴더를 폴링하여 완성된 G-code 파일을 예열된 워커 풀로 처리하는 감시 데몬
+    
+    출력 디렉터리가 입력 폴더이거나 그 안(done/, failed/ 포함)이면 결과가 다시 입력으로 잡히거나
+    원본 이동과 겹치므로 ValueError
+    """
+    
+    def __init__(self, input_dir, output_dir, settings=None, workers=None,
+                 poll_interval=1.0, status_path=None):
+        import os
         
-        # 구간 기본 정보
-        segment_length = segment['distance']
-        start_x, start_y = segment['start_x'], segment['start_y']
-        end_x, end_y = segment['end_x'], segment['end_y']
+        input_root = os.path.normcase(os.path.realpath(input_dir))
+        output_root = os.path.normcase(os.path.realpath(output_dir))
+        if os.path.commonpath([input_root, output_root]) == input_root:
+            raise ValueError(f"출력 디렉터리가 입력 폴더이거나 그 안에 있습니다: {output_dir}")
         
-        # Z-hop 단계 경계 계산
-        trajectory_mode = settings.get('trajectory_mode', 'percentage')
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.settings = to_zhop_settings(settings)
+        self.workers = workers or os.cpu_count() or 1
+        self.poll_interval = poll_interval
+        self.status_path = status_path or os.path.join(output_dir, 'smartzhop_status.json')
+        self.done_dir = os.path.join(input_dir, 'done')
+        self.failed_dir = os.path.join(input_dir, 'failed')
         
-        if trajectory_mode == 'angle':
-            # 각도 기반 경계 계산
-            ascent_angle = settings.get('ascent_angle', 45.0)
-            descent_angle = settings.get('descent_angle', 45.0)
-            max_height = z_height_function(total_distance / 2)  # 추정 최대 높이
+        self.candidates = {}  # 경로 → (크기, 수정시각, 최초 발견 시각): 쓰기 완료 대기
+        self.in_flight = {}  # future → (경로, 최초 발견 시각)
+        self.metrics = {
+            'processed': 0,
+            'failed': 0,
+            'last_latency_s': 0.0,
+            'avg_latency_s': 0.0,
+            'max_latency_s': 0.0,
+        }
+        self.executor = None
+    
+    def start(self):
+        """워커 풀을 만들고 모든 워커를 미리 예열"""
+        import os
+        from concurrent.futures import ProcessPoolExecutor
+        
+        for directory in (self.output_dir, self.done_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_processing_worker,
+                                            initargs=(self.settings,))
+        for future in [self.executor.submit(_warm_up_worker) for _ in range(self.workers)]:
+            future.result()
+    
+    def stop(self):
+        """진행 중인 작업을 마친 뒤 워커 풀 종료"""
+        if self.executor is not None:
+            self.collect(wait=True)
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        self.write_status()
+    
+    def scan(self):
+        """입력 폴더를 스캔하여 크기/수정시각이 안정된 (쓰기 완료된) 파일 제출"""
+        import os
+        import time
+        
+        now = time.time()
+        busy = {path for path, _ in self.in_flight.values()}
+        seen = set()
+        
+        for name in os.listdir(self.input_dir):
+            path = os.path.join(self.input_dir, name)
+            if (name.startswith('.') or not is_gcode_file_name(name)
+                    or path in busy or not os.path.isfile(path)):
+                continue
+            seen.add(path)
             
-            if ascent_angle >= 89.5:
-                ascent_boundary = 0.0
-            else:
-                ascent_boundary = max_height / math.tan(math.radians(ascent_angle))
+            stat = os.stat(path)
+            previous = self.candidates.get(path)
+            if previous is None or previous[:2] != (stat.st_size, stat.st_mtime):
+                # 새 파일이거나 아직 쓰는 중: 다음 폴링까지 대기
+                first_seen = previous[2] if previous else now
+                self.candidates[path] = (stat.st_size, stat.st_mtime, first_seen)
+                continue
             
-            if descent_angle >= 89.5:
-                descent_start = total_distance
-            else:
-                descent_horizontal = max_height / math.tan(math.radians(descent_angle))
-                descent_start = total_distance - descent_horizontal
-        else:
-            # 퍼센티지 기반 경계 계산
-            ascent_ratio = settings.get('ascent_ratio', 30) / 100.0
-            descent_ratio = settings.get('descent_ratio', 30) / 100.0
+            del self.candidates[path]
+            future = self.executor.submit(_process_file_in_worker, path,
+                                          os.path.join(self.output_dir, name))
+            self.in_flight[future] = (path, previous[2])
+        
+        # 사라진 후보 정리
+        for path in list(self.candidates):
+            if path not in seen:
+                del self.candidates[path]
+    
+    def collect(self, wait=False):
+        """완료된 작업의 원본을 done/failed로 옮기고 지연 시간 지표 갱신"""
+        import os
+        import time
+        from concurrent.futures import wait as wait_futures
+        
+        if wait and self.in_flight:
+            wait_futures(list(self.in_flight))
+        
+        for future in [future for future in self.in_flight if future.done()]:
+            path, first_seen = self.in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'input': path, 'error': f"{type(e).__name__}: {e}", 'seconds': 0.0}
             
-            ascent_boundary = total_distance * ascent_ratio
-            descent_start = total_distance * (1.0 - descent_ratio)
+            latency = time.time() - first_seen
+            target_dir = self.failed_dir if result['error'] else self.done_dir
+            if os.path.exists(path):
+                os.replace(path, os.path.join(target_dir, os.path.basename(path)))
+            
+            if result['error']:
+                self.metrics['failed'] += 1
+            else:
+                count = self.metrics['processed'] + 1
+                self.metrics['processed'] = count
+                self.metrics['avg_latency_s'] += (latency - self.metrics['avg_latency_s']) / count
+                self.metrics['max_latency_s'] = max(self.metrics['max_latency_s'], latency)
+                self.metrics['last_latency_s'] = latency
+            print(format_throughput(result) + f" (대기 포함 지연 {latency:.2f}초)")
+    
+    def write_status(self):
+        """큐 길이와 지연 시간 지표를 상태 파일에 원자적으로 기록"""
+        import os
+        import json
+        import tempfile
+        from datetime import datetime
         
-        # 경계점들
-        boundaries = []
-          # 상승 끝 경계 (수평 시작)
-        if start_distance <= ascent_boundary <= end_distance:
-            boundaries.append({
-                'distance': ascent_boundary,
-                'type': 'ascent_end',
-                'description': 'Ascent→Travel'
-            })
+        status = dict(self.metrics)
+        status['queue_depth'] = len(self.candidates) + len(self.in_flight)
+        status['waiting_for_write'] = len(self.candidates)
+        status['in_flight'] = len(self.in_flight)
+        status['workers'] = self.workers
+        status['updated_at'] = datetime.now().isoformat(timespec='seconds')
         
-        # 하강 시작 경계 (수평 끝)
-        if start_distance <= descent_start <= end_distance:
-            boundaries.append({
-                'distance': descent_start,
-                'type': 'descent_start', 
-                'description': 'Travel→Descent'
-            })
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.status_path)),
+                                         prefix='.smartzhop-status-', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(status, f, indent=2)
+        os.replace(temp_path, self.status_path)
+        return status
+    
+    def run(self, max_cycles=None):
+        """폴링 루프 실행 (max_cycles가 없으면 Ctrl+C까지 계속)"""
+        import time
         
-        # 경계점들을 거리순으로 정렬
-        boundaries.sort(key=lambda x: x['distance'])
+        self.start()
+        cycles = 0
+        try:
+            while max_cycles is None or cycles < max_cycles:
+                self.scan()
+                self.collect()
+                self.write_status()
+                cycles += 1
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            print("\n🛑 감시 종료 요청")
+        finally:
+            self.stop()
+        return self.metrics
+
+def run_watch_command(argv):
+    """CLI watch 명령 처리"""
+    import os
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='SmartZHop.py watch',
+                                     description='입력 폴더를 감시하며 새 G-code 파일을 예열된 워커로 처리')
+    parser.add_argument('input_dir', help='감시할 입력 폴더 (처리된 원본은 done/, 실패는 failed/로 이동)')
+    parser.add_argument('output_dir', help='처리 결과를 저장할 폴더')
+    parser.add_argument('--settings', '-s', help='JSON/YAML 설정 파일')
+    parser.add_argument('--workers', '-j', type=int, default=None, help='워커 프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--interval', type=float, default=1.0, help='폴링 간격 (초)')
+    parser.add_argument('--status', help='상태 파일 경로 (기본: 출력 폴더의 smartzhop_status.json)')
+    args = parser.parse_args(argv)
+    
+    try:
+        settings = load_settings_file(args.settings) if args.settings else None
+        watcher = HotFolderWatcher(args.input_dir, args.output_dir, settings, args.workers,
+                                   args.interval, args.status)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"👀 감시 시작: {os.path.abspath(args.input_dir)} → {os.path.abspath(args.output_dir)} "
+          f"(워커 {watcher.workers}개, {args.interval}초 간격)")
+    return watcher.run()
+
+def parse_settings_json(text, base=None):
+    """JSON 문자열 설정을 base(기본: ZHopSettings 기본값)에 덮어쓴 검증된 설정 객체로 변환 (HTTP 요청용)"""
+    import json
+    
+    raw_settings = json.loads(text) if text else {}
+    if not isinstance(raw_settings, dict):
+        raise ValueError("설정은 JSON 객체여야 합니다")
+    
+    base = base if base is not None else ZHopSettings()
+    return ZHopSettings.from_dict({**base.to_dict(), **raw_settings})
+
+class _ThreadStdout:
+    """스레드별 stdout 분기: 캡처 중인 스레드의 출력은 자기 버퍼로, 나머지 스레드는 원래 stdout으로
+
+    contextlib.redirect_stdout은 프로세스 전체의 sys.stdout을 바꾸므로 동시에 도는 HTTP 작업끼리는 쓸 수 없음
+    """
+    _install_lock = threading.Lock()
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def target(self):
+        return getattr(self.local, 'buffer', None) or self.stream
+    
+    def write(self, text):
+        return self.target().write(text)
+    
+    def flush(self):
+        return self.target().flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+    
+    @classmethod
+    def capture(cls):
+        """현재 스레드의 print 출력만 StringIO로 받는 컨텍스트 (다른 스레드 출력은 그대로)"""
+        import io
+        import sys
+        import contextlib
         
-        # 세분화된 점들 생성
-        subdivided_points = []
-        current_distance = start_distance
-        prev_distance = start_distance
+        with cls._install_lock:
+            if not isinstance(sys.stdout, cls):
+                sys.stdout = cls(sys.stdout)
+            proxy = sys.stdout
         
-        # 구간 시작점
-        if start_distance == 0 or len(boundaries) > 0:
-            subdivided_points.append({
-                'x': start_x,
-                'y': start_y,
-                'cumulative_distance': start_distance,
-                'segment_distance': 0.001,  # 최소값
-                'boundary_type': 'segment_start',
-                'prev_distance': start_distance
-            })
+        @contextlib.contextmanager
+        def capturing():
+            buffer = io.StringIO()
+            proxy.local.buffer = buffer
+            try:
+                yield buffer
+            finally:
+                proxy.local.buffer = None
+        return capturing()
+
+def create_processing_server(host='127.0.0.1', port=8765, workers=2, default_settings=None,
+                             chunk_size=64 * 1024):
+    """로컬 HTTP 처리 서비스 생성 (POST /process 스트리밍 응답, GET /metrics)
+
+    엔진의 진행 로그는 작업(요청 스레드)별로 캡처해 버리므로 동시 요청끼리 섞이지 않음.
+    응답 끝에는 ;SMARTZHOP_TIME_DELTA:<초> HOPS:<개수> 주석 한 줄이 붙음: 스트리밍 중에는 헤더의
+    ;TIME:을 고칠 수 없으므로 Z-홉으로 늘어난 예상 출력 시간(초)과 Z-홉 수를 마지막에 알려줌
+    """
+    import json
+    import time
+    import threading
+    from urllib.parse import urlparse, parse_qs
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    
+    default_settings = to_zhop_settings(default_settings)
+    job_slots = threading.BoundedSemaphore(workers)
+    metrics_lock = threading.Lock()
+    metrics = {
+        'jobs_processed': 0,
+        'jobs_failed': 0,
+        'jobs_active': 0,
+        'queue_depth': 0,
+        'lines_processed': 0,
+        'processing_seconds': 0.0,
+        'workers': workers,
+        'started_at': time.time(),
+    }
+    
+    def update_metrics(**deltas):
+        with metrics_lock:
+            for key, delta in deltas.items():
+                metrics[key] += delta
+    
+    class ProcessingHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
         
-        # 각 경계점에서 중간점 생성
-        for boundary in boundaries:
-            boundary_distance = boundary['distance']
-            
-            # 구간 내 위치 비율 계산
-            if segment_length > 0:
-                ratio = (boundary_distance - start_distance) / segment_length
-            else:
-                ratio = 0.0
-            
-            # 선형 보간으로 XY 좌표 계산
-            boundary_x = start_x + (end_x - start_x) * ratio
-            boundary_y = start_y + (end_y - start_y) * ratio
-            
-            subdivided_points.append({
-                'x': boundary_x,
-                'y': boundary_y,
-                'cumulative_distance': boundary_distance,
-                'segment_distance': boundary_distance - prev_distance,
-                'boundary_type': boundary['description'],
-                'prev_distance': prev_distance
-            })
-            
-            prev_distance = boundary_distance
+        def log_message(self, format, *args):
+            pass  # 요청마다 stderr 로그를 남기지 않음
         
-        # 구간 끝점
-        if end_distance - prev_distance > 0.001:  # 의미있는 거리가 남아있을 때만
-            subdivided_points.append({
-                'x': end_x,
-                'y': end_y,
-                'cumulative_distance': end_distance,
-                'segment_distance': end_distance - prev_distance,
-                'boundary_type': 'segment_end',
-                'prev_distance': prev_distance
-            })
+        def send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
         
-        # 세분화 결과가 없으면 원본 구간 반환
-        if len(subdivided_points) == 0:
-            subdivided_points.append({
-                'x': end_x,
-                'y': end_y,
-                'cumulative_distance': end_distance,
-                'segment_distance': segment_length,
-                'boundary_type': 'original',
-                'prev_distance': start_distance
-            })
+        def write_chunk(self, data):
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
         
-        return subdivided_points
+        def do_GET(self):
+            if urlparse(self.path).path != '/metrics':
+                self.send_json(404, {'error': 'not found'})
+                return
+            with metrics_lock:
+                snapshot = dict(metrics)
+            snapshot['uptime_seconds'] = time.time() - snapshot.pop('started_at')
+            snapshot['lines_per_second'] = (snapshot['lines_processed'] / snapshot['processing_seconds']
+                                            if snapshot['processing_seconds'] > 0 else 0.0)
+            self.send_json(200, snapshot)
+        
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != '/process':
+                self.send_json(404, {'error': 'not found'})
+                return
+            
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length)
+            try:
+                settings_text = (self.headers.get('X-SmartZHop-Settings')
+                                 or parse_qs(url.query).get('settings', [''])[0])
+                settings = parse_settings_json(settings_text, default_settings)
+                layers = split_gcode_layers(body.decode('utf-8'))
+            except (ValueError, UnicodeDecodeError) as e:
+                self.send_json(400, {'error': str(e)})
+                return
+            
+            # 작업 슬롯 대기 (동시 처리 작업 수 = workers)
+            update_metrics(queue_depth=1)
+            job_slots.acquire()
+            update_metrics(queue_depth=-1, jobs_active=1)
+            start_time = time.perf_counter()
+            line_count = sum(layer.count('\n') + 1 for layer in layers)
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                
+                # 레이어가 처리되는 대로 chunk_size 단위로 묶어서 전송 (엔진 로그는 이 작업 것만 캡처해 버림)
+                engine = ZHopEngine(settings)
+                pending = []
+                pending_size = 0
+                with _ThreadStdout.capture():
+                    for layer in engine.iter_execute(layers):
+                        encoded = (layer + '\n').encode('utf-8')
+                        pending.append(encoded)
+                        pending_size += len(encoded)
+                        if pending_size >= chunk_size:
+                            self.write_chunk(b''.join(pending))
+                            pending = []
+                            pending_size = 0
+                # 스트리밍 중에는 헤더의 ;TIME:을 고칠 수 없으므로 추가 시간을 주석으로 전달
+                stats = engine.print_time_stats
+                pending.append(f";SMARTZHOP_TIME_DELTA:{stats['total_delta']:.3f} HOPS:{stats['hops']}\n"
+                               .encode('utf-8'))
+                self.write_chunk(b''.join(pending))
+                self.wfile.write(b"0\r\n\r\n")
+                update_metrics(jobs_processed=1, lines_processed=line_count)
+            except Exception:
+                # 응답 헤더가 이미 전송됨: 종료 chunk 없이 연결을 끊어 클라이언트가 실패를 알 수 있게 함
+                update_metrics(jobs_failed=1)
+                self.close_connection = True
+            finally:
+                update_metrics(jobs_active=-1, processing_seconds=time.perf_counter() - start_time)
+                job_slots.release()
+    
+    server = ThreadingHTTPServer((host, port), ProcessingHandler)
+    server.daemon_threads = True
+    server.metrics = metrics
+    return server
 
-# ========================================================================================
-# 독립 실행을 위한 테스트 함수들
-# ========================================================================================
+def run_serve_command(argv):
+    """CLI serve 명령 처리"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='SmartZHop.py serve',
+                                     description='로컬 HTTP 처리 서비스 (POST /process, GET /metrics)')
+    parser.add_argument('--port', type=int, default=8765, help='포트 (기본: 8765)')
+    parser.add_argument('--workers', '-j', type=int, default=2, help='동시 처리 작업 수 (기본: 2)')
+    parser.add_argument('--settings', '-s', help='기본 설정 JSON/YAML 파일 (요청별 설정으로 덮어쓰기 가능)')
+    args = parser.parse_args(argv)
+    
+    settings = load_settings_file(args.settings) if args.settings else None
+    server = create_processing_server('127.0.0.1', args.port, args.workers, settings)
+    print(f"🌐 Smart Z-Hop 서비스: http://127.0.0.1:{server.server_address[1]} (동시 작업 {args.workers}개)")
+    print("   POST /process  (본문: G-code, 헤더 X-SmartZHop-Settings: 설정 JSON)")
+    print("   GET  /metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 서비스 종료")
+    finally:
+        server.server_close()
 
 def run_smart_zhop_test():
     """SmartZHop 독립 실행 테스트"""
@@ -1330,9 +5079,8 @@ def test_slingshot_mode():
     print("\n🚀 Slingshot 모드 테스트")
     print("-" * 30)
     
-    smart_zhop = SmartZHop()
     # Mock에서 slingshot 모드로 변경
-    smart_zhop.getSettingValueByKey = lambda key: 'slingshot' if key == 'zhop_mode' else smart_zhop.__class__.__bases__[0]().getSettingValueByKey(key)
+    smart_zhop = SmartZHop({'zhop_mode': 'slingshot'})
     
     test_lines = [
         "G0 F3000 X10 Y10",
@@ -1421,135 +5169,531 @@ def test_retraction_detection():
     print("   ✓ 최신 E 값 감소 확인")
     print("   ✓ 리트랙션 후 travel move 인식")
 
-def test_z_change_logging(file_path=None, max_lines=100):
-    """
-    실제 G-code 파일에서 Z 변화를 상세히 로깅하는 테스트 함수
-    초기 비정상적인 Z 상승 문제를 진단하기 위해 사용
-    """
-    print("\n🔍 Z 변화 상세 로깅 테스트")
-    print("=" * 50)
+class ZProfileAnalyzer:
+    """G-code 파일 전체를 일정한 메모리로 스트리밍하며 Z 프로파일 통계 수집 (z-profile 명령)"""
     
-    # 기본 파일 경로 설정
-    if file_path is None:
-        file_path = r"C:\Users\ms338\Documents\CE3E3V2_tmpclu26txa18650_batterie_holder(1).gcode"
+    def __init__(self, jump_threshold=5.0, max_anomalies=100):
+        self.jump_threshold = jump_threshold
+        self.max_anomalies = max_anomalies
+        self.reset()
     
-    print(f"📁 분석 대상 파일: {file_path}")
-    print(f"📊 최대 분석 라인 수: {max_lines}")
+    def reset(self):
+        self.current_z = None
+        self.current_e = None
+        self.relative_e = False   # M83 상대 압출 모드 (M82로 절대 모드 복귀)
+        self.print_z = None       # 마지막 압출 이동의 Z
+        self.hop_peak = None      # 압출 없이 print_z보다 올라간 최고 Z
+        self.layer = None
+        self.lines = 0
+        self.motion_lines = 0
+        self.z_min = None
+        self.z_max = None
+        self.hop_count = 0
+        self.hop_height_total = 0.0
+        self.hop_height_max = 0.0
+        self.hop_histogram = {label: 0 for label, _ in Z_PROFILE_HOP_BUCKETS}
+        self.per_layer = {}
+        self.anomalies = []
+        self.anomaly_count = 0
     
-    try:
-        # 파일 읽기
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+    def add_anomaly(self, line_number, kind, z, delta, line):
+        self.anomaly_count += 1
+        if len(self.anomalies) < self.max_anomalies:
+            self.anomalies.append({'line': line_number, 'type': kind, 'z': round(z, 4),
+                                   'delta': round(delta, 4), 'gcode': str(line, 'utf-8', 'replace')})
+    
+    def record_hop(self, height):
+        self.hop_count += 1
+        self.hop_height_total += height
+        self.hop_height_max = max(self.hop_height_max, height)
+        for label, upper in Z_PROFILE_HOP_BUCKETS:
+            if height < upper:
+                self.hop_histogram[label] += 1
+                break
+        if self.layer is not None:
+            self.per_layer[self.layer]['hops'] += 1
+    
+    def feed_line(self, line_number, line):
+        """라인 하나 처리 (line은 bytes 또는 memoryview)"""
+        self.lines = line_number
+        if not len(line):
+            return
+        first = line[0]
+        if first == 59:  # ';'
+            if line[:7] == b';LAYER:':
+                try:
+                    self.layer = int(bytes(line[7:]).strip() or 0)
+                except ValueError:
+                    return  # 숫자가 아닌 레이어 마커는 무시
+                self.per_layer.setdefault(self.layer, {'z_min': None, 'z_max': None, 'hops': 0})
+            return
+        if first == 77:  # 'M'
+            if line[:3] in (b'M82', b'M83') and (len(line) == 3 or line[3] not in b'0123456789'):
+                self.relative_e = line[:3] == b'M83'
+            return
+        if first != 71:  # 'G'
+            return
         
-        print(f"✅ 파일 로드 완료: 총 {len(lines)}줄")
+        self.motion_lines += 1
+        comment = GCODE_COMMENT_PATTERN.search(line)
+        params = dict(GCODE_PARAM_PATTERN.findall(line, 0, comment.start() if comment else len(line)))
         
-        # Z 변화 추적 변수들
-        current_z = None
-        z_changes = []
-        line_count = 0
+        if line[:3] == b'G92' and (len(line) == 3 or line[3] not in b'0123456789'):
+            # 좌표 재설정 (이동 아님): 이후 절대 E 비교 기준만 갱신
+            if b'E' in params:
+                self.current_e = float(params[b'E'])
+            return
         
-        print("\n📈 Z 변화 상세 로그:")
-        print("-" * 60)
-        print(f"{'Line':<6} {'G-code':<40} {'Z Value':<10} {'Z Change':<12} {'Type'}")
-        print("-" * 60)
+        extruding = False
+        if b'E' in params:
+            e_value = float(params[b'E'])
+            if self.relative_e:
+                advancing = e_value > 0
+            else:
+                advancing = self.current_e is None or e_value > self.current_e
+                self.current_e = e_value
+            extruding = advancing and (b'X' in params or b'Y' in params)
         
-        for i, line in enumerate(lines[:max_lines], 1):
-            line = line.strip()
-            if not line or line.startswith(';'):
-                continue
-                
-            line_count += 1
-            
-            # Z 값 추출
-            z_match = re.search(r'Z([-+]?\d*\.?\d+)', line, re.IGNORECASE)
-            if z_match:
-                new_z = float(z_match.group(1))
-                z_change = 0.0
-                change_type = "Initial"
-                
-                if current_z is not None:
-                    z_change = new_z - current_z
-                    if abs(z_change) > 0.001:  # 의미있는 변화만 기록
-                        if z_change > 0:
-                            change_type = "⬆️ UP"
-                        else:
-                            change_type = "⬇️ DOWN"
-                        
-                        # 비정상적인 큰 변화 감지
+        if b'Z' in params:
+            z = float(params[b'Z'])
+            if self.current_z is not None:
+                delta = z - self.current_z
+                if abs(delta) > self.jump_threshold:
+                    self.add_anomaly(line_number, 'jump', z, delta, line)
+                if self.print_z is not None and z < self.print_z - Z_PROFILE_TOLERANCE and extruding:
+                    self.add_anomaly(line_number, 'below_print_z', z, z - self.print_z, line)
+            self.current_z = z
+            self.z_min = z if self.z_min is None else min(self.z_min, z)
+            self.z_max = z if self.z_max is None else max(self.z_max, z)
+            if self.layer is not None:
+                layer_stats = self.per_layer[self.layer]
+                layer_stats['z_min'] = z if layer_stats['z_min'] is None else min(layer_stats['z_min'], z)
+                layer_stats['z_max'] = z if layer_stats['z_max'] is None else max(layer_stats['z_max'], z)
+        
+        if self.current_z is None:
+            return
+        if extruding:
+            # 압출 재개: 그 사이 올라갔던 최고 Z와 현재 Z의 차이가 Z-홉 높이
+            if self.hop_peak is not None and self.hop_peak > self.current_z + Z_PROFILE_TOLERANCE:
+                self.record_hop(self.hop_peak - self.current_z)
+            self.hop_peak = None
+            self.print_z = self.current_z
+        elif self.print_z is not None and self.current_z > self.print_z + Z_PROFILE_TOLERANCE:
+            self.hop_peak = self.current_z if self.hop_peak is None else max(self.hop_peak, self.current_z)
+    
+    def analyze_file(self, file_path):
+        """파일 전체를 mmap으로 스트리밍 분석하여 보고서 반환"""
+        import time
+        
+        self.reset()
+        start_time = time.perf_counter()
+        with MappedGcodeReader(file_path) as reader:
+            for line_number, line in reader.iter_lines():
+                self.feed_line(line_number, line)
+        report = self.report()
+        report['file'] = file_path
+        report['seconds'] = time.perf_counter() - start_time
+        report['lines_per_second'] = self.lines / max(report['seconds'], 1e-9)
+        return report
+    
+    def report(self):
+        return {
+            'lines': self.lines,
+            'motion_lines': self.motion_lines,
+            'layers': len(self.per_layer),
+            'z_min': self.z_min,
+            'z_max': self.z_max,
+            'hops': self.hop_count,
+            'hop_height_avg': self.hop_height_total / self.hop_count if self.hop_count else 0.0,
+            'hop_height_max': self.hop_height_max,
+            'hop_histogram': dict(self.hop_histogram),
+            'anomaly_count': self.anomaly_count,
+            'anomalies': list(self.anomalies),
+            'per_layer': {str(layer): dict(stats) for layer, stats in self.per_layer.items()},
+        }
 
+def write_z_profile_csv(csv_path, report):
+    """레이어별 Z 범위/Z-홉 수를 CSV로 저장"""
+    import csv
+    
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['layer', 'z_min', 'z_max', 'hops'])
+        for layer, stats in report['per_layer'].items():
+            writer.writerow([layer, stats['z_min'], stats['z_max'], stats['hops']])
 
+def print_z_profile_report(report):
+    """Z 프로파일 보고서 요약 출력"""
+    print(f"\n📈 Z 프로파일: {report['file']}")
+    print("-" * 60)
+    print(f"   • 라인: {report['lines']:,}개 (모션 {report['motion_lines']:,}개), 레이어: {report['layers']}개")
+    if report['z_min'] is not None:
+        print(f"   • Z 범위: {report['z_min']:.3f} ~ {report['z_max']:.3f} mm")
+    print(f"   • Z-홉: {report['hops']}개 (평균 {report['hop_height_avg']:.3f}mm, 최대 {report['hop_height_max']:.3f}mm)")
+    for label, count in report['hop_histogram'].items():
+        if count:
+            print(f"     {label:>10}: {count}")
+    if report['anomaly_count']:
+        print(f"\n⚠️ 이상 Z 변화 {report['anomaly_count']}개:")
+        for anomaly in report['anomalies'][:5]:
+            print(f"   Line {anomaly['line']}: {anomaly['type']} {anomaly['delta']:+.3f} mm | {anomaly['gcode']}")
+    print(f"\n⏱️ {report['seconds']:.2f}초 ({report['lines_per_second']:,.0f} 줄/s)")
 
-                        if abs(z_change) > 5.0:
-                            change_type += " ⚠️ LARGE"
-                        elif abs(z_change) > 1.0:
-                            change_type += " 🔶 MEDIUM"
-                    else:
-                        change_type = "→ SAME"
-                
-                # 로그 출력
-                z_change_str = f"{z_change:+.3f}" if current_z is not None else "N/A"
-                print(f"{i:<6} {line[:38]:<40} {new_z:<10.3f} {z_change_str:<12} {change_type}")
+def run_z_profile_command(argv):
+    """CLI z-profile 명령 처리 (이상 Z 변화가 허용치를 넘으면 종료 코드 1)"""
+    import sys
+    import json
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='SmartZHop.py z-profile',
+                                     description='G-code 전체의 Z 프로파일을 스트리밍 분석 (레이어별 Z 범위, Z-홉, 이상 변화)')
+    parser.add_argument('file', help='분석할 G-code 파일 (.gcode, .gcode.gz/.bz2/.xz, .bgcode)')
+    parser.add_argument('--json', dest='json_path', help='JSON 보고서 경로 (- 는 표준 출력)')
+    parser.add_argument('--csv', dest='csv_path', help='레이어별 CSV 보고서 경로')
+    parser.add_argument('--jump-threshold', type=float, default=5.0, help='이상 Z 변화 기준 mm (기본: 5.0)')
+    parser.add_argument('--max-anomalies', type=int, default=None,
+                        help='허용 이상 변화 수 (초과 시 종료 코드 1, 처리 결과 검사용)')
+    args = parser.parse_args(argv)
+    
+    report = ZProfileAnalyzer(args.jump_threshold).analyze_file(args.file)
+    if args.json_path == '-':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_z_profile_report(report)
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"💾 JSON 보고서: {args.json_path}")
+    if args.csv_path:
+        write_z_profile_csv(args.csv_path, report)
+        print(f"💾 CSV 보고서: {args.csv_path}")
+    
+    if args.max_anomalies is not None and report['anomaly_count'] > args.max_anomalies:
+        sys.exit(1)
+    return report
+
+def is_diff_anchor(line):
+    """정렬 기준 라인 여부: ;LAYER: 주석 또는 XY 이동이 있는 압출 라인 (Smart Z-Hop이 변경하지 않는 라인)"""
+    if line[:7] == b';LAYER:':
+        return True
+    if len(line) < 2 or line[0] != 71 or line[1] not in b'123':  # G1/G2/G3
+        return False
+    comment = GCODE_COMMENT_PATTERN.search(line)
+    axes = {axis for axis, _ in GCODE_PARAM_PATTERN.findall(line, 0, comment.start() if comment else len(line))}
+    return b'E' in axes and (b'X' in axes or b'Y' in axes)
+
+def advance_gcode_position(position, line):
+    """이동 라인을 적용한 새 위치와 (이동 거리, 상승 Z) 반환 (절대 좌표 기준)"""
+    if len(line) < 2 or line[0] != 71 or line[1] not in b'0123':
+        return position, 0.0, 0.0
+    comment = GCODE_COMMENT_PATTERN.search(line)
+    params = dict(GCODE_PARAM_PATTERN.findall(line, 0, comment.start() if comment else len(line)))
+    x, y, z = position
+    new_x = float(params[b'X']) if b'X' in params else x
+    new_y = float(params[b'Y']) if b'Y' in params else y
+    new_z = float(params[b'Z']) if b'Z' in params else z
+    if x is None or y is None or z is None:
+        return (new_x, new_y, new_z), 0.0, 0.0
+    distance = math.sqrt((new_x - x) ** 2 + (new_y - y) ** 2 + (new_z - z) ** 2)
+    return (new_x, new_y, new_z), distance, max(0.0, new_z - z)
+
+class GcodeDiffer:
+    """원본/처리 G-code를 레이어와 압출 라인 기준으로 맞춰 변경된 travel 블록만 스트리밍 보고 (diff 명령)"""
+    
+    def __init__(self):
+        self.summary = None
+    
+    @staticmethod
+    def iter_segments(reader):
+        """(앵커 라인 번호, 앵커, 앵커 앞의 [(라인 번호, 라인)]) 순회 - 파일 끝은 앵커 None"""
+        block = []
+        for line_number, line in reader.iter_lines():
+            if is_diff_anchor(line):
+                yield line_number, bytes(line), block
+                block = []
+            else:
+                block.append((line_number, bytes(line)))
+        yield None, None, block
+    
+    @staticmethod
+    def measure_block(position, block):
+        """블록을 따라 이동한 경로 길이와 상승 Z 합계"""
+        path_length = 0.0
+        z_up = 0.0
+        for _, line in block:
+            position, distance, rise = advance_gcode_position(position, line)
+            path_length += distance
+            z_up += rise
+        return position, path_length, z_up
+    
+    def iter_changes(self, before_path, after_path):
+        """변경된 블록을 순서대로 생성 (완료 후 self.summary에 전체 통계)"""
+        import time
+        
+        start_time = time.perf_counter()
+        summary = {'before': before_path, 'after': after_path, 'aligned': True, 'mismatch': None,
+                   'anchors': 0, 'layers': 0, 'changed_blocks': 0, 'lines_removed': 0, 'lines_inserted': 0,
+                   'added_z_travel': 0.0, 'added_path_length': 0.0}
+        self.summary = summary
+        position = (None, None, None)
+        layer = None
+        
+        with MappedGcodeReader(before_path) as before_reader, MappedGcodeReader(after_path) as after_reader:
+            for (before_number, before_anchor, before_block), (after_number, after_anchor, after_block) in zip(
+                    self.iter_segments(before_reader), self.iter_segments(after_reader)):
+                if [line for _, line in before_block] == [line for _, line in after_block]:
+                    position = self.measure_block(position, before_block)[0]
+                else:
+                    # 공통 앞/뒤 라인을 제외한 실제 변경 구간
+                    prefix = 0
+                    while (prefix < min(len(before_block), len(after_block))
+                           and before_block[prefix][1] == after_block[prefix][1]):
+                        prefix += 1
+                    suffix = 0
+                    while (suffix < min(len(before_block), len(after_block)) - prefix
+                           and before_block[-1 - suffix][1] == after_block[-1 - suffix][1]):
+                        suffix += 1
+                    removed = before_block[prefix:len(before_block) - suffix]
+                    inserted = after_block[prefix:len(after_block) - suffix]
+                    
+                    start = self.measure_block(position, before_block[:prefix])[0]
+                    before_end, before_length, before_z = self.measure_block(start, removed)
+                    after_end, after_length, after_z = self.measure_block(start, inserted)
+                    before_end = self.measure_block(before_end, before_block[len(before_block) - suffix:])[0]
+                    position = self.measure_block(after_end, after_block[len(after_block) - suffix:])[0]
+                    
+                    change = {
+                        'layer': layer,
+                        'kind': 'replaced' if removed and inserted else ('inserted' if inserted else 'removed'),
+                        'before_lines': [removed[0][0], removed[-1][0]] if removed else None,
+                        'after_lines': [inserted[0][0], inserted[-1][0]] if inserted else None,
+                        'removed': len(removed),
+                        'inserted': len(inserted),
+                        'added_z': after_z - before_z,
+                        'added_path': after_length - before_length,
+                        'before_end': list(before_end),
+                        'after_end': list(position),
+                        'before_layer_change': before_anchor is not None and before_anchor[:7] == b';LAYER:',
+                    }
+                    summary['changed_blocks'] += 1
+                    summary['lines_removed'] += len(removed)
+                    summary['lines_inserted'] += len(inserted)
+                    summary['added_z_travel'] += change['added_z']
+                    summary['added_path_length'] += change['added_path']
+                    yield change
                 
-                # Z 변화 기록
-                z_changes.append({
-                    'line_num': i,
-                    'line_content': line,
-                    'z_value': new_z,
-                    'z_change': z_change if current_z is not None else 0.0,
-                    'previous_z': current_z
-                })
+                if before_anchor != after_anchor:
+                    # 압출 라인/레이어 순서가 다르면 더 이상 정렬할 수 없음
+                    summary['aligned'] = False
+                    summary['mismatch'] = {
+                        'before_line': before_number, 'after_line': after_number,
+                        'before': before_anchor.decode('utf-8', 'replace') if before_anchor else None,
+                        'after': after_anchor.decode('utf-8', 'replace') if after_anchor else None,
+                    }
+                    break
+                if before_anchor is None:
+                    break
                 
-                current_z = new_z
+                summary['anchors'] += 1
+                if before_anchor[:7] == b';LAYER:':
+                    layer = int(before_anchor[7:].strip() or 0)
+                    summary['layers'] += 1
+                position = advance_gcode_position(position, before_anchor)[0]
+        
+        summary['seconds'] = time.perf_counter() - start_time
+
+def run_diff_command(argv):
+    """CLI diff 명령 처리 (정렬 실패 시 종료 코드 1)"""
+    import sys
+    import json
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='SmartZHop.py diff',
+                                     description='원본과 처리 결과를 레이어/압출 라인 기준으로 비교하여 변경된 travel 블록만 보고')
+    parser.add_argument('before', help='원본 (또는 이전 버전 결과) G-code')
+    parser.add_argument('after', help='처리 결과 G-code')
+    parser.add_argument('--jsonl', help='변경 블록을 JSON Lines로 저장 (마지막 줄은 요약, - 는 표준 출력)')
+    parser.add_argument('--limit', type=int, default=20, help='화면에 출력할 변경 블록 수 (기본: 20)')
+    args = parser.parse_args(argv)
+    
+    differ = GcodeDiffer()
+    output = None
+    if args.jsonl:
+        output = sys.stdout if args.jsonl == '-' else open(args.jsonl, 'w', encoding='utf-8')
+    else:
+        print(f"\n🔀 {args.before} → {args.after}")
+        print("-" * 78)
+        print(f"{'레이어':>6} {'원본 라인':>15} {'결과 라인':>15} {'-':>4} {'+':>4} {'추가 Z':>9} {'추가 경로':>10}")
+    
+    try:
+        for index, change in enumerate(differ.iter_changes(args.before, args.after)):
+            if output is not None:
+                output.write(json.dumps(change) + '\n')
+            elif index < args.limit:
+                before_lines = '-'.join(map(str, change['before_lines'])) if change['before_lines'] else '-'
+                after_lines = '-'.join(map(str, change['after_lines'])) if change['after_lines'] else '-'
+                print(f"{str(change['layer']):>6} {before_lines:>15} {after_lines:>15} {change['removed']:>4} "
+                      f"{change['inserted']:>4} {change['added_z']:>8.3f}mm {change['added_path']:>8.3f}mm")
+        summary = differ.summary
+        if output is not None:
+            output.write(json.dumps({'summary': summary}) + '\n')
+    finally:
+        if output is not None and output is not sys.stdout:
+            output.close()
+    
+    if output is None:
+        print("-" * 78)
+        print(f"📊 변경 블록 {summary['changed_blocks']}개 (레이어 {summary['layers']}개, 앵커 {summary['anchors']}개): "
+              f"-{summary['lines_removed']} / +{summary['lines_inserted']} 줄")
+        print(f"   • 추가 Z 이동: {summary['added_z_travel']:.3f}mm, 추가 경로: {summary['added_path_length']:.3f}mm")
+        print(f"⏱️ {summary['seconds']:.2f}초")
+    if not summary['aligned']:
+        mismatch = summary['mismatch']
+        print(f"❌ 정렬 실패: 원본 {mismatch['before_line']}번 줄 '{mismatch['before']}' ≠ "
+              f"결과 {mismatch['after_line']}번 줄 '{mismatch['after']}'", file=sys.stderr)
+        sys.exit(1)
+    return summary
+
+def count_newlines(data, start, end, chunk_size=1 << 20):
+    """bytes/mmap 구간의 줄바꿈 수 (mmap은 count가 없으므로 일정 크기 조각으로 복사하여 계산)"""
+    total = 0
+    for offset in range(start, end, chunk_size):
+        total += data[offset:min(offset + chunk_size, end)].count(b'\n')
+    return total
+
+def validate_gcode_file(file_path, original_path=None, tolerance=0.001, max_errors=100):
+    """처리 결과 검증: 압출 Z = 레이어 출력 Z, M203 설정/복원 짝, (원본 지정 시) Z-홉 끝점 = 원본 travel 목표"""
+    import time
+    import itertools
+    
+    start_time = time.perf_counter()
+    report = {'file': file_path, 'original': original_path, 'lines': 0, 'layers': 0, 'z_checks': 0,
+              'm203_sets': 0, 'm203_restores': 0, 'hops_checked': 0, 'error_count': 0, 'errors': []}
+    
+    def add_error(kind, line_number, message):
+        report['error_count'] += 1
+        if len(report['errors']) < max_errors:
+            report['errors'].append({'type': kind, 'line': line_number, 'message': message})
+    
+    with MappedGcodeReader(file_path) as reader:
+        if reader.buffer is not None:
+            data = reader.buffer
+        elif reader.file is None:
+            with open_gcode_file(file_path) as f:
+                data = f.read().encode('utf-8')
+        else:
+            data = b''  # 빈 파일
         
-        print("-" * 60)
-        print(f"📊 Z 변화 통계:")
-        print(f"   • 총 Z 명령: {len(z_changes)}개")
+        line_cache = [0, 1]  # (오프셋, 라인 번호): 오류 위치는 대부분 증가 순서이므로 이어서 계산
         
-        if z_changes:
-            z_values = [change['z_value'] for change in z_changes]
-            z_change_values = [change['z_change'] for change in z_changes[1:]]  # 첫 번째 제외
-            
-            print(f"   • Z 범위: {min(z_values):.3f} ~ {max(z_values):.3f} mm")
-            
-            if z_change_values:
-                print(f"   • 최대 상승: {max(z_change_values):.3f} mm")
-                print(f"   • 최대 하강: {min(z_change_values):.3f} mm")
-                
-                # 큰 변화들 찾기
-                large_changes = [change for change in z_changes[1:] if abs(change['z_change']) > 1.0]
-                if large_changes:
-                    print(f"\n⚠️ 큰 Z 변화 감지 ({len(large_changes)}개):")
-                    for change in large_changes[:5]:  # 처음 5개만 표시
-                        print(f"   Line {change['line_num']}: {change['z_change']:+.3f} mm")
-                        print(f"      {change['line_content']}")
-        
-        # 결과 파일로 저장
-        result_file = file_path.replace('.gcode', '_z_analysis.txt')
-        with open(result_file, 'w', encoding='utf-8') as f:
-            f.write(f"Z Change Analysis Report\n")
-            f.write(f"========================\n")
-            f.write(f"Source file: {file_path}\n")
-            f.write(f"Analysis date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Lines analyzed: {min(max_lines, len(lines))}\n\n")
-            
-            for change in z_changes:
-                f.write(f"Line {change['line_num']:4d}: Z={change['z_value']:8.3f} ")
-                if change['previous_z'] is not None:
-                    f.write(f"(Δ{change['z_change']:+.3f}) ")
-                f.write(f"| {change['line_content']}\n")
+        def line_at(offset):
+            if offset < line_cache[0]:
+                line_cache[:] = [0, 1]
+            line_cache[1] += count_newlines(data, line_cache[0], offset)
+            line_cache[0] = offset
+            return line_cache[1]
         
-        print(f"\n💾 상세 분석 결과 저장됨: {result_file}")
+        report['lines'] = count_newlines(data, 0, len(data)) + 1 if len(data) else 0
         
-    except FileNotFoundError:
-        print(f"❌ 파일을 찾을 수 없습니다: {file_path}")
-        print("📋 파일 경로를 확인하거나 다른 G-code 파일을 사용해주세요.")
-    except Exception as e:
-        print(f"❌ 오류 발생: {str(e)}")
+        # 1) Z 연속성: Z 변경/레이어 사이 구간마다 첫 압출만 검사 (같은 구간의 압출은 모두 같은 Z)
+        #    패턴은 줄바꿈 리터럴로 시작하여 빠르게 검색 (첫 줄은 Cura 헤더 주석)
+        find_extrusion = VALIDATOR_EXTRUSION_PATTERN.search
+        current_z = None
+        print_z = None
+        layer = None
+        previous_end = 0
+        for event in itertools.chain(VALIDATOR_Z_EVENT_PATTERN.finditer(data), (None,)):
+            interval_end = event.start() if event is not None else len(data)
+            if current_z is not None:
+                extrusion = find_extrusion(data, previous_end, interval_end)
+                if extrusion is not None:
+                    report['z_checks'] += 1
+                    if print_z is None:
+                        print_z = current_z
+                    elif abs(current_z - print_z) > tolerance:
+                        add_error('z_mismatch', line_at(extrusion.start() + 1),
+                                  f"레이어 {layer}: 압출 Z {current_z:.3f} ≠ 출력 Z {print_z:.3f}")
+            if event is None:
+                break
+            z_text, layer_text = event.groups()
+            if layer_text is not None:
+                layer = int(layer_text)
+                print_z = None
+                report['layers'] += 1
+            else:
+                current_z = float(z_text)
+                if VALIDATOR_EXTRUSION_PATTERN.match(data, event.start()):
+                    print_z = current_z  # Z를 포함한 압출 (spiralize): 출력 Z가 계속 변함
+            previous_end = event.end()
+        
+        # 2) M203 Z 속도 제한 설정/복원 짝
+        speed_limited_at = None
+        for command in VALIDATOR_M203_PATTERN.finditer(data):
+            if b'Set Z-axis speed limit' in command.group(0):
+                report['m203_sets'] += 1
+                if speed_limited_at is not None:
+                    add_error('m203_unmatched_set', line_at(speed_limited_at), "복원 없이 다시 M203 설정")
+                speed_limited_at = command.start() + 1
+            elif b'Restore original Z-axis speed' in command.group(0):
+                report['m203_restores'] += 1
+                if speed_limited_at is None:
+                    add_error('m203_orphan_restore', line_at(command.start() + 1), "설정 없는 M203 복원")
+                speed_limited_at = None
+        if speed_limited_at is not None:
+            add_error('m203_open_at_end', line_at(speed_limited_at), "파일 끝까지 M203 복원 없음")
+    
+    # 3) 원본과 정렬하여 Z-홉 블록의 끝 위치(XY 목표와 복원된 Z) 비교
+    if original_path:
+        differ = GcodeDiffer()
+        for change in differ.iter_changes(original_path, file_path):
+            report['hops_checked'] += 1
+            expected, actual = change['before_end'], change['after_end']
+            if change['before_layer_change']:
+                # 레이어 변경 Z-홉은 다음 레이어의 첫 이동에서 Z가 정해지므로 XY만 비교
+                expected, actual = expected[:2], actual[:2]
+            if any(a is not None and e is not None and abs(a - e) > tolerance for a, e in zip(actual, expected)):
+                add_error('hop_endpoint', change['after_lines'][-1] if change['after_lines'] else None,
+                          f"Z-홉 끝점 {actual} ≠ 원본 travel 목표 {expected}")
+        if not differ.summary['aligned']:
+            mismatch = differ.summary['mismatch']
+            add_error('alignment', mismatch['after_line'], f"원본과 압출 라인이 다름: {mismatch['after']}")
+    
+    report['seconds'] = time.perf_counter() - start_time
+    report['lines_per_second'] = report['lines'] / max(report['seconds'], 1e-9)
+    report['valid'] = report['error_count'] == 0
+    return report
 
-    print("   ✓ 최신 E 값 감소 확인")
-    print("   ✓ 리트랙션 후 travel move 인식")
+def run_validate_command(argv):
+    """CLI validate 명령 처리 (오류가 있으면 종료 코드 1)"""
+    import sys
+    import json
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='SmartZHop.py validate',
+                                     description='처리 결과의 Z 연속성, M203 짝, Z-홉 끝점 검증')
+    parser.add_argument('file', help='검증할 처리 결과 G-code')
+    parser.add_argument('--original', help='원본 G-code (지정 시 Z-홉 끝점을 원본 travel 목표와 비교)')
+    parser.add_argument('--json', dest='json_path', help='JSON 보고서 경로 (- 는 표준 출력)')
+    args = parser.parse_args(argv)
+    
+    report = validate_gcode_file(args.file, args.original)
+    if args.json_path == '-':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"\n🔎 검증: {args.file}")
+        print(f"   • {report['lines']:,}줄, 레이어 {report['layers']}개, Z 검사 {report['z_checks']}개, "
+              f"M203 {report['m203_sets']}/{report['m203_restores']}, Z-홉 끝점 {report['hops_checked']}개")
+        for error in report['errors'][:10]:
+            print(f"   ❌ Line {error['line']}: [{error['type']}] {error['message']}")
+        status = "✅ 통과" if report['valid'] else f"❌ 오류 {report['error_count']}개"
+        print(f"{status} ({report['seconds']:.2f}초, {report['lines_per_second']:,.0f} 줄/s)")
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    if not report['valid']:
+        sys.exit(1)
+    return report
 
-# 메인 실행 블록
 if __name__ == "__main__":
     import sys
     
@@ -1560,18 +5704,59 @@ if __name__ == "__main__":
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
         
-        if command == 'z-log' or command == 'zlog':
-            # Z 변화 로깅 테스트
-            file_path = sys.argv[2] if len(sys.argv) > 2 else None
-            max_lines = int(sys.argv[3]) if len(sys.argv) > 3 else 100
-            test_z_change_logging(file_path, max_lines)
+        if command in ('z-profile', 'z-log', 'zlog'):
+            # Z 프로파일 스트리밍 분석
+            run_z_profile_command(sys.argv[2:])
+            
+        elif command == 'diff':
+            # 원본/처리 결과 비교
+            run_diff_command(sys.argv[2:])
+            
+        elif command == 'validate':
+            # 처리 결과 검증
+            run_validate_command(sys.argv[2:])
+            
+        elif command == 'dry-run' or command == 'dryrun':
+            # 분석 전용 실행 (G-code 생성 없이 통계만)
+            run_dry_run_command(sys.argv[2:])
+            
+        elif command == 'sweep':
+            # 설정 조합 병렬 비교
+            run_sweep_command(sys.argv[2:])
+            
+        elif command == 'batch':
+            # 여러 파일 병렬 후처리
+            run_batch_command(sys.argv[2:])
+            
+        elif command == 'watch':
+            # 핫 폴더 감시 데몬
+            run_watch_command(sys.argv[2:])
+            
+        elif command == 'serve':
+            # 로컬 HTTP 처리 서비스
+            run_serve_command(sys.argv[2:])
+            
+        elif command == 'process':
+            # 단일 파일 후처리 (.gcode.gz / .bgcode 출력 지원)
+            run_process_command(sys.argv[2:])
+            
+        elif command == 'bench-io':
+            # 압축 입출력 처리량 비교
+            run_bench_io_command(sys.argv[2:])
             
         elif command == 'help' or command == '-h':
             print("\n📋 사용 가능한 명령어:")
             print("  python SmartZHop.py                   - 전체 테스트 실행")
-            print("  python SmartZHop.py z-log             - Z 변화 로깅 (기본 파일)")
-            print("  python SmartZHop.py z-log [파일경로]    - 특정 파일 Z 변화 로깅")
-            print("  python SmartZHop.py z-log [파일경로] [라인수] - 라인 수 제한")
+            print("  python SmartZHop.py z-profile <파일경로> [--json 경로|-] [--csv 경로] [--max-anomalies N] - Z 프로파일 분석")
+            print("  python SmartZHop.py diff <원본> <결과> [--jsonl 경로|-] [--limit N] - 변경된 travel 블록 비교")
+            print("  python SmartZHop.py validate <결과> [--original 원본] [--json 경로|-] - Z 연속성/M203/Z-홉 끝점 검증")
+            print("  python SmartZHop.py dry-run <파일경로> [-s 설정.json] [--set 키=값 ...] [--json] - Z-홉 통계 분석 (G-code 생성 생략)")
+            print("  python SmartZHop.py sweep <파일경로> [-s 설정.json] --grid 키=값1,값2 ... [--workers N] [--csv 경로] - 설정 조합 비교")
+            print("  python SmartZHop.py batch <디렉터리|glob> [-o 출력] [-s 설정.json] [-j N] - 여러 파일 병렬 처리")
+            print("  python SmartZHop.py watch <입력폴더> <출력폴더> [-s 설정.json] [-j N] [--interval 초] - 핫 폴더 감시")
+            print("  python SmartZHop.py serve [--port 8765] [-j N] [-s 설정.json] - 로컬 HTTP 처리 서비스")
+            print("  python SmartZHop.py process <입력> <출력(.gcode/.gcode.gz/.bgcode)> [-s 설정.json] [--validate] - 단일 파일 처리")
+            print("  python SmartZHop.py bench-io <파일> [--codecs none,gz,bz2,xz] - 압축 입출력 처리량 비교")
             print("  python SmartZHop.py help              - 도움말")
             sys.exit(0)
             
@@ -1599,7 +5784,7 @@ if __name__ == "__main__":
         print("🔍 새로운 Z 변화 분석 기능 추가!")
         print("")
         print("📋 추가 명령어:")
-        print("   python SmartZHop.py z-log    - Z 변화 상세 분석")
+        print("   python SmartZHop.py z-profile <파일> - Z 프로파일 분석")
         print("   python SmartZHop.py help     - 도움말")
         print("")
         print("🏆 3D 프린팅의 새로운 차원을 경험해보세요!")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 배치 처리 검증 테스트
+
+🎯 batch 기능 검증:
+- JSON 설정 파일 로드 및 검증
+- 디렉터리/glob 입력 수집
+- 워커 풀 병렬 처리 + 원자적 출력 저장
+- 한 파일의 실패가 다른 파일 처리에 영향을 주지 않음
+- 여러 폴더의 같은 이름 파일은 하위 경로 유지, 입력 위치와 같은 출력 디렉터리 거부
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import (ZHopEngine, ZHopSettings, load_gcode_layers, load_settings_file, collect_gcode_files, process_file,
+                       run_batch, batch_output_paths, format_throughput)
+
+def write_job(path, layer_count=3):
+    """간단한 레이어 작업 파일 작성"""
+    lines = [";FLAVOR:Marlin"]
+    for layer in range(layer_count):
+        lines += [f";LAYER:{layer}",
+                  f"G1 X10 Y10 Z{0.2 * (layer + 1):.1f} E{layer * 2 + 1}",
+                  "G0 F9000 X60 Y10",
+                  f"G1 X70 Y10 E{layer * 2 + 2}"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+def test_settings_file_validation():
+    """설정 파일 타입 변환과 알 수 없는 키 거부 검증"""
+    print("⚙️ 설정 파일 로드")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        good = os.path.join(directory, "good.json")
+        with open(good, "w", encoding="utf-8") as f:
+            json.dump({"zhop_mode": "traditional", "zhop_height": "0.4", "travel_zhop": "yes"}, f)
+        settings = load_settings_file(good)
+        print(f"   • {settings}")
+        assert settings == ZHopSettings(zhop_mode="traditional", zhop_height=0.4, travel_zhop=True)
+        assert load_settings_file(good).zhop_speed == ZHopSettings().zhop_speed  # 없는 키는 기본값
+
+        bad = os.path.join(directory, "bad.json")
+        with open(bad, "w", encoding="utf-8") as f:
+            json.dump({"zhop_hieght": 0.4}, f)
+        try:
+            load_settings_file(bad)
+            assert False, "오타 키는 거부되어야 함"
+        except ValueError as e:
+            print(f"   ✅ 잘못된 키 거부: {e}")
+
+def test_batch_directory_with_failure():
+    """디렉터리 일괄 처리 + 실패 격리 검증"""
+    print("\n📦 batch 디렉터리 처리")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("a.gcode", "b.gcode", "c.gcode"):
+            write_job(os.path.join(directory, name))
+        # 파싱 단계에서 예외를 일으키는 손상된 SETTING_3
+        with open(os.path.join(directory, "broken.gcode"), "w", encoding="utf-8") as f:
+            f.write(";SETTING_3 machine_max_feedrate_z = 1.2.3\nG0 X1 Y1")
+        with open(os.path.join(directory, "notes.txt"), "w", encoding="utf-8") as f:
+            f.write("not gcode")
+
+        files = collect_gcode_files(directory)
+        assert [os.path.basename(path) for path in files] == ["a.gcode", "b.gcode", "broken.gcode", "c.gcode"]
+        assert collect_gcode_files(os.path.join(directory, "[ab].gcode")) == files[:2]
+
+        output_dir = os.path.join(directory, "out")
+        results, summary = run_batch(directory, output_dir, {"zhop_mode": "traditional"}, workers=2)
+        print(f"   • 요약: {summary}")
+
+        assert summary["files"] == 4
+        assert summary["succeeded"] == 3
+        assert summary["failed"] == 1
+        failed = [result for result in results if result["error"]]
+        assert os.path.basename(failed[0]["input"]) == "broken.gcode"
+
+        outputs = sorted(os.listdir(output_dir))
+        assert outputs == ["a.gcode", "b.gcode", "c.gcode"]  # 임시 파일이 남지 않음
+        with open(os.path.join(output_dir, "a.gcode"), encoding="utf-8") as f:
+            assert "Smart Z-Hop Travel Up" in f.read()
+
+def test_process_file_reports_throughput():
+    """단일 파일 처리 통계 검증"""
+    print("\n⏱️ 파일 처리 통계")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "job.gcode")
+        write_job(source, layer_count=10)
+        result = process_file(source, os.path.join(directory, "job_out.gcode"))
+        print(f"   {format_throughput(result)}")
+
+        # 설정이 없으면 Mock 설정이 아니라 ZHopSettings 기본값으로 처리
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = ZHopEngine(ZHopSettings()).execute(load_gcode_layers(source))
+        with open(os.path.join(directory, "job_out.gcode"), encoding="utf-8") as f:
+            assert f.read() == "\n".join(expected)  # 입력에 없던 마지막 줄바꿈을 덧붙이지 않음
+
+        assert result["error"] is None
+        assert result["lines"] == 41
+        assert result["bytes_out"] > result["bytes_in"]
+        assert result["hops"] > 0
+
+def test_batch_output_paths():
+    """여러 폴더의 같은 이름 파일과 입력 위치 출력 거부 검증"""
+    print("\n🗂️ batch 출력 경로")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for folder in ("left", "right"):
+            os.makedirs(os.path.join(directory, folder))
+            write_job(os.path.join(directory, folder, "part.gcode"))
+        pattern = os.path.join(directory, "*", "part.gcode")
+        output_dir = os.path.join(directory, "out")
+        results, summary = run_batch(pattern, output_dir, {"zhop_mode": "traditional"}, workers=2)
+        outputs = sorted(os.path.relpath(result["output"], output_dir) for result in results)
+        print(f"   • glob 출력: {outputs}")
+        assert summary["succeeded"] == 2
+        assert outputs == [os.path.join("left", "part.gcode"), os.path.join("right", "part.gcode")]
+        assert all(os.path.isfile(os.path.join(output_dir, path)) for path in outputs)
+
+        files = collect_gcode_files(pattern)
+        for source, target in ((os.path.join(directory, "left"), os.path.join(directory, "left")),
+                               (pattern, directory),
+                               (os.path.join(directory, "left", "*.gcode"), os.path.join(directory, "left", "."))):
+            try:
+                batch_output_paths(source, collect_gcode_files(source), target)
+                assert False, "입력 위치와 같은 출력 디렉터리는 거부되어야 함"
+            except ValueError as e:
+                print(f"   ✅ 거부: {os.path.relpath(target, directory)} - {e}")
+        assert batch_output_paths(pattern, [], directory) == {}
+        assert len(set(batch_output_paths(pattern, files, output_dir).values())) == 2
+
+if __name__ == "__main__":
+    test_settings_file_validation()
+    test_batch_directory_with_failure()
+    test_batch_output_paths()
+    test_process_file_reports_throughput()
+    print("\n✨ batch 처리 검증 완료!")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 바이너리 G-code(bgcode) 출력 검증 테스트
+
+🎯 bgcode 기능 검증:
+- MeatPack / Heatshrink 인코더와 디코더 왕복 (비ASCII 문자 포함)
+- meatpack_comments 디코딩 결과가 원본과 동일 (줄 끝 주석, 공백 규칙이 다른 G 라인 포함)
+- 블록 헤더 + CRC32 검증 (손상 감지)
+- Cura 헤더 → 메타데이터 블록
+- 처리 결과를 .bgcode로 저장 시 크기 감소
+"""
+
+import sys
+import os
+import random
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import (meatpack_encode, meatpack_decode, heatshrink_compress, heatshrink_decompress,
+                       encode_bgcode, decode_bgcode, process_file, open_gcode_file,
+                       BGCODE_COMPRESSION, BGCODE_GCODE_ENCODING)
+
+def build_job_text(layer_count=30):
+    """Cura 헤더와 travel이 포함된 G-code 텍스트 생성"""
+    lines = [";FLAVOR:Marlin", ";TIME:3725", ";Filament used: 2.5m", ";Layer height: 0.2",
+             ";Generated with Cura_SteamEngine 5.6.0"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines.append(f";LAYER:{layer}")
+        lines.append(f"G0 F9000 X10 Y10 Z{0.2 * (layer + 1):.1f}")
+        for travel in range(30):
+            e_value += 1.01
+            lines.append(f"G1 F1500 X{20 + travel * 1.37:.3f} Y{10 + travel * 0.5:.3f} E{e_value:.5f}")
+            lines.append(f"G0 F9000 X{20 + travel:.3f} Y{40 + travel * 1.1:.3f}")
+    return "\n".join(lines) + "\n"
+
+def test_codec_round_trip():
+    """MeatPack / Heatshrink 왕복 검증"""
+    print("🔁 MeatPack / Heatshrink 왕복")
+    print("=" * 50)
+
+    lines = ["G1 X10.5 Y-3 E0.25", "M104 S200", "; comment line", "G0 Z0.60;Smart Z-Hop Travel Up"]
+    packed = meatpack_encode(lines, keep_comments=True)
+    print(f"   • MeatPack: {sum(len(line) + 1 for line in lines)} → {len(packed)} bytes")
+    assert meatpack_decode(packed) == "\n".join(lines) + "\n"
+    assert meatpack_decode(meatpack_encode(lines, keep_comments=False)) == "G1 X10.5 Y-3 E0.25\nM104 S200\nG0 Z0.60\n"
+
+    random.seed(7)
+    data = bytes(random.choice(b"G01X. \n") for _ in range(5000)) + b"ABCD" * 500
+    for window in (11, 12):
+        compressed = heatshrink_compress(data, window, 4)
+        print(f"   • Heatshrink {window},4: {len(data)} → {len(compressed)} bytes")
+        assert heatshrink_decompress(compressed, window, 4) == data
+        assert len(compressed) < len(data)
+
+    # 비ASCII 문자(UTF-8 다중 바이트)도 바이트 단위로 패킹되어 그대로 복원
+    text = "M117 café\nG1 X1\nM117 출력 중\n; 한글 주석\n"
+    for encoding in ("meatpack", "meatpack_comments"):
+        decoded, _ = decode_bgcode(encode_bgcode(text, encoding=encoding))
+        expected = text if encoding == "meatpack_comments" else "M117 café\nG1 X1\nM117 출력 중\n"
+        print(f"   • {encoding} 비ASCII 왕복: {decoded.splitlines()}")
+        assert decoded == expected
+
+def test_meatpack_comments_lossless():
+    """meatpack_comments 디코딩 결과가 원본 입력과 동일한지 검증"""
+    print("\n🔍 meatpack_comments 무손실 왕복")
+    print("=" * 50)
+
+    lines = ["G28", "G0X1 Y2", "G0 X1Y2", "G1  X5 Y5", "G1 x1 y2", "G1 X1 E0.5 ;extrude",
+             "G0 F9000 X10 Y10 ; 한글 주석", "G0 Z0.60;Smart Z-Hop Travel Up", "M117 Hello World",
+             "G29 P1 T", "M104 S200 ;temp", ";LAYER:1"]
+    original = "\n".join(lines) + "\n"
+    decoded = meatpack_decode(meatpack_encode(lines, keep_comments=True))
+    for before, after in zip(lines, decoded.splitlines()):
+        print(f"   • {before!r} → {after!r}")
+    assert decoded == original
+
+    # 주석을 버리는 meatpack도 코드 부분은 그대로 복원
+    stripped = [line.split(";", 1)[0].rstrip() for line in lines]
+    expected = "".join(line + "\n" for line in stripped if line)
+    assert meatpack_decode(meatpack_encode(lines, keep_comments=False)) == expected
+
+    text = build_job_text()
+    decoded, _ = decode_bgcode(encode_bgcode(text, encoding="meatpack_comments"))
+    assert decoded == text
+
+def test_bgcode_container():
+    """모든 압축/인코딩 조합의 bgcode 왕복과 CRC 검증"""
+    print("\n📦 bgcode 컨테이너")
+    print("=" * 50)
+
+    text = build_job_text()
+    for encoding in BGCODE_GCODE_ENCODING:
+        for compression in BGCODE_COMPRESSION:
+            data = encode_bgcode(text, compression, encoding)
+            decoded, metadata = decode_bgcode(data)
+            assert data[:4] == b"GCDE"
+            if encoding == "meatpack":
+                assert decoded == "".join(line + "\n" for line in text.split("\n")[:-1]
+                                          if not line.startswith(";"))
+            else:
+                assert decoded == text
+        print(f"   • {encoding}: {len(text):,} → {len(data):,} bytes")
+
+    assert metadata["print"]["estimated printing time (normal mode)"] == "1h 2m 5s"
+    assert metadata["print"]["filament used [mm]"] == "2500.00"
+    assert metadata["slicer"]["Producer"] == "Cura_SteamEngine 5.6.0"
+
+    corrupted = bytearray(encode_bgcode(text))
+    corrupted[-10] ^= 0xFF
+    try:
+        decode_bgcode(bytes(corrupted))
+        assert False, "손상된 블록은 거부되어야 함"
+    except ValueError as e:
+        print(f"   ✅ 손상 감지: {e}")
+
+def test_process_to_bgcode():
+    """처리 결과를 .bgcode로 저장하면 텍스트보다 작고 내용이 동일한지 검증"""
+    print("\n💾 .bgcode 출력")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "job.gcode")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(build_job_text())
+
+        text_result = process_file(source, os.path.join(directory, "out.gcode"))
+        binary_result = process_file(source, os.path.join(directory, "out.bgcode"))
+        print(f"   • .gcode: {text_result['bytes_out']:,} bytes / .bgcode: {binary_result['bytes_out']:,} bytes")
+
+        assert binary_result["error"] is None
+        assert binary_result["bytes_out"] * 4 < text_result["bytes_out"]
+
+        with open(os.path.join(directory, "out.gcode"), encoding="utf-8") as f:
+            expected = f.read()
+        with open_gcode_file(os.path.join(directory, "out.bgcode")) as f:
+            decoded = f.read()
+        # meatpack_comments는 라인 끝 주석(Smart Z-Hop 주석 포함)까지 유지하고 빈 줄만 제거
+        assert decoded == "".join(line + "\n" for line in expected.split("\n") if line)
+
+if __name__ == "__main__":
+    test_codec_round_trip()
+    test_meatpack_comments_lossless()
+    test_bgcode_container()
+    test_process_to_bgcode()
+    print("\n✨ bgcode 출력 검증 완료!")
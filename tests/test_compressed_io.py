@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 압축 G-code 입출력 검증 테스트
+
+🎯 압축 입출력 기능 검증:
+- .gcode.gz / .bz2 / .xz 확장자별 투명한 읽기/쓰기
+- 별도 스레드 압축 결과가 비압축 결과와 동일
+- 처리되는 레이어를 바로 압축 스레드로 넘겨도 (헤더 ;TIME:은 마지막에 보정) 전체 처리 후 저장과 동일
+- 헤더 보정은 같은 임시 파일 안에서 교체 (길이가 달라지면 본문을 밀거나 당김), 마지막 줄바꿈을 덧붙이지 않음
+- 별도 스레드 압축 해제 읽기 (중간에 닫기, 손상 파일 오류 전달)
+- 배치 처리에서 압축 파일 수집
+- 압축 방식별 처리량 벤치마크
+"""
+
+import sys
+import os
+import io
+import gzip
+import tempfile
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import (ZHopEngine, ZHopSettings, open_gcode_file, process_file, collect_gcode_files,
+                       benchmark_compressed_io, strip_compression_suffix, write_gcode_atomic,
+                       split_gcode_layers, replace_file_prefix)
+
+def write_job(path, layer_count=20):
+    """확장자에 맞게 (압축) G-code 작업 파일 작성"""
+    lines = [";FLAVOR:Marlin"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines.append(f";LAYER:{layer}")
+        lines.append(f"G0 F9000 X10 Y10 Z{0.2 * (layer + 1):.1f}")
+        for travel in range(30):
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{20 + travel} Y10 E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{20 + travel} Y{40 + travel}")
+    with open_gcode_file(path, "w") as f:
+        f.write("\n".join(lines))
+
+def test_compressed_round_trip():
+    """압축 입력 → 압축 출력 결과가 비압축 처리 결과와 동일한지 검증"""
+    print("🗜️ 압축 입출력 왕복")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain_in = os.path.join(directory, "job.gcode")
+        write_job(plain_in)
+        assert process_file(plain_in, os.path.join(directory, "out.gcode"))["error"] is None
+        with open(os.path.join(directory, "out.gcode"), encoding="utf-8") as f:
+            expected = f.read()
+
+        for suffix in (".gz", ".bz2", ".xz"):
+            source = os.path.join(directory, "job.gcode" + suffix)
+            output = os.path.join(directory, "out.gcode" + suffix)
+            write_job(source)
+            result = process_file(source, output)
+            print(f"   • {suffix}: {result['bytes_in']} → {result['bytes_out']} bytes")
+
+            assert result["error"] is None
+            assert result["bytes_out"] < len(expected)
+            with open_gcode_file(output) as f:
+                assert f.read() == expected
+
+        # 표준 gzip 도구와 호환
+        with gzip.open(os.path.join(directory, "out.gcode.gz"), "rt", encoding="utf-8") as f:
+            assert f.read() == expected
+
+        files = [os.path.basename(path) for path in collect_gcode_files(directory)]
+        assert "job.gcode.gz" in files and "job.gcode.xz" in files
+
+    assert strip_compression_suffix("model.gcode.gz") == "model.gcode"
+    assert strip_compression_suffix("model.gcode") == "model.gcode"
+
+def timed_job(layer_count=6, m73=False):
+    """;TIME: 헤더와 레이어별 ;TIME_ELAPSED: (선택적으로 M73) 표시가 있는 작업 텍스트"""
+    lines = [";FLAVOR:Marlin", f";TIME:{layer_count * 100}", ";LAYER_COUNT:{layer_count}"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines += [f";LAYER:{layer}", f"G0 F300 Z{0.2 * (layer + 1):.1f}"]
+        if m73:
+            lines.append(f"M73 P{layer * 100 // layer_count} R{layer_count - layer}")
+        for travel in range(3):
+            e_value += 1.0
+            lines += [f"G1 F1500 X{20 + travel} Y10 E{e_value:.3f}", f"G0 F9000 X{60 + travel * 20} Y{40 + layer}"]
+        lines.append(f";TIME_ELAPSED:{(layer + 1) * 100:.6f}")
+    return "\n".join(lines)
+
+def test_streamed_output_matches_execute():
+    """처리와 동시에 저장한 결과가 전체 처리 후 저장(execute)과 같은지 검증"""
+    print("\n🚰 처리 중 스트리밍 저장")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for m73 in (False, True):
+            text = timed_job(m73=m73)
+            engine = ZHopEngine(ZHopSettings())
+            with contextlib.redirect_stdout(io.StringIO()):
+                expected = "\n".join(engine.execute(split_gcode_layers(text)))
+            assert engine.needs_print_time_totals(split_gcode_layers(text)) == m73
+            assert ";TIME:600" not in expected  # 헤더 보정 확인
+            for suffix in ("", ".gz", ".bz2", ".xz"):
+                source = os.path.join(directory, "timed.gcode" + suffix)
+                output = os.path.join(directory, "timed_out.gcode" + suffix)
+                with open_gcode_file(source, "w") as f:
+                    f.write(text)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    assert process_file(source, output)["error"] is None
+                with open_gcode_file(output) as f:
+                    assert f.read() == expected
+            print(f"   • M73 {'있음 (전체 처리 후 저장)' if m73 else '없음 (스트리밍)'}: 4개 형식 결과 동일")
+
+        # 표준 gzip 도구로도 헤더 멤버 + 본문 멤버를 한 파일로 읽음
+        with gzip.open(os.path.join(directory, "timed_out.gcode.gz"), "rt", encoding="utf-8") as f:
+            assert f.read().startswith(";FLAVOR:Marlin\n;TIME:")
+
+        def failing_layers():
+            yield "; header"
+            yield ";LAYER:0"
+            raise RuntimeError("처리 실패")
+        output = os.path.join(directory, "failed.gcode.gz")
+        try:
+            write_gcode_atomic(output, failing_layers(), lambda header: header)
+            assert False, "처리 오류가 전달되어야 함"
+        except RuntimeError:
+            pass
+        assert not os.path.exists(output)
+        assert not [name for name in os.listdir(directory) if name.startswith(".smartzhop-")]
+
+def test_header_rewritten_in_place():
+    """헤더 자리 교체가 같은 파일 안에서 길이 변화와 관계없이 본문을 보존하는지 검증"""
+    print("\n✏️ 헤더 자리 교체")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "prefix.bin")
+        body = bytes(range(256)) * 40
+        for old, new in ((b";TIME:600", b";TIME:612"), (b";TIME:600", b";TIME:1000000"), (b";TIME:600", b";T")):
+            with open(path, "wb") as f:
+                f.write(old + body)
+            replace_file_prefix(path, len(old), new, block_size=1000)  # 여러 블록에 걸쳐 이동
+            with open(path, "rb") as f:
+                assert f.read() == new + body
+            print(f"   • {old.decode()} → {new.decode()}: 본문 {len(body)} bytes 보존")
+
+        # ;TIME: 자릿수가 늘어나도 모든 형식에서 헤더가 보정되고, 입력처럼 마지막 줄바꿈 없이 저장
+        def layers():
+            yield ";FLAVOR:Marlin\n;TIME:99"
+            yield ";LAYER:0\nG1 X1"
+            yield ";LAYER:1\nG1 X2"
+        for suffix in ("", ".gz", ".bz2", ".xz"):
+            output = os.path.join(directory, "header.gcode" + suffix)
+            write_gcode_atomic(output, layers(), lambda header: header.replace(";TIME:99", ";TIME:1234"))
+            with open_gcode_file(output) as f:
+                assert f.read() == ";FLAVOR:Marlin\n;TIME:1234\n;LAYER:0\nG1 X1\n;LAYER:1\nG1 X2"
+        assert not [name for name in os.listdir(directory) if name.startswith(".smartzhop-")]
+
+def test_threaded_decompression():
+    """별도 스레드 압축 해제 읽기 검증"""
+    print("\n🧵 스레드 압축 해제")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "job.gcode.gz")
+        write_job(path, layer_count=200)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            expected = f.read()
+        with open_gcode_file(path) as f:
+            assert f.read() == expected
+        with open_gcode_file(path) as f:
+            assert [f.readline() for _ in range(3)] == expected.splitlines(True)[:3]
+        print(f"   • {len(expected):,} 문자 읽기, 중간에 닫기 정상")
+
+        with open(path, "rb") as f:
+            data = f.read()
+        truncated = os.path.join(directory, "broken.gcode.gz")
+        with open(truncated, "wb") as f:
+            f.write(data[:len(data) // 2])
+        try:
+            with open_gcode_file(truncated) as f:
+                f.read()
+            assert False, "손상된 압축 파일 오류가 전달되어야 함"
+        except EOFError as e:
+            print(f"   ✅ 손상 파일 오류 전달: {e}")
+
+def test_compressed_io_benchmark():
+    """압축 방식별 처리량 벤치마크 검증"""
+    print("\n⏱️ 압축 입출력 처리량")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "bench.gcode")
+        write_job(source, layer_count=40)
+        results = benchmark_compressed_io(source, suffixes=("", ".gz"))
+
+    for result in results:
+        print(f"   • {result['codec']}: {result['input_bytes']:,} bytes, {result['ratio']:.1f}x, "
+              f"{result['mb_per_second']:.2f} MB/s")
+
+    assert [result["codec"] for result in results] == ["none", "gzip"]
+    assert results[0]["ratio"] == 1.0
+    assert results[1]["ratio"] > 3
+    assert all(result["lines_per_second"] > 0 for result in results)
+
+if __name__ == "__main__":
+    test_compressed_round_trip()
+    test_streamed_output_matches_execute()
+    test_header_rewritten_in_place()
+    test_threaded_decompression()
+    test_compressed_io_benchmark()
+    print("\n✨ 압축 입출력 검증 완료!")
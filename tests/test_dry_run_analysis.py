@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 분석 전용(dry-run) 모드 검증 테스트
+
+🎯 dry-run 기능 검증:
+- 전체 실행과 동일한 Z-홉 판단 결과
+- 추가 Z 이동 거리/길이 분포 통계
+- G-code 생성 생략으로 인한 속도 향상
+- dry-run 명령: 설정 파일 + --set 덮어쓰기 (ZHopSettings로 검증)
+"""
+
+import sys
+import os
+import io
+import json
+import math
+import time
+import tempfile
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, ZHopEngine, ZHopSettings, run_dry_run_command
+
+def build_layered_job(layer_count=20, travels_per_layer=30):
+    """짧은/긴 travel이 섞인 Cura 형식의 레이어 목록 생성"""
+    layers = [";FLAVOR:Marlin\n;TIME:1000"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        z = 0.2 * (layer + 1)
+        lines = [f";LAYER:{layer}", f"G0 F9000 X10 Y10 Z{z:.1f}"]
+        for travel in range(travels_per_layer):
+            x = 10 + (travel % 10) * 12
+            y = 10 + (travel // 10) * 40
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{x + 5} Y{y} E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{x + 5.5} Y{y}")  # 짧은 travel (0.5mm)
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{x + 8} Y{y} E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{x + 8} Y{y + 30}")  # 긴 travel (30mm)
+        lines.append(f";TIME_ELAPSED:{(layer + 1) * 50:.6f}")
+        layers.append("\n".join(lines))
+    return layers
+
+def test_dry_run_matches_full_execution():
+    """분석 전용 결과가 실제 실행의 Z-홉 수와 일치하는지 검증"""
+    print("🔍 dry-run vs 전체 실행 비교")
+    print("=" * 50)
+
+    job = build_layered_job()
+
+    full = SmartZHop()
+    full_result = full.execute(job)
+    full_hops = full.print_time_stats['hops']
+
+    report = SmartZHop().analyze(job)
+
+    print(f"   • 전체 실행 Z-홉: {full_hops}개")
+    print(f"   • dry-run Z-홉: {report['hops']}개 / 시퀀스 {report['travel_sequences']}개")
+    print(f"   • 추가 Z 이동: {report['added_z_travel']:.2f}mm")
+    print(f"   • 길이 분포: {report['length_histogram']}")
+
+    assert len(full_result) == len(job)
+    assert report['hops'] == full_hops
+    # 레이어마다 시작 travel 1개 + 짧은/긴 travel 쌍
+    assert report['travel_sequences'] == 20 * (30 * 2 + 1)
+    assert report['length_histogram']['20-50mm'] == 20 * 30
+    assert report['length_histogram']['<1mm'] == 0
+    assert report['added_z_travel'] > 0
+
+def test_dry_run_traditional_mode():
+    """Traditional 모드 dry-run 통계 검증"""
+    print("\n🔵 Traditional 모드 dry-run")
+    print("=" * 50)
+
+    job = build_layered_job(layer_count=5, travels_per_layer=10)
+    zhop = SmartZHop()
+    defaults = zhop.getSettingValueByKey
+    zhop.getSettingValueByKey = lambda key: 'traditional' if key == 'zhop_mode' else defaults(key)
+
+    report = zhop.analyze(job)
+    print(f"   • Z-홉 적용: {report['hops']}개, 레이어 변경: {report['layer_change_hops']}개")
+
+    assert report['mode'] == 'traditional'
+    assert report['hops'] == 5 * 10
+    expected_z = report['hops'] * 2 * 0.3 + report['layer_change_hops'] * 0.3
+    assert math.isclose(report['added_z_travel'], expected_z)
+
+def test_dry_run_speedup():
+    """G-code 생성 생략에 의한 속도 향상 측정"""
+    print("\n⚡ dry-run 속도 비교")
+    print("=" * 50)
+
+    job = build_layered_job(layer_count=30, travels_per_layer=40)
+
+    start = time.perf_counter()
+    SmartZHop().execute(job)
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    SmartZHop().analyze(job)
+    dry_time = time.perf_counter() - start
+
+    print(f"   • 전체 실행: {full_time:.3f}초")
+    print(f"   • dry-run: {dry_time:.3f}초 ({full_time / max(dry_time, 1e-9):.1f}배)")
+
+    assert dry_time < full_time
+
+def test_dry_run_command_settings():
+    """dry-run 명령의 설정 파일과 --set 덮어쓰기 검증"""
+    print("\n⚙️ dry-run 명령 설정")
+    print("=" * 50)
+
+    job = build_layered_job(layer_count=5, travels_per_layer=10)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "job.gcode")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(job))
+        settings_path = os.path.join(directory, "settings.json")
+        with open(settings_path, "w", encoding="utf-8") as f:
+            json.dump({"zhop_mode": "slingshot", "travel_distance": 1.0}, f)
+
+        reports = {}
+        for distance in ("1", "40"):
+            with contextlib.redirect_stdout(io.StringIO()) as log:
+                reports[distance] = run_dry_run_command([path, "-s", settings_path, "--set", f"travel_distance={distance}",
+                                                         "--set", "zhop_height=0.5", "--json"])
+            assert json.loads(log.getvalue())["hops"] == reports[distance]["hops"]
+        expected = ZHopEngine(ZHopSettings(zhop_mode="slingshot", travel_distance=40.0, zhop_height=0.5))
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected_report = expected.analyze(job)
+        print(f"   • travel_distance 1: Z-홉 {reports['1']['hops']}개 / 40: {reports['40']['hops']}개")
+        assert reports["40"]["mode"] == "slingshot"
+        assert reports["40"]["settings"]["zhop_height"] == 0.5
+        assert reports["40"]["hops"] == expected_report["hops"]
+        assert reports["1"]["hops"] > reports["40"]["hops"]
+
+        for bad in (["--set", "zhop_hieght=0.4"], ["--set", "zhop_height"], ["--set", "zhop_height=high"]):
+            try:
+                with contextlib.redirect_stderr(io.StringIO()):
+                    run_dry_run_command([path] + bad)
+                assert False, "잘못된 설정은 거부되어야 함"
+            except SystemExit as e:
+                assert e.code == 2
+        print("   ✅ 잘못된 --set 값 거부")
+
+if __name__ == "__main__":
+    test_dry_run_matches_full_execution()
+    test_dry_run_traditional_mode()
+    test_dry_run_speedup()
+    test_dry_run_command_settings()
+    print("\n✨ dry-run 분석 검증 완료!")
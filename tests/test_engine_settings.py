@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 독립 엔진(ZHopEngine)과 불변 설정(ZHopSettings) 검증 테스트
+
+🎯 엔진/설정 분리 검증:
+- 설정 기본값이 Cura 설정 정의의 default_value와 일치
+- 설정 객체는 불변이며 생성 시 타입/선택지/범위 검증
+- 엔진은 pickle 가능하고 설정이 같으면 같은 값/해시
+- SmartZHop.execute 결과가 같은 설정의 독립 엔진(워커 프로세스 포함)과 동일
+"""
+
+import sys
+import os
+import io
+import pickle
+import dataclasses
+import contextlib
+import concurrent.futures
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, ZHopEngine, ZHopSettings, get_setting_definitions, split_gcode_layers
+
+JOB = "\n".join([
+    ";FLAVOR:Marlin",
+    ";LAYER:0",
+    "G0 F300 Z0.2",
+    "G1 F1500 X10 Y10 E1",
+    "G1 F2700 E-4",
+    "G0 F9000 X80 Y60",
+    "G0 X90 Y70",
+    "G1 F1500 X95 Y70 E2",
+    ";LAYER:1",
+    "G0 F300 Z0.4",
+    "G1 X96 Y70 E3",
+    "G0 F9000 X10 Y10",
+    "G1 X12 Y10 E4",
+])
+
+def test_settings_object():
+    """설정 기본값, 불변성, 검증"""
+    print("🧾 ZHopSettings")
+    print("=" * 50)
+
+    settings = ZHopSettings()
+    definitions = get_setting_definitions()
+    assert list(settings.to_dict()) == list(definitions)
+    for key, value in settings.to_dict().items():
+        assert value == definitions[key]['default_value'], key
+    print(f"   • 설정 {len(definitions)}개 기본값 일치")
+
+    try:
+        settings.zhop_height = 1.0
+        assert False, "불변 설정이 변경됨"
+    except dataclasses.FrozenInstanceError:
+        pass
+
+    parsed = ZHopSettings.from_dict({"zhop_mode": "slingshot", "zhop_height": "0.4", "travel_zhop": "no",
+                                     "slingshot_ascent_ratio": "20", "zhop_speed": 5})
+    assert parsed.zhop_height == 0.4 and parsed.travel_zhop is False
+    assert parsed.slingshot_ascent_ratio == 20 and isinstance(parsed.zhop_speed, float)
+    assert dataclasses.replace(parsed, zhop_height=0.6).zhop_height == 0.6
+
+    for invalid in ({"zhop_hieght": 0.4}, {"zhop_mode": "spiral"}, {"zhop_height": -1},
+                    {"slingshot_ascent_ratio": 150}, {"travel_distance": "far"}, {"enable": "on", "custom_layers": 3}):
+        try:
+            ZHopSettings.from_dict(invalid)
+            assert False, invalid
+        except ValueError as error:
+            print(f"   • {invalid} → {error}")
+    try:
+        dataclasses.replace(parsed, slingshot_trajectory_mode="spline")
+        assert False, "replace 검증 누락"
+    except ValueError:
+        pass
+
+def test_engine_pickle_and_hash():
+    """엔진 pickle 왕복과 설정 기준 해시"""
+    print("\n📦 ZHopEngine pickle / hash")
+    print("=" * 50)
+
+    settings = ZHopSettings.from_dict({"zhop_mode": "slingshot", "zhop_height": 0.4})
+    engine = ZHopEngine(settings)
+    restored = pickle.loads(pickle.dumps(engine))
+    assert restored == engine and hash(restored) == hash(engine)
+    assert restored.settings == settings
+    assert ZHopEngine(dataclasses.replace(settings, zhop_height=0.5)) != engine
+    assert len({engine, restored, ZHopEngine(settings), ZHopEngine()}) == 2
+    print(f"   • pickle 크기: {len(pickle.dumps(engine)):,} B")
+
+    script = SmartZHop({"zhop_height": 0.4})
+    assert script != SmartZHop({"zhop_height": 0.4})  # 스크립트 객체는 객체 자체로 비교
+    assert script.create_engine() == ZHopEngine(ZHopSettings.from_script(script))
+    assert script.create_engine().settings.zhop_height == 0.4
+
+def test_adapter_matches_engine():
+    """SmartZHop.execute와 독립 엔진 결과 비교 (워커 프로세스 포함)"""
+    print("\n🔌 Cura 어댑터와 엔진 비교")
+    print("=" * 50)
+
+    for overrides in ({}, {"zhop_mode": "traditional"}, {"zhop_height": 0.6, "travel_distance": 5}):
+        script = SmartZHop(overrides)
+        engine = ZHopEngine(ZHopSettings.from_script(script))
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = script.execute(split_gcode_layers(JOB))
+            assert engine.execute(split_gcode_layers(JOB)) == expected
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1) as pool:
+                assert pool.submit(engine.execute, split_gcode_layers(JOB)).result() == expected
+        print(f"   • {overrides or '기본 설정'}: {engine.settings.zhop_mode}, 레이어 {len(expected)}개 동일")
+        assert "Smart" in "\n".join(expected)
+
+    script = SmartZHop()
+    script.setting_overrides["zhop_mode"] = "traditional"  # 실행할 때마다 설정을 다시 읽음
+    with contextlib.redirect_stdout(io.StringIO()):
+        script.execute(split_gcode_layers(JOB))
+    assert script.settings.zhop_mode == "traditional"
+
+if __name__ == "__main__":
+    test_settings_object()
+    test_engine_pickle_and_hash()
+    test_adapter_matches_engine()
+    print("\n✨ 독립 엔진/설정 검증 완료!")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 피처 타입 정책 검증 테스트
+
+🎯 Cura ;TYPE: 마커 기반 Z-홉 정책 검증:
+- 'FROM>TO=ACTION' 규칙 파싱 (잘못된 규칙은 무시)
+- skip 규칙으로 같은 타입 사이 travel Z-홉 생략, hop/높이 규칙으로 강제 Z-홉
+- ;TYPE: 주석이 travel 앞/뒤 어디 있어도 같은 판단
+- 스킵 스캔 / 라인 단위 / 스트림 결과 동일
+"""
+
+import sys
+import os
+import io
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop
+from zhop_runner import run_zhop, run_stream
+
+def build_job(layer_count=4, type_after_travel=False):
+    """레이어마다 FILL 구간 사이 travel → WALL-OUTER 구간으로 travel 하는 Cura 형식 G-code 생성"""
+    lines = [";FLAVOR:Marlin", f";LAYER_COUNT:{layer_count}"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines += [f";LAYER:{layer}", f"G0 F300 Z{0.2 * (layer + 1):.1f}"]
+        for index, feature in enumerate(("FILL", "FILL", "WALL-OUTER")):
+            if not type_after_travel:
+                lines.append(f";TYPE:{feature}")
+            lines.append(f"G0 F9000 X{60 + index * 30} Y{40 + layer}")
+            if type_after_travel:
+                lines.append(f";TYPE:{feature}")
+            for extrusion in range(4):
+                e_value += 0.5
+                lines.append(f"G1 F1500 X{60 + index * 30 + extrusion * 3} Y{42 + layer} E{e_value:.3f}")
+    return "\n".join(lines)
+
+def test_policy_parsing():
+    """정책 문자열 파싱 검증"""
+    print("📝 정책 파싱")
+    print("=" * 50)
+
+    processor = SmartZHop({})
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        policy = processor.parse_feature_policy("fill>FILL=skip, *>wall-outer=0.6; SKIN>*=hop\nBAD, A>B=-1, A>B=maybe")
+    print(f"   • 규칙: {policy}")
+    assert policy == (("FILL", "FILL", "skip"), ("*", "WALL-OUTER", 0.6), ("SKIN", "*", "hop"))
+    assert log.getvalue().count("⚠️") == 3
+
+    assert processor.resolve_feature_action(policy, "Fill", "fill") == "skip"
+    assert processor.resolve_feature_action(policy, None, "WALL-OUTER") == 0.6
+    assert processor.resolve_feature_action(policy, "SKIN", None) == "hop"
+    assert processor.resolve_feature_action(policy, "FILL", "SKIN") == "auto"
+
+def test_policy_actions():
+    """skip / 높이 규칙 적용 검증"""
+    print("\n🎛️ 정책 적용")
+    print("=" * 50)
+
+    text = build_job()
+    settings = {"layer_change_zhop": False, "travel_distance": 0.0}
+    _, baseline, _ = run_zhop(settings, text)
+    _, skipped, _ = run_zhop({**settings, "slingshot_feature_policy": "FILL>FILL=skip"}, text)
+    _, dry, _ = run_zhop({**settings, "slingshot_feature_policy": "FILL>FILL=skip"}, text, dry_run=True)
+    print(f"   • 정책 없음: Z-홉 {baseline.print_time_stats['hops']}개 / FILL>FILL=skip: {skipped.print_time_stats['hops']}개")
+    assert baseline.print_time_stats['hops'] == 12
+    assert skipped.print_time_stats['hops'] == 8
+    assert dry.dry_run_stats['policy_skipped_hops'] == 4
+
+    output, forced, _ = run_zhop({"layer_change_zhop": False, "travel_distance": 1000.0, "zhop_height": 0.2,
+                                  "slingshot_feature_policy": "*>WALL-OUTER=0.8"}, text)
+    layer = output[2].split("\n")  # ;LAYER:1 (Z0.4)
+    z_values = [float(line.split(" Z")[1].split()[0]) for line in layer if "Smart" in line and " Z" in line]
+    print(f"   • *>WALL-OUTER=0.8: Z-홉 {forced.print_time_stats['hops']}개, 최고 Z {max(z_values):.2f}")
+    assert forced.print_time_stats['hops'] == 4
+    assert max(z_values) > 0.4 + 0.2 + 0.001  # 기본 높이보다 높게
+    assert max(z_values) <= 0.4 + 0.8 + 0.001
+
+def test_type_marker_position():
+    """;TYPE: 위치(travel 앞/뒤)와 무관한 판단 검증"""
+    print("\n📍 ;TYPE: 위치")
+    print("=" * 50)
+
+    settings = {"layer_change_zhop": False, "travel_distance": 0.0, "slingshot_feature_policy": "FILL>FILL=skip"}
+    _, before, _ = run_zhop(settings, build_job())
+    _, after, _ = run_zhop(settings, build_job(type_after_travel=True))
+    print(f"   • travel 앞: {before.print_time_stats['hops']}개 / travel 뒤: {after.print_time_stats['hops']}개")
+    assert before.print_time_stats['hops'] == after.print_time_stats['hops'] == 8
+
+def test_engines_match():
+    """스킵 스캔 / 라인 단위 / 스트림 동일성 검증"""
+    print("\n🔁 엔진 비교")
+    print("=" * 50)
+
+    for text in (build_job(), build_job(type_after_travel=True)):
+        for settings in ({"slingshot_feature_policy": "FILL>FILL=skip"},
+                         {"slingshot_feature_policy": "*>WALL-OUTER=hop", "travel_distance": 1000.0},
+                         {"slingshot_feature_policy": "FILL>*=0.5", "custom_layers": "2"}):
+            expected, line_engine, _ = run_zhop(settings, text, skip_scan=False)
+            output, skip_engine, _ = run_zhop(settings, text)
+            streamed, _, _ = run_stream(settings, text)
+            print(f"   • {settings}: Z-홉 {skip_engine.print_time_stats['hops']}개")
+            assert output == expected
+            assert skip_engine.dry_run_stats == line_engine.dry_run_stats
+            assert streamed == "\n".join(expected)
+
+if __name__ == "__main__":
+    test_policy_parsing()
+    test_policy_actions()
+    test_type_marker_position()
+    test_engines_match()
+    print("\n✨ 피처 타입 정책 검증 완료!")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 처리 전/후 G-code 비교(diff) 검증 테스트
+
+🎯 diff 기능 검증:
+- 레이어/압출 라인 기준 정렬로 변경된 travel 블록만 보고
+- 블록별 추가 Z 이동과 경로 길이
+- 압출 라인이 달라지면 정렬 실패 보고
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, GcodeDiffer, run_diff_command, split_gcode_layers
+
+def build_job(layer_count=8):
+    """짧은/긴 travel이 섞인 G-code 텍스트 생성"""
+    lines = [";FLAVOR:Marlin"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines.append(f";LAYER:{layer}")
+        lines.append(f"G0 F9000 X10 Y10 Z{0.2 * (layer + 1):.1f}")
+        for travel in range(6):
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{20 + travel} Y10 E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{20 + travel} Y{10.5 if travel % 2 else 40}")  # 0.5mm / 30mm
+        e_value += 1.0
+        lines.append(f"G1 F1500 X30 Y30 E{e_value:.3f}")
+    return "\n".join(lines)
+
+def write_pair(directory, settings):
+    """원본과 처리 결과 파일 작성"""
+    before = os.path.join(directory, "before.gcode")
+    after = os.path.join(directory, "after.gcode")
+    job = build_job()
+    zhop = SmartZHop(settings)
+    with open(before, "w", encoding="utf-8") as f:
+        f.write(job)
+    with open(after, "w", encoding="utf-8") as f:
+        f.write("\n".join(zhop.execute(split_gcode_layers(job))))
+    return before, after, zhop
+
+def test_traditional_diff():
+    """Traditional 모드: Z-홉마다 변경 블록 1개, 추가 Z = 홉 높이"""
+    print("🔀 Traditional diff")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        before, after, zhop = write_pair(directory, {"zhop_mode": "traditional", "zhop_height": 0.4,
+                                                     "layer_change_zhop": False})
+        differ = GcodeDiffer()
+        changes = list(differ.iter_changes(before, after))
+        summary = differ.summary
+
+    print(f"   • 변경 블록: {summary['changed_blocks']}개, +{summary['lines_inserted']}줄, "
+          f"추가 Z {summary['added_z_travel']:.2f}mm")
+    assert summary["aligned"]
+    assert summary["layers"] == 8
+    assert summary["changed_blocks"] == zhop.print_time_stats["hops"] == 24  # 긴 travel만
+    # travel 라인 1줄 → Z 속도 제한 + 상승 + travel + 하강 + 속도 복원 5줄
+    assert all(change["kind"] == "replaced" and (change["removed"], change["inserted"]) == (1, 5)
+               for change in changes)
+    assert all(abs(change["added_z"] - 0.4) < 1e-6 for change in changes)
+    assert all(abs(change["added_path"] - 0.8) < 1e-6 for change in changes)  # 수직 상승 + 하강
+    assert changes[0]["layer"] == 0
+
+def test_slingshot_diff_and_cli():
+    """Slingshot 모드: travel 라인이 궤적으로 교체됨 + JSON Lines 출력"""
+    print("\n🔀 Slingshot diff")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        before, after, zhop = write_pair(directory, {"zhop_mode": "slingshot", "layer_change_zhop": False})
+        jsonl_path = os.path.join(directory, "diff.jsonl")
+        summary = run_diff_command([before, after, "--jsonl", jsonl_path])
+        with open(jsonl_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+
+    print(f"   • 변경 블록: {summary['changed_blocks']}개, -{summary['lines_removed']} / +{summary['lines_inserted']}줄")
+    assert summary["aligned"]
+    assert records[-1]["summary"]["changed_blocks"] == len(records) - 1 == summary["changed_blocks"]
+    assert all(record["kind"] == "replaced" for record in records[:-1])
+    assert summary["added_z_travel"] > 0
+    assert summary["added_path_length"] > 0
+
+def test_misaligned_files():
+    """압출 라인이 다르면 정렬 실패"""
+    print("\n❌ 정렬 실패 감지")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        before, after, _ = write_pair(directory, {"zhop_mode": "traditional"})
+        with open(after, encoding="utf-8") as f:
+            content = f.read().replace("G1 F1500 X23 Y10 E", "G1 F1500 X23.5 Y10 E", 1)
+        with open(after, "w", encoding="utf-8") as f:
+            f.write(content)
+
+        differ = GcodeDiffer()
+        list(differ.iter_changes(before, after))
+
+    print(f"   • {differ.summary['mismatch']}")
+    assert not differ.summary["aligned"]
+    assert differ.summary["mismatch"]["before"].startswith("G1 F1500 X23 Y10")
+
+if __name__ == "__main__":
+    test_traditional_diff()
+    test_slingshot_diff_and_cli()
+    test_misaligned_files()
+    print("\n✨ diff 검증 완료!")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 높이 맵 Z-홉 높이 검증 테스트
+
+🎯 압출 점유 격자 기반 Z-홉 높이 검증:
+- 빈 영역만 지나는 travel은 최소 높이, 현재 레이어 인쇄 영역을 지나면 설정 높이 유지
+- 이전 레이어 영역만 지나면 그만큼 낮은 높이 (가장 높은 인쇄면 위로 설정 높이 확보)
+- 낮춘 Z-홉 수/높이 통계, 추가 시간 감소
+- 스킵 스캔 / 라인 단위 / 스트림 결과 동일
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import HeightMap
+from zhop_runner import run_zhop, run_stream
+
+def build_job(layer_count=4, cross_part=False):
+    """X40~60 사각 벽을 쌓고, 빈 영역(또는 벽 모서리 위)으로 travel 하는 Cura 형식 G-code 생성"""
+    lines = [";FLAVOR:Marlin", f";LAYER_COUNT:{layer_count}"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines += [f";LAYER:{layer}", f"G0 F300 Z{0.2 * (layer + 1):.1f}", "G0 F9000 X40 Y40"]
+        for corner in ("X60 Y40", "X60 Y60", "X40 Y60", "X40 Y40"):
+            e_value += 1.0
+            lines.append(f"G1 F1500 {corner} E{e_value:.3f}")
+        if cross_part:
+            lines.append("G0 F9000 X70 Y70")  # 벽 모서리(X60 Y60) 위를 지남
+            target = "X72 Y72"
+        else:
+            lines += ["G0 F9000 X0 Y40", "G0 X0 Y0"]  # 빈 영역만 지남
+            target = "X2 Y2"
+        e_value += 1.0
+        lines.append(f"G1 F1500 {target} E{e_value:.3f}")
+    return "\n".join(lines)
+
+def max_hop_z(layer):
+    """레이어 안 Smart 궤적 라인의 최고 Z"""
+    return max(float(line.split(" Z")[1].split()[0]) for line in layer.split("\n") if "Smart" in line and " Z" in line)
+
+def test_height_map_grid():
+    """격자 기록과 경로 최고 높이 검증"""
+    print("🗺️ 높이 맵 격자")
+    print("=" * 50)
+
+    height_map = HeightMap(1.0)
+    height_map.move(0.0, 0.0, 0.2, False)
+    height_map.move(20.0, 0.0, None, True)
+    assert height_map.path_top(10.0, -10.0, [{'target_x': 10.0, 'target_y': 10.0}]) == 0.2
+    assert height_map.path_top(40.0, -10.0, [{'target_x': 40.0, 'target_y': 10.0}]) is None
+
+    height_map.new_layer()
+    height_map.move(None, None, 0.4, False)
+    height_map.move(20.0, 5.0, None, True)
+    print(f"   • 현재 레이어 칸 {len(height_map.current)}개, 이전 레이어 칸 {len(height_map.previous)}개")
+    assert height_map.path_top(10.0, -10.0, [{'target_x': 10.0, 'target_y': 2.0}]) == 0.2
+    assert height_map.path_top(20.0, 2.0, [{'target_x': 20.0, 'target_y': 8.0}]) == 0.4
+
+    height_map.new_layer()
+    height_map.new_layer()
+    assert height_map.path_top(10.0, -10.0, [{'target_x': 10.0, 'target_y': 10.0}]) is None  # 두 레이어 전은 버림
+
+def test_hop_height_lowered():
+    """빈 영역/인쇄 영역 travel 높이 검증"""
+    print("\n📉 Z-홉 높이")
+    print("=" * 50)
+
+    settings = {"layer_change_zhop": False, "travel_distance": 0.0, "zhop_height": 0.6,
+                "slingshot_min_zhop": 0.1, "slingshot_max_distance": 10.0}
+    base, base_processor, _ = run_zhop(settings, build_job())
+    mapped, processor, _ = run_zhop({**settings, "slingshot_height_map": True}, build_job())
+    print(f"   • 빈 영역 travel 최고 Z: {max_hop_z(base[3]):.3f} → {max_hop_z(mapped[3]):.3f} (레이어 Z 0.6)")
+    assert abs(max_hop_z(base[3]) - (0.6 + 0.6)) < 0.001
+    assert abs(max_hop_z(mapped[3]) - (0.6 + 0.1)) < 0.001
+    assert processor.dry_run_stats['height_map_lowered_hops'] == 8
+    assert abs(processor.dry_run_stats['height_map_height_saved'] - 8 * 0.5) < 1e-6
+    assert processor.print_time_stats['total_delta'] < base_processor.print_time_stats['total_delta']
+
+    crossed, processor, _ = run_zhop({**settings, "slingshot_height_map": True}, build_job(cross_part=True))
+    print(f"   • 인쇄 영역 travel 최고 Z: {max_hop_z(crossed[3]):.3f}")
+    assert abs(max_hop_z(crossed[3]) - (0.6 + 0.6)) < 0.001  # 현재 레이어 벽 위: 설정 높이 유지
+    assert processor.dry_run_stats['height_map_lowered_hops'] == 4  # 레이어 첫 travel만 (이전 레이어 위)
+
+def test_previous_layer_clearance():
+    """이전 레이어 영역만 지날 때 높이 검증"""
+    print("\n🪜 이전 레이어 영역")
+    print("=" * 50)
+
+    text = "\n".join([";FLAVOR:Marlin", ";LAYER:0", "G0 F300 Z0.2", "G0 F9000 X0 Y0",
+                      "G1 F1500 X20 Y0 E1", ";LAYER:1", "G0 F300 Z0.4", "G0 F9000 X0 Y-10",
+                      "G0 X10 Y10", "G1 F1500 X12 Y12 E2"])
+    settings = {"layer_change_zhop": False, "travel_distance": 0.0, "zhop_height": 0.6,
+                "slingshot_max_distance": 10.0, "slingshot_height_map": True}
+    output, _, _ = run_zhop(settings, text)
+    print(f"   • 최고 Z: {max_hop_z(output[2]):.3f} (이전 레이어 0.2 + 0.6)")
+    assert abs(max_hop_z(output[2]) - (0.2 + 0.6)) < 0.001
+
+def test_engines_match():
+    """스킵 스캔 / 라인 단위 / 스트림 동일성 검증"""
+    print("\n🔁 엔진 비교")
+    print("=" * 50)
+
+    for text in (build_job(), build_job(cross_part=True)):
+        for settings in ({"slingshot_height_map": True},
+                         {"slingshot_height_map": True, "custom_layers": "2", "slingshot_height_map_resolution": 0.5},
+                         {"slingshot_height_map": True, "layer_change_zhop": False, "travel_distance": 0.0}):
+            expected, line_engine, _ = run_zhop(settings, text, skip_scan=False)
+            output, skip_engine, _ = run_zhop(settings, text)
+            _, dry, _ = run_zhop(settings, text, dry_run=True)
+            streamed, _, _ = run_stream(settings, text)
+            print(f"   • {settings}: 낮춘 Z-홉 {skip_engine.dry_run_stats['height_map_lowered_hops']}개")
+            assert output == expected
+            assert skip_engine.dry_run_stats == line_engine.dry_run_stats
+            assert dry.dry_run_stats['height_map_lowered_hops'] == skip_engine.dry_run_stats['height_map_lowered_hops']
+            assert streamed == "\n".join(expected)
+
+if __name__ == "__main__":
+    test_height_map_grid()
+    test_hop_height_lowered()
+    test_previous_layer_clearance()
+    test_engines_match()
+    print("\n✨ 높이 맵 Z-홉 높이 검증 완료!")
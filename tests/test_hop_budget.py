@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop Z-홉 예산 검증 테스트
+
+🎯 2단계 예산 선택 검증:
+- 개수 예산 (전체/레이어당) 만큼만 Z-홉, 나머지는 원본 travel 그대로
+- 시간 예산 안에서 추가 시간이 제한되고, 예산이 클수록 Z-홉이 많음
+- 가치가 높은 travel(외벽 도착, 인쇄 영역 통과)을 먼저 선택, 레이어 변경 Z-홉은 항상 유지
+- 스킵 스캔 / 라인 단위 / 분석 전용 결과 동일, 스트림은 예산 없이 처리
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, ZHopSettings, HeightMap
+from zhop_runner import run_zhop, run_stream
+
+# 레이어 변경 Z-홉 없이 모든 travel이 예산 후보가 되는 기본 설정
+BASE_SETTINGS = {"layer_change_zhop": False, "travel_distance": 5.0}
+
+def build_job(layer_count=4):
+    """레이어마다 FILL → WALL-OUTER → FILL 구간으로 travel 하는 Cura 형식 G-code 생성
+
+    레이어는 X로 70mm씩 떨어져 있고 압출은 다음 travel 방향으로 뻗어 있어 travel이 인쇄 영역을 지나지 않음
+    """
+    lines = [";FLAVOR:Marlin", f";LAYER_COUNT:{layer_count}"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        offset = 70 * layer
+        lines += [f";LAYER:{layer}", f"G0 F300 Z{0.2 * (layer + 1):.1f}"]
+        for feature, x, y, dx, dy in (("FILL", 10, 10, 1.0, 0.0), ("WALL-OUTER", 40, 10, 0.0, 1.0),
+                                      ("FILL", 40, 40, 0.8, -0.6)):
+            lines += [f";TYPE:{feature}", f"G0 F9000 X{offset + x} Y{y}"]
+            for extrusion in range(1, 4):
+                e_value += 0.5
+                lines.append(f"G1 F1500 X{offset + x + extrusion * 2 * dx:.1f} Y{y + extrusion * 2 * dy:.1f} E{e_value:.3f}")
+    return "\n".join(lines)
+
+def test_selection():
+    """후보 선택 규칙 검증 (필수 후보 우선, 가치/초당 가치 순)"""
+    print("🧮 후보 선택")
+    print("=" * 50)
+
+    processor = SmartZHop({})
+    candidates = [
+        {'id': 0, 'layer': 0, 'value': 1.0, 'cost': 0.4, 'mandatory': True},
+        {'id': 1, 'layer': 0, 'value': 3.0, 'cost': 0.3, 'mandatory': False},
+        {'id': 2, 'layer': 0, 'value': 2.0, 'cost': 0.1, 'mandatory': False},
+        {'id': 3, 'layer': 1, 'value': 0.5, 'cost': -0.2, 'mandatory': False},
+        {'id': 4, 'layer': 1, 'value': 2.5, 'cost': 0.2, 'mandatory': False},
+    ]
+    count_job = processor.select_budget_hops(candidates, {'mode': 'count', 'scope': 'job', 'value': 3})
+    count_layer = processor.select_budget_hops(candidates, {'mode': 'count', 'scope': 'layer', 'value': 1})
+    time_job = processor.select_budget_hops(candidates, {'mode': 'time', 'scope': 'job', 'value': 0.6})
+    print(f"   • 개수 3(전체): {sorted(count_job)} / 개수 1(레이어당): {sorted(count_layer)} / 0.6초: {sorted(time_job)}")
+    assert count_job == {0, 1, 4}
+    assert count_layer == {0, 4}  # 필수 후보는 예산을 넘어도 유지
+    assert time_job == {0, 2, 3}  # 초당 가치 순 (추가 시간이 0 이하면 항상 선택)
+    assert processor.select_budget_hops([], {'mode': 'time', 'scope': 'layer', 'value': 1.0}) == set()
+
+def test_count_budget():
+    """전체/레이어당 개수 예산 검증"""
+    print("\n🔢 개수 예산")
+    print("=" * 50)
+
+    assert ZHopSettings(hop_budget_mode="count").hop_budget_mode == "count"
+    _, unlimited, _ = run_zhop(BASE_SETTINGS, build_job())
+    _, job, log = run_zhop({**BASE_SETTINGS, "hop_budget_mode": "count", "hop_budget_value": 5}, build_job())
+    print(f"   • 예산 없음: Z-홉 {unlimited.print_time_stats['hops']}개 / 전체 5개: {job.print_time_stats['hops']}개")
+    assert unlimited.print_time_stats['hops'] == 12
+    assert job.print_time_stats['hops'] == 5
+    assert job.dry_run_stats['budget_skipped_hops'] == 7
+    assert "💰 Z-홉 예산 (전체 5개): 후보 12개 중 5개 선택" in log
+
+    output, per_layer, _ = run_zhop({**BASE_SETTINGS, "hop_budget_mode": "count", "hop_budget_scope": "layer",
+                                     "hop_budget_value": 1}, build_job())
+    hops_per_layer = [layer.count("Safe Descent") for layer in output[1:]]
+    print(f"   • 레이어당 1개: {hops_per_layer}")
+    assert hops_per_layer == [1, 1, 1, 1]
+
+def test_time_budget():
+    """시간 예산 안의 추가 시간 검증"""
+    print("\n⏱️ 시간 예산")
+    print("=" * 50)
+
+    _, unlimited, _ = run_zhop(BASE_SETTINGS, build_job())
+    previous_hops = 0
+    for budget in (0.0, 0.05, 0.2, 10.0):
+        _, processor, _ = run_zhop({**BASE_SETTINGS, "hop_budget_mode": "time", "hop_budget_value": budget},
+                                   build_job())
+        stats = processor.print_time_stats
+        print(f"   • {budget}초: Z-홉 {stats['hops']}개, 추가 시간 {stats['total_delta']:.3f}초")
+        assert stats['total_delta'] <= budget + 1e-9
+        assert stats['hops'] >= previous_hops
+        previous_hops = stats['hops']
+    assert previous_hops == unlimited.print_time_stats['hops']
+
+def test_value_order():
+    """가치가 높은 travel 우선 선택과 레이어 변경 Z-홉 유지 검증"""
+    print("\n🏅 가치 순서")
+    print("=" * 50)
+
+    output, _, _ = run_zhop({**BASE_SETTINGS, "hop_budget_mode": "count", "hop_budget_scope": "layer",
+                             "hop_budget_value": 1}, build_job())
+    for layer in output[1:]:
+        lines = layer.split("\n")
+        hop_at = next(index for index, line in enumerate(lines) if "Smart" in line)
+        assert lines.index(";TYPE:WALL-OUTER") < hop_at < lines.index(";TYPE:FILL", hop_at)
+    print("   • 레이어마다 WALL-OUTER 도착 travel만 Z-홉")
+
+    processor = SmartZHop({})
+    height_map = HeightMap(1.0)
+    height_map.move(0.0, 0.0, 0.2, False)
+    height_map.move(20.0, 0.0, None, True)
+    settings = {'max_distance': 100.0}
+    crossing = processor.score_hop(10.0, -10.0, [{'target_x': 10.0, 'target_y': 10.0}], 20.0, False,
+                                   None, height_map, settings)
+    empty = processor.score_hop(40.0, -10.0, [{'target_x': 40.0, 'target_y': 10.0}], 20.0, True,
+                                (None, "skin"), height_map, settings)
+    print(f"   • 인쇄 영역 통과: {crossing:.2f} / 빈 영역 + 리트랙션 + SKIN: {empty:.2f}")
+    assert abs(crossing - (0.2 + 2.0)) < 1e-9
+    assert abs(empty - (0.2 + 1.0 + 0.75)) < 1e-9
+
+    _, processor, _ = run_zhop({**BASE_SETTINGS, "layer_change_zhop": True, "hop_budget_mode": "count",
+                                "hop_budget_value": 0}, build_job())
+    print(f"   • 예산 0개 + 레이어 변경: Z-홉 {processor.print_time_stats['hops']}개")
+    assert processor.print_time_stats['hops'] == 4
+
+def test_engines_match():
+    """스킵 스캔 / 라인 단위 / 분석 전용 동일성, 스트림 예산 무시 검증"""
+    print("\n🔁 엔진 비교")
+    print("=" * 50)
+
+    text = build_job()
+    for settings in ({"hop_budget_mode": "count", "hop_budget_value": 3},
+                     {"hop_budget_mode": "time", "hop_budget_scope": "layer", "hop_budget_value": 0.2},
+                     {"hop_budget_mode": "count", "hop_budget_value": 2, "zhop_mode": "hybrid",
+                      "layer_change_zhop": True, "slingshot_height_map": True, "custom_layers": "1,2"}):
+        expected, line_engine, _ = run_zhop({**BASE_SETTINGS, **settings}, text, skip_scan=False)
+        output, skip_engine, _ = run_zhop({**BASE_SETTINGS, **settings}, text)
+        _, dry, _ = run_zhop({**BASE_SETTINGS, **settings}, text, dry_run=True)
+        print(f"   • {settings}: Z-홉 {skip_engine.print_time_stats['hops']}개")
+        assert output == expected
+        assert skip_engine.dry_run_stats == line_engine.dry_run_stats
+        assert dry.dry_run_stats['hops'] == skip_engine.print_time_stats['hops']
+        assert dry.dry_run_stats['budget_skipped_hops'] == skip_engine.dry_run_stats['budget_skipped_hops']
+
+    unlimited, _, _ = run_zhop(BASE_SETTINGS, text)
+    streamed, _, log = run_stream({**BASE_SETTINGS, "hop_budget_mode": "count", "hop_budget_value": 3}, text)
+    assert "⚠️ Z-홉 예산은 스트리밍 처리에서 지원되지 않습니다" in log
+    assert streamed == "\n".join(unlimited)
+
+if __name__ == "__main__":
+    test_selection()
+    test_count_budget()
+    test_time_budget()
+    test_value_order()
+    test_engines_match()
+    print("\n✨ Z-홉 예산 검증 완료!")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 핫 폴더 감시(watch) 검증 테스트
+
+🎯 watch 기능 검증:
+- 쓰기 중인 파일은 크기/수정시각이 안정될 때까지 대기
+- 예열된 워커 풀로 처리 후 결과 저장, 원본은 done/ 또는 failed/로 이동
+- 상태 파일의 큐 길이/지연 시간 지표
+- 입력 폴더와 같거나 그 안(done/, failed/ 포함)의 출력 폴더 거부
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import HotFolderWatcher, run_watch_command
+
+JOB = "\n".join([
+    ";LAYER:0",
+    "G1 X10 Y10 Z0.2 E1",
+    "G0 F9000 X60 Y10",
+    "G1 X70 Y10 E2",
+])
+
+def test_watch_waits_for_complete_files():
+    """쓰기 완료 감지와 처리 결과 이동 검증"""
+    print("👀 핫 폴더 감시")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_dir = os.path.join(directory, "in")
+        output_dir = os.path.join(directory, "out")
+        os.makedirs(input_dir)
+
+        watcher = HotFolderWatcher(input_dir, output_dir, {"zhop_mode": "traditional"},
+                                   workers=2, poll_interval=0.01)
+        watcher.start()
+        try:
+            growing = os.path.join(input_dir, "growing.gcode")
+            with open(growing, "w", encoding="utf-8") as f:
+                f.write(JOB[:20])
+            with open(os.path.join(input_dir, "ready.gcode"), "w", encoding="utf-8") as f:
+                f.write(JOB)
+            with open(os.path.join(input_dir, "broken.gcode"), "w", encoding="utf-8") as f:
+                f.write(";SETTING_3 machine_max_feedrate_z = 1.2.3")
+            with open(os.path.join(input_dir, ".partial.gcode"), "w", encoding="utf-8") as f:
+                f.write(JOB)
+
+            watcher.scan()  # 첫 관찰: 모두 대기
+            assert len(watcher.candidates) == 3
+            assert not watcher.in_flight
+
+            with open(growing, "a", encoding="utf-8") as f:
+                f.write(JOB[20:])  # 아직 쓰는 중
+            watcher.scan()
+            print(f"   • 처리 중: {len(watcher.in_flight)}개, 대기: {len(watcher.candidates)}개")
+            assert len(watcher.in_flight) == 2
+            assert list(watcher.candidates) == [growing]
+
+            status = watcher.write_status()
+            assert status["queue_depth"] == 3
+
+            watcher.collect(wait=True)
+            watcher.scan()
+            watcher.collect(wait=True)
+        finally:
+            watcher.stop()
+
+        with open(watcher.status_path, encoding="utf-8") as f:
+            status = json.load(f)
+        print(f"   • 상태: {status}")
+
+        assert sorted(os.listdir(output_dir)) == ["growing.gcode", "ready.gcode", "smartzhop_status.json"]
+        assert sorted(os.listdir(os.path.join(input_dir, "done"))) == ["growing.gcode", "ready.gcode"]
+        assert os.listdir(os.path.join(input_dir, "failed")) == ["broken.gcode"]
+        assert os.path.exists(os.path.join(input_dir, ".partial.gcode"))
+        assert status["processed"] == 2
+        assert status["failed"] == 1
+        assert status["queue_depth"] == 0
+        assert status["max_latency_s"] >= status["avg_latency_s"] > 0
+
+        with open(os.path.join(output_dir, "ready.gcode"), encoding="utf-8") as f:
+            assert "Smart Z-Hop Travel Up" in f.read()
+
+def test_watch_run_cycles():
+    """폴링 루프 실행 검증 (제한된 반복)"""
+    print("\n🔁 폴링 루프")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_dir = os.path.join(directory, "in")
+        output_dir = os.path.join(directory, "out")
+        os.makedirs(input_dir)
+        with open(os.path.join(input_dir, "job.gcode"), "w", encoding="utf-8") as f:
+            f.write(JOB)
+
+        metrics = HotFolderWatcher(input_dir, output_dir, workers=1, poll_interval=0.01).run(max_cycles=5)
+        print(f"   • 지표: {metrics}")
+
+        assert metrics["processed"] == 1
+        assert os.path.exists(os.path.join(output_dir, "job.gcode"))
+
+def test_output_inside_input_rejected():
+    """입력 폴더 안의 출력 폴더 거부 검증"""
+    print("\n🚫 출력 폴더 위치 검사")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_dir = os.path.join(directory, "in")
+        os.makedirs(input_dir)
+        for output_dir in (input_dir, os.path.join(input_dir, "."), os.path.join(input_dir, "done"),
+                           os.path.join(input_dir, "failed"), os.path.join(input_dir, "out", "nested")):
+            try:
+                HotFolderWatcher(input_dir, output_dir)
+                assert False, f"거부되어야 함: {output_dir}"
+            except ValueError as e:
+                print(f"   ✅ {os.path.relpath(output_dir, directory)}: {e}")
+
+        # 이름이 입력 폴더로 시작하는 형제 폴더는 허용
+        watcher = HotFolderWatcher(input_dir, os.path.join(directory, "in-processed"))
+        assert watcher.executor is None
+
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                run_watch_command([input_dir, os.path.join(input_dir, "done")])
+            assert False, "사용법 오류로 종료되어야 함"
+        except SystemExit as e:
+            assert e.code == 2
+
+if __name__ == "__main__":
+    test_watch_waits_for_complete_files()
+    test_watch_run_cycles()
+    test_output_inside_input_rejected()
+    print("\n✨ watch 검증 완료!")
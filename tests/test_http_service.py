@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 로컬 HTTP 처리 서비스 검증 테스트
+
+🎯 serve 기능 검증:
+- POST /process: G-code 본문 + 설정 JSON → chunked 스트리밍 응답
+- 스트리밍 결과가 execute() 결과와 동일
+- 마지막 ;SMARTZHOP_TIME_DELTA: 주석이 엔진의 추가 시간/Z-홉 수와 일치
+- 동시 요청의 엔진 로그가 서버 stdout에 섞이지 않음 (작업별 캡처)
+- 잘못된 설정은 400 응답
+- GET /metrics: 처리 작업 수/라인 수/처리량
+"""
+
+import sys
+import os
+import io
+import json
+import contextlib
+import threading
+import http.client
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import ZHopEngine, ZHopSettings, create_processing_server, split_gcode_layers
+
+def build_job(layer_count=40):
+    """여러 레이어의 travel이 포함된 G-code 텍스트 생성"""
+    lines = [";FLAVOR:Marlin"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines.append(f";LAYER:{layer}")
+        lines.append(f"G0 F9000 X10 Y10 Z{0.2 * (layer + 1):.1f}")
+        for travel in range(20):
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{20 + travel} Y10 E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{20 + travel} Y{40 + travel}")
+    return "\n".join(lines)
+
+def start_server():
+    """임의 포트로 서버를 시작하고 (서버, 포트) 반환"""
+    server = create_processing_server(port=0, workers=2, chunk_size=4096)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+def test_process_streams_chunked_output():
+    """스트리밍 결과와 execute() 결과 일치 검증"""
+    print("🌐 POST /process 스트리밍")
+    print("=" * 50)
+
+    server, port = start_server()
+    try:
+        job = build_job()
+        settings = {"zhop_mode": "traditional", "zhop_height": "0.4"}
+
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        connection.request("POST", "/process", body=job.encode("utf-8"),
+                           headers={"X-SmartZHop-Settings": json.dumps(settings)})
+        response = connection.getresponse()
+        assert response.status == 200
+        assert response.getheader("Transfer-Encoding") == "chunked"
+        streamed = response.read().decode("utf-8")
+        connection.close()
+
+        engine = ZHopEngine(ZHopSettings(zhop_mode="traditional", zhop_height=0.4))
+        expected = engine.execute(split_gcode_layers(job))
+        body, _, trailer = streamed.rstrip("\n").rpartition("\n")
+        print(f"   • 응답 크기: {len(streamed)} bytes")
+        print(f"   • 마지막 줄: {trailer}")
+
+        assert body + "\n" == "\n".join(expected) + "\n"
+        stats = engine.print_time_stats
+        assert trailer == f";SMARTZHOP_TIME_DELTA:{stats['total_delta']:.3f} HOPS:{stats['hops']}"
+        assert stats['hops'] > 0
+        assert "G0 Z0.60;Smart Z-Hop Travel Up" in body  # zhop_height 0.4 적용
+
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        connection.request("GET", "/metrics")
+        metrics = json.loads(connection.getresponse().read())
+        connection.close()
+        print(f"   • 지표: {metrics}")
+
+        assert metrics["jobs_processed"] == 1
+        assert metrics["jobs_failed"] == 0
+        assert metrics["jobs_active"] == 0
+        assert metrics["queue_depth"] == 0
+        assert metrics["lines_processed"] == job.count("\n") + 1
+        assert metrics["lines_per_second"] > 0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_concurrent_jobs_keep_logs_private():
+    """동시 요청의 엔진 로그가 서버 stdout으로 새지 않는지 검증"""
+    print("\n🧵 동시 요청 로그 분리")
+    print("=" * 50)
+
+    job = build_job(20)
+    expected = "\n".join(ZHopEngine(ZHopSettings()).execute(split_gcode_layers(job)))
+    server_stdout = io.StringIO()
+    results = []
+
+    def request():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        connection.request("POST", "/process", body=job.encode("utf-8"))
+        results.append(connection.getresponse().read().decode("utf-8"))
+        connection.close()
+
+    with contextlib.redirect_stdout(server_stdout):
+        server, port = start_server()
+        try:
+            clients = [threading.Thread(target=request) for _ in range(4)]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            print("메인 스레드 출력")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    print(f"   • 응답 {len(results)}개, 서버 stdout: {server_stdout.getvalue()!r}")
+    assert len(results) == 4
+    assert all(result.rstrip("\n").rpartition("\n")[0] == expected for result in results)
+    assert server_stdout.getvalue() == "메인 스레드 출력\n"  # 다른 스레드 출력은 그대로 통과
+
+def test_invalid_settings_rejected():
+    """잘못된 설정/경로 요청 거부 검증"""
+    print("\n🚫 잘못된 요청 거부")
+    print("=" * 50)
+
+    server, port = start_server()
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        connection.request("POST", "/process?settings=" + "%7B%22zhop_hieght%22%3A1%7D", body=b"G0 X1 Y1")
+        response = connection.getresponse()
+        error = json.loads(response.read())
+        print(f"   • {response.status}: {error}")
+        assert response.status == 400
+
+        connection.request("GET", "/unknown")
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 404
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    test_process_streams_chunked_output()
+    test_concurrent_jobs_keep_logs_private()
+    test_invalid_settings_rejected()
+    print("\n✨ HTTP 서비스 검증 완료!")
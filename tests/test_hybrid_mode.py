@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 하이브리드 모드 검증 테스트
+
+🎯 travel 시퀀스별 방식 선택 검증:
+- Z-홉이 필요한 travel은 예상 시간이 짧은 방식 (구간 사이 속도를 이어 가는 슬링샷 궤적이 수직 Z-홉보다 빠름)
+- Z-홉이 필요 없는 travel은 그대로 (Z-홉 없음)
+- 방식별 선택 수 요약 출력, 추가 시간이 슬링샷 모드보다 길지 않음
+- 스킵 스캔 / 라인 단위 / 스트림 결과 동일
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import ZHopSettings
+from zhop_runner import run_zhop, run_stream
+
+def build_job(layer_count=3):
+    """레이어마다 짧은 리트랙션 travel, 긴 travel, 짧은 일반 travel이 섞인 Cura 형식 G-code 생성"""
+    lines = [";FLAVOR:Marlin", f";LAYER_COUNT:{layer_count}"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines += [f";LAYER:{layer}", f"G0 F300 Z{0.2 * (layer + 1):.1f}"]
+        for index in range(4):
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{10 + index * 5} Y10 E{e_value:.3f}")
+            lines += [f"G1 F2700 E{e_value - 5:.3f}", f"G0 F9000 X{10 + index * 5 + 0.5} Y12",
+                      f"G1 F2700 E{e_value:.3f}"]  # 짧은 리트랙션 travel
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{12 + index * 5} Y12 E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{12 + index * 5 + 0.5} Y12.5")  # 짧은 일반 travel
+        lines.append("G0 F9000 X150 Y150")  # 긴 travel (앞의 짧은 travel과 한 시퀀스)
+        e_value += 1.0
+        lines.append(f"G1 F1500 X152 Y150 E{e_value:.3f}")
+    return "\n".join(lines)
+
+SETTINGS = {"zhop_mode": "hybrid", "layer_change_zhop": False, "travel_distance": 5.0}
+
+def test_strategy_per_sequence():
+    """시퀀스별 방식 선택과 요약 검증"""
+    print("🔀 시퀀스별 방식 선택")
+    print("=" * 50)
+
+    assert ZHopSettings(zhop_mode="hybrid").zhop_mode == "hybrid"
+    output, processor, log = run_zhop(SETTINGS, build_job())
+    choices = processor.dry_run_stats['hybrid_choices']
+    print(f"   • 선택: {choices}")
+    assert choices == {'slingshot': 15, 'traditional': 0, 'none': 9}
+    assert sum(choices.values()) == processor.dry_run_stats['travel_sequences']
+    assert "🔀 하이브리드 선택: 슬링샷 15개, 전통적 0개, Z-홉 없음 9개" in log
+
+    layer = "\n".join(output)
+    assert "Smart Z-Hop Travel Up" not in layer
+    assert layer.count("Smart Z-Hop Complete (Safe Descent)") == 15
+
+def test_not_slower_than_single_mode():
+    """슬링샷 모드 대비 추가 시간 검증"""
+    print("\n⏱️ 추가 시간 비교")
+    print("=" * 50)
+
+    _, hybrid, _ = run_zhop(SETTINGS, build_job())
+    _, slingshot, _ = run_zhop({**SETTINGS, "zhop_mode": "slingshot"}, build_job())
+    print(f"   • 하이브리드: {hybrid.print_time_stats['total_delta']:.3f}s / "
+          f"슬링샷: {slingshot.print_time_stats['total_delta']:.3f}s")
+    assert hybrid.print_time_stats['hops'] == slingshot.print_time_stats['hops']
+    assert hybrid.print_time_stats['total_delta'] <= slingshot.print_time_stats['total_delta']
+
+def test_engines_match():
+    """스킵 스캔 / 라인 단위 / 스트림 동일성 검증"""
+    print("\n🔁 엔진 비교")
+    print("=" * 50)
+
+    text = build_job()
+    for settings in (SETTINGS, {"zhop_mode": "hybrid"}, {**SETTINGS, "zhop_speed": 5, "custom_layers": "1"}):
+        expected, line_engine, _ = run_zhop(settings, text, skip_scan=False)
+        output, skip_engine, _ = run_zhop(settings, text)
+        _, dry, _ = run_zhop(settings, text, dry_run=True)
+        streamed, _, _ = run_stream(settings, text)
+        print(f"   • {settings}: {skip_engine.dry_run_stats['hybrid_choices']}")
+        assert output == expected
+        assert skip_engine.dry_run_stats == line_engine.dry_run_stats
+        assert dry.dry_run_stats['hybrid_choices'] == skip_engine.dry_run_stats['hybrid_choices']
+        assert streamed == "\n".join(expected)
+
+if __name__ == "__main__":
+    test_strategy_per_sequence()
+    test_not_slower_than_single_mode()
+    test_engines_match()
+    print("\n✨ 하이브리드 모드 검증 완료!")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 제자리(in-place) 처리 메모리 검증 테스트
+
+🎯 in_place 기능 검증:
+- 처리 결과가 일반 실행과 동일하고 입력 목록 자체를 반환
+- tracemalloc 최대 추가 메모리가 가장 큰 레이어 크기의 몇 배 이내
+- 일반 실행은 원본과 결과를 동시에 유지 (비교 기준)
+- 제자리 처리는 직접 켜야 함, 처리 중 오류 시 일반 실행은 입력을 보존 (제자리는 일부만 처리된 채 남음)
+"""
+
+import sys
+import os
+import io
+import random
+import contextlib
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, split_gcode_layers
+
+def build_job(layer_count=40, extrusions=1200):
+    """압출 위주 레이어 + 레이어마다 몇 개의 travel, 경과 시간 주석이 있는 작업 생성"""
+    rng = random.Random(5)
+    lines = [";FLAVOR:Marlin", ";TIME:5000"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines += [f";LAYER:{layer}", f"G0 F300 Z{0.2 * (layer + 1):.1f}", f";TIME_ELAPSED:{layer * 10}"]
+        for extrusion in range(extrusions):
+            e_value += 0.1
+            lines.append(f"G1 X{rng.uniform(0, 200):.3f} Y{rng.uniform(0, 200):.3f} E{e_value:.5f}")
+            if extrusion % 300 == 299:
+                # 기계 최대 XY 속도 travel: Z-홉 궤적이 원본보다 빠르지 않아 추가 시간 발생
+                lines.append(f"G0 F30000 X{rng.uniform(0, 200):.3f} Y{rng.uniform(0, 200):.3f}")
+    return "\n".join(lines)
+
+def measure_execute(mode, in_place):
+    """입력 레이어 생성 후 execute의 최대 추가 메모리 측정 → (결과, 입력 목록, 추가 메모리, 최대 레이어, 전체 크기)"""
+    processor = SmartZHop({"zhop_mode": mode})
+    processor.in_place = in_place
+    text = build_job()
+    tracemalloc.start()
+    try:
+        data = split_gcode_layers(text)
+        del text
+        largest = max(len(layer) for layer in data)
+        total = sum(len(layer) for layer in data)
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = processor.execute(data)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return output, data, peak - baseline, largest, total
+
+def test_in_place_peak_memory():
+    """제자리 처리 최대 메모리 검증"""
+    print("🧠 제자리 처리 메모리")
+    print("=" * 50)
+
+    for mode in ("slingshot", "traditional"):
+        output, data, extra, largest, total = measure_execute(mode, in_place=True)
+        expected, _, copy_extra, _, _ = measure_execute(mode, in_place=False)
+        print(f"   • {mode}: 최대 레이어 {largest:,} B, 전체 {total:,} B")
+        print(f"     in_place 추가 {extra:,} B ({extra / largest:.1f}x), 일반 추가 {copy_extra:,} B")
+
+        assert output is data
+        assert output == expected
+        assert "Smart" in output[1]
+        assert ";TIME_ELAPSED:10\n" not in output[2]  # 시간 보정도 제자리 반영
+        assert extra < 6 * largest
+        assert copy_extra > 0.8 * total
+
+def test_in_place_is_opt_in():
+    """기본값과 처리 중 오류 시 입력 목록 상태 검증"""
+    print("\n🛡️ 제자리 처리 기본값 / 오류 시 입력")
+    print("=" * 50)
+
+    assert SmartZHop({}).in_place is False
+
+    def failing_after_two_layers(processor):
+        """레이어 2개를 내보낸 뒤 오류가 나는 처리기"""
+        original = processor.iter_execute
+        def iter_execute(data):
+            for layer_index, layer in enumerate(original(data)):
+                if layer_index == 2:
+                    raise RuntimeError("처리 실패")
+                yield layer
+        processor.iter_execute = iter_execute
+        return processor
+
+    for in_place in (False, True):
+        processor = failing_after_two_layers(SmartZHop({"zhop_mode": "slingshot"}))
+        processor.in_place = in_place
+        data = split_gcode_layers(build_job(layer_count=4, extrusions=300))
+        original = list(data)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                processor.execute(data)
+            assert False, "처리 오류가 전달되어야 함"
+        except RuntimeError:
+            pass
+        changed = [index for index, layer in enumerate(data) if layer != original[index]]
+        print(f"   • in_place={in_place}: 바뀐 입력 레이어 {changed}")
+        assert changed == ([1] if in_place else [])
+
+if __name__ == "__main__":
+    test_in_place_peak_memory()
+    test_in_place_is_opt_in()
+    print("\n✨ 제자리 처리 검증 완료!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 스마트 모드 레이어 변경 Z-홉 검증 테스트
+
+🎯 레이어 변경 Z-홉 합치기 검증:
+- 레이어 Z 단독 이동이 사라지고 첫 travel과 함께 하나의 연속 궤적으로 처리
+- 궤적은 이전 레이어 높이에서 출발해 새 레이어 높이로 내려앉음
+- 대상 레이어가 아니거나 travel Z-홉이 꺼져 있어도 레이어 변경 Z-홉은 적용
+- 스킵 스캔 / 라인 단위 / 스트림 결과 동일
+- 별도 수직 홉(전통적 방식) + travel 홉보다 추가 시간이 적음
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import split_gcode_layers
+from zhop_runner import run_zhop, run_stream
+
+def build_job(layer_count=10):
+    """레이어마다 Z 단독 이동 → 첫 travel → 압출 순서의 Cura 형식 G-code 생성"""
+    lines = [";FLAVOR:Marlin", f";LAYER_COUNT:{layer_count}"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines += [f";LAYER:{layer}", ";TYPE:WALL-OUTER", f"G0 F300 Z{0.2 * (layer + 1):.1f}",
+                  f"G0 F9000 X{60 + layer} Y{40 + layer * 2}"]
+        for extrusion in range(5):
+            e_value += 0.5
+            lines.append(f"G1 F1500 X{70 + extrusion * 3} Y{40 + layer * 2} E{e_value:.3f}")
+    return "\n".join(lines)
+
+def test_layer_change_merged_into_travel():
+    """Z 단독 이동 제거와 연속 궤적 검증"""
+    print("🪜 레이어 변경 Z-홉 합치기")
+    print("=" * 50)
+
+    output, _, _ = run_zhop({"travel_distance": 1000.0}, build_job())
+    layer = output[3].split("\n")  # ;LAYER:2
+    print("   " + "\n   ".join(layer[:5]))
+
+    assert "G0 F300 Z0.6" not in layer
+    curve = [line for line in layer if line.startswith("G1") and "Smart" in line]
+    z_values = [float(line.split(" Z")[1].split()[0]) for line in curve if " Z" in line]
+    assert z_values[0] > 0.6  # 첫 이동부터 상승 (이전 높이 0.4에서 출발)
+    assert z_values[-1] == 0.6  # 새 레이어 높이로 착지
+    assert not any(line.startswith("G1 Z") for line in layer)  # 별도 수직 이동 없음
+
+def test_applies_regardless_of_travel_settings():
+    """travel Z-홉 설정과 무관한 적용 및 비활성화 검증"""
+    print("\n⚙️ 설정 조합")
+    print("=" * 50)
+
+    text = build_job()
+    for settings in ({"travel_zhop": False}, {"custom_layers": "1"}, {"travel_distance": 1000.0}):
+        output, processor, _ = run_zhop(settings, text)
+        hopped = sum("Smart" in layer for layer in output)
+        print(f"   • {settings}: Z-홉 레이어 {hopped}개")
+        assert hopped == 10
+        assert processor.dry_run_stats["travel_sequences"] == 10
+
+    data = split_gcode_layers(text)
+    output, _, _ = run_zhop({"layer_change_zhop": False, "travel_zhop": False}, text)
+    assert all(layer is original or layer == original for layer, original in zip(output, data))
+    assert "Smart" not in "\n".join(output)
+
+def test_engines_match():
+    """스킵 스캔 / 라인 단위 / 스트림 동일성 검증"""
+    print("\n🔁 엔진 비교")
+    print("=" * 50)
+
+    text = build_job()
+    for settings in ({}, {"travel_zhop": False}, {"custom_layers": "2 5"}):
+        expected, _, _ = run_zhop(settings, text, skip_scan=False)
+        output, _, _ = run_zhop(settings, text)
+        streamed, _, _ = run_stream(settings, text)
+        print(f"   • {settings}: 동일")
+        assert output == expected
+        assert streamed == "\n".join(expected)
+
+def test_less_time_than_separate_hop():
+    """별도 수직 홉 대비 추가 시간 감소 검증"""
+    print("\n⏱️ 추가 시간 비교")
+    print("=" * 50)
+
+    text = build_job()
+    _, merged, _ = run_zhop({"travel_distance": 0.0}, text)
+    _, separate_travel, _ = run_zhop({"travel_distance": 0.0, "layer_change_zhop": False}, text)
+    _, separate_layer, _ = run_zhop({"zhop_mode": "traditional", "travel_zhop": False, "zhop_height": 0.3}, text)
+    separate = separate_travel.print_time_stats["total_delta"] + separate_layer.print_time_stats["total_delta"]
+    print(f"   • 합친 궤적: {merged.print_time_stats['total_delta']:.3f}s / 별도 홉: {separate:.3f}s")
+    assert merged.print_time_stats["total_delta"] < separate
+
+if __name__ == "__main__":
+    test_layer_change_merged_into_travel()
+    test_applies_regardless_of_travel_settings()
+    test_engines_match()
+    test_less_time_than_separate_hop()
+    print("\n✨ 레이어 변경 Z-홉 검증 완료!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 레이어 지정(custom_layers, top_bottom_only) 검증 테스트
+
+🎯 레이어 필터 검증:
+- 스마트 모드도 지정 레이어에만 travel Z-홉 적용 (1 = ;LAYER:0, 쉼표/공백 구분)
+- 비대상 레이어는 원본 문자열 객체 그대로 반환 (파싱 없음)
+- 대상 레이어 결과는 필터 없이 처리한 결과와 동일 (건너뛴 레이어의 위치 상태 복원)
+- 스트림 처리도 같은 레이어를 대상으로 함
+"""
+
+import sys
+import os
+import io
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, split_gcode_layers
+from zhop_runner import run_zhop, run_stream
+
+def build_job(layer_count=30):
+    """레이어마다 압출, 리트랙션, travel이 있는 Cura 형식 G-code 생성"""
+    lines = [";FLAVOR:Marlin", f";LAYER_COUNT:{layer_count}", "G28"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines += [f";LAYER:{layer}", f"G0 F300 Z{0.2 * (layer + 1):.1f}"]
+        for travel in range(8):
+            for extrusion in range(20):
+                e_value += 0.1
+                lines.append(f"G1 F1500 X{10 + extrusion + travel}.5 Y{20 + layer + travel} E{e_value:.4f}")
+            if travel % 3 == 0:
+                e_value -= 4.0
+                lines.append(f"G1 F2700 E{e_value:.4f}")
+            lines.append(f"G0 F9000 X{80 + travel * 9} Y{90 - layer}")
+    return "\n".join(lines)
+
+def test_slingshot_filters_layers():
+    """스마트 모드 레이어 지정과 비대상 레이어 객체 동일성"""
+    print("🎯 스마트 모드 레이어 지정")
+    print("=" * 50)
+
+    text = build_job()
+    unfiltered, _, _ = run_zhop({}, text)
+    for settings, targets in (({"custom_layers": "1, 5 12"}, {0, 4, 11}), ({"top_bottom_only": True}, {0, 29})):
+        for skip_scan in (True, False):
+            data = split_gcode_layers(text)
+            output, _, _ = run_zhop(settings, data, skip_scan)
+            hopped = {index - 1 for index, layer in enumerate(output) if "Smart" in layer}
+            print(f"   • {settings} (skip_scan={skip_scan}): Z-홉 레이어 {sorted(hopped)}")
+            assert hopped == targets
+            for index, layer in enumerate(output):
+                if index - 1 in targets:
+                    assert layer == unfiltered[index]  # 건너뛴 레이어 이후에도 같은 시작 위치
+                elif skip_scan:
+                    assert layer is data[index]
+
+def test_traditional_filters_layers():
+    """전통적 모드 ;LAYER: 번호 기준 레이어 지정"""
+    print("\n🎯 전통적 모드 레이어 지정")
+    print("=" * 50)
+
+    text = build_job()
+    for settings, targets in (({"custom_layers": "2,3"}, {1, 2}), ({"top_bottom_only": True}, {0, 29})):
+        settings = dict(settings, zhop_mode="traditional", layer_change_zhop=False)
+        data = split_gcode_layers(text)
+        output, _, _ = run_zhop(settings, data)
+        expected, _, _ = run_zhop(settings, text, skip_scan=False)
+        hopped = {index - 1 for index, layer in enumerate(output) if "Travel Up" in layer}
+        print(f"   • {settings}: Z-홉 레이어 {sorted(hopped)}")
+        assert output == expected
+        assert hopped == targets
+        assert all(layer is data[index] for index, layer in enumerate(output) if index - 1 not in targets)
+
+    # 레이어 변경 Z-홉은 모든 레이어에 유지
+    output, _, _ = run_zhop({"zhop_mode": "traditional", "top_bottom_only": True}, text)
+    assert sum("Layer Change" in layer for layer in output) == 30
+
+def test_untargeted_layers_not_parsed():
+    """비대상 레이어 라인 파싱 생략 검증"""
+    print("\n🚀 비대상 레이어 파싱")
+    print("=" * 50)
+
+    text = build_job(200)
+    data = split_gcode_layers(text)
+    line_count = text.count("\n") + 1
+    for mode in ("slingshot", "traditional"):
+        processor = SmartZHop({"zhop_mode": mode, "top_bottom_only": True})
+        original_get_value = processor.getValue
+        calls = [0]
+        def counting_get_value(line, key):
+            calls[0] += 1
+            return original_get_value(line, key)
+        processor.getValue = counting_get_value
+        with contextlib.redirect_stdout(io.StringIO()):
+            list(processor.iter_execute(data))
+        print(f"   • {mode}: 라인 {line_count:,}개, getValue 호출 {calls[0]:,}회")
+        assert calls[0] < line_count / 10  # 대상 레이어 2개 + 레이어마다 ;LAYER: 라인 정도만
+
+def test_stream_uses_same_layers():
+    """스트림 처리 대상 레이어 동일성"""
+    print("\n📡 스트림 처리")
+    print("=" * 50)
+
+    text = build_job()
+    for settings in ({"custom_layers": "3 4"}, {"top_bottom_only": True},
+                     {"zhop_mode": "traditional", "custom_layers": "3 4"}):
+        expected, _, _ = run_zhop(settings, text)
+        streamed, _, _ = run_stream(settings, text)
+        print(f"   • {settings}: {streamed.count('Smart')}개 Z-홉 주석")
+        assert streamed == "\n".join(expected)
+
+if __name__ == "__main__":
+    test_slingshot_filters_layers()
+    test_traditional_filters_layers()
+    test_untargeted_layers_not_parsed()
+    test_stream_uses_same_layers()
+    print("\n✨ 레이어 지정 검증 완료!")
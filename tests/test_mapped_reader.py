@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop mmap 입력 리더 검증 테스트
+
+🎯 MappedGcodeReader 검증:
+- mmap 라인 순회 결과가 일반 읽기와 동일 (CRLF, 마지막 줄바꿈 없음 포함)
+- G 명령 라인만 디코딩
+- 큰 파일도 Python 메모리 사용량 일정 (tracemalloc)
+- 압축 파일은 스트리밍 읽기로 대체
+"""
+
+import sys
+import os
+import gzip
+import tempfile
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import MappedGcodeReader
+
+def test_line_iteration_matches_text():
+    """mmap 라인 순회와 일반 텍스트 분할 결과 비교"""
+    print("🗺️ mmap 라인 순회")
+    print("=" * 50)
+
+    content = ";FLAVOR:Marlin\r\nG0 X1 Y1 Z0.2\r\n\r\n;LAYER:0\nG1 X2 Y2 E1\nM104 S200\nG0 X5"
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "job.gcode")
+        with open(path, "wb") as f:
+            f.write(content.encode("utf-8"))
+
+        with MappedGcodeReader(path) as reader:
+            lines = [(number, bytes(line).decode("utf-8")) for number, line in reader.iter_lines()]
+            motion = list(reader.iter_motion_lines())
+            limited = list(reader.iter_motion_lines(max_lines=2))
+
+        gz_path = path + ".gz"
+        with gzip.open(gz_path, "wb") as f:
+            f.write(content.encode("utf-8"))
+        with MappedGcodeReader(gz_path) as reader:
+            gz_motion = list(reader.iter_motion_lines())
+
+        empty_path = os.path.join(directory, "empty.gcode")
+        open(empty_path, "w").close()
+        with MappedGcodeReader(empty_path) as reader:
+            assert list(reader.iter_lines()) == []
+
+    print(f"   • 라인: {len(lines)}개, 모션 라인: {motion}")
+    assert [line for _, line in lines] == content.replace("\r\n", "\n").split("\n")
+    assert motion == [(2, "G0 X1 Y1 Z0.2"), (5, "G1 X2 Y2 E1"), (7, "G0 X5")]
+    assert limited == [(2, "G0 X1 Y1 Z0.2")]
+    assert gz_motion == motion
+
+def test_constant_memory_on_large_file():
+    """큰 파일 순회 시 Python 메모리 최대 사용량이 파일 크기와 무관한지 검증"""
+    print("\n📉 큰 파일 메모리 사용량")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "large.gcode")
+        with open(path, "w", encoding="utf-8") as f:
+            for index in range(100000):
+                f.write(f";TYPE:WALL-OUTER\nG1 X{index % 200}.123 Y{index % 97}.456 E{index * 0.01:.5f}\n")
+        file_size = os.path.getsize(path)
+
+        tracemalloc.start()
+        motion_count = 0
+        with MappedGcodeReader(path) as reader:
+            for _, line in reader.iter_motion_lines():
+                motion_count += 1
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"   • 파일: {file_size / 1e6:.1f}MB, 모션 라인: {motion_count:,}개, 최대 메모리: {peak / 1e3:.1f}KB")
+    assert motion_count == 100000
+    assert peak < file_size / 100
+
+if __name__ == "__main__":
+    test_line_iteration_matches_text()
+    test_constant_memory_on_large_file()
+    print("\n✨ mmap 리더 검증 완료!")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 슬라이서 Z-홉 대체 검증 테스트
+
+🎯 슬라이서 "Z Hop When Retracted" 처리 검증:
+- travel 시퀀스 앞뒤의 Z 단독 상승/하강 라인을 제거하고 궤적 하나로 대체 (이중 Z-홉 없음)
+- 대체 수와 제거된 Z 이동 거리 통계
+- Z-홉하지 않는 시퀀스는 슬라이서 Z-홉을 그대로 유지
+- 스킵 스캔 / 라인 단위 / 스트림 결과 동일
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zhop_runner import run_zhop, run_stream
+
+NATIVE_HOP = 0.4
+
+def build_job(layer_count=6, retract=True):
+    """리트랙션 → Z 상승 → travel → Z 하강 → 복귀 형태의 Cura 형식 G-code 생성"""
+    lines = [";FLAVOR:Marlin", f";LAYER_COUNT:{layer_count}"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        z = 0.2 * (layer + 1)
+        lines += [f";LAYER:{layer}", f"G0 F9000 X10 Y{10 + layer} Z{z:.1f}", ";TYPE:WALL-OUTER"]
+        for travel in range(3):
+            for extrusion in range(4):
+                e_value += 0.3
+                lines.append(f"G1 F1500 X{10 + extrusion * 2 + travel} Y{10 + layer} E{e_value:.3f}")
+            if retract:
+                lines.append(f"G1 F2700 E{e_value - 6.5:.3f}")
+            lines += [f"G1 F1200 Z{z + NATIVE_HOP:.1f}", f"G0 F9000 X{60 + travel * 20} Y{40 + layer}",
+                      f"G0 X{70 + travel * 20} Y{60 + layer}", f"G1 F1200 Z{z:.1f}"]
+            if retract:
+                lines.append(f"G1 F2700 E{e_value:.3f}")
+    return "\n".join(lines)
+
+def test_native_hops_replaced():
+    """슬라이서 Z-홉 제거와 궤적 높이 검증"""
+    print("🔄 슬라이서 Z-홉 대체")
+    print("=" * 50)
+
+    settings = {"layer_change_zhop": False, "zhop_height": 0.3}
+    output, processor, _ = run_zhop(settings, build_job())
+    layer = output[3].split("\n")  # ;LAYER:2 (Z0.6)
+    print("   " + "\n   ".join(line for line in layer if "Smart" in line)[:300])
+
+    assert "G1 F1200 Z1.0" not in layer and "G1 F1200 Z0.6" not in layer
+    z_values = [float(line.split(" Z")[1].split()[0]) for line in layer if "Smart" in line and " Z" in line]
+    assert max(z_values) <= 0.6 + 0.3 + 0.001  # 슬라이서 상승 위에 쌓이지 않음
+    assert z_values[-1] == 0.6
+
+    stats = processor.dry_run_stats
+    print(f"   • 대체: {stats['native_hops_replaced']}개, 제거된 Z 이동: {stats['native_hop_z_saved']:.2f}mm")
+    assert stats['native_hops_replaced'] == 18
+    assert abs(stats['native_hop_z_saved'] - 18 * 2 * NATIVE_HOP) < 1e-6
+
+    _, dry, _ = run_zhop(settings, build_job(), dry_run=True)
+    assert dry.dry_run_stats['native_hops_replaced'] == 18
+
+def test_kept_when_not_hopping():
+    """Z-홉하지 않는 시퀀스의 슬라이서 Z-홉 유지 검증"""
+    print("\n🧷 Z-홉 없는 시퀀스")
+    print("=" * 50)
+
+    text = build_job(retract=False)
+    output, processor, _ = run_zhop({"layer_change_zhop": False, "travel_distance": 1000.0}, text)
+    print(f"   • 대체: {processor.dry_run_stats['native_hops_replaced']}개")
+    assert "\n".join(output) == text
+    assert processor.dry_run_stats['native_hops_replaced'] == 0
+
+def test_engines_match():
+    """스킵 스캔 / 라인 단위 / 스트림 동일성 검증"""
+    print("\n🔁 엔진 비교")
+    print("=" * 50)
+
+    for retract in (True, False):
+        text = build_job(retract=retract)
+        for settings in ({}, {"layer_change_zhop": False}, {"travel_distance": 30.0}, {"custom_layers": "2"}):
+            expected, line_engine, _ = run_zhop(settings, text, skip_scan=False)
+            output, skip_engine, _ = run_zhop(settings, text)
+            streamed, _, _ = run_stream(settings, text)
+            print(f"   • {settings} (retract={retract}): 대체 {skip_engine.dry_run_stats['native_hops_replaced']}개")
+            assert output == expected
+            assert skip_engine.dry_run_stats == line_engine.dry_run_stats
+            assert streamed == "\n".join(expected)
+
+if __name__ == "__main__":
+    test_native_hops_replaced()
+    test_kept_when_not_hopping()
+    test_engines_match()
+    print("\n✨ 슬라이서 Z-홉 대체 검증 완료!")
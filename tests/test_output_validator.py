@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 처리 결과 검증기(validate) 테스트
+
+🎯 validate 기능 검증:
+- 정상 처리 결과는 두 모드 모두 통과
+- Z 복원 누락 → 압출 Z 불일치 + Z-홉 끝점 오류
+- M203 복원 누락 → 짝 오류
+- 단일 정규식 스캔 처리량
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, validate_gcode_file, split_gcode_layers
+
+def build_job(layer_count=8, travels=6):
+    """짧은/긴 travel이 섞인 G-code 텍스트 생성"""
+    lines = [";FLAVOR:Marlin"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines.append(f";LAYER:{layer}")
+        lines.append(f"G0 F9000 X10 Y10 Z{0.2 * (layer + 1):.1f}")
+        for travel in range(travels):
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{20 + travel} Y10 E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{20 + travel} Y{10.5 if travel % 2 else 40}")
+        e_value += 1.0
+        lines.append(f"G1 F1500 X30 Y30 E{e_value:.3f}")
+    return "\n".join(lines)
+
+def write_files(directory, mode, edit=None, layer_count=8, travels=6):
+    """원본과 (선택적으로 손상시킨) 처리 결과 파일 작성"""
+    job = build_job(layer_count, travels)
+    processed = "\n".join(SmartZHop({"zhop_mode": mode}).execute(split_gcode_layers(job)))
+    if edit:
+        processed = edit(processed)
+    original_path = os.path.join(directory, "original.gcode")
+    processed_path = os.path.join(directory, "processed.gcode")
+    with open(original_path, "w", encoding="utf-8") as f:
+        f.write(job)
+    with open(processed_path, "w", encoding="utf-8") as f:
+        f.write(processed)
+    return original_path, processed_path
+
+def test_valid_outputs_pass():
+    """정상 처리 결과 검증 통과"""
+    print("✅ 정상 결과 검증")
+    print("=" * 50)
+
+    for mode in ("traditional", "slingshot"):
+        with tempfile.TemporaryDirectory() as directory:
+            original, processed = write_files(directory, mode)
+            report = validate_gcode_file(processed, original)
+        print(f"   • {mode}: Z 검사 {report['z_checks']}개, M203 {report['m203_sets']}/{report['m203_restores']}, "
+              f"Z-홉 끝점 {report['hops_checked']}개")
+        assert report["valid"], report["errors"]
+        assert report["layers"] == 8
+        assert report["hops_checked"] > 0
+        assert report["m203_sets"] == report["m203_restores"] > 0
+
+def test_broken_outputs_detected():
+    """Z 복원 누락과 M203 복원 누락 감지"""
+    print("\n❌ 손상된 결과 감지")
+    print("=" * 50)
+
+    def drop_first(marker):
+        def edit(text):
+            lines = text.split("\n")
+            index = next(i for i, line in enumerate(lines) if marker in line)
+            return "\n".join(lines[:index] + lines[index + 1:])
+        return edit
+
+    with tempfile.TemporaryDirectory() as directory:
+        original, processed = write_files(directory, "traditional", drop_first("Smart Z-Hop Travel Down"))
+        report = validate_gcode_file(processed, original)
+    kinds = [error["type"] for error in report["errors"]]
+    print(f"   • Z 복원 누락: {report['errors'][:2]}")
+    assert not report["valid"]
+    assert kinds.count("z_mismatch") == 1
+    assert "hop_endpoint" in kinds
+
+    with tempfile.TemporaryDirectory() as directory:
+        _, processed = write_files(directory, "traditional", drop_first("Restore original Z-axis speed"))
+        report = validate_gcode_file(processed)
+    print(f"   • M203 복원 누락: {report['errors']}")
+    assert [error["type"] for error in report["errors"]] == ["m203_unmatched_set"]
+    assert report["errors"][0]["line"] == 2  # 레이어 변경 Z-홉의 설정 라인
+
+def test_validation_throughput():
+    """원본 없는 검증은 라인 단위 Python 루프 없이 스캔"""
+    print("\n⚡ 검증 처리량")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        _, processed = write_files(directory, "slingshot", layer_count=60, travels=200)
+        start = time.perf_counter()
+        report = validate_gcode_file(processed)
+        elapsed = time.perf_counter() - start
+
+    print(f"   • {report['lines']:,}줄: {elapsed:.3f}초 ({report['lines_per_second']:,.0f} 줄/s)")
+    assert report["valid"]
+    assert report["lines"] > 50000
+
+if __name__ == "__main__":
+    test_valid_outputs_pass()
+    test_broken_outputs_detected()
+    test_validation_throughput()
+    print("\n✨ 검증기 테스트 완료!")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 설정 조합(sweep) 비교 도구 검증 테스트
+
+🎯 sweep 기능 검증:
+- --grid 인자 → 설정 조합 생성 (Cura 설정 타입 변환)
+- 한 번 파싱한 작업을 프로세스 풀에서 재사용
+- 조합별 Z-홉 수 / 추가 Z 거리 / 추가 시간 / 출력 크기
+- 기본 설정(--settings) 위에 조합 병합, traditional 모드에서 slingshot_* 키 거부
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import (SmartZHop, parse_sweep_grid, run_parameter_sweep,
+                       print_sweep_table, write_sweep_csv, merge_sweep_points,
+                       run_sweep_command)
+
+def write_test_job(directory):
+    """짧은/긴 travel이 섞인 테스트 G-code 파일 작성"""
+    lines = [";FLAVOR:Marlin", ";TIME:500"]
+    e_value = 0.0
+    for layer in range(5):
+        lines.append(f";LAYER:{layer}")
+        lines.append(f"G0 F9000 X10 Y10 Z{0.2 * (layer + 1):.1f}")
+        for travel in range(10):
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{20 + travel} Y10 E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{20 + travel} Y{12 + travel * 5}")  # 2~47mm travel
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{21 + travel} Y10 E{e_value:.3f}")
+    path = os.path.join(directory, "sweep_job.gcode")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return path
+
+def test_grid_parsing():
+    """grid 인자 파싱 및 타입 변환 검증"""
+    print("🧮 grid 인자 파싱")
+    print("=" * 50)
+
+    types = SmartZHop().get_setting_types()
+    keys, combinations = parse_sweep_grid(
+        ["zhop_mode=slingshot,traditional", "slingshot_ascent_ratio=20,40", "travel_zhop=true"], types)
+
+    for combination in combinations:
+        print(f"   • {combination}")
+
+    assert keys == ["zhop_mode", "slingshot_ascent_ratio", "travel_zhop"]
+    assert len(combinations) == 4
+    assert combinations[0] == {"zhop_mode": "slingshot", "slingshot_ascent_ratio": 20, "travel_zhop": True}
+
+    try:
+        parse_sweep_grid(["not_a_setting=1"], types)
+        assert False, "알 수 없는 키는 거부되어야 함"
+    except ValueError as e:
+        print(f"   ✅ 잘못된 키 거부: {e}")
+
+def test_sweep_results():
+    """조합별 결과 지표와 풀/순차 결과 일치 검증"""
+    print("\n📊 sweep 결과 검증")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_test_job(directory)
+        grid = ["travel_distance=1,30", "zhop_height=0.2,0.6"]
+
+        keys, job, pooled = run_parameter_sweep(path, grid, workers=2)
+        _, _, sequential = run_parameter_sweep(path, grid, workers=1)
+        print_sweep_table(keys, job, pooled)
+
+        csv_path = os.path.join(directory, "sweep.csv")
+        write_sweep_csv(csv_path, keys, pooled)
+        with open(csv_path, encoding="utf-8") as f:
+            csv_rows = f.read().strip().split("\n")
+
+    assert len(pooled) == 4
+    assert len(csv_rows) == 5
+    for pooled_result, sequential_result in zip(pooled, sequential):
+        assert pooled_result["settings"] == sequential_result["settings"]
+        assert pooled_result["hops"] == sequential_result["hops"]
+        assert pooled_result["output_bytes"] == sequential_result["output_bytes"]
+
+    by_settings = {(r["settings"]["travel_distance"], r["settings"]["zhop_height"]): r for r in pooled}
+    # 임계값이 높을수록 Z-홉 수 감소, 높이가 클수록 추가 Z 거리 증가
+    assert by_settings[(30.0, 0.2)]["hops"] < by_settings[(1.0, 0.2)]["hops"]
+    assert by_settings[(1.0, 0.6)]["added_z_travel"] > by_settings[(1.0, 0.2)]["added_z_travel"]
+    assert all(r["output_bytes"] > job["input_bytes"] for r in pooled)
+
+def test_base_settings_merge():
+    """기본 설정 파일 병합과 traditional 모드의 slingshot_* grid 검사"""
+    print("\n🧩 기본 설정 병합 / 모드 검사")
+    print("=" * 50)
+
+    base = {"zhop_mode": "slingshot", "zhop_height": 0.8}
+    points = merge_sweep_points(["slingshot_ascent_ratio"], [{"slingshot_ascent_ratio": 20},
+                                                             {"slingshot_ascent_ratio": 40}], base)
+    for point in points:
+        print(f"   • {point['zhop_mode']} / 높이 {point['zhop_height']} / 상승 {point['slingshot_ascent_ratio']}")
+    assert [point["slingshot_ascent_ratio"] for point in points] == [20, 40]
+    assert all(point["zhop_mode"] == "slingshot" and point["zhop_height"] == 0.8 for point in points)
+
+    # 기본값(traditional)에서 slingshot_* 키만 바꾸면 모든 조합이 같은 결과 → 거부
+    try:
+        merge_sweep_points(["slingshot_ascent_ratio"], [{"slingshot_ascent_ratio": 20}])
+        assert False, "traditional 모드에서 slingshot_* grid는 거부되어야 함"
+    except ValueError as e:
+        print(f"   ✅ traditional 모드 거부: {e}")
+
+    # 일부 조합만 traditional이면 경고 후 진행
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        points = merge_sweep_points(["zhop_mode", "slingshot_ascent_ratio"],
+                                    [{"zhop_mode": "slingshot", "slingshot_ascent_ratio": 20},
+                                     {"zhop_mode": "traditional", "slingshot_ascent_ratio": 20}])
+    print(f"   • {log.getvalue().strip()}")
+    assert len(points) == 2 and "⚠️" in log.getvalue()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_test_job(directory)
+        settings_path = os.path.join(directory, "base.json")
+        with open(settings_path, "w", encoding="utf-8") as f:
+            json.dump({"zhop_mode": "slingshot", "travel_distance": 30.0}, f)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = run_sweep_command([path, "-s", settings_path, "--grid", "zhop_height=0.2,0.6",
+                                         "--workers", "1"])
+        _, _, default_results = run_parameter_sweep(path, ["zhop_height=0.2,0.6"], workers=1)
+
+        # 잘못된 grid는 사용법 오류로 종료
+        try:
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                run_sweep_command([path, "--grid", "slingshot_ascent_ratio=20,40"])
+            assert False, "사용법 오류로 종료되어야 함"
+        except SystemExit as e:
+            assert e.code == 2
+
+    for result, default_result in zip(results, default_results):
+        print(f"   • 높이 {result['settings']['zhop_height']}: 기본 설정 {result['hops']}개 / "
+              f"설정 없음 {default_result['hops']}개")
+        assert result["settings"]["zhop_mode"] == "slingshot"
+        assert result["settings"]["travel_distance"] == 30.0
+    # travel_distance 30mm 기본 설정 → 기본값(1mm)보다 Z-홉 감소
+    assert all(r["hops"] < d["hops"] for r, d in zip(results, default_results))
+
+if __name__ == "__main__":
+    test_grid_parsing()
+    test_sweep_results()
+    test_base_settings_merge()
+    print("\n✨ sweep 검증 완료!")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 인쇄 시간 추정 검증 테스트
+
+🎯 추가 시간 추정 기능 검증:
+- SETTING_3 기계 한계값 파싱
+- 사다리꼴/삼각형 가속 프로파일 이동 시간
+- 일직선 구간 사이 속도 유지, Z-홉 M203 Z 속도 제한, Z-홉별 추가 시간 0 이상
+- Z-홉별/레이어별 추가 시간 집계
+- ;TIME: / ;TIME_ELAPSED: / M73 표시 보정
+"""
+
+import sys
+import os
+import math
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, DEFAULT_MACHINE_LIMITS
+
+def build_cura_job():
+    """SETTING_3와 시간 표시가 포함된 Cura 형식의 작은 작업 생성"""
+    header = "\n".join([
+        ";FLAVOR:Marlin",
+        ";TIME:600",
+        "M73 P0 R10",
+    ])
+    layers = []
+    for layer in range(3):
+        z = 0.2 * (layer + 1)
+        layers.append("\n".join([
+            f";LAYER:{layer}",
+            f"G1 X10 Y10 Z{z:.1f} E{layer * 10 + 5:.1f} F1500",
+            f"G1 F2700 E{layer * 10 + 4:.1f}",
+            "G0 F30000 X110 Y10",  # 기계 최대 XY 속도 travel: Z-홉 궤적도 같은 속도
+            f"G1 F1500 X110 Y20 E{layer * 10 + 6:.1f}",
+            f";TIME_ELAPSED:{(layer + 1) * 200:.6f}",
+        ]))
+    footer = ";SETTING_3 machine_max_feedrate_z = 10\\nmachine_max_acceleration_z = 50\\nmachine_acceleration = 2000"
+    return [header] + layers + [footer]
+
+def test_machine_limits_parsing():
+    """SETTING_3 기계 한계값 파싱 검증"""
+    print("🔧 SETTING_3 기계 한계값 파싱")
+    print("=" * 50)
+
+    zhop = SmartZHop()
+    limits = zhop.parse_machine_limits(build_cura_job())
+
+    for key, value in sorted(limits.items()):
+        print(f"   • {key}: {value}")
+
+    assert limits['max_feedrate_z'] == 10.0
+    assert limits['max_acceleration_z'] == 50.0
+    assert limits['acceleration'] == 2000.0
+    assert limits['max_feedrate_x'] == DEFAULT_MACHINE_LIMITS['max_feedrate_x']
+
+def test_trapezoid_move_time():
+    """사다리꼴/삼각형 가속 프로파일 이동 시간 검증"""
+    print("\n📐 이동 시간 추정 (정지→정지)")
+    print("=" * 50)
+
+    zhop = SmartZHop()
+    limits = dict(DEFAULT_MACHINE_LIMITS, acceleration=1000.0,
+                  max_acceleration_x=1000.0, max_acceleration_y=1000.0)
+
+    # 100mm @ 100mm/s, 1000mm/s²: 가속 0.1초 + 등속 + 감속 → L/v + v/a
+    long_move = zhop.estimate_move_time(100.0, 0.0, 0.0, 6000, limits)
+    # 1mm: 최고 속도 미도달 → 2*sqrt(L/a)
+    short_move = zhop.estimate_move_time(1.0, 0.0, 0.0, 6000, limits)
+    # 순수 Z 이동은 Z축 한계로 제한
+    z_move = zhop.estimate_move_time(0.0, 0.0, 1.0, 6000, limits)
+
+    print(f"   • 100mm XY: {long_move:.4f}초")
+    print(f"   • 1mm XY: {short_move:.4f}초")
+    print(f"   • 1mm Z: {z_move:.4f}초")
+
+    assert math.isclose(long_move, 1.0 + 0.1)
+    assert math.isclose(short_move, 2 * math.sqrt(1.0 / 1000.0))
+    assert z_move > short_move
+    assert zhop.estimate_move_time(0.0, 0.0, 0.0, 6000, limits) == 0.0
+
+def test_junction_and_hop_limits():
+    """구간 사이 접합 속도, Z-홉 Z 속도 제한, 추가 시간 하한 검증"""
+    print("\n🔗 접합 속도 / Z-홉 속도 제한")
+    print("=" * 50)
+
+    zhop = SmartZHop()
+    limits = dict(DEFAULT_MACHINE_LIMITS, acceleration=1000.0,
+                  max_acceleration_x=1000.0, max_acceleration_y=1000.0)
+
+    # 일직선으로 이어진 두 구간은 정지 없이 한 구간처럼 이동
+    single, _ = zhop.estimate_moves_time(0.0, 0.0, 0.0, [(100.0, 0.0, 0.0, 6000)], None, limits)
+    split, _ = zhop.estimate_moves_time(0.0, 0.0, 0.0, [(50.0, 0.0, 0.0, 6000), (100.0, 0.0, 0.0, None)],
+                                        None, limits)
+    # 거의 일직선(1°)이면 거의 감속 없음, 직각이면 코너에서 크게 감속
+    bend = 50.0 * math.tan(math.radians(1.0))
+    near, _ = zhop.estimate_moves_time(0.0, 0.0, 0.0, [(50.0, 0.0, 0.0, 6000), (100.0, bend, 0.0, None)],
+                                       None, limits)
+    corner, _ = zhop.estimate_moves_time(0.0, 0.0, 0.0, [(50.0, 0.0, 0.0, 6000), (50.0, 50.0, 0.0, None)],
+                                         None, limits)
+    stop_to_stop = 2 * zhop.estimate_move_time(50.0, 0.0, 0.0, 6000, limits)
+    print(f"   • 100mm 한 구간: {single:.4f}초 / 두 구간: {split:.4f}초 / 1° 꺾임: {near:.4f}초")
+    print(f"   • 직각: {corner:.4f}초 / 정지→정지 두 번: {stop_to_stop:.4f}초")
+    assert math.isclose(single, split)
+    assert near < single + 0.01
+    assert single < corner <= stop_to_stop
+
+    # M203으로 Z-홉 속도를 낮추면 (원본 Z 속도를 아는 경우) Z 이동이 느려짐
+    zhop.original_z_max_feedrate = 600.0
+    hop = [(0.0, 0.0, 2.0, None), (20.0, 0.0, 2.0, 9000), (20.0, 0.0, 0.0, None)]
+    fast = zhop.record_hop_time(0.0, 0.0, 0.0, ["G0 F9000 X20"], hop, None)
+    slow = zhop.record_hop_time(0.0, 0.0, 0.0, ["G0 F9000 X20"], hop, None, zhop_speed=2.0)
+    print(f"   • 기계 Z 속도: +{fast:.4f}초 / M203 Z 2mm/s: +{slow:.4f}초")
+    assert slow > fast + 1.0
+
+    # 원본보다 빠른 F의 궤적이어도 Z-홉 하나가 추정 시간을 줄이지 않음
+    faster = zhop.record_hop_time(0.0, 0.0, 0.0, ["G0 F600 X20"],
+                                  [(10.0, 0.0, 0.2, 30000), (20.0, 0.0, 0.0, None)], None)
+    print(f"   • 빠른 궤적: +{faster:.4f}초")
+    assert faster == 0.0
+    assert zhop.print_time_stats['hops'] == 3
+    assert all(delta >= 0 for delta in zhop.print_time_stats['per_layer'].values())
+
+def test_print_time_markers_updated():
+    """Z-홉 추가 시간이 시간 표시에 반영되는지 검증"""
+    print("\n⏱️ 시간 표시 보정")
+    print("=" * 50)
+
+    zhop = SmartZHop()
+    job = build_cura_job()
+    result = zhop.execute(job)
+    stats = zhop.print_time_stats
+
+    print(f"   • Z-홉 수: {stats['hops']}개")
+    print(f"   • 추가 시간: {stats['total_delta']:.3f}초")
+    print(f"   • 레이어별: {stats['per_layer']}")
+
+    assert stats['hops'] == 3
+    assert stats['total_delta'] > 0
+    assert sorted(stats['per_layer']) == [1, 2, 3]
+
+    expected_total = round(600 + stats['total_delta'])
+    assert f";TIME:{expected_total}" in result[0]
+
+    cumulative = 0.0
+    for layer_index in range(1, 4):
+        cumulative += stats['per_layer'][layer_index]
+        elapsed_line = result[layer_index].split("\n")[-1]
+        print(f"   • {elapsed_line}")
+        assert math.isclose(float(elapsed_line.split(":")[1]), layer_index * 200 + cumulative, abs_tol=1e-5)
+
+    # M73 남은 시간은 헤더 위치에서 전체 추가 시간만큼 증가
+    m73_line = [line for line in result[0].split("\n") if line.startswith("M73")][0]
+    print(f"   • {m73_line}")
+    assert m73_line == f"M73 P0 R{round(10 + stats['total_delta'] / 60)}"
+
+if __name__ == "__main__":
+    test_machine_limits_parsing()
+    test_trapezoid_move_time()
+    test_junction_and_hop_limits()
+    test_print_time_markers_updated()
+    print("\n✨ 인쇄 시간 추정 검증 완료!")
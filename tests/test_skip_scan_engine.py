@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 스킵 스캔 엔진 검증 테스트
+
+🎯 스킵 스캔 기능 검증:
+- 스마트/전통적 모드 모두 라인 단위 엔진과 바이트 단위로 동일한 출력 (리트랙션, Z 단독 이동, 썸네일 포함)
+- 분석 전용 모드 통계 동일
+- 라인 파싱 횟수가 전체 라인 수가 아닌 travel 수에 비례
+"""
+
+import sys
+import os
+import io
+import random
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, split_gcode_layers
+
+def build_job(seed, layer_count=30):
+    """썸네일, 리트랙션, Z 단독 이동, 연속 travel이 섞인 Cura 형식 G-code 생성"""
+    rng = random.Random(seed)
+    lines = [";FLAVOR:Marlin", ";TIME:1234", "; thumbnail begin 16x16 420"]
+    lines += ["; " + "".join(rng.choice("ABGXYZEF019+/") for _ in range(70)) for _ in range(6)]
+    lines += ["; thumbnail end", "M104 S200", "G92 E0", "G28"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines.append(f";LAYER:{layer}")
+        lines.append(f"G0 F300 Z{0.2 * (layer + 1):.2f}")
+        for _ in range(rng.randint(10, 40)):
+            choice = rng.random()
+            if choice < 0.45:
+                e_value += rng.uniform(0, 2)
+                lines.append(f"G1 X{rng.uniform(0, 200):.3f} Y{rng.uniform(0, 200):.3f} E{e_value:.5f}")
+            elif choice < 0.55:
+                e_value -= 6.5
+                lines.append(f"G1 F2700 E{e_value:.5f}")
+            elif choice < 0.6:
+                lines.append(";TYPE:WALL-OUTER")
+            elif choice < 0.63:
+                lines.append(";MESH:NONMESH")
+            elif choice < 0.66:
+                lines.append(f"G0 F300 Z{rng.uniform(0, 5):.2f}")
+            elif choice < 0.68:
+                lines.append("G92 E0")
+            else:
+                for _ in range(rng.choice([1, 1, 2, 3])):
+                    lines.append(f"G0 F9000 X{rng.uniform(0, 200):.3f} Y{rng.uniform(0, 200):.3f}")
+    return "\n".join(lines) + "\n"
+
+def run_engine(text, skip_scan, dry_run=False, settings=None):
+    """엔진을 선택해 실행하고 (출력, 분석 통계) 반환"""
+    processor = SmartZHop(settings)
+    processor.skip_scan = skip_scan
+    processor.dry_run = dry_run
+    with contextlib.redirect_stdout(io.StringIO()):
+        output = list(processor.iter_execute(split_gcode_layers(text)))
+    return output, processor.dry_run_stats
+
+def test_matches_line_engine():
+    """라인 단위 엔진과 출력/통계 동일성 검증"""
+    print("🔁 라인 단위 엔진과 비교")
+    print("=" * 50)
+
+    for seed in range(12):
+        text = build_job(seed)
+        for settings in ({}, {"slingshot_trajectory_mode": "angle"}, {"travel_distance": 30.0},
+                         {"zhop_mode": "traditional"}, {"zhop_mode": "traditional", "layer_change_zhop": False},
+                         {"zhop_mode": "traditional", "custom_layers": "1,3,5", "travel_distance": 30.0}):
+            for dry_run in (False, True):
+                expected = run_engine(text, False, dry_run, settings)
+                assert run_engine(text, True, dry_run, settings) == expected, (seed, settings, dry_run)
+
+    output, stats = run_engine(build_job(0), True)
+    print(f"   • 시퀀스: {stats['travel_sequences']}개, 출력 레이어: {len(output)}개")
+    assert "Smart Z-Hop" in "\n".join(output)
+    assert "; thumbnail end" in output[0]
+
+def test_parsing_proportional_to_travels():
+    """압출 라인은 파싱하지 않음 검증"""
+    print("\n🚀 파싱 횟수")
+    print("=" * 50)
+
+    lines = [";FLAVOR:Marlin"]
+    e_value = 0.0
+    for layer in range(20):
+        lines += [f";LAYER:{layer}", f"G0 F300 Z{0.2 * (layer + 1):.1f}"]
+        for travel in range(5):
+            for extrusion in range(200):
+                e_value += 0.1
+                lines.append(f"G1 X{extrusion % 50}.5 Y{travel * 10} E{e_value:.4f}")
+            lines.append(f"G0 F9000 X{travel * 20} Y80")
+    text = "\n".join(lines)
+
+    counts = {}
+    for mode, skip_scan in [(mode, skip_scan) for mode in ("slingshot", "traditional") for skip_scan in (False, True)]:
+        processor = SmartZHop({"zhop_mode": mode})
+        processor.skip_scan = skip_scan
+        processor.dry_run = True
+        original_get_value = processor.getValue
+        calls = [0]
+        def counting_get_value(line, key):
+            calls[0] += 1
+            return original_get_value(line, key)
+        processor.getValue = counting_get_value
+        list(processor.iter_execute(split_gcode_layers(text)))
+        counts[mode, skip_scan] = calls[0]
+
+    for mode in ("slingshot", "traditional"):
+        print(f"   • {mode}: 라인 수 {len(lines):,} / getValue 호출: 라인 단위 {counts[mode, False]:,}, "
+              f"스킵 스캔 {counts[mode, True]:,}")
+        assert counts[mode, True] * 20 < counts[mode, False]
+        assert counts[mode, True] < len(lines) / 10
+
+if __name__ == "__main__":
+    test_matches_line_engine()
+    test_parsing_proportional_to_travels()
+    print("\n✨ 스킵 스캔 엔진 검증 완료!")
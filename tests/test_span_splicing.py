@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 레이어 구간 이어 붙이기(span splicing) 검증 테스트
+
+🎯 레이어 재구성 검증:
+- 변경 없는 레이어는 원본 문자열 객체를 그대로 반환 (복사 없음)
+- 생성된 Z-홉 블록과 원본 구간 슬라이스 조합이 라인 단위 조립과 동일
+- strip_end가 rstrip()과 같은 결과
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, split_gcode_layers
+
+JOB = "\n".join([
+    ";FLAVOR:Marlin",
+    ";LAYER:0",
+    "G0 F300 Z0.2",
+    "G1 F1500 X10 Y10 E1",
+    "G1 X20 Y10 E2",
+    "G0 F9000 X80 Y60",
+    "G0 X90 Y70",
+    "G1 X95 Y70 E3",
+    ";LAYER:1",
+    "G1 X96 Y70 E4",
+    "G1 X97 Y71 E5",
+])
+
+def test_untouched_layers_are_not_copied():
+    """변경 없는 레이어의 객체 동일성 검증"""
+    print("🧵 변경 없는 레이어")
+    print("=" * 50)
+
+    for mode in ("slingshot", "traditional"):
+        for skip_scan in (True, False):
+            data = split_gcode_layers(JOB)
+            processor = SmartZHop({"zhop_mode": mode, "layer_change_zhop": False})
+            processor.skip_scan = skip_scan
+            output = list(processor.iter_execute(data))
+            print(f"   • {mode} (skip_scan={skip_scan}): {[layer is original for layer, original in zip(output, data)]}")
+
+            assert output[0] is data[0]
+            assert output[1] != data[1]
+            assert "Smart Z-Hop" in output[1]
+            assert output[2] is data[2]
+
+def test_splice_layer():
+    """구간 이어 붙이기와 rstrip 동등성 검증"""
+    print("\n✂️ splice_layer")
+    print("=" * 50)
+
+    processor = SmartZHop()
+    text = "A\nB\nC\n  \n"
+    assert processor.splice_layer(text, []) is text
+    assert processor.splice_layer(text, [(2, 3, "X\nY")]) == "A\nX\nY\nC\n  \n"
+    assert processor.splice_layer(text, [(2, 3, "X")], strip_end=True) == "A\nX\nC"
+    assert processor.splice_layer(text, [(6, 8, "  ")], strip_end=True) == "A\nB\nC"
+    assert processor.splice_layer("A\nB", [(2, 3, "Z \n")], strip_end=True) == "A\nZ"
+    assert processor.splice_layer(text, [], strip_end=True) == text.rstrip()
+
+    lines = JOB.split("\n")
+    replacements = []
+    start = 0
+    expected = []
+    for index, line in enumerate(lines):
+        if index % 3 == 0:
+            replacements.append((start, start + len(line), f"G0 Z{index};hop\n{line}"))
+            expected.append(f"G0 Z{index};hop\n{line}")
+        else:
+            expected.append(line)
+        start += len(line) + 1
+    print(f"   • 대체 구간: {len(replacements)}개")
+    assert processor.splice_layer(JOB, replacements) == "\n".join(expected)
+
+if __name__ == "__main__":
+    test_untouched_layers_are_not_copied()
+    test_splice_layer()
+    print("\n✨ 구간 이어 붙이기 검증 완료!")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 라인 스트림 처리 API(iter_process) 검증 테스트
+
+🎯 iter_process 기능 검증:
+- 출력이 iter_execute(split_gcode_layers(text))와 동일 (스마트/전통적 모드)
+- 파일처럼 줄바꿈이 붙은 라인 입력 지원
+- 입력을 끝까지 읽지 않고 출력 (버퍼는 현재 travel 시퀀스 크기로 제한)
+- 분석 전용(dry_run) 전통적 모드 스트림: 출력 없이 레이어 단위 처리와 같은 통계
+- 앞부분에 SETTING_3가 없으면 원본 Z 속도를 추측하지 않고 M203 설정/복원 생략
+"""
+
+import sys
+import os
+import io
+import itertools
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, iter_process, split_gcode_layers
+
+def build_job(layer_count=20):
+    """리트랙션과 연속 travel이 포함된 Cura 형식 G-code 생성"""
+    lines = [";FLAVOR:Marlin", f";LAYER_COUNT:{layer_count}"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines += [f";LAYER:{layer}", f"G0 F300 Z{0.2 * (layer + 1):.1f}"]
+        for travel in range(6):
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{10 + travel * 7} Y{20 + layer} E{e_value:.3f}")
+            if travel % 2:
+                e_value -= 5.0
+                lines.append(f"G1 F2700 E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{60 + travel * 9} Y{80 - travel}")
+            lines.append(f"G0 X{70 + travel * 9} Y{90 - travel}")
+            lines.append(";TYPE:WALL-OUTER")
+    lines.append("M107")
+    return "\n".join(lines)
+
+def test_stream_matches_layer_processing():
+    """레이어 단위 처리 결과와 동일성 검증"""
+    print("📡 스트림 처리 결과 비교")
+    print("=" * 50)
+
+    text = build_job()
+    for settings in ({}, {"travel_distance": 30.0}, {"zhop_mode": "traditional"},
+                     {"zhop_mode": "traditional", "top_bottom_only": True}):
+        # 스트림은 SETTING_3를 미리 읽지 못하므로 레이어 단위 처리와 같은 원본 Z 속도를 지정
+        stream_processor = SmartZHop(settings)
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = "\n".join(SmartZHop(settings).iter_execute(split_gcode_layers(text)))
+            stream_processor.parse_original_z_feedrate(split_gcode_layers(text))
+            streamed = list(stream_processor.iter_process_lines(io.StringIO(text)))
+        print(f"   • {settings}: {len(streamed)}줄")
+        assert "\n".join(streamed) == expected
+        assert all("\n" not in line for line in streamed)
+        assert any("Smart" in line for line in streamed)
+
+def test_stream_is_incremental():
+    """입력을 모두 읽기 전에 출력이 나오는지 검증"""
+    print("\n🔁 점진적 출력")
+    print("=" * 50)
+
+    consumed = [0]
+    def endless_job():
+        for line in itertools.cycle(build_job(4).split("\n")[2:-2]):
+            consumed[0] += 1
+            yield line
+
+    for mode in ("slingshot", "traditional"):
+        consumed[0] = 0
+        output = iter_process(endless_job(), {"zhop_mode": mode})
+        with contextlib.redirect_stdout(io.StringIO()):
+            first_lines = list(itertools.islice(output, 500))
+        print(f"   • {mode}: 출력 {len(first_lines)}줄 / 읽은 입력 {consumed[0]}줄")
+        assert len(first_lines) == 500
+        assert consumed[0] < 500 + 25  # 앞부분 20줄 + 현재 시퀀스만 선행
+
+def test_stream_dry_run():
+    """분석 전용 모드 전통적 스트림 검증 (출력 생략, 통계 동일)"""
+    print("\n🔍 분석 전용 스트림")
+    print("=" * 50)
+
+    text = build_job()
+    for settings in ({"zhop_mode": "traditional"}, {"zhop_mode": "traditional", "layer_change_zhop": False}):
+        layer_processor = SmartZHop(settings)
+        layer_processor.dry_run = True
+        stream_processor = SmartZHop(settings)
+        stream_processor.dry_run = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert list(layer_processor.iter_execute(split_gcode_layers(text))) == []
+            streamed = list(stream_processor.iter_process_lines(io.StringIO(text)))
+        stats = stream_processor.dry_run_stats
+        print(f"   • {settings}: 출력 {len(streamed)}줄, Z-홉 {stats['hops']}개, 레이어 변경 {stats['layer_change_hops']}개")
+        assert streamed == []
+        assert stats == layer_processor.dry_run_stats
+        assert stats['hops'] > 0
+
+def test_stream_without_setting_3():
+    """SETTING_3 없는 스트림의 Z-홉 속도 제어 검증"""
+    print("\n🚦 SETTING_3 없는 스트림")
+    print("=" * 50)
+
+    text = build_job(4)
+    for mode in ("slingshot", "traditional"):
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            streamed = list(iter_process(io.StringIO(text), {"zhop_mode": mode}))
+        print(f"   • {mode}: Z-홉 주석 {sum('Smart' in line for line in streamed)}개, "
+              f"M203 {sum(line.startswith('M203') for line in streamed)}개")
+        assert any("Smart" in line for line in streamed)
+        assert not any(line.startswith("M203") for line in streamed)
+        assert "⚠️ 원본 Z축 최대 속도를 알 수 없어 Z-홉 속도 제어(M203)를 생략합니다" in log.getvalue()
+
+    # 앞부분의 SETTING_3 또는 지정한 원본 속도로 복원
+    header_text = text.replace(";FLAVOR:Marlin", ";FLAVOR:Marlin\n;SETTING_3 machine_max_feedrate_z = 8", 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        from_header = list(iter_process(io.StringIO(header_text), {"zhop_mode": "traditional"}))
+        processor = SmartZHop({"zhop_mode": "traditional"})
+        processor.original_z_max_feedrate = 600
+        preset = list(processor.iter_process_lines(io.StringIO(text)))
+    assert any(line.startswith("M203 Z480 ; Restore") for line in from_header)
+    assert any(line.startswith("M203 Z600 ; Restore") for line in preset)
+    restores = sum(line.startswith("M203 Z600 ; Restore") for line in preset)
+    assert restores == sum("Set Z-axis speed limit" in line for line in preset) > 0
+
+if __name__ == "__main__":
+    test_stream_matches_layer_processing()
+    test_stream_is_incremental()
+    test_stream_dry_run()
+    test_stream_without_setting_3()
+    print("\n✨ 스트림 처리 API 검증 완료!")
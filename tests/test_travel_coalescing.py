@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop travel 시퀀스 병합 검증 테스트
+
+🎯 비이동 라인을 사이에 둔 travel 병합 검증:
+- ;TYPE: 주석, M204, G1 F, 리트랙션 G1 E 등이 끼어 있어도 travel 하나로 Z-홉 하나
+- 끼어 있던 라인은 궤적 안 원래 순서 위치에 그대로 출력
+- 시퀀스를 끊는 라인(G4 등)과 비교해 Z-홉 수와 추가 시간 감소
+- 스킵 스캔 / 라인 단위 / 스트림 결과 동일
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zhop_runner import run_zhop, run_stream
+
+CARRIED = [";TYPE:FILL", "M204 S3000", "G1 F2700 E{e}", "G1 F9000"]
+
+def build_job(separators=None, layer_count=4):
+    """travel 사이에 비이동 라인이 끼어 있는 Cura 형식 G-code 생성"""
+    separators = CARRIED if separators is None else separators
+    lines = [";FLAVOR:Marlin", f";LAYER_COUNT:{layer_count}"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines += [f";LAYER:{layer}", f"G0 F300 Z{0.2 * (layer + 1):.1f}"]
+        for chain in range(3):
+            for extrusion in range(4):
+                e_value += 0.4
+                lines.append(f"G1 F1500 X{10 + extrusion * 3} Y{10 + chain * 5} E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{40 + chain * 10} Y{30 + layer}")
+            lines += [separator.format(e=f"{e_value - 5:.3f}") for separator in separators]
+            lines.append(f"G0 X{80 + chain * 10} Y{60 + layer}")
+            lines.append(f"G1 F2700 E{e_value:.3f}")
+    return "\n".join(lines)
+
+def test_one_hop_per_chain():
+    """비이동 라인을 사이에 둔 travel이 Z-홉 하나가 되는지 검증"""
+    print("🔗 travel 병합")
+    print("=" * 50)
+
+    settings = {"layer_change_zhop": False}
+    output, processor, _ = run_zhop(settings, build_job())
+    layer = output[2].split("\n")  # ;LAYER:1
+    start = layer.index("G0 F300 Z0.4")
+    print("   " + "\n   ".join(line[:70] for line in layer[start + 5:start + 20]))
+
+    print(f"   • 시퀀스: {processor.dry_run_stats['travel_sequences']}개, "
+          f"Z-홉: {processor.print_time_stats['hops']}개")
+    assert processor.dry_run_stats['travel_sequences'] == 12
+    assert processor.print_time_stats['hops'] == 12
+    assert sum("Safe Descent" in line for line in layer) == 3
+
+    # 끼어 있던 라인은 상승 궤적 이후, 두 번째 travel 구간 이전 위치에
+    carried_at = [layer.index(line) for line in (";TYPE:FILL", "M204 S3000", "G1 F9000")]
+    hop_lines = [index for index, line in enumerate(layer) if "Smart" in line]
+    assert carried_at == sorted(carried_at)
+    assert hop_lines[0] < carried_at[0] and carried_at[-1] < hop_lines[-1]
+    assert not any(line.startswith("G0 ") for line in layer[start + 1:])
+
+def test_fewer_hops_and_less_time():
+    """시퀀스를 끊는 라인과 비교해 Z-홉 수와 추가 시간 감소 검증"""
+    print("\n⏱️ 끊긴 시퀀스와 비교")
+    print("=" * 50)
+
+    settings = {"layer_change_zhop": False}
+    _, merged, _ = run_zhop(settings, build_job())
+    _, split, _ = run_zhop(settings, build_job(CARRIED[:2] + ["G4 P0"] + CARRIED[2:]))
+    print(f"   • 병합: Z-홉 {merged.print_time_stats['hops']}개, {merged.print_time_stats['total_delta']:.3f}s")
+    print(f"   • 끊김(G4): Z-홉 {split.print_time_stats['hops']}개, {split.print_time_stats['total_delta']:.3f}s")
+    assert merged.print_time_stats['hops'] < split.print_time_stats['hops']
+    assert merged.print_time_stats['total_delta'] < split.print_time_stats['total_delta']
+
+def test_engines_match():
+    """스킵 스캔 / 라인 단위 / 스트림 동일성 검증"""
+    print("\n🔁 엔진 비교")
+    print("=" * 50)
+
+    for text in (build_job(), build_job(CARRIED[:2] + ["G4 P0"])):
+        for settings in ({}, {"travel_distance": 1000.0}, {"custom_layers": "2", "travel_zhop": True}):
+            expected, line_engine, _ = run_zhop(settings, text, skip_scan=False)
+            output, skip_engine, _ = run_zhop(settings, text)
+            streamed, _, _ = run_stream(settings, text)
+            print(f"   • {settings}: 시퀀스 {skip_engine.dry_run_stats['travel_sequences']}개")
+            assert output == expected
+            assert skip_engine.dry_run_stats == line_engine.dry_run_stats
+            assert streamed == "\n".join(expected)
+
+if __name__ == "__main__":
+    test_one_hop_per_chain()
+    test_fewer_hops_and_less_time()
+    test_engines_match()
+    print("\n✨ travel 시퀀스 병합 검증 완료!")
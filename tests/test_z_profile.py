@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop Z 프로파일 분석기(z-profile) 검증 테스트
+
+🎯 z-profile 기능 검증:
+- 파일 전체 스트리밍 분석 (라인 수 제한 없음)
+- 레이어별 Z 범위 / Z-홉 수 / Z-홉 높이 히스토그램
+- 이상 Z 변화 감지 (라인 번호 포함)
+- M82/M83 압출 모드와 G92 E 재설정 추적, 숫자가 아닌 ;LAYER: 마커 무시
+- JSON / CSV 보고서
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, ZProfileAnalyzer, run_z_profile_command, split_gcode_layers
+
+def build_job(layer_count=10):
+    """travel이 포함된 G-code 텍스트 생성"""
+    lines = [";FLAVOR:Marlin"]
+    e_value = 0.0
+    for layer in range(layer_count):
+        lines.append(f";LAYER:{layer}")
+        lines.append(f"G0 F9000 X10 Y10 Z{0.2 * (layer + 1):.1f}")
+        for travel in range(5):
+            e_value += 1.0
+            lines.append(f"G1 F1500 X{20 + travel} Y10 E{e_value:.3f}")
+            lines.append(f"G0 F9000 X{20 + travel} Y{40 + travel}")
+        e_value += 1.0
+        lines.append(f"G1 F1500 X30 Y30 E{e_value:.3f}")
+    return "\n".join(lines)
+
+def test_hops_counted_per_layer():
+    """처리된 G-code의 Z-홉 수/높이가 처리 통계와 일치하는지 검증"""
+    print("📈 Z-홉 통계")
+    print("=" * 50)
+
+    for mode in ("traditional", "slingshot"):
+        zhop = SmartZHop({"zhop_mode": mode, "zhop_height": 0.4, "layer_change_zhop": False})
+        processed = "\n".join(zhop.execute(split_gcode_layers(build_job())))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "processed.gcode")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(processed)
+            report = ZProfileAnalyzer().analyze_file(path)
+
+        print(f"   • {mode}: Z-홉 {report['hops']}개 (처리 통계 {zhop.print_time_stats['hops']}개), "
+              f"최대 {report['hop_height_max']:.3f}mm, {report['hop_histogram']}")
+        assert report["layers"] == 10
+        assert report["anomaly_count"] == 0
+        if mode == "traditional":
+            assert report["hops"] == zhop.print_time_stats["hops"] == 50
+            assert report["per_layer"]["3"]["hops"] == 5
+            assert abs(report["hop_height_max"] - 0.4) < 0.01
+        else:
+            # 레이어 시작 travel의 홉은 새 레이어 높이보다 낮아 Z-홉으로 보이지 않음
+            assert report["hops"] >= 50
+            assert 0 < report["hop_height_max"] <= 0.4
+        assert report["lines"] == processed.count("\n") + 1
+
+def test_anomalies_and_reports():
+    """이상 Z 변화 감지와 JSON/CSV 보고서 검증"""
+    print("\n⚠️ 이상 Z 변화 + 보고서")
+    print("=" * 50)
+
+    content = "\n".join([
+        ";LAYER:0",
+        "G0 X0 Y0 Z0.2",
+        "G1 X10 Y0 E1",
+        "G0 X20 Y0 Z12.0",   # 3: 큰 상승
+        "G0 X30 Y0 Z0.2",    # 4: 큰 하강
+        "G1 X40 Y0 E2",
+        ";LAYER:1",
+        "G0 Z0.4",
+        "G1 X50 Y0 Z0.1 E3",  # 9: 압출 중 이전 레이어보다 낮음
+    ])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "job.gcode")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        json_path = os.path.join(directory, "report.json")
+        csv_path = os.path.join(directory, "layers.csv")
+        report = run_z_profile_command([path, "--json", json_path, "--csv", csv_path])
+
+        with open(json_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        with open(csv_path, encoding="utf-8") as f:
+            csv_rows = f.read().strip().split("\n")
+
+        try:
+            run_z_profile_command([path, "--json", json_path, "--max-anomalies", "0"])
+            assert False, "이상 변화가 허용치를 넘으면 실패해야 함"
+        except SystemExit as e:
+            assert e.code == 1
+
+    print(f"   • 이상 변화: {[(a['line'], a['type']) for a in report['anomalies']]}")
+    assert [(a["line"], a["type"]) for a in report["anomalies"]] == [(4, "jump"), (5, "jump"), (9, "below_print_z")]
+    # 12mm까지 올라갔다가 0.2에서 압출 재개 + 0.4로 올라갔다가 0.1에서 압출
+    assert report["hops"] == 2
+    assert saved["anomaly_count"] == 3
+    assert csv_rows == ["layer,z_min,z_max,hops", "0,0.2,12.0,1", "1,0.1,0.4,1"]
+
+def test_extrusion_modes():
+    """상대 압출(M83) / G92 E 재설정 / 잘못된 레이어 마커 처리 검증"""
+    print("\n🧴 압출 모드 추적")
+    print("=" * 50)
+
+    def analyze(lines):
+        analyzer = ZProfileAnalyzer()
+        for line_number, line in enumerate(lines, 1):
+            analyzer.feed_line(line_number, line.encode("utf-8"))
+        return analyzer.report()
+
+    def hopped_layer(extrusions):
+        """압출 → 0.4mm 상승 travel → 하강 → 압출 반복 (E 값은 extrusions가 결정)"""
+        lines = ["G0 X0 Y0 Z0.2"]
+        for e_text in extrusions:
+            lines += [f"G1 X10 Y0 {e_text}", "G0 Z0.6", "G0 X30 Y30", "G0 Z0.2"]
+        return lines
+
+    relative = analyze(["M83", ";LAYER:0"] + hopped_layer(["E0.5"] * 4) + ["M82"])
+    absolute = analyze([";LAYER:0"] + hopped_layer(["E0.5"] * 4))
+    reset = analyze([";LAYER:0"] + hopped_layer(["E5"]) + ["G92 E0"] + hopped_layer(["E1", "E2"])[1:])
+    print(f"   • M83 상대 압출: Z-홉 {relative['hops']}개 / 같은 E 절대 압출: {absolute['hops']}개 / "
+          f"G92 E0 이후: {reset['hops']}개")
+    assert relative["hops"] == 3  # 양수 E는 매번 압출
+    assert absolute["hops"] == 0  # 절대 모드에서 같은 E는 압출 아님
+    assert reset["hops"] == 2     # G92 E0 이후 E1은 E5보다 작아도 압출
+    assert reset["anomaly_count"] == 0
+
+    broken = analyze([";LAYER:0", "G0 X0 Y0 Z0.2", ";LAYER:abc", "G1 X10 Y0 Z0.2 E1", ";LAYER:1", "G0 Z0.4"])
+    print(f"   • ;LAYER:abc 무시: 레이어 {sorted(broken['per_layer'])}")
+    assert sorted(broken["per_layer"]) == ["0", "1"]
+
+if __name__ == "__main__":
+    test_hops_counted_per_layer()
+    test_anomalies_and_reports()
+    test_extrusion_modes()
+    print("\n✨ z-profile 검증 완료!")
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smart Z-Hop 테스트 공용 실행 도우미
+
+🎯 기능별 테스트가 같은 방식으로 처리 결과를 얻도록 공유:
+- 설정 → SmartZHop 처리기 생성 (스킵 스캔 / 라인 단위 엔진, 분석 전용 모드 선택)
+- iter_execute 결과 레이어, 처리기(통계 확인용), 출력 로그 반환
+- 라인 스트림(iter_process_lines) 결과를 레이어 단위 처리와 같은 원본 Z 속도로 비교
+"""
+
+import sys
+import os
+import io
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SmartZHop import SmartZHop, split_gcode_layers
+
+def run_zhop(settings, gcode, skip_scan=True, dry_run=False):
+    """설정으로 처리 → (출력 레이어, 처리기, 출력 로그)
+
+    gcode는 G-code 텍스트 또는 이미 나눈 레이어 목록 (입력 레이어 객체와 비교할 때)
+    """
+    processor = SmartZHop(settings)
+    processor.skip_scan = skip_scan
+    processor.dry_run = dry_run
+    data = split_gcode_layers(gcode) if isinstance(gcode, str) else gcode
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        output = list(processor.iter_execute(data))
+    return output, processor, log.getvalue()
+
+def run_stream(settings, gcode):
+    """설정으로 라인 스트림 처리 → (출력 텍스트, 처리기, 출력 로그)
+
+    스트림은 파일 끝의 SETTING_3를 미리 읽지 못해 원본 Z 속도를 추측하지 않으므로,
+    레이어 단위 처리(run_zhop)와 비교할 때는 그쪽이 쓰는 원본 Z 속도를 미리 지정
+    """
+    processor = SmartZHop(settings)
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        processor.parse_original_z_feedrate(split_gcode_layers(gcode))
+        output = "\n".join(processor.iter_process_lines(io.StringIO(gcode)))
+    return output, processor, log.getvalue()